@@ -0,0 +1,103 @@
+"""Sender fingerprint allowlist for Calyx Mail (runtime/mailbox/allowlist.json)."""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+ALLOWLIST_FILENAME = "allowlist.json"
+
+
+class Allowlist:
+    """
+    Allowed sender fingerprints, cached in memory.
+    
+    The file is parsed once into a frozenset, so a membership check is
+    O(1) however large the allowlist. Every check lstat()s the file and
+    re-reads it only if its inode, mtime or size changed (save_allowlist()
+    replaces it by rename, which always changes the inode), so a sender
+    removed from the file is denied on the next check.
+    
+    The file must not be a symlink (SecurityError). A missing, unreadable
+    or malformed file is an empty allowlist (deny everyone when enforced).
+    
+    Thread-safe.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Path to allowlist.json
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: list[str] = []
+        self._fingerprints: frozenset[str] = frozenset()
+        # (st_dev, st_ino, st_mtime_ns, st_size) of the loaded file, None = missing
+        self._stamp: Optional[tuple[int, int, int, int]] = None
+        self._loaded = False
+    
+    def __contains__(self, fingerprint: object) -> bool:
+        return fingerprint in self.fingerprints
+    
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+    
+    @property
+    def fingerprints(self) -> frozenset[str]:
+        """Current allowed fingerprints (reloaded if the file changed)."""
+        with self._lock:
+            self._refresh()
+            return self._fingerprints
+    
+    @property
+    def entries(self) -> list[str]:
+        """Current allowlist in file order (a copy)."""
+        with self._lock:
+            self._refresh()
+            return list(self._entries)
+    
+    def _refresh(self) -> None:
+        from .mailbox import SecurityError
+        
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            st = None
+        if st is not None and stat.S_ISLNK(st.st_mode):
+            raise SecurityError(f"Symlinks not allowed: {self.path}")
+        stamp = None if st is None else (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._loaded and stamp == self._stamp:
+            return
+        
+        entries: list[str] = []
+        if st is not None:
+            try:
+                # Stamp the file actually read (it may be replaced after the lstat)
+                fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            except FileNotFoundError:
+                stamp = None
+            except OSError as e:
+                if os.path.islink(self.path):
+                    raise SecurityError(f"Symlinks not allowed: {self.path}") from e
+                stamp = None
+            else:
+                with os.fdopen(fd, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    stamp = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+                    try:
+                        data = json.loads(f.read())
+                    except (ValueError, OSError):
+                        data = None
+                if isinstance(data, list):
+                    entries = [fp for fp in data if isinstance(fp, str)]
+        
+        self._entries = entries
+        self._fingerprints = frozenset(entries)
+        self._stamp = stamp
+        self._loaded = True
@@ -0,0 +1,347 @@
+"""Envelope archive packs for Calyx Mail (runtime/mailbox/archive/<box>/pack_NNNNNN.pack)."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from .codec import HashedEnvelope, decode_envelope
+from .mailbox import _fsync_dirs
+
+
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_INDEX_FILENAME = "archive_index.db"
+
+# Pack layout: PACK_MAGIC, then records of
+#   sha256 (32 bytes) | length (8 bytes, big-endian) | canonical envelope bytes
+PACK_MAGIC = b"CXPACK1\n"
+_RECORD_HEADER_SIZE = 32 + 8
+
+# A new pack is started once the current one reaches this size
+PACK_MAX_BYTES = 256 * 1024 * 1024
+
+_PACK_RE = re.compile(r"pack_([0-9]{6})\.pack")
+
+_O_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+
+class ArchiveError(Exception):
+    """Raised when an archive pack or its index is inconsistent."""
+    pass
+
+
+class ArchiveStore:
+    """
+    Append-only pack files of archived envelopes, with an SQLite offset index.
+    
+    Each box (inbox, outbox, ...) has its own numbered packs; a pack holds
+    many envelopes as length-prefixed records, each carrying the SHA-256 of
+    its canonical bytes (the same content hash that names mailbox files).
+    Records are never rewritten. The index (archive_index.db) maps content
+    hash and msg_id to (pack, offset, length); it can be rebuilt from the
+    packs, which are the source of truth.
+    
+    add_many() holds the index write lock while it appends, so concurrent
+    archivers (threads or processes) never interleave records. The pack
+    (and, for a new pack, its directory entry) is fsynced before the index
+    commit, so an indexed record survives a crash. A crash
+    after a pack append but before the index commit leaves unindexed
+    records at the pack's tail; the next append starts a new pack instead
+    of writing after them, and rebuild_index() recovers every complete
+    record.
+    """
+    
+    def __init__(self, archive_dir: Path, pack_max_bytes: int = PACK_MAX_BYTES):
+        """
+        Args:
+            archive_dir: Archive directory (runtime/mailbox/archive)
+            pack_max_bytes: Size at which a new pack is started
+        """
+        self.archive_dir = archive_dir
+        self.pack_max_bytes = pack_max_bytes
+        if not self.archive_dir.exists():
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            _fsync_dirs([self.archive_dir.parent])
+        self.db_path = archive_dir / ARCHIVE_INDEX_FILENAME
+        conn = self._connect()
+        conn.close()
+    
+    def add_many(self, box: str, envelopes: Iterable[HashedEnvelope]) -> list[str]:
+        """
+        Append envelopes to the box's current pack (one write and one fsync).
+        
+        Args:
+            box: Box the envelopes are archived from (e.g. "inbox")
+            envelopes: Hashed envelopes (already archived hashes are skipped)
+        
+        Returns:
+            Content hashes now in the archive, in input order (including
+            ones that were already archived)
+        """
+        envelopes = list(envelopes)
+        if not envelopes:
+            return []
+        box_dir = self.archive_dir / box
+        if not box_dir.exists():
+            box_dir.mkdir(exist_ok=True)
+            _fsync_dirs([self.archive_dir])
+        
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                archived = _existing(conn, [hashed.content_hash for hashed in envelopes])
+                pending: dict[str, HashedEnvelope] = {}
+                for hashed in envelopes:
+                    if hashed.content_hash not in archived:
+                        pending.setdefault(hashed.content_hash, hashed)
+                if pending:
+                    self._append(conn, box, box_dir, list(pending.values()))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return [hashed.content_hash for hashed in envelopes]
+    
+    def _append(self, conn: sqlite3.Connection, box: str, box_dir: Path, envelopes: list[HashedEnvelope]) -> None:
+        pack, offset = self._current_pack(conn, box, box_dir)
+        
+        chunks = []
+        rows = []
+        archived_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        new_pack = offset == 0
+        if new_pack:
+            chunks.append(PACK_MAGIC)
+            offset = len(PACK_MAGIC)
+        for hashed in envelopes:
+            data = hashed.canonical_bytes
+            chunks.append(bytes.fromhex(hashed.content_hash))
+            chunks.append(len(data).to_bytes(8, 'big'))
+            chunks.append(data)
+            offset += _RECORD_HEADER_SIZE
+            header = hashed.header
+            rows.append((
+                hashed.content_hash,
+                box,
+                header.get("msg_id", ""),
+                header.get("timestamp", ""),
+                pack,
+                offset,
+                len(data),
+                archived_at,
+            ))
+            offset += len(data)
+        
+        fd = os.open(str(box_dir / pack), os.O_WRONLY | os.O_APPEND | os.O_CREAT | _O_NOFOLLOW, 0o600)
+        try:
+            view = memoryview(b"".join(chunks))
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if new_pack:
+            _fsync_dirs([box_dir])
+        conn.executemany(_INSERT_SQL, rows)
+    
+    def _current_pack(self, conn: sqlite3.Connection, box: str, box_dir: Path) -> tuple[str, int]:
+        """(pack name, current size) to append to: the last pack if it is intact and not full."""
+        packs = _list_packs(box_dir)
+        if packs:
+            name = packs[-1]
+            size = (box_dir / name).stat().st_size
+            row = conn.execute(
+                "SELECT MAX(offset + length) FROM archived WHERE box = ? AND pack = ?",
+                (box, name),
+            ).fetchone()
+            indexed_end = row[0] if row[0] is not None else len(PACK_MAGIC)
+            if size == indexed_end and size < self.pack_max_bytes:
+                return name, size
+            number = int(_PACK_RE.fullmatch(name).group(1)) + 1
+        else:
+            number = 1
+        return f"pack_{number:06d}.pack", 0
+    
+    def get(self, content_hash: str) -> Optional[bytes]:
+        """
+        Canonical bytes of an archived envelope.
+        
+        Args:
+            content_hash: 64-char hex content hash
+        
+        Returns:
+            Envelope bytes, or None if not archived
+        
+        Raises:
+            ArchiveError: If the record is missing or does not match its hash
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT box, pack, offset, length FROM archived WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        box, pack, offset, length = row
+        
+        try:
+            fd = os.open(str(self.archive_dir / box / pack), os.O_RDONLY | _O_NOFOLLOW)
+        except FileNotFoundError as e:
+            raise ArchiveError(f"Archive pack missing: {box}/{pack}") from e
+        try:
+            data = os.pread(fd, length, offset)
+        finally:
+            os.close(fd)
+        if len(data) != length or hashlib.sha256(data).hexdigest() != content_hash:
+            raise ArchiveError(f"Archived envelope {content_hash} does not match its hash ({box}/{pack}@{offset})")
+        return data
+    
+    def load(self, content_hash: str) -> Optional[dict[str, Any]]:
+        """
+        Archived envelope by content hash.
+        
+        Returns:
+            Envelope dict, or None if not archived
+        """
+        data = self.get(content_hash)
+        return None if data is None else decode_envelope(data)
+    
+    def find_msg_id(self, msg_id: str) -> list[str]:
+        """Content hashes of archived envelopes with this msg_id (oldest archived first)."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT content_hash FROM archived WHERE msg_id = ? ORDER BY archived_at, content_hash",
+                (msg_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+    
+    def __contains__(self, content_hash: str) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT 1 FROM archived WHERE content_hash = ?", (content_hash,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    
+    def count(self) -> int:
+        """Number of archived envelopes."""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def rebuild_index(self) -> int:
+        """
+        Rebuild the index from every complete, hash-valid record in the packs.
+        
+        Returns:
+            Number of archived envelopes
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM archived")
+                for box_dir in sorted(p for p in self.archive_dir.iterdir() if p.is_dir() and not p.is_symlink()):
+                    for pack in _list_packs(box_dir):
+                        conn.executemany(_INSERT_SQL, _scan_pack(box_dir.name, box_dir / pack))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return conn.execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archived (
+                    content_hash TEXT PRIMARY KEY,
+                    box TEXT NOT NULL,
+                    msg_id TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    pack TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    archived_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_msg_id ON archived(msg_id)")
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+
+def get_archive(mailbox_dir: Path) -> ArchiveStore:
+    """Archive store under a mailbox directory (runtime/mailbox/archive)."""
+    return ArchiveStore(mailbox_dir / ARCHIVE_DIRNAME)
+
+
+def _list_packs(box_dir: Path) -> list[str]:
+    """Pack file names in a box's archive directory, oldest first."""
+    try:
+        return sorted(entry.name for entry in os.scandir(box_dir) if _PACK_RE.fullmatch(entry.name))
+    except FileNotFoundError:
+        return []
+
+
+def _existing(conn: sqlite3.Connection, content_hashes: list[str]) -> set[str]:
+    found = set()
+    for start in range(0, len(content_hashes), 500):
+        batch = content_hashes[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        found.update(row[0] for row in conn.execute(
+            f"SELECT content_hash FROM archived WHERE content_hash IN ({placeholders})", batch
+        ))
+    return found
+
+
+def _scan_pack(box: str, path: Path) -> Iterator[tuple]:
+    """Index rows for the complete, hash-valid records of a pack (a torn tail ends the scan)."""
+    data = path.read_bytes()
+    if not data.startswith(PACK_MAGIC):
+        raise ArchiveError(f"Not an archive pack: {path}")
+    mtime = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    offset = len(PACK_MAGIC)
+    while offset + _RECORD_HEADER_SIZE <= len(data):
+        digest = data[offset:offset + 32].hex()
+        length = int.from_bytes(data[offset + 32:offset + _RECORD_HEADER_SIZE], 'big')
+        start = offset + _RECORD_HEADER_SIZE
+        record = data[start:start + length]
+        if len(record) != length:
+            break
+        offset = start + length
+        if hashlib.sha256(record).hexdigest() != digest:
+            continue
+        try:
+            header = decode_envelope(record).get("header", {})
+        except Exception:
+            continue
+        yield (digest, box, header.get("msg_id", ""), header.get("timestamp", ""), path.name, start, length, mtime)
+
+
+# Duplicate records (e.g. re-archived after a crash) keep the first indexed location
+_INSERT_SQL = """
+    INSERT OR IGNORE INTO archived
+    (content_hash, box, msg_id, timestamp, pack, offset, length, archived_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
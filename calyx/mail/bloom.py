@@ -0,0 +1,93 @@
+"""Bloom filter used as an in-memory negative cache (replay state lookups)."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+
+
+_MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+    
+    "Not present" answers are exact; "maybe present" answers are wrong with
+    probability close to the configured false-positive rate while the number
+    of keys stays within capacity. Bit positions are derived by double
+    hashing from 128 key bits: 64-char hex keys (SHA-256 replay keys) are
+    already uniform and are used directly; other keys are hashed with BLAKE2b.
+    """
+    
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        """
+        Args:
+            capacity: Expected number of keys
+            fp_rate: Target false-positive rate at capacity (0 < fp_rate < 1)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _hashes(self, key: str) -> tuple[int, int]:
+        """Two independent 64-bit hashes of key."""
+        value = None
+        if len(key) == 64:
+            try:
+                value = int(key[:32], 16)
+            except ValueError:
+                pass
+        if value is None:
+            value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest(), 'little')
+        return value & _MASK64, (value >> 64) | 1
+    
+    def add(self, key: str) -> bool:
+        """
+        Add key to the filter.
+        
+        Returns:
+            False if all of the key's bits were already set (key already
+            added, or indistinguishable from one); such keys are not counted
+        """
+        bits = self._bits
+        h1, h2 = self._hashes(key)
+        m = self.num_bits
+        added = False
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+            h1 += h2
+        if added:
+            self.count += 1
+        return added
+    
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        h1, h2 = self._hashes(key)
+        m = self.num_bits
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h1 += h2
+        return True
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self._bits)
+    
+    def estimated_fp_rate(self) -> float:
+        """Expected false-positive rate for the number of keys added so far."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
@@ -0,0 +1,276 @@
+"""Deterministic binary encoding (CBOR subset) for Calyx Mail Protocol Layer v0.2."""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Any, Callable
+
+
+class CBORError(ValueError):
+    """Raised when binary data is malformed or not in canonical form."""
+    pass
+
+
+# Major types (RFC 8949, section 3.1)
+MAJOR_UINT = 0
+MAJOR_NEGINT = 1
+MAJOR_BYTES = 2
+MAJOR_TEXT = 3
+MAJOR_ARRAY = 4
+MAJOR_MAP = 5
+
+# Simple values (major type 7)
+_FALSE = 0xF4
+_TRUE = 0xF5
+_NULL = 0xF6
+
+_UINT64_MAX = 2 ** 64 - 1
+
+
+def encode_head(major: int, argument: int) -> bytes:
+    """
+    Encode an item head in shortest form (core deterministic encoding).
+    
+    Args:
+        major: Major type (0-7)
+        argument: Length or integer value (0 <= argument < 2**64)
+    
+    Returns:
+        1, 2, 3, 5, or 9 head bytes
+    """
+    mt = major << 5
+    if argument < 24:
+        return bytes((mt | argument,))
+    if argument < 0x100:
+        return bytes((mt | 24, argument))
+    if argument < 0x10000:
+        return bytes((mt | 25,)) + argument.to_bytes(2, 'big')
+    if argument < 0x100000000:
+        return bytes((mt | 26,)) + argument.to_bytes(4, 'big')
+    return bytes((mt | 27,)) + argument.to_bytes(8, 'big')
+
+
+def encode(obj: Any) -> bytes:
+    """
+    Deterministic binary encoding: SINGLE SOURCE OF TRUTH for v0.2 canonical bytes.
+    
+    Encoding rules (RFC 8949 core deterministic encoding, restricted subset):
+    - Integer arguments and lengths in shortest form
+    - Definite lengths only
+    - Map keys are text strings, sorted bytewise by their encoded form
+      (the length head makes shorter keys sort first)
+    - Text strings UTF-8, NFC normalized
+    - Byte strings raw (bytes, bytearray, or memoryview)
+    - Integers limited to the 64-bit CBOR range
+    - No floats, tags, or undefined
+    
+    Args:
+        obj: Object to encode (dict, list, bytes, or primitive)
+    
+    Returns:
+        Canonical binary bytes
+    
+    Raises:
+        ValueError: If disallowed types are present
+        TypeError: If an object of an unsupported type is present
+    """
+    out = bytearray()
+    _encode_into(obj, out.extend)
+    return bytes(out)
+
+
+def _encode_text(text: str) -> bytes:
+    """Encode a text string item (NFC normalized, UTF-8)."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFC', text)
+    data = text.encode('utf-8')
+    return encode_head(MAJOR_TEXT, len(data)) + data
+
+
+def _encode_into(obj: Any, emit: Callable[[bytes], None]) -> None:
+    """Emit canonical binary items for obj, validating types as it goes."""
+    if isinstance(obj, str):
+        emit(_encode_text(obj))
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        view = memoryview(obj).cast('B')
+        emit(encode_head(MAJOR_BYTES, len(view)))
+        emit(view)
+    elif obj is None:
+        emit(bytes((_NULL,)))
+    elif obj is True:
+        emit(bytes((_TRUE,)))
+    elif obj is False:
+        emit(bytes((_FALSE,)))
+    elif isinstance(obj, int):
+        if obj >= 0:
+            if obj > _UINT64_MAX:
+                raise ValueError("Integers outside 64-bit range disallowed")
+            emit(encode_head(MAJOR_UINT, obj))
+        else:
+            if -1 - obj > _UINT64_MAX:
+                raise ValueError("Integers outside 64-bit range disallowed")
+            emit(encode_head(MAJOR_NEGINT, -1 - obj))
+    elif isinstance(obj, dict):
+        encoded_keys = []
+        for k in obj:
+            if not isinstance(k, str):
+                raise ValueError(f"Dict keys must be strings, got {type(k)}")
+            encoded_keys.append((_encode_text(k), k))
+        encoded_keys.sort()
+        for i in range(1, len(encoded_keys)):
+            if encoded_keys[i][0] == encoded_keys[i - 1][0]:
+                raise ValueError(f"Duplicate key after normalization: {encoded_keys[i][1]!r}")
+        emit(encode_head(MAJOR_MAP, len(encoded_keys)))
+        for encoded_key, k in encoded_keys:
+            emit(encoded_key)
+            _encode_into(obj[k], emit)
+    elif isinstance(obj, list):
+        emit(encode_head(MAJOR_ARRAY, len(obj)))
+        for item in obj:
+            _encode_into(item, emit)
+    elif isinstance(obj, float):
+        raise ValueError("Floats disallowed in canonical encoding (use int with scaling)")
+    elif isinstance(obj, set):
+        raise ValueError("Sets disallowed (use sorted list)")
+    elif isinstance(obj, tuple):
+        raise ValueError("Tuples disallowed (use list)")
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not CBOR serializable")
+
+
+class _Decoder:
+    """Strict decoder: accepts only the canonical form produced by encode()."""
+    
+    def __init__(self, data: bytes | bytearray | memoryview, zero_copy: bool):
+        self.view = memoryview(data).cast('B')
+        self.pos = 0
+        self.zero_copy = zero_copy
+    
+    def _take(self, n: int) -> memoryview:
+        end = self.pos + n
+        if end > len(self.view):
+            raise CBORError("Unexpected end of data")
+        chunk = self.view[self.pos:end]
+        self.pos = end
+        return chunk
+    
+    def read_head(self) -> tuple[int, int]:
+        """
+        Read an item head.
+        
+        Returns:
+            (major, argument) tuple; simple values are returned as (7, byte)
+        """
+        initial = self._take(1)[0]
+        major = initial >> 5
+        info = initial & 0x1F
+        if major == 7:
+            if initial in (_FALSE, _TRUE, _NULL):
+                return 7, initial
+            raise CBORError(f"Unsupported simple value or float: 0x{initial:02x}")
+        if major == 6:
+            raise CBORError("Tags disallowed")
+        if info < 24:
+            return major, info
+        if info == 24:
+            argument = self._take(1)[0]
+            minimum = 24
+        elif info == 25:
+            argument = int.from_bytes(self._take(2), 'big')
+            minimum = 0x100
+        elif info == 26:
+            argument = int.from_bytes(self._take(4), 'big')
+            minimum = 0x10000
+        elif info == 27:
+            argument = int.from_bytes(self._take(8), 'big')
+            minimum = 0x100000000
+        else:
+            raise CBORError("Indefinite lengths disallowed")
+        if argument < minimum:
+            raise CBORError("Non-shortest integer or length encoding")
+        return major, argument
+    
+    def read_text(self, length: int) -> str:
+        """Read a text string body of length bytes (strict UTF-8, NFC)."""
+        try:
+            text = str(self._take(length), 'utf-8')
+        except UnicodeDecodeError as e:
+            raise CBORError(f"Invalid UTF-8 in text string: {e}") from e
+        if not text.isascii() and not unicodedata.is_normalized('NFC', text):
+            raise CBORError("Text string not NFC normalized")
+        return text
+    
+    def read_bytes(self, length: int) -> bytes | memoryview:
+        """Read a byte string body (memoryview slice when zero_copy)."""
+        chunk = self._take(length)
+        return chunk if self.zero_copy else bytes(chunk)
+    
+    def read_item(self) -> Any:
+        """Read one complete item."""
+        major, argument = self.read_head()
+        if major == MAJOR_UINT:
+            return argument
+        if major == MAJOR_NEGINT:
+            return -1 - argument
+        if major == MAJOR_BYTES:
+            return self.read_bytes(argument)
+        if major == MAJOR_TEXT:
+            return self.read_text(argument)
+        if major == MAJOR_ARRAY:
+            return [self.read_item() for _ in range(argument)]
+        if major == MAJOR_MAP:
+            return self.read_map_body(argument)
+        # Simple values
+        return {_FALSE: False, _TRUE: True, _NULL: None}[argument]
+    
+    def read_key(self) -> tuple[str, bytes]:
+        """Read a map key; returns (key, encoded key bytes) for order checking."""
+        start = self.pos
+        major, argument = self.read_head()
+        if major != MAJOR_TEXT:
+            raise CBORError("Map keys must be text strings")
+        key = self.read_text(argument)
+        return key, bytes(self.view[start:self.pos])
+    
+    def read_map_body(self, count: int) -> dict[str, Any]:
+        """Read count key/value pairs, enforcing canonical key order."""
+        result: dict[str, Any] = {}
+        previous: bytes | None = None
+        for _ in range(count):
+            key, encoded_key = self.read_key()
+            if previous is not None and encoded_key <= previous:
+                raise CBORError("Map keys not in canonical order (or duplicated)")
+            previous = encoded_key
+            result[key] = self.read_item()
+        return result
+
+
+def decode(data: bytes | bytearray | memoryview, zero_copy: bool = False) -> Any:
+    """
+    Decode canonical binary bytes.
+    
+    Rejects anything encode() would not produce (non-shortest heads,
+    indefinite lengths, unsorted or duplicate keys, floats, tags, non-NFC
+    text, trailing bytes), so decode() followed by encode() is the identity.
+    
+    Args:
+        data: Canonical binary bytes
+        zero_copy: If True, byte strings are returned as memoryview slices of
+                   data instead of copies (data must stay alive and unchanged)
+    
+    Returns:
+        Decoded object
+    
+    Raises:
+        CBORError: If data is malformed or not canonical
+    """
+    decoder = _Decoder(data, zero_copy)
+    obj = decoder.read_item()
+    if decoder.pos != len(decoder.view):
+        raise CBORError("Trailing bytes after top-level item")
+    return obj
+
+
+def is_map_start(first_byte: int) -> bool:
+    """Return True if first_byte can start a definite-length map (v0.2 envelope)."""
+    return first_byte >> 5 == MAJOR_MAP and (first_byte & 0x1F) < 28
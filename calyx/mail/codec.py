@@ -5,10 +5,16 @@ from __future__ import annotations
 import base64
 import hashlib
 import json
+import math
 import unicodedata
-from typing import Any
+from json.encoder import encode_basestring as _encode_json_string
+from typing import Any, Callable
 
-from .crypto import DecryptionError
+from . import cbor
+
+
+# Protocol version using the deterministic binary encoding (see spec/mail/binary_encoding_v0.2.md)
+BINARY_PROTOCOL_VERSION = "0.2"
 
 
 class EncodingError(Exception):
@@ -28,7 +34,6 @@ def validate_canonical_types(obj: Any) -> None:
     Raises:
         ValueError: If disallowed types are present
     """
-    import math
     if isinstance(obj, float):
         # Check for NaN/Infinity
         if math.isnan(obj) or math.isinf(obj):
@@ -61,10 +66,20 @@ def canonical_encode(obj: Any) -> bytes:
     Encoding rules (deterministic):
     - UTF-8 encoding
     - NFC Unicode normalization
-    - Sorted keys (recursive, depth-first, alphabetical) via json.dumps(sort_keys=True)
+    - Sorted keys (recursive, depth-first, alphabetical)
     - No whitespace (separators=(',', ':'))
     - No floats (rejected)
     
+    The encoder is single-pass: type validation happens while tokens are
+    emitted, and NFC normalization is applied per string token, skipping
+    pure-ASCII strings (base64 ciphertext, signatures, fingerprints).
+    Output is byte-identical to
+    ``NFC(json.dumps(obj, sort_keys=True, separators=(',', ':'),
+    ensure_ascii=False, allow_nan=False)).encode('utf-8')``: every string
+    token starts with '"', and no character composes backwards with an
+    ASCII character, so NFC over the whole document equals NFC over each
+    string token.
+    
     Args:
         obj: Object to encode (dict, list, or primitive)
         
@@ -73,6 +88,7 @@ def canonical_encode(obj: Any) -> bytes:
         
     Raises:
         ValueError: If disallowed types are present
+        TypeError: If an object of an unsupported type is present
         UnicodeEncodeError: If invalid UTF-8
         
     Note:
@@ -80,27 +96,76 @@ def canonical_encode(obj: Any) -> bytes:
         All envelope hashing, signature computation, and replay key generation
         use this function to ensure determinism.
     """
-    # Type validation
-    validate_canonical_types(obj)
-    
-    # Canonical JSON encoding (single deterministic method)
-    # json.dumps with sort_keys=True ensures alphabetical key ordering
-    canonical_json_str = json.dumps(
-        obj,
-        sort_keys=True,        # Alphabetical key sorting (deterministic)
-        separators=(',', ':'), # No whitespace (deterministic)
-        ensure_ascii=False,    # Allow UTF-8 (will normalize)
-        allow_nan=False,       # Reject NaN/Infinity
-    )
-    
-    # Unicode normalization (NFC) - ensures canonical form
-    normalized = unicodedata.normalize('NFC', canonical_json_str)
+    parts: list[str] = []
+    _emit_canonical(obj, parts.append)
     
     # UTF-8 encoding (final deterministic bytes)
-    return normalized.encode('utf-8')
+    return ''.join(parts).encode('utf-8')
 
 
-def build_signed_payload(protocol_version: str, header: dict, ciphertext: str) -> dict:
+def _emit_canonical(obj: Any, emit: Callable[[str], None]) -> None:
+    """
+    Emit canonical JSON tokens for obj, validating types as it goes.
+    
+    Mirrors validate_canonical_types() (same errors, same messages) and the
+    token output of json.dumps(sort_keys=True, separators=(',', ':'),
+    ensure_ascii=False) followed by NFC normalization.
+    """
+    if isinstance(obj, str):
+        token = _encode_json_string(obj)
+        if not obj.isascii():
+            # Escaped token is normalized as a whole (escapes such as "\n"
+            # followed by a combining mark compose exactly as before)
+            token = unicodedata.normalize('NFC', token)
+        emit(token)
+    elif obj is None:
+        emit('null')
+    elif obj is True:
+        emit('true')
+    elif obj is False:
+        emit('false')
+    elif isinstance(obj, int):
+        emit(int.__repr__(obj))
+    elif isinstance(obj, dict):
+        for k in obj:
+            if not isinstance(k, str):
+                raise ValueError(f"Dict keys must be strings, got {type(k)}")
+        if not obj:
+            emit('{}')
+            return
+        separator = '{'
+        for k in sorted(obj):
+            emit(separator)
+            _emit_canonical(k, emit)
+            emit(':')
+            _emit_canonical(obj[k], emit)
+            separator = ','
+        emit('}')
+    elif isinstance(obj, list):
+        if not obj:
+            emit('[]')
+            return
+        separator = '['
+        for item in obj:
+            emit(separator)
+            _emit_canonical(item, emit)
+            separator = ','
+        emit(']')
+    elif isinstance(obj, float):
+        if math.isnan(obj) or math.isinf(obj):
+            raise ValueError("NaN/Infinity disallowed")
+        raise ValueError("Floats disallowed in canonical encoding (use int with scaling)")
+    elif isinstance(obj, set):
+        raise ValueError("Sets disallowed (use sorted list)")
+    elif isinstance(obj, tuple):
+        raise ValueError("Tuples disallowed (use list)")
+    elif isinstance(obj, bytes):
+        raise ValueError("Bytes disallowed (use base64-encoded string)")
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def build_signed_payload(protocol_version: str, header: dict, ciphertext: str | bytes) -> dict:
     """
     Build signed payload with explicit construction order.
     
@@ -112,7 +177,7 @@ def build_signed_payload(protocol_version: str, header: dict, ciphertext: str) -
     Args:
         protocol_version: Protocol version string (e.g., "0.1")
         header: Header dict (will be sorted internally)
-        ciphertext: Base64-encoded ciphertext
+        ciphertext: Base64-encoded ciphertext (v0.1) or raw ciphertext bytes (v0.2)
         
     Returns:
         Dict with explicit key order: protocol_version, header, ciphertext
@@ -130,6 +195,24 @@ def build_signed_payload(protocol_version: str, header: dict, ciphertext: str) -
     return payload
 
 
+def encode_signed_payload(payload: dict[str, Any]) -> bytes:
+    """
+    Encode signed payload to the canonical bytes covered by the signature.
+    
+    v0.2 payloads use the binary canonical encoding (cbor.encode); v0.1 and
+    legacy v0 payloads use canonical JSON (canonical_encode).
+    
+    Args:
+        payload: Signed payload dict (from build_signed_payload)
+        
+    Returns:
+        Canonical bytes to sign or verify
+    """
+    if payload.get("protocol_version") == BINARY_PROTOCOL_VERSION:
+        return cbor.encode(payload)
+    return canonical_encode(payload)
+
+
 def detect_version(envelope: dict[str, Any]) -> str:
     """
     Detect protocol version from envelope.
@@ -138,12 +221,12 @@ def detect_version(envelope: dict[str, Any]) -> str:
         envelope: Envelope dict
         
     Returns:
-        Protocol version string ("0.1" or "0.0" for legacy v0)
+        Protocol version string ("0.1", "0.2", or "0.0" for legacy v0)
     """
     if "protocol_version" in envelope:
         version = envelope["protocol_version"]
-        if version == "0.1":
-            return "0.1"
+        if version in ("0.1", BINARY_PROTOCOL_VERSION):
+            return version
         else:
             raise VersionError(f"Unknown protocol version: {version}")
     else:
@@ -260,24 +343,197 @@ def decode_envelope_v0(data: bytes) -> dict[str, Any]:
         raise EncodingError(f"Failed to decode v0 envelope: {e}") from e
 
 
-def compute_envelope_hash(envelope: dict[str, Any]) -> str:
+def encode_envelope_v0_2(envelope: dict[str, Any]) -> bytes:
     """
-    Compute full SHA256 hash of canonical envelope.
+    Encode envelope to canonical binary bytes (v0.2).
+    
+    Ciphertext and signature are raw byte strings (bytes, bytearray, or
+    memoryview); no base64 step is involved.
     
     Args:
-        envelope: Envelope dict
+        envelope: Envelope dict with protocol_version="0.2"
         
     Returns:
-        64-character hexadecimal string (full SHA256, no truncation)
+        Canonical binary bytes
+        
+    Raises:
+        VersionError: If protocol_version is not "0.2"
+        EncodingError: If encoding fails
+    """
+    version = detect_version(envelope)
+    if version != BINARY_PROTOCOL_VERSION:
+        raise VersionError(f"Expected protocol_version='{BINARY_PROTOCOL_VERSION}', got '{version}'")
+    
+    try:
+        return cbor.encode(envelope)
+    except (ValueError, TypeError) as e:
+        raise EncodingError(f"Failed to encode v0.2 envelope: {e}") from e
+
+
+def decode_envelope_v0_2(data: bytes | bytearray | memoryview, zero_copy: bool = False) -> dict[str, Any]:
+    """
+    Decode canonical binary bytes to envelope dict (v0.2).
+    
+    Args:
+        data: Canonical binary bytes
+        zero_copy: If True, ciphertext and signature are memoryview slices of
+                   data (no copy); data must outlive the returned envelope
+        
+    Returns:
+        Envelope dict
+        
+    Raises:
+        EncodingError: If decoding fails or data is not canonical
+        VersionError: If protocol_version is not "0.2"
+    """
+    try:
+        envelope = cbor.decode(data, zero_copy=zero_copy)
+    except cbor.CBORError as e:
+        raise EncodingError(f"Failed to decode v0.2 envelope: {e}") from e
+    
+    if not isinstance(envelope, dict):
+        raise EncodingError("Failed to decode v0.2 envelope: top-level item is not a map")
+    
+    version = detect_version(envelope)
+    if version != BINARY_PROTOCOL_VERSION:
+        raise VersionError(f"Expected protocol_version='{BINARY_PROTOCOL_VERSION}', got '{version}'")
+    
+    return envelope
+
+
+def encode_envelope(envelope: dict[str, Any]) -> bytes:
+    """
+    Encode envelope to canonical bytes for its protocol version.
+    
+    Args:
+        envelope: Envelope dict (legacy v0, v0.1, or v0.2)
+        
+    Returns:
+        Canonical bytes (JSON for v0/v0.1, binary for v0.2)
     """
     version = detect_version(envelope)
+    if version == BINARY_PROTOCOL_VERSION:
+        return encode_envelope_v0_2(envelope)
     if version == "0.1":
-        canonical_bytes = encode_envelope_v0_1(envelope)
-    else:
-        canonical_bytes = encode_envelope_v0(envelope)
+        return encode_envelope_v0_1(envelope)
+    return encode_envelope_v0(envelope)
+
+
+def decode_envelope(data: bytes | bytearray | memoryview, zero_copy: bool = False) -> dict[str, Any]:
+    """
+    Decode envelope bytes of any supported version.
+    
+    The wire format is sniffed from the first byte: a CBOR map head selects
+    the v0.2 binary decoder, anything else is parsed as JSON (v0.1 or
+    legacy v0). This lets mixed mailboxes be read during migration.
     
-    hash_obj = hashlib.sha256(canonical_bytes)
-    return hash_obj.hexdigest()  # Full 64-character hex
+    Args:
+        data: Envelope bytes (canonical binary, canonical JSON, or pretty-printed JSON)
+        zero_copy: If True, v0.2 byte strings are memoryview slices of data
+        
+    Returns:
+        Envelope dict
+        
+    Raises:
+        EncodingError: If decoding fails
+        VersionError: If protocol_version is unknown
+    """
+    if len(data) > 0 and cbor.is_map_start(data[0]):
+        return decode_envelope_v0_2(data, zero_copy=zero_copy)
+    
+    envelope = decode_envelope_v0(bytes(data))
+    if not isinstance(envelope, dict):
+        raise EncodingError("Failed to decode envelope: top-level value is not an object")
+    detect_version(envelope)
+    return envelope
+
+
+class HashedEnvelope:
+    """
+    Envelope paired with its canonical bytes and SHA256, computed once.
+    
+    The envelope is canonicalized at construction and the header is copied,
+    so canonical_bytes, content_hash and header (msg_id, timestamp, sender,
+    as used for replay keys and index rows) always describe the same
+    envelope. `envelope` is the caller's dict itself, not a copy: mutating
+    it afterwards changes what envelope-level reads (signature verification)
+    see without changing the hash, so treat a wrapped dict as read-only.
+    Pass a HashedEnvelope through the delivery path (codec, replay, mailbox)
+    so each envelope is canonicalized and hashed exactly once.
+    """
+    
+    __slots__ = ("envelope", "version", "canonical_bytes", "content_hash", "_header")
+    
+    def __init__(self, envelope: dict[str, Any]):
+        """
+        Canonicalize and hash envelope.
+        
+        Args:
+            envelope: Envelope dict (v0.2, v0.1, or legacy v0)
+            
+        Raises:
+            VersionError: If protocol_version is unknown
+            EncodingError: If a legacy v0 or v0.2 envelope cannot be encoded
+            ValueError: If a v0.1 envelope contains disallowed types
+        """
+        version = detect_version(envelope)
+        if version == BINARY_PROTOCOL_VERSION:
+            canonical_bytes = encode_envelope_v0_2(envelope)
+        elif version == "0.1":
+            canonical_bytes = encode_envelope_v0_1(envelope)
+        else:
+            canonical_bytes = encode_envelope_v0(envelope)
+        
+        # Header fields are scalars, so a shallow copy is a snapshot
+        header = envelope.get("header", {})
+        
+        object.__setattr__(self, "envelope", envelope)
+        object.__setattr__(self, "_header", dict(header) if isinstance(header, dict) else header)
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "canonical_bytes", canonical_bytes)
+        object.__setattr__(self, "content_hash", hashlib.sha256(canonical_bytes).hexdigest())
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("HashedEnvelope is immutable")
+    
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("HashedEnvelope is immutable")
+    
+    def __repr__(self) -> str:
+        return f"HashedEnvelope(version={self.version!r}, content_hash={self.content_hash[:16]!r}...)"
+    
+    @property
+    def header(self) -> dict[str, Any]:
+        """Envelope header as of construction (empty dict if missing)."""
+        return self._header
+    
+    @classmethod
+    def wrap(cls, envelope: dict[str, Any] | HashedEnvelope) -> HashedEnvelope:
+        """
+        Return envelope as a HashedEnvelope, reusing an existing wrapper.
+        
+        Args:
+            envelope: Envelope dict or HashedEnvelope
+            
+        Returns:
+            HashedEnvelope (the same object if already wrapped)
+        """
+        if isinstance(envelope, cls):
+            return envelope
+        return cls(envelope)
+
+
+def compute_envelope_hash(envelope: dict[str, Any] | HashedEnvelope) -> str:
+    """
+    Compute full SHA256 hash of canonical envelope.
+    
+    Args:
+        envelope: Envelope dict, or HashedEnvelope (cached hash is returned)
+        
+    Returns:
+        64-character hexadecimal string (full SHA256, no truncation)
+    """
+    return HashedEnvelope.wrap(envelope).content_hash
 
 
 def validate_canonical(data: bytes) -> bool:
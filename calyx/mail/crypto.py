@@ -4,18 +4,64 @@ from __future__ import annotations
 
 import base64
 import hashlib
-from typing import TypedDict
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Iterable, Iterator, TypedDict
 
 try:
     import nacl.signing
     import nacl.public
     import nacl.utils
+    import nacl.exceptions
+    from nacl.bindings import (
+        crypto_box_SEALBYTES,
+        crypto_secretstream_xchacha20poly1305_ABYTES,
+        crypto_secretstream_xchacha20poly1305_HEADERBYTES,
+        crypto_secretstream_xchacha20poly1305_KEYBYTES,
+        crypto_secretstream_xchacha20poly1305_TAG_FINAL,
+        crypto_secretstream_xchacha20poly1305_TAG_MESSAGE,
+        crypto_secretstream_xchacha20poly1305_init_pull,
+        crypto_secretstream_xchacha20poly1305_init_push,
+        crypto_secretstream_xchacha20poly1305_keygen,
+        crypto_secretstream_xchacha20poly1305_pull,
+        crypto_secretstream_xchacha20poly1305_push,
+        crypto_secretstream_xchacha20poly1305_state,
+    )
     from nacl.exceptions import CryptoError
 except ImportError:
     raise ImportError(
         "PyNaCl is required for Calyx Mail. Install with: pip install pynacl"
     )
 
+# Direct libsodium access for buffer (zero-copy) operations. PyNaCl's public
+# bindings only accept bytes, which forces a copy of multi-megabyte payloads.
+# Falls back to the bytes-based API if the low-level module is unavailable.
+try:
+    from nacl._sodium import ffi as _ffi, lib as _lib
+except ImportError:  # pragma: no cover - depends on PyNaCl build
+    _ffi = None
+    _lib = None
+
+
+# Chunked (secretstream) encryption parameters
+STREAM_CHUNK_SIZE = 64 * 1024  # Default plaintext bytes per chunk
+STREAM_CHUNK_SIZE_MAX = 16 * 1024 * 1024  # Upper bound accepted from headers
+STREAM_ABYTES = crypto_secretstream_xchacha20poly1305_ABYTES  # Per-chunk overhead (17)
+STREAM_KEY_BLOCK_SIZE = (
+    crypto_box_SEALBYTES  # Sealed box overhead
+    + crypto_secretstream_xchacha20poly1305_KEYBYTES  # Per-message key
+    + crypto_secretstream_xchacha20poly1305_HEADERBYTES  # Stream header
+)
+
+
+# Key object cache (LRU, bounded): (kind, fingerprint of raw key) -> entry
+KEY_CACHE_SIZE = 256
+
+_KEY_SIGNING = "ed25519_signing"
+_KEY_VERIFY = "ed25519_verify"
+_KEY_SEAL = "x25519_public"
+_KEY_OPEN = "x25519_private"
+
 
 class KeyPair(TypedDict):
     """Key pair structure."""
@@ -38,7 +84,7 @@ def compute_fingerprint(public_key: bytes) -> str:
     
     Args:
         public_key: 32-byte public key (ed25519 or x25519)
-        
+    
     Returns:
         Base64-encoded fingerprint (22 chars, no padding)
     """
@@ -85,6 +131,141 @@ def generate_identity() -> Identity:
     }
 
 
+class _KeyCache:
+    """
+    Thread-safe LRU cache of NaCl key objects.
+    
+    Entries are looked up by (kind, compute_fingerprint(raw key bytes)); the
+    stored raw bytes are compared on every hit, so a fingerprint collision
+    can never return another key's object. Each entry also records the
+    fingerprint of the corresponding public key, which is what
+    invalidate_key_cache() matches on (private-key entries are invalidated
+    through their identity's public fingerprint).
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str], tuple[bytes, str, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, kind: str, raw: bytes, factory: Callable[[bytes], tuple[str, object]]) -> object:
+        """
+        Return cached key object for raw key bytes, building it on a miss.
+        
+        Args:
+            kind: Key kind (_KEY_* constant)
+            raw: Raw key bytes
+            factory: Builds (public fingerprint, key object) from raw bytes
+        
+        Returns:
+            Key object
+        """
+        if not isinstance(raw, (bytes, bytearray, memoryview)):
+            raise nacl.exceptions.TypeError(f"Key must be bytes, got {type(raw).__name__}")
+        raw = bytes(raw)
+        cache_key = (kind, compute_fingerprint(raw))
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == raw:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        
+        # Build outside the lock (key derivation is the expensive part)
+        public_fp, key_object = factory(raw)
+        with self._lock:
+            self._entries[cache_key] = (raw, public_fp, key_object)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return key_object
+    
+    def invalidate(self, fingerprint: str | None = None) -> int:
+        """Drop entries for a public key fingerprint (all if None); returns count."""
+        with self._lock:
+            if fingerprint is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [k for k, entry in self._entries.items() if entry[1] == fingerprint]
+            for cache_key in stale:
+                del self._entries[cache_key]
+            return len(stale)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_key_cache = _KeyCache(KEY_CACHE_SIZE)
+
+
+def invalidate_key_cache(fingerprint: str | None = None) -> int:
+    """
+    Invalidate cached key objects (call when keys rotate or are revoked).
+    
+    Args:
+        fingerprint: Public key fingerprint (signing or encryption) whose
+                     cached objects, public and private, should be dropped.
+                     None clears the whole cache.
+    
+    Returns:
+        Number of cache entries removed
+    """
+    return _key_cache.invalidate(fingerprint)
+
+
+def key_cache_info() -> dict[str, int]:
+    """
+    Key cache statistics.
+    
+    Returns:
+        Dict with size, maxsize, hits, misses
+    """
+    return {
+        "size": len(_key_cache),
+        "maxsize": _key_cache.maxsize,
+        "hits": _key_cache.hits,
+        "misses": _key_cache.misses,
+    }
+
+
+def _build_signing_key(raw: bytes) -> tuple[str, object]:
+    signing_key = nacl.signing.SigningKey(raw)
+    return compute_fingerprint(bytes(signing_key.verify_key)), signing_key
+
+
+def _build_verify_key(raw: bytes) -> tuple[str, object]:
+    return compute_fingerprint(raw), nacl.signing.VerifyKey(raw)
+
+
+def _build_seal_box(raw: bytes) -> tuple[str, object]:
+    return compute_fingerprint(raw), nacl.public.SealedBox(nacl.public.PublicKey(raw))
+
+
+def _build_private_key(raw: bytes) -> tuple[str, object]:
+    private_key = nacl.public.PrivateKey(raw)
+    return compute_fingerprint(bytes(private_key.public_key)), private_key
+
+
+def _signing_key(sender_ed25519_priv: bytes) -> nacl.signing.SigningKey:
+    return _key_cache.get(_KEY_SIGNING, sender_ed25519_priv, _build_signing_key)
+
+
+def _verify_key(sender_ed25519_pub: bytes) -> nacl.signing.VerifyKey:
+    return _key_cache.get(_KEY_VERIFY, sender_ed25519_pub, _build_verify_key)
+
+
+def _seal_box(recipient_x25519_pub: bytes) -> nacl.public.SealedBox:
+    return _key_cache.get(_KEY_SEAL, recipient_x25519_pub, _build_seal_box)
+
+
+def _private_key(recipient_x25519_priv: bytes) -> nacl.public.PrivateKey:
+    return _key_cache.get(_KEY_OPEN, recipient_x25519_priv, _build_private_key)
+
+
 def sign(payload: bytes, sender_ed25519_priv: bytes) -> bytes:
     """
     Sign payload with ed25519 private key.
@@ -92,35 +273,113 @@ def sign(payload: bytes, sender_ed25519_priv: bytes) -> bytes:
     Args:
         payload: Bytes to sign (canonical JSON)
         sender_ed25519_priv: 32-byte ed25519 private key
-        
+    
     Returns:
         64-byte ed25519 signature
     """
-    signing_key = nacl.signing.SigningKey(sender_ed25519_priv)
+    signing_key = _signing_key(sender_ed25519_priv)
     signature = signing_key.sign(payload).signature
     return bytes(signature)
 
 
-def verify(payload: bytes, sig: bytes, sender_ed25519_pub: bytes) -> bool:
+def load_verify_key(sender_ed25519_pub: bytes) -> nacl.signing.VerifyKey:
+    """
+    Build a reusable ed25519 verify key object.
+    
+    Callers verifying many envelopes from the same sender can build the key
+    once and pass it to verify() instead of the raw public key bytes. The
+    object comes from the key cache.
+    
+    Args:
+        sender_ed25519_pub: 32-byte ed25519 public key
+    
+    Returns:
+        VerifyKey object
+    
+    Raises:
+        ValueError: If the key is malformed
+    """
+    try:
+        return _verify_key(sender_ed25519_pub)
+    except (CryptoError, TypeError) as e:
+        raise ValueError(f"Invalid ed25519 public key: {e}") from e
+
+
+def load_recipient_box(recipient_x25519_priv: bytes) -> nacl.public.SealedBox:
+    """
+    Build a reusable sealed box object for decryption.
+    
+    Args:
+        recipient_x25519_priv: 32-byte x25519 private key
+    
+    Returns:
+        SealedBox object (pass to open_from_sender() instead of key bytes)
+    
+    Raises:
+        DecryptionError: If the key is malformed
+    """
+    try:
+        return nacl.public.SealedBox(_private_key(recipient_x25519_priv))
+    except (CryptoError, TypeError, ValueError) as e:
+        raise DecryptionError(f"Invalid x25519 private key: {e}") from e
+
+
+def verify(payload: bytes, sig: bytes, sender_ed25519_pub: bytes | nacl.signing.VerifyKey) -> bool:
     """
     Verify ed25519 signature.
     
     Args:
         payload: Original bytes (canonical JSON)
         sig: 64-byte ed25519 signature
-        sender_ed25519_pub: 32-byte ed25519 public key
-        
+        sender_ed25519_pub: 32-byte ed25519 public key, or a VerifyKey from
+                            load_verify_key()
+    
     Returns:
         True if signature is valid, False otherwise
     """
     try:
-        verify_key = nacl.signing.VerifyKey(sender_ed25519_pub)
+        if isinstance(sender_ed25519_pub, nacl.signing.VerifyKey):
+            verify_key = sender_ed25519_pub
+        else:
+            verify_key = _verify_key(sender_ed25519_pub)
         verify_key.verify(payload, sig)
         return True
     except (CryptoError, ValueError):
         return False
 
 
+def verify_signed_message(signed_message: bytes | bytearray | memoryview, sender_ed25519_pub: bytes) -> bool:
+    """
+    Verify an ed25519 signed message in place (NaCl combined format: signature || payload).
+    
+    Unlike verify(), the payload is not copied: callers assemble the combined
+    buffer once (e.g. from memory-mapped envelope pieces) and it is verified
+    where it lies.
+    
+    Args:
+        signed_message: 64-byte signature followed by the signed payload
+        sender_ed25519_pub: 32-byte ed25519 public key
+    
+    Returns:
+        True if signature is valid, False otherwise
+    """
+    if len(signed_message) < 64 or len(sender_ed25519_pub) != 32:
+        return False
+    if _lib is None:
+        data = bytes(signed_message)
+        return verify(data[64:], data[:64], sender_ed25519_pub)
+    
+    mlen = _ffi.new("unsigned long long *")
+    result = _lib.crypto_sign_open(
+        _ffi.NULL,  # Verify only: libsodium skips copying the message out
+        mlen,
+        _ffi.from_buffer(signed_message),
+        len(signed_message),
+        bytes(sender_ed25519_pub),
+    )
+    return result == 0
+
+
 def seal_to_recipient(plaintext: bytes, recipient_x25519_pub: bytes) -> bytes:
     """
     Encrypt plaintext using x25519 sealed box (recipient's public key).
@@ -130,39 +389,227 @@ def seal_to_recipient(plaintext: bytes, recipient_x25519_pub: bytes) -> bytes:
     Args:
         plaintext: Bytes to encrypt
         recipient_x25519_pub: 32-byte x25519 public key
-        
+    
     Returns:
         Sealed box ciphertext (ephemeral_pub + nonce + ciphertext + tag)
     """
-    recipient_key = nacl.public.PublicKey(recipient_x25519_pub)
-    box = nacl.public.SealedBox(recipient_key)
+    box = _seal_box(recipient_x25519_pub)
     ciphertext = box.encrypt(plaintext)
     return bytes(ciphertext)
 
 
-def open_from_sender(ciphertext: bytes, recipient_x25519_priv: bytes) -> bytes:
+def open_from_sender(ciphertext: bytes, recipient_x25519_priv: bytes | nacl.public.SealedBox) -> bytes:
     """
     Decrypt sealed box ciphertext using recipient's private key.
     
     Args:
         ciphertext: Sealed box ciphertext (from seal_to_recipient)
-        recipient_x25519_priv: 32-byte x25519 private key
-        
+        recipient_x25519_priv: 32-byte x25519 private key, or a SealedBox from
+                               load_recipient_box()
+    
     Returns:
         Decrypted plaintext bytes
-        
+    
     Raises:
         DecryptionError: If decryption fails (wrong key, tampered ciphertext)
     """
     try:
-        recipient_key = nacl.public.PrivateKey(recipient_x25519_priv)
-        box = nacl.public.SealedBox(recipient_key)
+        if isinstance(recipient_x25519_priv, nacl.public.SealedBox):
+            box = recipient_x25519_priv
+        else:
+            box = nacl.public.SealedBox(_private_key(recipient_x25519_priv))
         plaintext = box.decrypt(ciphertext)
         return bytes(plaintext)
     except CryptoError as e:
         raise DecryptionError(f"Decryption failed: {e}") from e
 
 
+def open_from_sender_buffer(
+    ciphertext: bytes | bytearray | memoryview,
+    recipient_x25519_priv: bytes,
+) -> bytearray:
+    """
+    Decrypt sealed box ciphertext from a buffer without copying it.
+    
+    The ciphertext may be a memoryview into a memory-mapped file; the
+    plaintext is written directly into a freshly allocated bytearray, so
+    peak memory is one plaintext-sized buffer.
+    
+    Args:
+        ciphertext: Sealed box ciphertext (bytes-like)
+        recipient_x25519_priv: 32-byte x25519 private key
+    
+    Returns:
+        Decrypted plaintext (bytearray)
+    
+    Raises:
+        DecryptionError: If decryption fails (wrong key, tampered ciphertext)
+    """
+    if _lib is None:
+        return bytearray(open_from_sender(bytes(ciphertext), recipient_x25519_priv))
+    
+    if len(ciphertext) < crypto_box_SEALBYTES:
+        raise DecryptionError("Decryption failed: ciphertext too short")
+    try:
+        recipient_key = _private_key(recipient_x25519_priv)
+    except (CryptoError, TypeError, ValueError) as e:
+        raise DecryptionError(f"Decryption failed: {e}") from e
+    
+    plaintext = bytearray(len(ciphertext) - crypto_box_SEALBYTES)
+    result = _lib.crypto_box_seal_open(
+        _ffi.from_buffer(plaintext, require_writable=True) if plaintext else _ffi.new("unsigned char[]", 1),
+        _ffi.from_buffer(ciphertext),
+        len(ciphertext),
+        bytes(recipient_key.public_key),
+        bytes(recipient_key),
+    )
+    if result != 0:
+        raise DecryptionError("Decryption failed: An error occurred trying to decrypt the message")
+    return plaintext
+
+
+def _iter_plaintext_chunks(source: bytes | bytearray | memoryview | BinaryIO, chunk_size: int) -> Iterator[tuple[bytes | memoryview, bool]]:
+    """Yield (chunk, is_final) pairs; always yields at least one (final) chunk."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast('B')
+        offset = 0
+        while True:
+            chunk = view[offset:offset + chunk_size]
+            offset += chunk_size
+            is_final = offset >= len(view)
+            yield chunk, is_final
+            if is_final:
+                return
+    
+    # File-like source: read one chunk ahead to know which chunk is final
+    current = source.read(chunk_size)
+    while True:
+        following = source.read(chunk_size) if len(current) == chunk_size else b""
+        is_final = not following
+        yield current, is_final
+        if is_final:
+            return
+        current = following
+
+
+def seal_stream_to_recipient(
+    source: bytes | bytearray | memoryview | BinaryIO,
+    recipient_x25519_pub: bytes,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> tuple[bytes, Iterator[bytes]]:
+    """
+    Encrypt plaintext as a chunked secretstream (bounded memory).
+    
+    A fresh per-message key is generated and sealed to the recipient with a
+    sealed box; the plaintext is then encrypted in fixed-size chunks with
+    XChaCha20-Poly1305 secretstream. The last chunk carries TAG_FINAL, so
+    truncation is detected on decryption.
+    
+    Key block layout: sealed(key) (80 bytes) || stream header (24 bytes).
+    Each chunk frame is chunk_size + 17 bytes, except the final one.
+    
+    Args:
+        source: Plaintext bytes, or a readable binary file object
+        recipient_x25519_pub: 32-byte x25519 public key
+        chunk_size: Plaintext bytes per chunk
+    
+    Returns:
+        Tuple of (key_block, iterator of encrypted chunk frames)
+    
+    Raises:
+        ValueError: If chunk_size is out of range
+    """
+    if not 0 < chunk_size <= STREAM_CHUNK_SIZE_MAX:
+        raise ValueError(f"chunk_size must be between 1 and {STREAM_CHUNK_SIZE_MAX}")
+    
+    key = crypto_secretstream_xchacha20poly1305_keygen()
+    state = crypto_secretstream_xchacha20poly1305_state()
+    stream_header = crypto_secretstream_xchacha20poly1305_init_push(state, key)
+    key_block = seal_to_recipient(key, recipient_x25519_pub) + stream_header
+    
+    def frames() -> Iterator[bytes]:
+        for chunk, is_final in _iter_plaintext_chunks(source, chunk_size):
+            tag = (
+                crypto_secretstream_xchacha20poly1305_TAG_FINAL if is_final
+                else crypto_secretstream_xchacha20poly1305_TAG_MESSAGE
+            )
+            yield crypto_secretstream_xchacha20poly1305_push(state, bytes(chunk), tag=tag)
+    
+    return key_block, frames()
+
+
+def iter_stream_frames(data: bytes | bytearray | memoryview, chunk_size: int) -> Iterator[memoryview]:
+    """
+    Split a contiguous chunk stream into encrypted frames (zero-copy).
+    
+    Args:
+        data: Concatenated chunk frames (e.g. a memoryview into a mapped file)
+        chunk_size: Plaintext bytes per chunk used by the sender
+    
+    Returns:
+        Iterator of memoryview frames
+    """
+    view = memoryview(data).cast('B')
+    frame_size = chunk_size + STREAM_ABYTES
+    for offset in range(0, len(view), frame_size):
+        yield view[offset:offset + frame_size]
+
+
+def open_stream_from_sender(
+    key_block: bytes | bytearray | memoryview,
+    frames: Iterable[bytes | bytearray | memoryview],
+    recipient_x25519_priv: bytes | nacl.public.SealedBox,
+) -> Iterator[bytes]:
+    """
+    Decrypt a chunked secretstream progressively.
+    
+    Each chunk is authenticated before it is yielded. A stream that ends
+    without TAG_FINAL, or continues after it, is rejected.
+    
+    Args:
+        key_block: Sealed per-message key || stream header (104 bytes)
+        frames: Encrypted chunk frames, in order
+        recipient_x25519_priv: 32-byte x25519 private key (or SealedBox)
+    
+    Returns:
+        Iterator of plaintext chunks
+    
+    Raises:
+        DecryptionError: If the key cannot be unsealed, a chunk fails
+                         authentication, or the stream is truncated
+    """
+    if len(key_block) != STREAM_KEY_BLOCK_SIZE:
+        raise DecryptionError(f"Decryption failed: key block must be {STREAM_KEY_BLOCK_SIZE} bytes")
+    key_block = bytes(key_block)
+    sealed_key_size = STREAM_KEY_BLOCK_SIZE - crypto_secretstream_xchacha20poly1305_HEADERBYTES
+    key = open_from_sender(key_block[:sealed_key_size], recipient_x25519_priv)
+    
+    state = crypto_secretstream_xchacha20poly1305_state()
+    try:
+        crypto_secretstream_xchacha20poly1305_init_pull(state, key_block[sealed_key_size:], key)
+    except (CryptoError, ValueError) as e:
+        raise DecryptionError(f"Decryption failed: {e}") from e
+    
+    def plaintexts() -> Iterator[bytes]:
+        finished = False
+        for frame in frames:
+            if finished:
+                raise DecryptionError("Decryption failed: data after final chunk")
+            try:
+                chunk, tag = crypto_secretstream_xchacha20poly1305_pull(state, bytes(frame))
+            except (CryptoError, ValueError) as e:
+                raise DecryptionError(f"Decryption failed: chunk authentication failed: {e}") from e
+            if tag == crypto_secretstream_xchacha20poly1305_TAG_FINAL:
+                finished = True
+            elif tag != crypto_secretstream_xchacha20poly1305_TAG_MESSAGE:
+                raise DecryptionError(f"Decryption failed: unexpected chunk tag {tag}")
+            yield chunk
+        if not finished:
+            raise DecryptionError("Decryption failed: stream truncated (no final chunk)")
+    
+    return plaintexts()
+
+
 class DecryptionError(Exception):
     """Raised when decryption fails."""
     pass
@@ -0,0 +1,431 @@
+"""Outbox delivery daemon for Calyx Mail (asyncio, inotify with polling fallback)."""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from .codec import compute_envelope_hash
+from .crypto import compute_fingerprint
+from .header import ReplayError
+from .keydir import KeyDirectory, get_key_directory
+from .mailbox import (
+    DEFAULT_DURABILITY,
+    SecurityError,
+    _check_symlink,
+    deliver_to_inbox,
+    find_envelope,
+    get_allowlist,
+    get_keys_dir,
+    get_mailbox_dir,
+    get_receipts_dir,
+    iter_envelope_paths,
+    load_envelope,
+    mark_delivered_receipt,
+)
+from .receipts import ReceiptWriter
+from .replay import ReplayError as ReplayStateError, ReplayState
+
+
+LOGGER = logging.getLogger("calyx.mail.daemon")
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_POLL_INTERVAL = 1.0
+
+# With inotify, the outbox is still rescanned this often (missed events, overflow)
+RESCAN_INTERVAL = 60.0
+
+# Files that failed with an I/O error are retried after RETRY_DELAY seconds,
+# doubling per failure up to RETRY_MAX_DELAY
+RETRY_DELAY = 1.0
+RETRY_MAX_DELAY = 300.0
+
+# Processed outbox files are moved to runtime/mailbox/<dir>/
+SENT_DIRNAME = "sent"
+REJECTED_DIRNAME = "rejected"
+
+# Delivery outcomes
+STATUS_DELIVERED = "delivered"   # in the inbox, moved to sent/
+STATUS_REJECTED = "rejected"     # failed a check, moved to rejected/
+STATUS_SKIPPED = "skipped"       # recipient is not a local identity, left in the outbox
+STATUS_ERROR = "error"           # I/O error, left in the outbox and retried
+
+
+@dataclass(slots=True)
+class DaemonResult:
+    """Outcome of one outbox file."""
+    path: Path
+    status: str
+    msg_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class MailDaemon:
+    """
+    Delivers envelopes written to runtime/mailbox/outbox to local inboxes.
+    
+    The outbox is watched with inotify where available (Linux, via ctypes)
+    and polled otherwise. Every wake-up rescans the outbox; new files go
+    through a bounded queue to a fixed number of workers, which run the
+    blocking delivery (signature, allowlist, timestamp and replay checks,
+    inbox write) in a thread pool. When the queue is full the scanner waits
+    for the workers, so a burst of envelopes is admitted no faster than it
+    can be delivered.
+    
+    Envelopes addressed to a local identity (an encryption public key in
+    runtime/keys) are delivered and moved to sent/ with a "delivered"
+    receipt; envelopes failing a check are moved to rejected/ with a
+    "failed" receipt. Envelopes for other recipients are left in the outbox
+    for another transport. Files that hit an I/O error (disk full, a failed
+    move) stay in the outbox and are retried on later scans with
+    exponential backoff. Receipts are batched by one ReceiptWriter
+    (flushed at least every second, and when the daemon stops).
+    """
+    
+    def __init__(
+        self,
+        runtime_dir: Path,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+        replay_state: ReplayState | None = None,
+        key_directory: KeyDirectory | None = None,
+        check_allowlist: bool | None = None,
+        check_timestamp: bool = True,
+        durability: str = DEFAULT_DURABILITY,
+        on_result: Callable[[DaemonResult], None] | None = None,
+    ):
+        """
+        Args:
+            runtime_dir: Runtime root directory
+            workers: Concurrent deliveries
+            queue_size: Outbox files queued ahead of the workers
+            poll_interval: Seconds between outbox scans without inotify
+            use_inotify: Watch the outbox with inotify if available
+            replay_state: Replay state database (default: runtime/mailbox/replay_state.db)
+            key_directory: Sender key directory for signature checks
+                           (default: runtime/keys/directory.json)
+            check_allowlist: Enforce the allowlist (default: if it is non-empty)
+            check_timestamp: Enforce the timestamp window
+            durability: Inbox write durability (DURABILITY_NONE/FILE/FULL)
+            on_result: Called on the event loop with each DaemonResult
+                       (exceptions are logged, not raised)
+        """
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        if queue_size < 1:
+            raise ValueError("queue_size must be positive")
+        self.runtime_dir = runtime_dir
+        self.workers = workers
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.check_allowlist = check_allowlist
+        self.check_timestamp = check_timestamp
+        self.durability = durability
+        self.on_result = on_result
+        self.stats = {status: 0 for status in (STATUS_DELIVERED, STATUS_REJECTED, STATUS_SKIPPED, STATUS_ERROR)}
+        
+        self._mailbox_dir = get_mailbox_dir(runtime_dir)
+        self._outbox_dir = self._mailbox_dir / "outbox"
+        self._owns_replay_state = replay_state is None
+        self._replay_state = replay_state
+        self._key_directory = key_directory or get_key_directory(runtime_dir)
+        # Files queued or being delivered, files left in the outbox on purpose,
+        # and failed files: path -> (failures, monotonic time of the next attempt)
+        self._pending: set[Path] = set()
+        self._ignored: set[Path] = set()
+        self._retry: dict[Path, tuple[int, float]] = {}
+        self._local_recipients: frozenset[str] = frozenset()
+        self._allowlist_enabled = False
+        self._receipts: ReceiptWriter | None = None
+    
+    async def run(self, stop: asyncio.Event | None = None, once: bool = False) -> dict[str, int]:
+        """
+        Watch and deliver until stop is set (or after one pass if once).
+        
+        Args:
+            stop: Event that ends the daemon (in-flight deliveries finish first)
+            once: Deliver what is in the outbox now, then return
+        
+        Returns:
+            Number of outbox files per status
+        """
+        loop = asyncio.get_running_loop()
+        stop = stop or asyncio.Event()
+        wake = asyncio.Event()
+        queue: asyncio.Queue[Path] = asyncio.Queue(maxsize=self.queue_size)
+        
+        self._outbox_dir.mkdir(parents=True, exist_ok=True)
+        _check_symlink(self._outbox_dir)
+        if self._replay_state is None:
+            self._replay_state = ReplayState(self._mailbox_dir / "replay_state.db")
+        self._receipts = ReceiptWriter(get_receipts_dir(self.runtime_dir))
+        
+        watcher = _Inotify.create() if self.use_inotify and not once else None
+        if watcher is not None:
+            loop.add_reader(watcher.fileno(), _drain_watcher, watcher, wake)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="calyx-mail")
+        tasks = [asyncio.create_task(self._worker(queue, executor)) for _ in range(self.workers)]
+        try:
+            while True:
+                wake.clear()
+                await self._scan(queue, watcher)
+                if once or stop.is_set():
+                    break
+                interval = RESCAN_INTERVAL if watcher is not None else self.poll_interval
+                if self._retry:
+                    next_retry = min(at for _, at in self._retry.values()) - time.monotonic()
+                    interval = max(0.0, min(interval, next_retry))
+                await _wait_any((wake, stop), interval)
+                if stop.is_set():
+                    break
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if watcher is not None:
+                loop.remove_reader(watcher.fileno())
+                watcher.close()
+            executor.shutdown(wait=True)
+            self._receipts.close()
+            self._receipts = None
+            if self._owns_replay_state and self._replay_state is not None:
+                self._replay_state.close()
+                self._replay_state = None
+        return dict(self.stats)
+    
+    async def _scan(self, queue: asyncio.Queue[Path], watcher: _Inotify | None) -> None:
+        """Queue outbox files not already pending (waits while the queue is full)."""
+        self._local_recipients = _local_recipients(self.runtime_dir)
+        self._allowlist_enabled = (
+            bool(get_allowlist(self.runtime_dir)) if self.check_allowlist is None else self.check_allowlist
+        )
+        if watcher is not None:
+            # Sharded outboxes: watch every shard directory (adding a watch twice is a no-op)
+            for dirpath, _, _ in os.walk(self._outbox_dir):
+                watcher.add_watch(dirpath)
+        
+        present = set()
+        now = time.monotonic()
+        for path in iter_envelope_paths(self._outbox_dir):
+            present.add(path)
+            if path in self._pending or path in self._ignored:
+                continue
+            retry = self._retry.get(path)
+            if retry is not None and retry[1] > now:
+                continue
+            self._pending.add(path)
+            await queue.put(path)
+        self._ignored &= present
+        for path in self._retry.keys() - present:
+            del self._retry[path]
+    
+    async def _worker(self, queue: asyncio.Queue[Path], executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            path = await queue.get()
+            try:
+                result = await loop.run_in_executor(executor, self.deliver_file, path)
+                self.stats[result.status] += 1
+                if result.status == STATUS_SKIPPED:
+                    self._ignored.add(path)
+                if result.status == STATUS_ERROR:
+                    failures = self._retry.get(path, (0, 0.0))[0] + 1
+                    delay = min(RETRY_DELAY * 2 ** (failures - 1), RETRY_MAX_DELAY)
+                    self._retry[path] = (failures, time.monotonic() + delay)
+                else:
+                    self._retry.pop(path, None)
+                if self.on_result is not None:
+                    try:
+                        self.on_result(result)
+                    except Exception:
+                        LOGGER.exception("on_result callback failed for %s", path)
+            except Exception:
+                # Keep the worker alive: the scanner and run() wait on the queue
+                LOGGER.exception("Delivery of %s failed", path)
+            finally:
+                self._pending.discard(path)
+                queue.task_done()
+    
+    def deliver_file(self, path: Path) -> DaemonResult:
+        """
+        Deliver one outbox file (blocking; runs on a worker thread).
+        
+        A replay of an envelope that is already in the inbox (delivered, but
+        not moved to sent/ before a crash or I/O error) completes the move
+        and is reported as delivered. I/O and SQLite errors are reported as
+        STATUS_ERROR and retried: deliver_to_inbox() records the replay key
+        only after the envelope is stored.
+        
+        Args:
+            path: Envelope file in the outbox
+        
+        Returns:
+            DaemonResult
+        """
+        try:
+            env = load_envelope(path)
+        except FileNotFoundError as e:
+            # Removed since the scan
+            return DaemonResult(path, STATUS_ERROR, error=str(e))
+        except Exception as e:
+            return self._reject(path, None, e)
+        
+        header = env.get("header") if isinstance(env, dict) else None
+        msg_id = header.get("msg_id") if isinstance(header, dict) else None
+        if not isinstance(header, dict) or header.get("recipient_fp") not in self._local_recipients:
+            return DaemonResult(path, STATUS_SKIPPED, msg_id)
+        
+        try:
+            deliver_to_inbox(
+                env,
+                self.runtime_dir,
+                replay_state=self._replay_state,
+                check_allowlist=self._allowlist_enabled,
+                check_replay=True,
+                check_timestamp=self.check_timestamp,
+                key_directory=self._key_directory,
+                durability=self.durability,
+            )
+        except (ReplayError, ReplayStateError) as e:
+            # Delivered before, but the move to sent/ failed: finish it
+            if not self._in_inbox(env):
+                return self._reject(path, msg_id, e)
+        except (OSError, sqlite3.Error) as e:
+            # Nothing was recorded for replay protection: retried on a later scan
+            return DaemonResult(path, STATUS_ERROR, msg_id, str(e))
+        except Exception as e:
+            return self._reject(path, msg_id, e)
+        
+        try:
+            self._move(path, SENT_DIRNAME)
+            self._receipt(msg_id, "delivered")
+        except OSError as e:
+            return DaemonResult(path, STATUS_ERROR, msg_id, str(e))
+        return DaemonResult(path, STATUS_DELIVERED, msg_id)
+    
+    def _in_inbox(self, env: dict) -> bool:
+        """True if this exact envelope (same content hash) is already in the inbox."""
+        try:
+            content_hash = compute_envelope_hash(env)
+        except Exception:
+            return False
+        return find_envelope(self._mailbox_dir / "inbox", content_hash) is not None
+    
+    def _reject(self, path: Path, msg_id: Optional[str], error: Exception) -> DaemonResult:
+        try:
+            self._move(path, REJECTED_DIRNAME)
+            self._receipt(msg_id or "unknown", "failed", str(error))
+        except OSError as e:
+            return DaemonResult(path, STATUS_ERROR, msg_id, str(e))
+        return DaemonResult(path, STATUS_REJECTED, msg_id, str(error))
+    
+    def _receipt(self, msg_id: str, status: str, error: str | None = None) -> None:
+        if self._receipts is not None:
+            self._receipts.write(msg_id, status, error)
+        else:
+            # deliver_file() called outside run()
+            mark_delivered_receipt(msg_id, status, self.runtime_dir, error)
+    
+    def _move(self, path: Path, dirname: str) -> Path:
+        """Move a processed outbox file to runtime/mailbox/<dirname>/."""
+        target_dir = self._mailbox_dir / dirname
+        target_dir.mkdir(exist_ok=True)
+        _check_symlink(target_dir)
+        target = target_dir / path.name
+        os.replace(path, target)
+        return target
+
+
+def _local_recipients(runtime_dir: Path) -> frozenset[str]:
+    """Encryption fingerprints of the identities whose keys are in runtime/keys."""
+    fingerprints = set()
+    for pub_path in get_keys_dir(runtime_dir).glob("*_encryption.key.pub"):
+        try:
+            _check_symlink(pub_path)
+            fingerprints.add(compute_fingerprint(pub_path.read_bytes()))
+        except (OSError, SecurityError):
+            continue
+    return frozenset(fingerprints)
+
+
+async def _wait_any(events: tuple[asyncio.Event, ...], timeout: float) -> None:
+    """Wait until any of events is set, or timeout seconds."""
+    waiters = [asyncio.ensure_future(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+def _drain_watcher(watcher: _Inotify, wake: asyncio.Event) -> None:
+    watcher.read_events()
+    wake.set()
+
+
+# inotify(7) event masks
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+
+class _Inotify:
+    """Minimal non-blocking inotify instance (ctypes; Linux only)."""
+    
+    def __init__(self, libc: ctypes.CDLL, fd: int):
+        self._libc = libc
+        self._fd = fd
+        self._watched: set[str] = set()
+    
+    @classmethod
+    def create(cls) -> _Inotify | None:
+        """inotify instance, or None where unavailable (polling fallback)."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+            init1 = libc.inotify_init1
+        except (OSError, AttributeError):
+            return None
+        fd = init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return cls(libc, fd)
+    
+    def fileno(self) -> int:
+        return self._fd
+    
+    def add_watch(self, path: str) -> None:
+        if path in self._watched:
+            return
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK) >= 0:
+            self._watched.add(path)
+    
+    def read_events(self) -> None:
+        """Discard queued events (any event means: rescan)."""
+        while True:
+            try:
+                if not os.read(self._fd, 65536):
+                    return
+            except BlockingIOError:
+                return
+    
+    def close(self) -> None:
+        os.close(self._fd)
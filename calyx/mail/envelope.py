@@ -3,62 +3,221 @@
 from __future__ import annotations
 
 import base64
+import os
+import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
 
-from .codec import build_signed_payload, canonical_encode, detect_version
+from .codec import (
+    BINARY_PROTOCOL_VERSION,
+    EncodingError,
+    VersionError,
+    build_signed_payload,
+    canonical_encode,
+    detect_version,
+    encode_envelope_v0_1,
+    encode_envelope_v0_2,
+    encode_signed_payload,
+)
 from .crypto import (
+    STREAM_CHUNK_SIZE,
+    STREAM_CHUNK_SIZE_MAX,
     DecryptionError,
     compute_fingerprint,
+    iter_stream_frames,
+    load_recipient_box,
+    load_verify_key,
     open_from_sender,
+    open_stream_from_sender,
     sign,
     verify,
 )
+from .header import AllowlistError, ReplayError, VerificationError, check_timestamp_window, parse_timestamp
 
+# Header "enc" value for chunked (secretstream) envelopes
+CHUNKED_ENCRYPTION = "secretstream"
 
-class VerificationError(Exception):
-    """Raised when envelope verification fails."""
-    pass
-
-
-class AllowlistError(Exception):
-    """Raised when sender is not in recipient's allowlist."""
-    pass
-
-
-class ReplayError(Exception):
-    """Raised when message ID is already seen or timestamp is invalid."""
-    pass
+# Spooled frame bytes per block yielded by create_envelope_stream()
+STREAM_COPY_SIZE = 256 * 1024
 
 
 # canonical_json moved to codec.py - use canonical_encode() instead
 
 
 def create_envelope(
-    plaintext: bytes,
+    plaintext: bytes | BinaryIO,
     sender_signing_priv: bytes,
     sender_signing_pub: bytes,
     recipient_encryption_pub: bytes,
     subject: str | None = None,
     msg_id: str | None = None,
     protocol_version: str = "0.1",
+    chunk_size: int | None = None,
 ) -> dict[str, Any]:
     """
-    Create a signed and encrypted envelope (v0.1).
+    Create a signed and encrypted envelope (v0.1, or binary v0.2).
+    
+    v0.1 envelopes carry base64 strings for ciphertext and signature;
+    v0.2 envelopes carry raw bytes and are signed over the binary canonical
+    encoding of the signed payload.
+    
+    With chunk_size set, the body is encrypted in chunked mode: "ciphertext"
+    holds the sealed per-message key and stream header, and the secretstream
+    chunk frames go in a separate "chunks" field. The header records
+    enc="secretstream" and chunk_size, so the mode is covered by the
+    signature. The plaintext may then be a readable binary file object and
+    is consumed one chunk at a time, but the returned dict holds every
+    frame (about the body size, plus a base64 copy of 4/3 of it during v0.1
+    encoding). For bodies that should not be held in memory, use
+    create_envelope_stream().
     
     Args:
-        plaintext: Message body bytes
+        plaintext: Message body bytes (or binary file object in chunked mode)
         sender_signing_priv: Sender's ed25519 private key (32 bytes)
         sender_signing_pub: Sender's ed25519 public key (32 bytes)
         recipient_encryption_pub: Recipient's x25519 public key (32 bytes)
         subject: Optional subject line (max 256 chars)
         msg_id: Optional message ID (UUID v4). Generated if not provided.
-        protocol_version: Protocol version (default: "0.1")
-        
+        protocol_version: Protocol version (default: "0.1"; "0.2" for binary)
+        chunk_size: Plaintext bytes per chunk; enables chunked mode if set
+    
     Returns:
         Envelope dict with protocol_version, header, ciphertext, and signature
+        (plus chunks in chunked mode)
+    """
+    binary = _check_new_version(protocol_version)
+    header = _new_header(sender_signing_pub, recipient_encryption_pub, subject, msg_id, chunk_size)
+    
+    # Encrypt plaintext
+    chunks_field: str | bytes | None = None
+    if chunk_size is None:
+        from .crypto import seal_to_recipient
+        if not isinstance(plaintext, (bytes, bytearray, memoryview)):
+            plaintext = plaintext.read()
+        ciphertext_bytes = seal_to_recipient(plaintext, recipient_encryption_pub)
+    else:
+        # Chunked mode: sealed per-message key + secretstream chunk frames
+        from .crypto import seal_stream_to_recipient
+        ciphertext_bytes, frames = seal_stream_to_recipient(plaintext, recipient_encryption_pub, chunk_size)
+        chunk_bytes = b"".join(frames)
+        chunks_field = chunk_bytes if binary else base64.b64encode(chunk_bytes).decode('ascii')
+        del chunk_bytes
+    
+    envelope = _signed_envelope(protocol_version, header, ciphertext_bytes, sender_signing_priv)
+    if chunks_field is not None:
+        envelope["chunks"] = chunks_field
+    
+    return envelope
+
+
+def create_envelope_stream(
+    plaintext: bytes | BinaryIO,
+    sender_signing_priv: bytes,
+    sender_signing_pub: bytes,
+    recipient_encryption_pub: bytes,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    subject: str | None = None,
+    msg_id: str | None = None,
+    protocol_version: str = "0.1",
+    spool_dir: Path | None = None,
+) -> tuple[dict[str, Any], Iterator[bytes]]:
     """
+    Create a chunked envelope as a stream of canonical bytes (bounded memory).
+    
+    Sender-side counterpart of verify_and_open_envelope_file_stream(): the
+    blocks are the canonical encoding of the envelope create_envelope()
+    would build with the same chunk_size, without the chunk frames ever
+    being held in memory together. Pass them to
+    mailbox.write_outbox_stream().
+    
+    "chunks" is the first key in both canonical encodings, and the
+    signature does not cover it, so everything but the frames is encoded
+    up front. v0.1 frames are base64-encoded as they are produced; v0.2
+    needs the byte string length first, so its frames are spooled to an
+    unnamed temporary file (in spool_dir) before they are yielded.
+    
+    Args:
+        plaintext: Message body bytes or readable binary file object
+        sender_signing_priv: Sender's ed25519 private key (32 bytes)
+        sender_signing_pub: Sender's ed25519 public key (32 bytes)
+        recipient_encryption_pub: Recipient's x25519 public key (32 bytes)
+        chunk_size: Plaintext bytes per chunk
+        subject: Optional subject line (max 256 chars)
+        msg_id: Optional message ID (UUID v4). Generated if not provided.
+        protocol_version: Protocol version (default: "0.1"; "0.2" for binary)
+        spool_dir: Directory for the v0.2 frame spool (default: system temp dir)
+    
+    Returns:
+        (envelope, blocks): the envelope without its "chunks" field, and an
+        iterator over the canonical bytes of the full envelope (consumes
+        plaintext; iterate once)
+    """
+    binary = _check_new_version(protocol_version)
+    header = _new_header(sender_signing_pub, recipient_encryption_pub, subject, msg_id, chunk_size)
+    
+    from .crypto import seal_stream_to_recipient
+    ciphertext_bytes, frames = seal_stream_to_recipient(plaintext, recipient_encryption_pub, chunk_size)
+    envelope = _signed_envelope(protocol_version, header, ciphertext_bytes, sender_signing_priv)
+    
+    # Encode with an empty chunks field and split the bytes around it
+    if binary:
+        from . import cbor
+        encoded = encode_envelope_v0_2({**envelope, "chunks": b""})
+        prefix = cbor.encode_head(5, len(envelope) + 1) + cbor.encode("chunks")
+        empty = cbor.encode(b"")
+    else:
+        encoded = encode_envelope_v0_1({**envelope, "chunks": ""})
+        prefix, empty = b'{"chunks":', b'""'
+    if not encoded.startswith(prefix + empty):
+        raise EncodingError("chunks is not the first field of the canonical envelope")
+    suffix = encoded[len(prefix) + len(empty):]
+    
+    def blocks() -> Iterator[bytes]:
+        yield prefix
+        if binary:
+            with tempfile.TemporaryFile(dir=spool_dir) as spool:
+                length = 0
+                for frame in frames:
+                    spool.write(frame)
+                    length += len(frame)
+                spool.seek(0)
+                yield cbor.encode_head(2, length)
+                while block := spool.read(STREAM_COPY_SIZE):
+                    yield block
+        else:
+            # base64 of consecutive 3-byte groups concatenates without padding
+            pending = b""
+            yield b'"'
+            for frame in frames:
+                pending += frame
+                cut = len(pending) - len(pending) % 3
+                yield base64.b64encode(pending[:cut])
+                pending = pending[cut:]
+            yield base64.b64encode(pending) + b'"'
+        yield suffix
+    
+    return envelope, blocks()
+
+
+def _check_new_version(protocol_version: str) -> bool:
+    """Reject versions new envelopes cannot use; True for binary v0.2."""
+    if protocol_version not in ("0.1", BINARY_PROTOCOL_VERSION):
+        raise ValueError(f"Unsupported protocol version for new envelopes: {protocol_version}")
+    return protocol_version == BINARY_PROTOCOL_VERSION
+
+
+def _new_header(
+    sender_signing_pub: bytes,
+    recipient_encryption_pub: bytes,
+    subject: str | None,
+    msg_id: str | None,
+    chunk_size: int | None,
+) -> dict[str, Any]:
+    """Header for a new envelope (fingerprints, msg_id, timestamp, chunked mode)."""
     # Generate message ID if not provided
     if msg_id is None:
         msg_id = str(uuid.uuid4())
@@ -67,44 +226,54 @@ def create_envelope(
     if subject is not None and len(subject) > 256:
         raise ValueError("Subject must be 256 characters or less")
     
-    # Compute fingerprints
-    sender_fp = compute_fingerprint(sender_signing_pub)
-    recipient_fp = compute_fingerprint(recipient_encryption_pub)
-    
-    # Encrypt plaintext
-    from .crypto import seal_to_recipient
-    ciphertext_bytes = seal_to_recipient(plaintext, recipient_encryption_pub)
-    ciphertext_b64 = base64.b64encode(ciphertext_bytes).decode('ascii')
-    
     # Create header (keys will be sorted in build_signed_payload)
     header = {
-        "sender_fp": sender_fp,
-        "recipient_fp": recipient_fp,
+        "sender_fp": compute_fingerprint(sender_signing_pub),
+        "recipient_fp": compute_fingerprint(recipient_encryption_pub),
         "msg_id": msg_id,
         "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
     }
     if subject is not None:
         header["subject"] = subject
+    if chunk_size is not None:
+        header["enc"] = CHUNKED_ENCRYPTION
+        header["chunk_size"] = chunk_size
+    return header
+
+
+def _signed_envelope(
+    protocol_version: str,
+    header: dict[str, Any],
+    ciphertext_bytes: bytes,
+    sender_signing_priv: bytes,
+) -> dict[str, Any]:
+    """Sign header and ciphertext; envelope dict without "chunks"."""
+    binary = protocol_version == BINARY_PROTOCOL_VERSION
+    if binary:
+        ciphertext_field: str | bytes = ciphertext_bytes
+    else:
+        ciphertext_field = base64.b64encode(ciphertext_bytes).decode('ascii')
     
     # Build signed payload (explicit construction order: protocol_version, header, ciphertext)
-    payload = build_signed_payload(protocol_version, header, ciphertext_b64)
+    payload = build_signed_payload(protocol_version, header, ciphertext_field)
     
-    # Canonical encode signed payload
-    payload_bytes = canonical_encode(payload)
+    # Canonical encode signed payload (JSON for v0.1, binary for v0.2)
+    payload_bytes = encode_signed_payload(payload)
     
     # Sign payload
     signature_bytes = sign(payload_bytes, sender_signing_priv)
-    signature_b64 = base64.b64encode(signature_bytes).decode('ascii')
+    if binary:
+        signature_field: str | bytes = signature_bytes
+    else:
+        signature_field = base64.b64encode(signature_bytes).decode('ascii')
     
     # Create envelope (with protocol_version)
-    envelope = {
+    return {
         "protocol_version": protocol_version,
         "header": header,
-        "ciphertext": ciphertext_b64,
-        "signature": signature_b64,
+        "ciphertext": ciphertext_field,
+        "signature": signature_field,
     }
-    
-    return envelope
 
 
 def verify_and_open_envelope(
@@ -128,24 +297,364 @@ def verify_and_open_envelope(
                           Should return True if seen (replay), False otherwise.
         timestamp_check: Optional function to validate timestamp.
                         Should return True if valid, False otherwise.
-        
+    
     Returns:
         Decrypted plaintext bytes
-        
+    
     Raises:
         VerificationError: If signature verification fails
         AllowlistError: If sender is not in allowlist
         ReplayError: If message ID is seen or timestamp is invalid
         DecryptionError: If decryption fails
     """
+    ciphertext_bytes, chunk_size = _verify_envelope(
+        envelope, sender_signing_pub, allowlist_check, msg_id_seen_check, timestamp_check,
+    )
+    
+    return _decrypt_verified(envelope, ciphertext_bytes, chunk_size, recipient_encryption_priv)
+
+
+def verify_envelope(
+    envelope: dict[str, Any],
+    sender_signing_pub: bytes,
+    allowlist_check: Callable[[str], bool] | None = None,
+    msg_id_seen_check: Callable[[str], bool] | None = None,
+    timestamp_check: Callable[[str], bool] | None = None,
+) -> None:
+    """
+    Verify envelope header checks and signature without decrypting.
+    
+    Used on relay/delivery paths that do not hold the recipient's key.
+    
+    Args:
+        envelope: Envelope dict with header, ciphertext, signature
+        sender_signing_pub: Sender's ed25519 public key (32 bytes)
+        allowlist_check: See verify_and_open_envelope()
+        msg_id_seen_check: See verify_and_open_envelope()
+        timestamp_check: See verify_and_open_envelope()
+        
+    Raises:
+        VerificationError: If signature verification fails
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+        DecryptionError: If the ciphertext encoding is invalid
+    """
+    _verify_envelope(envelope, sender_signing_pub, allowlist_check, msg_id_seen_check, timestamp_check)
+
+
+def _decrypt_verified(
+    envelope: dict[str, Any],
+    ciphertext_bytes: bytes,
+    chunk_size: int | None,
+    recipient_encryption_priv: Any,
+) -> bytes:
+    """Decrypt a verified envelope (single sealed box or chunked mode)."""
+    if chunk_size is not None:
+        # Chunked mode: decrypt all chunks and join
+        chunks = iter_stream_frames(_decode_chunks_field(envelope), chunk_size)
+        return b"".join(open_stream_from_sender(ciphertext_bytes, chunks, recipient_encryption_priv))
+    
+    plaintext = open_from_sender(ciphertext_bytes, recipient_encryption_priv)
+    
+    return plaintext
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """Outcome of one envelope in verify_and_open_batch()."""
+    
+    index: int
+    msg_id: str | None
+    plaintext: bytes | None = None
+    error: Exception | None = None
+    
+    @property
+    def ok(self) -> bool:
+        """True if the envelope was verified and decrypted."""
+        return self.error is None
+
+
+def verify_and_open_batch(
+    envelopes: Iterable[dict[str, Any]],
+    key_resolver: Callable[[str], bytes | None],
+    recipient_encryption_priv: bytes,
+    allowlist_check: Callable[[str], bool] | None = None,
+    msg_id_seen_check: Callable[[str], bool] | None = None,
+    timestamp_check: Callable[[str], bool] | None = None,
+    max_workers: int | None = None,
+) -> list[BatchResult]:
+    """
+    Verify and decrypt many envelopes (bulk inbox ingestion).
+    
+    Sender keys are resolved once per fingerprint and kept as VerifyKey
+    objects; the recipient SealedBox is built once. Verification and
+    decryption are spread across a thread pool (libsodium releases the
+    GIL). A failing envelope does not stop the batch: its result carries
+    the exception instead of a plaintext.
+    
+    The key resolver is called from the calling thread only; the check
+    callbacks run on worker threads and must be thread-safe.
+    
+    Args:
+        envelopes: Envelope dicts
+        key_resolver: Maps sender fingerprint to the sender's ed25519 public
+                      key bytes (None if unknown)
+        recipient_encryption_priv: Recipient's x25519 private key (32 bytes)
+        allowlist_check: See verify_and_open_envelope()
+        msg_id_seen_check: See verify_and_open_envelope()
+        timestamp_check: See verify_and_open_envelope()
+        max_workers: Thread pool size (default: ThreadPoolExecutor default;
+                     1 processes the batch inline)
+    
+    Returns:
+        One BatchResult per envelope, in input order
+    
+    Raises:
+        DecryptionError: If the recipient private key is malformed
+    """
+    envelopes = list(envelopes)
+    recipient_box = load_recipient_box(recipient_encryption_priv)
+    
+    # Resolve each sender key once (fingerprint -> VerifyKey or error)
+    verify_keys: dict[str, Any] = {}
+    for env in envelopes:
+        sender_fp = _batch_sender_fp(env)
+        if sender_fp is not None and sender_fp not in verify_keys:
+            verify_keys[sender_fp] = _resolve_verify_key(sender_fp, key_resolver)
+    
+    def process(index: int) -> BatchResult:
+        env = envelopes[index]
+        header = env.get("header") if isinstance(env, dict) else None
+        msg_id = header.get("msg_id") if isinstance(header, dict) else None
+        result = BatchResult(index=index, msg_id=msg_id)
+        try:
+            sender_fp = _batch_sender_fp(env)
+            if sender_fp is None:
+                raise VerificationError("Envelope missing sender_fp")
+            verify_key = verify_keys[sender_fp]
+            if isinstance(verify_key, Exception):
+                result.error = verify_key  # Key resolution failed for this sender
+                return result
+            ciphertext_bytes, chunk_size = _verify_envelope(
+                env, verify_key, allowlist_check, msg_id_seen_check, timestamp_check,
+            )
+            result.plaintext = _decrypt_verified(env, ciphertext_bytes, chunk_size, recipient_box)
+        except Exception as e:
+            result.error = e
+        return result
+    
+    def process_slice(indices: range) -> list[BatchResult]:
+        return [process(index) for index in indices]
+    
+    if max_workers == 1 or len(envelopes) <= 1:
+        return process_slice(range(len(envelopes)))
+    
+    # Contiguous slices keep per-task overhead small relative to crypto work
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    step = max(1, -(-len(envelopes) // (workers * 4)))
+    slices = [range(start, min(start + step, len(envelopes))) for start in range(0, len(envelopes), step)]
+    results: list[BatchResult] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for slice_results in executor.map(process_slice, slices):
+            results.extend(slice_results)
+    return results
+
+
+def _batch_sender_fp(env: Any) -> str | None:
+    """Sender fingerprint of an envelope dict, or None if absent/malformed."""
+    if not isinstance(env, dict) or not isinstance(env.get("header"), dict):
+        return None
+    sender_fp = env["header"].get("sender_fp")
+    return sender_fp if isinstance(sender_fp, str) else None
+
+
+def _resolve_verify_key(sender_fp: str, key_resolver: Callable[[str], bytes | None]) -> Any:
+    """Resolve and load a sender's VerifyKey; returns the exception on failure."""
+    try:
+        sender_signing_pub = key_resolver(sender_fp)
+        if sender_signing_pub is None:
+            raise VerificationError(f"Unknown sender fingerprint: {sender_fp}")
+        if compute_fingerprint(sender_signing_pub) != sender_fp:
+            raise VerificationError(f"Resolved key does not match sender fingerprint: {sender_fp}")
+        return load_verify_key(sender_signing_pub)
+    except ValueError as e:
+        return VerificationError(f"Invalid sender key for {sender_fp}: {e}")
+    except Exception as e:
+        return e
+
+
+def verify_and_open_envelope_stream(
+    envelope: dict[str, Any],
+    sender_signing_pub: bytes,
+    recipient_encryption_priv: bytes,
+    allowlist_check: Callable[[str], bool] | None = None,
+    msg_id_seen_check: Callable[[str], bool] | None = None,
+    timestamp_check: Callable[[str], bool] | None = None,
+) -> Iterator[bytes]:
+    """
+    Verify envelope and decrypt it progressively, one chunk at a time.
+    
+    Header checks and signature verification happen before this function
+    returns; the returned iterator yields authenticated plaintext chunks
+    and raises DecryptionError if a chunk is tampered with or the stream
+    is truncated. Non-chunked envelopes yield their plaintext as a single
+    chunk.
+    
+    Args:
+        envelope: Envelope dict with header, ciphertext, signature
+        sender_signing_pub: Sender's ed25519 public key (32 bytes)
+        recipient_encryption_priv: Recipient's x25519 private key (32 bytes)
+        allowlist_check: See verify_and_open_envelope()
+        msg_id_seen_check: See verify_and_open_envelope()
+        timestamp_check: See verify_and_open_envelope()
+    
+    Returns:
+        Iterator of plaintext chunks
+    
+    Raises:
+        VerificationError: If signature verification fails
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+        DecryptionError: If the per-message key cannot be unsealed
+    """
+    ciphertext_bytes, chunk_size = _verify_envelope(
+        envelope, sender_signing_pub, allowlist_check, msg_id_seen_check, timestamp_check,
+    )
+    
+    if chunk_size is None:
+        return iter((open_from_sender(ciphertext_bytes, recipient_encryption_priv),))
+    
+    chunks = iter_stream_frames(_decode_chunks_field(envelope), chunk_size)
+    return open_stream_from_sender(ciphertext_bytes, chunks, recipient_encryption_priv)
+
+
+def _verify_envelope(
+    envelope: dict[str, Any],
+    sender_signing_pub: bytes,
+    allowlist_check: Callable[[str], bool] | None,
+    msg_id_seen_check: Callable[[str], bool] | None,
+    timestamp_check: Callable[[str], bool] | None,
+) -> tuple[bytes, int | None]:
+    """
+    Run header checks and verify the signature of an envelope dict.
+    
+    Returns:
+        Tuple of (raw ciphertext bytes, chunk size or None)
+    
+    Raises:
+        VerificationError: If signature verification fails
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+        DecryptionError: If the ciphertext encoding is invalid
+    """
     # Validate envelope structure
     if "header" not in envelope or "ciphertext" not in envelope or "signature" not in envelope:
         raise VerificationError("Envelope missing required fields")
     
     header = envelope["header"]
-    ciphertext_b64 = envelope["ciphertext"]
-    signature_b64 = envelope["signature"]
+    ciphertext_field = envelope["ciphertext"]
+    signature_field = envelope["signature"]
+    
+    _check_header(header, allowlist_check, msg_id_seen_check, timestamp_check)
+    chunk_size = _stream_chunk_size(header)
+    if (chunk_size is not None) != ("chunks" in envelope):
+        raise VerificationError("Envelope chunks field does not match header encryption mode")
     
+    # Build signed payload (with explicit construction order)
+    protocol_version = envelope.get("protocol_version", "0.0")  # Legacy v0 support
+    binary = protocol_version == BINARY_PROTOCOL_VERSION
+    if binary:
+        # v0.2: raw byte fields, binary canonical signed payload
+        if not isinstance(ciphertext_field, (bytes, bytearray, memoryview)):
+            raise VerificationError("v0.2 ciphertext must be raw bytes")
+        payload = build_signed_payload(protocol_version, header, ciphertext_field)
+        try:
+            payload_bytes = encode_signed_payload(payload)
+        except (ValueError, TypeError) as e:
+            raise VerificationError(f"Signed payload not encodable: {e}") from e
+    elif protocol_version == "0.1":
+        payload = build_signed_payload(protocol_version, header, ciphertext_field)
+        payload_bytes = canonical_encode(payload)
+    else:
+        # Legacy v0: no protocol_version in signed payload
+        payload_dict = {
+            "header": header,
+            "ciphertext": ciphertext_field,
+        }
+        payload_bytes = canonical_encode(payload_dict)
+    
+    if binary:
+        if not isinstance(signature_field, (bytes, bytearray, memoryview)):
+            raise VerificationError("v0.2 signature must be raw bytes")
+        signature_bytes = bytes(signature_field)
+    else:
+        try:
+            signature_bytes = base64.b64decode(signature_field)
+        except Exception as e:
+            raise VerificationError(f"Invalid signature encoding: {e}") from e
+    
+    if not verify(payload_bytes, signature_bytes, sender_signing_pub):
+        raise VerificationError("Signature verification failed")
+    
+    # Decode ciphertext
+    if binary:
+        ciphertext_bytes = bytes(ciphertext_field)
+    else:
+        try:
+            ciphertext_bytes = base64.b64decode(ciphertext_field)
+        except Exception as e:
+            raise DecryptionError(f"Invalid ciphertext encoding: {e}") from e
+    
+    return ciphertext_bytes, chunk_size
+
+
+def _stream_chunk_size(header: dict[str, Any]) -> int | None:
+    """
+    Chunk size of a chunked-mode envelope, or None for single sealed box.
+    
+    Raises:
+        VerificationError: If the encryption mode or chunk size is invalid
+    """
+    enc = header.get("enc")
+    if enc is None:
+        if "chunk_size" in header:
+            raise VerificationError("Header chunk_size without enc")
+        return None
+    if enc != CHUNKED_ENCRYPTION:
+        raise VerificationError(f"Unsupported encryption mode: {enc}")
+    chunk_size = header.get("chunk_size")
+    if type(chunk_size) is not int or not 0 < chunk_size <= STREAM_CHUNK_SIZE_MAX:
+        raise VerificationError(f"Invalid chunk_size: {chunk_size!r}")
+    return chunk_size
+
+
+def _decode_chunks_field(envelope: dict[str, Any]) -> bytes | bytearray | memoryview:
+    """Raw chunk frames of a chunked envelope (base64 for v0.1, bytes for v0.2)."""
+    chunks_field = envelope["chunks"]
+    if envelope.get("protocol_version") == BINARY_PROTOCOL_VERSION:
+        if not isinstance(chunks_field, (bytes, bytearray, memoryview)):
+            raise DecryptionError("v0.2 chunks must be raw bytes")
+        return chunks_field
+    try:
+        return base64.b64decode(chunks_field)
+    except Exception as e:
+        raise DecryptionError(f"Invalid chunks encoding: {e}") from e
+
+
+def _check_header(
+    header: dict[str, Any],
+    allowlist_check: Callable[[str], bool] | None,
+    msg_id_seen_check: Callable[[str], bool] | None,
+    timestamp_check: Callable[[str], bool] | None,
+) -> None:
+    """
+    Check required header fields, allowlist, msg_id replay and timestamp window.
+    
+    Raises:
+        VerificationError: If a required header field is missing
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+    """
     # Check required header fields
     required_fields = ["sender_fp", "recipient_fp", "msg_id", "timestamp"]
     for field in required_fields:
@@ -169,77 +678,179 @@ def verify_and_open_envelope(
         timestamp = header["timestamp"]
         if not timestamp_check(timestamp):
             raise ReplayError(f"Timestamp validation failed: {timestamp}")
+
+
+def verify_and_open_envelope_file(
+    path: Path,
+    sender_signing_pub: bytes,
+    recipient_encryption_priv: bytes,
+    allowlist_check: Callable[[str], bool] | None = None,
+    msg_id_seen_check: Callable[[str], bool] | None = None,
+    timestamp_check: Callable[[str], bool] | None = None,
+) -> bytearray:
+    """
+    Verify and decrypt an envelope file with bounded memory (streaming path).
     
-    # Build signed payload (with explicit construction order)
-    protocol_version = envelope.get("protocol_version", "0.0")  # Legacy v0 support
-    if protocol_version == "0.1":
-        payload = build_signed_payload(protocol_version, header, ciphertext_b64)
-        payload_bytes = canonical_encode(payload)
-    else:
-        # Legacy v0: no protocol_version in signed payload
-        payload_dict = {
-            "header": header,
-            "ciphertext": ciphertext_b64,
-        }
-        payload_bytes = canonical_encode(payload_dict)
-    
-    try:
-        signature_bytes = base64.b64decode(signature_b64)
-    except Exception as e:
-        raise VerificationError(f"Invalid signature encoding: {e}") from e
+    Same checks and errors as verify_and_open_envelope(), but the file is
+    memory-mapped: the header is parsed without materializing the
+    ciphertext, the signed payload is assembled once into a single buffer
+    and verified in place, and the decryptor reads the ciphertext through a
+    buffer view (zero-copy for binary v0.2 files). Peak memory is roughly
+    one ciphertext-sized buffer plus the plaintext, instead of ~3x.
     
-    if not verify(payload_bytes, signature_bytes, sender_signing_pub):
-        raise VerificationError("Signature verification failed")
+    Ed25519 (PureEdDSA) hashes the whole message twice, so verification
+    cannot consume a stream; assembling the payload once is the bounded
+    alternative.
     
-    # Decrypt ciphertext
-    try:
-        ciphertext_bytes = base64.b64decode(ciphertext_b64)
-    except Exception as e:
-        raise DecryptionError(f"Invalid ciphertext encoding: {e}") from e
+    Args:
+        path: Envelope file path (.json or .cbor)
+        sender_signing_pub: Sender's ed25519 public key (32 bytes)
+        recipient_encryption_priv: Recipient's x25519 private key (32 bytes)
+        allowlist_check: See verify_and_open_envelope()
+        msg_id_seen_check: See verify_and_open_envelope()
+        timestamp_check: See verify_and_open_envelope()
     
-    plaintext = open_from_sender(ciphertext_bytes, recipient_encryption_priv)
+    Returns:
+        Decrypted plaintext (bytearray)
     
+    Raises:
+        VerificationError: If the file is malformed or signature verification fails
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+        DecryptionError: If decryption fails
+    """
+    plaintext = bytearray()
+    for chunk in verify_and_open_envelope_file_stream(
+        path,
+        sender_signing_pub,
+        recipient_encryption_priv,
+        allowlist_check=allowlist_check,
+        msg_id_seen_check=msg_id_seen_check,
+        timestamp_check=timestamp_check,
+    ):
+        if not plaintext:
+            plaintext = chunk if isinstance(chunk, bytearray) else bytearray(chunk)
+        else:
+            plaintext += chunk
     return plaintext
 
 
-def parse_timestamp(timestamp_str: str) -> datetime:
+def verify_and_open_envelope_file_stream(
+    path: Path,
+    sender_signing_pub: bytes,
+    recipient_encryption_priv: bytes,
+    allowlist_check: Callable[[str], bool] | None = None,
+    msg_id_seen_check: Callable[[str], bool] | None = None,
+    timestamp_check: Callable[[str], bool] | None = None,
+) -> Iterator[bytes | bytearray]:
     """
-    Parse ISO 8601 timestamp string.
+    Verify an envelope file and decrypt it progressively.
+    
+    Header checks and signature verification happen before this function
+    returns. For chunked-mode envelopes the returned iterator decrypts one
+    frame at a time straight from the mapped file, so memory stays bounded
+    by the chunk size regardless of the body size (the signature covers
+    the sealed per-message key; each chunk is authenticated by
+    secretstream). Single sealed-box envelopes yield one chunk.
+    
+    The file stays mapped until the iterator is exhausted or closed; the
+    returned iterator has close() and can be used as a context manager.
     
     Args:
-        timestamp_str: ISO 8601 timestamp (e.g., "2026-02-12T10:30:00Z")
-        
+        path: Envelope file path (.json or .cbor)
+        sender_signing_pub: Sender's ed25519 public key (32 bytes)
+        recipient_encryption_priv: Recipient's x25519 private key (32 bytes)
+        allowlist_check: See verify_and_open_envelope()
+        msg_id_seen_check: See verify_and_open_envelope()
+        timestamp_check: See verify_and_open_envelope()
+    
     Returns:
-        datetime object (UTC)
-        
+        Iterator of plaintext chunks
+    
     Raises:
-        ValueError: If timestamp format is invalid
+        VerificationError: If the file is malformed or signature verification fails
+        AllowlistError: If sender is not in allowlist
+        ReplayError: If message ID is seen or timestamp is invalid
+        DecryptionError: If decryption fails
     """
+    from .crypto import open_from_sender_buffer, verify_signed_message
+    from .stream import EnvelopeFile
+    
     try:
-        # Parse ISO 8601 format
-        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-    except Exception as e:
-        raise ValueError(f"Invalid timestamp format: {timestamp_str}") from e
+        envelope_file = EnvelopeFile(path)
+    except (EncodingError, VersionError) as e:
+        raise VerificationError(f"Malformed envelope file: {e}") from e
+    
+    try:
+        _check_header(envelope_file.header, allowlist_check, msg_id_seen_check, timestamp_check)
+        chunk_size = _stream_chunk_size(envelope_file.header)
+        if (chunk_size is not None) != envelope_file.chunked:
+            raise VerificationError("Envelope chunks field does not match header encryption mode")
+        
+        try:
+            signed_message = envelope_file.signed_message()
+        except (EncodingError, ValueError, TypeError) as e:
+            raise VerificationError(f"Invalid signed payload: {e}") from e
+        
+        if not verify_signed_message(signed_message, sender_signing_pub):
+            raise VerificationError("Signature verification failed")
+        del signed_message  # Release before allocating the plaintext buffer
+        
+        try:
+            ciphertext = envelope_file.ciphertext()
+            frames = envelope_file.chunk_frames(chunk_size) if chunk_size is not None else None
+        except EncodingError as e:
+            raise DecryptionError(f"Invalid ciphertext encoding: {e}") from e
+        
+        if frames is None:
+            plaintexts = iter((open_from_sender_buffer(ciphertext, recipient_encryption_priv),))
+        else:
+            plaintexts = open_stream_from_sender(ciphertext, frames, recipient_encryption_priv)
+    except BaseException:
+        envelope_file.close()
+        raise
+    
+    return _FilePlaintextStream(plaintexts, envelope_file)
 
 
-def check_timestamp_window(timestamp_str: str, window_seconds: int = 300) -> bool:
-    """
-    Check if timestamp is within acceptable window (±window_seconds from now).
+class _FilePlaintextStream:
+    """Iterator over plaintext chunks that owns (and finally closes) an EnvelopeFile."""
     
-    Args:
-        timestamp_str: ISO 8601 timestamp string
-        window_seconds: Acceptable time window in seconds (default: 300 = 5 minutes)
-        
-    Returns:
-        True if timestamp is within window, False otherwise
-    """
-    try:
-        msg_time = parse_timestamp(timestamp_str)
-        now = datetime.now(timezone.utc)
-        delta = abs((now - msg_time).total_seconds())
-        return delta <= window_seconds
-    except ValueError:
-        return False
+    def __init__(self, plaintexts: Iterator[bytes | bytearray], envelope_file: Any):
+        self._plaintexts = plaintexts
+        self._envelope_file = envelope_file
+    
+    def __iter__(self) -> _FilePlaintextStream:
+        return self
+    
+    def __next__(self) -> bytes | bytearray:
+        if self._envelope_file is None:
+            raise StopIteration
+        try:
+            return next(self._plaintexts)
+        except StopIteration:
+            self.close()
+            raise
+        except EncodingError as e:
+            self.close()
+            raise DecryptionError(f"Invalid ciphertext encoding: {e}") from e
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self) -> None:
+        """Stop decryption and unmap the envelope file."""
+        if self._envelope_file is None:
+            return
+        close_plaintexts = getattr(self._plaintexts, "close", None)
+        if close_plaintexts is not None:
+            close_plaintexts()
+        self._plaintexts = iter(())
+        self._envelope_file.close()
+        self._envelope_file = None
+    
+    def __enter__(self) -> _FilePlaintextStream:
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,63 @@
+"""Envelope header checks for Calyx Mail: check errors and the timestamp window (no PyNaCl import)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+
+class VerificationError(Exception):
+    """Raised when envelope verification fails."""
+    pass
+
+
+class AllowlistError(Exception):
+    """Raised when sender is not in recipient's allowlist."""
+    pass
+
+
+class ReplayError(Exception):
+    """Raised when message ID is already seen or timestamp is invalid."""
+    pass
+
+
+def parse_timestamp(timestamp_str: str) -> datetime:
+    """
+    Parse ISO 8601 timestamp string.
+    
+    Args:
+        timestamp_str: ISO 8601 timestamp (e.g., "2026-02-12T10:30:00Z")
+    
+    Returns:
+        datetime object (UTC)
+    
+    Raises:
+        ValueError: If timestamp format is invalid
+    """
+    try:
+        # Parse ISO 8601 format
+        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt
+    except Exception as e:
+        raise ValueError(f"Invalid timestamp format: {timestamp_str}") from e
+
+
+def check_timestamp_window(timestamp_str: str, window_seconds: int = 300) -> bool:
+    """
+    Check if timestamp is within acceptable window (±window_seconds from now).
+    
+    Args:
+        timestamp_str: ISO 8601 timestamp string
+        window_seconds: Acceptable time window in seconds (default: 300 = 5 minutes)
+    
+    Returns:
+        True if timestamp is within window, False otherwise
+    """
+    try:
+        msg_time = parse_timestamp(timestamp_str)
+        now = datetime.now(timezone.utc)
+        delta = abs((now - msg_time).total_seconds())
+        return delta <= window_seconds
+    except ValueError:
+        return False
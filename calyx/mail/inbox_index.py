@@ -0,0 +1,373 @@
+"""Inbox header index for Calyx Mail (runtime/mailbox/inbox_index.db)."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .codec import HashedEnvelope
+
+
+INDEX_FILENAME = "inbox_index.db"
+
+# Wait this long for another connection's write lock before failing
+BUSY_TIMEOUT_MS = 5000
+
+_INSERT_SQL = """
+    INSERT INTO inbox_index
+    (content_hash, msg_id, sender_fp, recipient_fp, timestamp, subject, size, read, header, indexed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+    ON CONFLICT(content_hash) DO NOTHING
+"""
+
+
+class InboxIndex:
+    """
+    Header index (SQLite) for envelopes stored in the inbox.
+    
+    One row per content hash with the header fields needed for listing, so
+    listing a page of the inbox is an indexed query instead of parsing and
+    re-hashing every envelope file. Rows hold no file paths; envelopes are
+    located by content hash (see mailbox.find_envelope), which keeps the
+    index valid across mailbox layout migrations.
+    
+    Each thread keeps one connection, opened on first use and closed by
+    close().
+    """
+    
+    def __init__(self, db_path: Path):
+        """
+        Initialize inbox index database.
+        
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._init_db()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for the calling thread (opened and tuned on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: each statement is its own transaction unless
+            # a method opens one explicitly
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    def __enter__(self) -> InboxIndex:
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("PRAGMA journal_mode = WAL")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS inbox_index (
+                content_hash TEXT PRIMARY KEY,
+                msg_id TEXT NOT NULL,
+                sender_fp TEXT NOT NULL,
+                recipient_fp TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                subject TEXT,
+                size INTEGER NOT NULL,
+                read INTEGER NOT NULL DEFAULT 0,
+                header TEXT NOT NULL,
+                indexed_at TIMESTAMP NOT NULL
+            )
+        """)
+        
+        # Newest-first listing, optionally per sender (keyset paging)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_inbox_timestamp
+            ON inbox_index(timestamp, content_hash)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_inbox_sender
+            ON inbox_index(sender_fp, timestamp, content_hash)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_inbox_msg_id
+            ON inbox_index(msg_id)
+        """)
+    
+    def add(self, hashed: HashedEnvelope, size: int) -> bool:
+        """
+        Index a delivered envelope (no-op if already indexed; read state is kept).
+        
+        Args:
+            hashed: Hashed envelope
+            size: Size of the stored envelope file in bytes
+        
+        Returns:
+            True if a new row was added
+        """
+        cursor = self._connection().execute(_INSERT_SQL, _row(hashed.content_hash, hashed.header, size))
+        return cursor.rowcount == 1
+    
+    def add_many(self, entries: Iterable[tuple[HashedEnvelope, int]]) -> int:
+        """
+        Index many delivered envelopes in one transaction (see add()).
+        
+        Args:
+            entries: (hashed envelope, stored file size) pairs
+        
+        Returns:
+            Number of new rows added
+        """
+        return self.add_entries((hashed.content_hash, hashed.header, size) for hashed, size in entries)
+    
+    def add_entries(self, entries: Iterable[tuple[str, dict[str, Any], int]]) -> int:
+        """
+        Index many envelopes by content hash and header in one transaction (see add()).
+        
+        Args:
+            entries: (content_hash, header, size) for each envelope
+        
+        Returns:
+            Number of new rows added
+        """
+        rows = [_row(content_hash, header, size) for content_hash, header, size in entries]
+        conn = self._connection()
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT_SQL, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+    
+    def replace_all(self, entries: Iterable[tuple[str, dict[str, Any], int]]) -> int:
+        """
+        Replace the whole index (one transaction), keeping read state of surviving rows.
+        
+        Args:
+            entries: (content_hash, header, size) for every envelope in the inbox
+        
+        Returns:
+            Number of indexed envelopes
+        """
+        rows = [_row(content_hash, header, size) for content_hash, header, size in entries]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            read_hashes = {row[0] for row in conn.execute(
+                "SELECT content_hash FROM inbox_index WHERE read = 1"
+            )}
+            conn.execute("DELETE FROM inbox_index")
+            conn.executemany("""
+                INSERT OR REPLACE INTO inbox_index
+                (content_hash, msg_id, sender_fp, recipient_fp, timestamp, subject, size, read, header, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+            """, rows)
+            conn.executemany(
+                "UPDATE inbox_index SET read = 1 WHERE content_hash = ?",
+                [(content_hash,) for content_hash in read_hashes],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+    
+    def remove(self, content_hash: str) -> bool:
+        """
+        Remove an envelope from the index.
+        
+        Args:
+            content_hash: Envelope content hash
+        
+        Returns:
+            True if a row was removed
+        """
+        cursor = self._connection().execute("DELETE FROM inbox_index WHERE content_hash = ?", (content_hash,))
+        return cursor.rowcount > 0
+    
+    def remove_many(self, content_hashes: Iterable[str]) -> int:
+        """
+        Remove envelopes from the index in one transaction.
+        
+        Args:
+            content_hashes: Envelope content hashes
+        
+        Returns:
+            Number of rows removed
+        """
+        params = [(content_hash,) for content_hash in content_hashes]
+        conn = self._connection()
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM inbox_index WHERE content_hash = ?", params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+    
+    def set_read(self, key: str, read: bool = True) -> int:
+        """
+        Set read state by content hash or msg_id.
+        
+        Args:
+            key: Content hash or message ID
+            read: New read state
+        
+        Returns:
+            Number of rows updated
+        """
+        cursor = self._connection().execute(
+            "UPDATE inbox_index SET read = ? WHERE content_hash = ? OR msg_id = ?",
+            (int(read), key, key),
+        )
+        return cursor.rowcount
+    
+    def count(self) -> int:
+        """Number of indexed envelopes."""
+        return self._connection().execute("SELECT COUNT(*) FROM inbox_index").fetchone()[0]
+    
+    def expired(
+        self,
+        until: str,
+        limit: int,
+        after: Optional[tuple[str, str]] = None,
+    ) -> list[tuple[str, str]]:
+        """
+        Envelopes with timestamp < until, oldest first (for retention).
+        
+        Paging is keyed on the values of the last row, not on the row
+        itself, so rows may be removed between pages.
+        
+        Args:
+            until: ISO 8601 cutoff (exclusive)
+            limit: Maximum number of entries
+            after: (timestamp, content_hash) of the last entry of the previous page
+        
+        Returns:
+            List of (timestamp, content_hash) tuples
+        """
+        sql = "SELECT timestamp, content_hash FROM inbox_index WHERE timestamp < ?"
+        params: list[Any] = [until]
+        if after is not None:
+            sql += " AND (timestamp, content_hash) > (?, ?)"
+            params.extend(after)
+        sql += " ORDER BY timestamp, content_hash LIMIT ?"
+        params.append(limit)
+        return [tuple(row) for row in self._connection().execute(sql, params)]
+    
+    def query(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        sender_fp: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        List indexed envelopes, newest first (timestamp, then content hash, descending).
+        
+        Paging is keyset based: pass the content_hash of the last entry of
+        the previous page as `after`, so each page costs O(limit) index steps
+        regardless of its position.
+        
+        Args:
+            limit: Maximum number of entries (None = all)
+            after: Content hash of the last entry of the previous page
+            sender_fp: Only envelopes from this sender fingerprint
+            since: Only timestamps >= since (ISO 8601, e.g. "2026-02-12T00:00:00Z")
+            until: Only timestamps < until (ISO 8601)
+            unread_only: Only envelopes not marked read
+        
+        Returns:
+            List of {"header", "msg_id", "content_hash", "size", "read"} dicts
+        
+        Raises:
+            ValueError: If after is not an indexed content hash (e.g. the
+                        envelope was archived or the index rebuilt since)
+        """
+        conn = self._connection()
+        clauses = []
+        params: list[Any] = []
+        if sender_fp is not None:
+            clauses.append("sender_fp = ?")
+            params.append(sender_fp)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if unread_only:
+            clauses.append("read = 0")
+        if after is not None:
+            cursor_row = conn.execute(
+                "SELECT timestamp, content_hash FROM inbox_index WHERE content_hash = ?", (after,)
+            ).fetchone()
+            if cursor_row is None:
+                raise ValueError(f"Unknown paging cursor (not in the inbox index): {after}")
+            clauses.append("(timestamp, content_hash) < (?, ?)")
+            params.extend(cursor_row)
+        
+        sql = "SELECT header, msg_id, content_hash, size, read FROM inbox_index"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, content_hash DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        rows = conn.execute(sql, params).fetchall()
+        
+        return [
+            {
+                "header": json.loads(header),
+                "msg_id": msg_id,
+                "content_hash": content_hash,
+                "size": size,
+                "read": bool(read),
+            }
+            for header, msg_id, content_hash, size, read in rows
+        ]
+
+
+def _row(content_hash: str, header: dict[str, Any], size: int) -> tuple:
+    """Column values for one index row (matches the INSERT column order)."""
+    return (
+        content_hash,
+        header.get("msg_id", ""),
+        header.get("sender_fp", ""),
+        header.get("recipient_fp", ""),
+        header.get("timestamp", ""),
+        header.get("subject"),
+        size,
+        json.dumps(header, sort_keys=True),
+        datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    )
@@ -0,0 +1,342 @@
+"""Fingerprint-indexed public key directory for Calyx Mail (runtime/keys/directory.json)."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import threading
+from pathlib import Path
+from typing import Any, TypedDict
+
+
+DIRECTORY_FILENAME = "directory.json"
+DIRECTORY_FORMAT_VERSION = 1
+
+
+class KeyDirectoryError(Exception):
+    """Raised when a key directory entry or bundle is invalid."""
+    pass
+
+
+class KeyEntry(TypedDict):
+    """Public keys of one identity."""
+    identity: str
+    signing_fp: str
+    signing_pub: bytes
+    encryption_fp: str
+    encryption_pub: bytes
+
+
+class KeyDirectory:
+    """
+    Public key directory indexed by signing and encryption fingerprint.
+    
+    The on-disk index lives at runtime/keys/directory.json. It is loaded
+    lazily on first lookup and kept in memory. Every lookup stats the file
+    and re-reads it only if its inode, mtime or size changed (_save()
+    replaces it by rename, which always changes the inode), so a key
+    removed by another process (a revoked sender) stops resolving on the
+    next lookup. Keys dropped or replaced on reload are evicted from the
+    crypto key cache.
+    
+    On-disk format:
+        {
+          "version": 1,
+          "identities": {
+            "<signing_fp>": {
+              "identity": "alice",
+              "signing_pub": "<base64>",
+              "encryption_fp": "<fp>",
+              "encryption_pub": "<base64>"
+            }
+          }
+        }
+    """
+    
+    def __init__(self, runtime_dir: Path):
+        """
+        Args:
+            runtime_dir: Runtime root directory
+        """
+        self.path = runtime_dir / "keys" / DIRECTORY_FILENAME
+        self._lock = threading.RLock()
+        self._by_signing: dict[str, KeyEntry] | None = None
+        self._by_encryption: dict[str, KeyEntry] = {}
+        # (st_dev, st_ino, st_mtime_ns, st_size) of the loaded file, None = missing
+        self._stamp: tuple[int, int, int, int] | None = None
+    
+    def _file_stamp(self) -> tuple[int, int, int, int] | None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _load(self) -> None:
+        """(Re)load the index from disk into memory."""
+        from .mailbox import _check_symlink
+        
+        stamp = self._file_stamp()
+        by_signing: dict[str, KeyEntry] = {}
+        if stamp is not None:
+            _check_symlink(self.path)
+            try:
+                with self.path.open('r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                raise KeyDirectoryError(f"Unreadable key directory {self.path}: {e}") from e
+            identities = data.get("identities", {}) if isinstance(data, dict) else {}
+            if not isinstance(identities, dict):
+                raise KeyDirectoryError(f"Malformed key directory {self.path}")
+            for signing_fp, record in identities.items():
+                entry = _entry_from_record(record)
+                if entry["signing_fp"] != signing_fp:
+                    raise KeyDirectoryError(f"Key directory entry does not match its fingerprint: {signing_fp}")
+                by_signing[signing_fp] = entry
+        
+        stale = [
+            entry for signing_fp, entry in (self._by_signing or {}).items()
+            if by_signing.get(signing_fp) != entry
+        ]
+        if stale:
+            from .crypto import invalidate_key_cache
+            
+            for entry in stale:
+                invalidate_key_cache(entry["signing_fp"])
+                invalidate_key_cache(entry["encryption_fp"])
+        
+        self._by_signing = by_signing
+        self._by_encryption = {entry["encryption_fp"]: entry for entry in by_signing.values()}
+        self._stamp = stamp
+    
+    def _ensure_loaded(self) -> None:
+        """Load on first use, or reload if the file changed on disk (one stat)."""
+        with self._lock:
+            if self._by_signing is None or self._file_stamp() != self._stamp:
+                self._load()
+    
+    def lookup_signing(self, signing_fp: str) -> KeyEntry | None:
+        """
+        Find identity by signing (sender) fingerprint.
+        
+        Args:
+            signing_fp: Signing key fingerprint (header.sender_fp)
+        
+        Returns:
+            KeyEntry, or None if unknown
+        """
+        self._ensure_loaded()
+        return self._by_signing.get(signing_fp)
+    
+    def lookup_encryption(self, encryption_fp: str) -> KeyEntry | None:
+        """
+        Find identity by encryption (recipient) fingerprint.
+        
+        Args:
+            encryption_fp: Encryption key fingerprint (header.recipient_fp)
+        
+        Returns:
+            KeyEntry, or None if unknown
+        """
+        self._ensure_loaded()
+        return self._by_encryption.get(encryption_fp)
+    
+    def signing_key(self, signing_fp: str) -> bytes | None:
+        """
+        Sender public key for a fingerprint (key resolver for verify_and_open_batch).
+        
+        Args:
+            signing_fp: Signing key fingerprint
+        
+        Returns:
+            32-byte ed25519 public key, or None if unknown
+        """
+        entry = self.lookup_signing(signing_fp)
+        return entry["signing_pub"] if entry is not None else None
+    
+    def entries(self) -> list[KeyEntry]:
+        """
+        All directory entries, sorted by identity name.
+        
+        Returns:
+            List of KeyEntry
+        """
+        self._ensure_loaded()
+        return sorted(self._by_signing.values(), key=lambda e: (e["identity"], e["signing_fp"]))
+    
+    def add(self, identity: str, signing_pub: bytes, encryption_pub: bytes) -> KeyEntry:
+        """
+        Add or replace an identity's public keys.
+        
+        An existing entry with the same identity name but different keys is
+        replaced (key rotation) and its cached key objects are invalidated.
+        
+        Args:
+            identity: Identity name
+            signing_pub: 32-byte ed25519 public key
+            encryption_pub: 32-byte x25519 public key
+        
+        Returns:
+            The stored KeyEntry
+        
+        Raises:
+            KeyDirectoryError: If a key has the wrong length
+        """
+        from .crypto import invalidate_key_cache
+        
+        entry = _make_entry(identity, signing_pub, encryption_pub)
+        with self._lock:
+            self._ensure_loaded()
+            stale = [
+                e for e in self._by_signing.values()
+                if e["identity"] == identity and e["signing_fp"] != entry["signing_fp"]
+            ]
+            for old in stale:
+                del self._by_signing[old["signing_fp"]]
+                invalidate_key_cache(old["signing_fp"])
+                invalidate_key_cache(old["encryption_fp"])
+            previous = self._by_signing.get(entry["signing_fp"])
+            if previous is not None and previous["encryption_fp"] != entry["encryption_fp"]:
+                invalidate_key_cache(previous["encryption_fp"])
+            self._by_signing[entry["signing_fp"]] = entry
+            self._save()
+        return entry
+    
+    def import_bundle(self, bundle: dict[str, Any] | Path) -> KeyEntry:
+        """
+        Import a public bundle (as written by `calyx_mail.py keygen`).
+        
+        Fingerprints present in the bundle must match its public keys.
+        
+        Args:
+            bundle: Bundle dict, or path to bundle JSON file
+        
+        Returns:
+            The stored KeyEntry
+        
+        Raises:
+            KeyDirectoryError: If the bundle is malformed or inconsistent
+        """
+        if isinstance(bundle, Path):
+            try:
+                with bundle.open('r', encoding='utf-8') as f:
+                    bundle = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                raise KeyDirectoryError(f"Unreadable bundle: {e}") from e
+        if not isinstance(bundle, dict):
+            raise KeyDirectoryError("Bundle must be a JSON object")
+        
+        identity = bundle.get("identity")
+        if not isinstance(identity, str) or not identity:
+            raise KeyDirectoryError("Bundle missing identity")
+        signing_pub = _b64_field(bundle, "signing_pub")
+        encryption_pub = _b64_field(bundle, "encryption_pub")
+        
+        entry = _make_entry(identity, signing_pub, encryption_pub)
+        for field in ("signing_fp", "encryption_fp"):
+            if field in bundle and bundle[field] != entry[field]:
+                raise KeyDirectoryError(f"Bundle {field} does not match its public key")
+        return self.add(identity, signing_pub, encryption_pub)
+    
+    def remove(self, fingerprint: str) -> bool:
+        """
+        Remove the identity with this signing or encryption fingerprint.
+        
+        Args:
+            fingerprint: Signing or encryption fingerprint
+        
+        Returns:
+            True if an entry was removed
+        """
+        from .crypto import invalidate_key_cache
+        
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._by_signing.get(fingerprint) or self._by_encryption.get(fingerprint)
+            if entry is None:
+                return False
+            del self._by_signing[entry["signing_fp"]]
+            invalidate_key_cache(entry["signing_fp"])
+            invalidate_key_cache(entry["encryption_fp"])
+            self._save()
+        return True
+    
+    def _save(self) -> None:
+        """Write index atomically and refresh in-memory views (lock held)."""
+        from .mailbox import _atomic_write
+        
+        identities = {
+            signing_fp: {
+                "identity": entry["identity"],
+                "signing_pub": base64.b64encode(entry["signing_pub"]).decode('ascii'),
+                "encryption_fp": entry["encryption_fp"],
+                "encryption_pub": base64.b64encode(entry["encryption_pub"]).decode('ascii'),
+            }
+            for signing_fp, entry in sorted(self._by_signing.items())
+        }
+        content = json.dumps(
+            {"version": DIRECTORY_FORMAT_VERSION, "identities": identities},
+            indent=2,
+        ).encode('utf-8')
+        _atomic_write(self.path, content)
+        
+        self._by_encryption = {entry["encryption_fp"]: entry for entry in self._by_signing.values()}
+        self._stamp = self._file_stamp()
+
+
+def _b64_field(record: dict[str, Any], field: str) -> bytes:
+    value = record.get(field)
+    if not isinstance(value, str):
+        raise KeyDirectoryError(f"Missing or invalid {field}")
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise KeyDirectoryError(f"Invalid base64 in {field}: {e}") from e
+
+
+def _make_entry(identity: str, signing_pub: bytes, encryption_pub: bytes) -> KeyEntry:
+    # Deferred: importing crypto loads PyNaCl
+    from .crypto import compute_fingerprint
+    
+    if len(signing_pub) != 32 or len(encryption_pub) != 32:
+        raise KeyDirectoryError("Public keys must be 32 bytes")
+    return {
+        "identity": identity,
+        "signing_fp": compute_fingerprint(signing_pub),
+        "signing_pub": bytes(signing_pub),
+        "encryption_fp": compute_fingerprint(encryption_pub),
+        "encryption_pub": bytes(encryption_pub),
+    }
+
+
+def _entry_from_record(record: Any) -> KeyEntry:
+    if not isinstance(record, dict) or not isinstance(record.get("identity"), str):
+        raise KeyDirectoryError("Malformed key directory entry")
+    entry = _make_entry(record["identity"], _b64_field(record, "signing_pub"), _b64_field(record, "encryption_pub"))
+    if record.get("encryption_fp", entry["encryption_fp"]) != entry["encryption_fp"]:
+        raise KeyDirectoryError(f"Key directory entry encryption_fp mismatch: {record['identity']}")
+    return entry
+
+
+_directories: dict[Path, KeyDirectory] = {}
+_directories_lock = threading.Lock()
+
+
+def get_key_directory(runtime_dir: Path) -> KeyDirectory:
+    """
+    Shared in-memory KeyDirectory for a runtime directory.
+    
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        KeyDirectory (one instance per resolved runtime path)
+    """
+    key = Path(runtime_dir).resolve()
+    with _directories_lock:
+        directory = _directories.get(key)
+        if directory is None:
+            directory = KeyDirectory(key)
+            _directories[key] = directory
+        return directory
@@ -5,13 +5,58 @@ from __future__ import annotations
 import hashlib
 import json
 import os
+import re
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
 
-from .codec import compute_envelope_hash
-from .envelope import AllowlistError, ReplayError, check_timestamp_window
-from .replay import ReplayState, check_replay as check_replay_protection
+from .allowlist import ALLOWLIST_FILENAME, Allowlist
+from .codec import (
+    BINARY_PROTOCOL_VERSION,
+    EncodingError,
+    HashedEnvelope,
+    VersionError,
+    decode_envelope,
+)
+from .header import AllowlistError, ReplayError, VerificationError, check_timestamp_window
+from .receipts import ReceiptWriter, lookup_receipt_status as _lookup_receipt_status
+
+if TYPE_CHECKING:
+    # Imported where used, to keep CLI start-up short: replay (SQLite, Bloom
+    # filter) and envelope (PyNaCl) are not needed to list the inbox or write
+    # receipts, and the inbox index, key directory, seen cache and streaming
+    # reader only by the operations that use them
+    from .inbox_index import InboxIndex
+    from .keydir import KeyDirectory
+    from .replay import ReplayState
+    from .seen_cache import SeenCache
+
+
+# Content-addressed envelope filenames: <sha256 hex>.json or <sha256 hex>.cbor
+_FILENAME_RE = re.compile(r'[0-9a-f]{64}\.(json|cbor)')
+_HASH_RE = re.compile(r'[0-9a-f]{64}')
+_SHARD_RE = re.compile(r'[0-9a-f]{2}')
+
+# Mailbox directory layouts (recorded in runtime/mailbox/layout.json)
+LAYOUT_FILENAME = "layout.json"
+LAYOUT_FLAT = "flat"          # inbox/<hash>.json
+LAYOUT_SHARDED = "sharded"    # inbox/ab/cd/<hash>.json (ab, cd = first hash bytes)
+MAILBOX_LAYOUTS = (LAYOUT_FLAT, LAYOUT_SHARDED)
+MAILBOX_BOXES = ("inbox", "outbox")
+
+# Durability of mailbox file writes
+DURABILITY_NONE = "none"    # no fsync (a crash may lose or truncate recent files)
+DURABILITY_FILE = "file"    # fsync each file before its rename (never torn)
+DURABILITY_FULL = "full"    # also fsync the directory (the rename itself survives)
+DURABILITY_LEVELS = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_FULL)
+DEFAULT_DURABILITY = DURABILITY_FILE
+
+_O_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+# Envelope files are hashed through one reusable buffer per thread
+_HASH_BUFFER_SIZE = 1 << 20
+_hash_buffers = threading.local()
 
 
 def get_mailbox_dir(runtime_dir: Path) -> Path:
@@ -20,7 +65,7 @@ def get_mailbox_dir(runtime_dir: Path) -> Path:
     
     Args:
         runtime_dir: Runtime root directory (e.g., Path("runtime"))
-        
+    
     Returns:
         Path to runtime/mailbox/ directory (created if missing)
     """
@@ -35,7 +80,7 @@ def get_keys_dir(runtime_dir: Path) -> Path:
     
     Args:
         runtime_dir: Runtime root directory
-        
+    
     Returns:
         Path to runtime/keys/ directory (created if missing)
     """
@@ -44,32 +89,42 @@ def get_keys_dir(runtime_dir: Path) -> Path:
     return keys_dir
 
 
+_allowlists: dict[Path, Allowlist] = {}
+
+
+def get_allowlist(runtime_dir: Path) -> Allowlist:
+    """
+    Sender fingerprint allowlist (runtime/mailbox/allowlist.json).
+    
+    Shared by the delivery paths: parsed once into a frozenset and
+    reloaded only when the file changes on disk.
+    
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        Allowlist (one instance per allowlist path)
+    """
+    allowlist_path = get_mailbox_dir(runtime_dir) / ALLOWLIST_FILENAME
+    key = allowlist_path.parent.resolve() / ALLOWLIST_FILENAME
+    allowlist = _allowlists.get(key)
+    if allowlist is None:
+        allowlist = Allowlist(allowlist_path)
+        _allowlists[key] = allowlist
+    return allowlist
+
+
 def load_allowlist(runtime_dir: Path) -> list[str]:
     """
     Load sender fingerprint allowlist from runtime/mailbox/allowlist.json (v0.1 with symlink check).
     
     Args:
         runtime_dir: Runtime root directory
-        
+    
     Returns:
         List of allowed sender fingerprints (empty list if file doesn't exist)
     """
-    mailbox_dir = get_mailbox_dir(runtime_dir)
-    allowlist_path = mailbox_dir / "allowlist.json"
-    
-    if not allowlist_path.exists():
-        return []
-    
-    _check_symlink(allowlist_path)
-    
-    try:
-        with allowlist_path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
-    except (json.JSONDecodeError, IOError):
-        return []
+    return get_allowlist(runtime_dir).entries
 
 
 def save_allowlist(runtime_dir: Path, fingerprints: list[str]) -> None:
@@ -81,7 +136,7 @@ def save_allowlist(runtime_dir: Path, fingerprints: list[str]) -> None:
         fingerprints: List of allowed sender fingerprints
     """
     mailbox_dir = get_mailbox_dir(runtime_dir)
-    allowlist_path = mailbox_dir / "allowlist.json"
+    allowlist_path = mailbox_dir / ALLOWLIST_FILENAME
     
     _check_symlink(allowlist_path)
     
@@ -90,188 +145,444 @@ def save_allowlist(runtime_dir: Path, fingerprints: list[str]) -> None:
     _atomic_write(allowlist_path, content)
 
 
-def load_seen_cache(runtime_dir: Path) -> list[str]:
+_seen_caches: dict[Path, SeenCache] = {}
+
+
+def get_seen_cache(runtime_dir: Path) -> SeenCache:
     """
-    Load seen message ID cache from runtime/mailbox/seen_cache.json.
+    Seen message ID cache (runtime/mailbox/seen_cache.log).
+    
+    Used for replay protection when no ReplayState is given. A v0
+    seen_cache.json is imported on first use.
     
     Args:
         runtime_dir: Runtime root directory
-        
+    
     Returns:
-        List of seen message IDs (empty list if file doesn't exist)
+        SeenCache (one instance per cache path)
     """
-    mailbox_dir = get_mailbox_dir(runtime_dir)
-    cache_path = mailbox_dir / "seen_cache.json"
+    from .seen_cache import SEEN_CACHE_FILENAME, SeenCache
     
-    if not cache_path.exists():
-        return []
+    cache_path = get_mailbox_dir(runtime_dir) / SEEN_CACHE_FILENAME
+    _check_symlink(cache_path)
+    key = cache_path.resolve()
+    cache = _seen_caches.get(key)
+    if cache is None:
+        cache = SeenCache(cache_path)
+        _seen_caches[key] = cache
+    return cache
+
+
+def load_seen_cache(runtime_dir: Path) -> list[str]:
+    """
+    Load seen message ID cache (see get_seen_cache()).
     
-    try:
-        with cache_path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
-    except (json.JSONDecodeError, IOError):
-        return []
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        List of seen message IDs, oldest first (empty list if there is no cache)
+    """
+    return list(get_seen_cache(runtime_dir))
 
 
 def save_seen_cache(runtime_dir: Path, msg_ids: list[str]) -> None:
     """
-    Save seen message ID cache to runtime/mailbox/seen_cache.json.
+    Replace the seen message ID cache (see get_seen_cache()).
     
-    Prunes entries older than 24 hours (based on message ID timestamp if available).
     Limits cache to 10,000 entries (FIFO eviction).
     
     Args:
         runtime_dir: Runtime root directory
         msg_ids: List of seen message IDs
     """
-    mailbox_dir = get_mailbox_dir(runtime_dir)
-    cache_path = mailbox_dir / "seen_cache.json"
-    
-    # Limit to 10,000 entries (FIFO)
-    if len(msg_ids) > 10000:
-        msg_ids = msg_ids[-10000:]
-    
-    with cache_path.open('w', encoding='utf-8') as f:
-        json.dump(msg_ids, f, indent=2)
+    get_seen_cache(runtime_dir).replace(msg_ids)
 
 
-def add_to_seen_cache(runtime_dir: Path, msg_id: str) -> None:
+def add_to_seen_cache(runtime_dir: Path, msg_id: str) -> bool:
     """
-    Add message ID to seen cache.
+    Add message ID to seen cache (one append, no rewrite).
     
     Args:
         runtime_dir: Runtime root directory
         msg_id: Message ID to add
+    
+    Returns:
+        True if the message ID was new
     """
-    seen = load_seen_cache(runtime_dir)
-    if msg_id not in seen:
-        seen.append(msg_id)
-    save_seen_cache(runtime_dir, seen)
+    return get_seen_cache(runtime_dir).add(msg_id)
 
 
 def _check_symlink(path: Path) -> None:
     """
     Check if path is a symlink and reject if so.
     
-    This is a baseline check. For additional hardening, see _atomic_write_fd()
-    which uses fd-based operations where platform supports it.
+    This is a baseline check. _atomic_write() additionally creates its
+    temporary file with O_NOFOLLOW where the platform supports it.
     """
     if path.is_symlink():
         raise SecurityError(f"Symlinks not allowed: {path}")
 
 
-def _atomic_write(path: Path, content: bytes) -> None:
+def _atomic_write(
+    path: Path,
+    content: bytes,
+    durability: str = DEFAULT_DURABILITY,
+    sync_dirs: set[Path] | None = None,
+) -> None:
     """
-    Atomically write content to file (temporary file + atomic rename).
+    Atomically write content to file (unique temporary file + atomic rename).
+    
+    The temporary file is created next to path under a unique name with
+    O_CREAT | O_EXCL | O_NOFOLLOW (mode 0600), so concurrent writers of the
+    same file never share or follow a temporary file; the last rename wins
+    (for content-addressed files every writer has the same content).
     
-    Uses baseline symlink check. For additional hardening on platforms that
-    support it, see _atomic_write_fd() which uses fd-based operations.
+    Args:
+        path: Target file path
+        content: Content to write (bytes)
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+        sync_dirs: With DURABILITY_FULL, collect the directory here instead
+                   of syncing it now (group commit, see _fsync_dirs())
+    
+    Raises:
+        SecurityError: If path is a symlink
+        OSError: If the write fails (the temporary file is removed)
     """
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
     _check_symlink(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix('.tmp')
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+    created = False
     try:
-        tmp_path.write_bytes(content)
-        tmp_path.replace(path)
+        fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_NOFOLLOW, 0o600)
+        created = True
+        try:
+            view = memoryview(content)
+            while view:
+                view = view[os.write(fd, view):]
+            if durability != DURABILITY_NONE:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
     except Exception as e:
-        if tmp_path.exists():
-            tmp_path.unlink()
+        if created:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
         raise OSError(f"Failed to atomically write {path}: {e}") from e
+    
+    if durability == DURABILITY_FULL:
+        if sync_dirs is None:
+            _fsync_dirs([path.parent])
+        else:
+            sync_dirs.add(path.parent)
 
 
-def _atomic_write_fd(path: Path, content: bytes) -> None:
-    """
-    Atomically write content using fd-based operations (best-effort hardening).
-    
-    Uses os.open() with O_NOFOLLOW where platform supports it to prevent
-    symlink/TOCTOU attacks. Falls back to _atomic_write() if not portable.
-    
-    Platform support:
-    - Unix-like (Linux, macOS): O_NOFOLLOW supported
-    - Windows: Not supported, falls back to baseline
-    
-    Args:
-        path: Target file path
-        content: Content to write (bytes)
-    """
-    import os
-    import stat
-    
-    # Check if platform supports O_NOFOLLOW
-    try:
-        O_NOFOLLOW = os.O_NOFOLLOW
-    except AttributeError:
-        # Platform doesn't support O_NOFOLLOW (e.g., Windows)
-        # Fall back to baseline atomic write
-        _atomic_write(path, content)
+def _fsync_dirs(dirs: Iterable[Path]) -> None:
+    """fsync directories so renames into them survive a crash (no-op where unsupported)."""
+    o_directory = getattr(os, "O_DIRECTORY", None)
+    if o_directory is None:
         return
-    
-    # Unix-like platform: use fd-based operations
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix('.tmp')
-    
-    try:
-        # Open temporary file with O_NOFOLLOW (prevents symlink attacks)
-        tmp_fd = os.open(
-            str(tmp_path),
-            os.O_WRONLY | os.O_CREAT | os.O_EXCL | O_NOFOLLOW,
-            stat.S_IRUSR | stat.S_IWUSR  # 0600 permissions
-        )
-        
+    for directory in dirs:
+        fd = os.open(str(directory), os.O_RDONLY | o_directory)
         try:
-            # Write content
-            os.write(tmp_fd, content)
-            os.fsync(tmp_fd)  # Ensure data is written to disk
+            os.fsync(fd)
         finally:
-            os.close(tmp_fd)
-        
-        # Atomic rename (POSIX: atomic, Windows: best-effort)
-        tmp_path.replace(path)
-        
-    except OSError as e:
-        # Clean up temporary file on error
-        if tmp_path.exists():
-            tmp_path.unlink()
-        raise OSError(f"Failed to atomically write {path}: {e}") from e
+            os.close(fd)
 
 
 def _verify_content_hash(path: Path, expected_hash: str) -> bool:
     """
     Verify that file content, when canonicalized, matches expected hash.
     
-    Note: File content may be pretty-printed, but hash is computed from canonical form.
+    Envelope files hold their canonical bytes, so this is a SHA-256 of the
+    file itself with no parsing. Files written before that (pretty-printed
+    JSON) fall back to streaming the canonical hash from the parsed file.
     """
-    if not path.exists():
-        return False
     try:
-        # Read and parse JSON
-        with path.open('r', encoding='utf-8') as f:
-            envelope = json.load(f)
+        if _file_sha256(path) == expected_hash:
+            return True
         
-        # Compute canonical hash
-        from .codec import compute_envelope_hash
-        actual_hash = compute_envelope_hash(envelope)
+        # Pre-canonical storage: hash the canonical form (JSON or v0.2 binary)
+        from .stream import EnvelopeFile
+        with EnvelopeFile(path) as envelope_file:
+            actual_hash = envelope_file.content_hash()
         return actual_hash == expected_hash
     except Exception:
         return False
 
 
+def _file_sha256(path: Path) -> str:
+    """SHA-256 hex digest of a file, read into a reusable per-thread buffer."""
+    buffer = getattr(_hash_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _hash_buffers.buffer = memoryview(bytearray(_HASH_BUFFER_SIZE))
+    digest = hashlib.sha256()
+    fd = os.open(str(path), os.O_RDONLY | _O_NOFOLLOW)
+    with os.fdopen(fd, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(buffer[:count])
+    return digest.hexdigest()
+
+
 def _validate_filename(filename: str) -> bool:
     """
-    Validate that filename matches content-addressed pattern: ^[0-9a-f]{64}\\.json$
+    Validate that filename matches content-addressed pattern: ^[0-9a-f]{64}\\.(json|cbor)$
+    
+    ".json" holds v0.1/legacy v0 envelopes, ".cbor" holds binary v0.2 envelopes.
     
     Args:
         filename: Filename to validate (e.g., "abc123.json")
-        
+    
     Returns:
         True if filename matches pattern, False otherwise
     """
-    import re
-    pattern = r'^[0-9a-f]{64}\.json$'  # Raw string: \. matches literal dot
-    return bool(re.match(pattern, filename))
+    return _FILENAME_RE.fullmatch(filename) is not None
+
+
+def is_content_hash(value: str) -> bool:
+    """Return True if value is a full lowercase hex SHA-256 content hash."""
+    return _HASH_RE.fullmatch(value) is not None
+
+
+def get_mailbox_layout(runtime_dir: Path) -> str:
+    """
+    Directory layout of the inbox and outbox (runtime/mailbox/layout.json).
+    
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        LAYOUT_FLAT (default when no marker exists) or LAYOUT_SHARDED
+    
+    Raises:
+        SecurityError: If the marker is a symlink
+        ValueError: If the marker is unreadable or names an unknown layout
+    """
+    layout_path = get_mailbox_dir(runtime_dir) / LAYOUT_FILENAME
+    try:
+        _check_symlink(layout_path)
+        with layout_path.open('r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return LAYOUT_FLAT
+    except (json.JSONDecodeError, IOError) as e:
+        raise ValueError(f"Unreadable mailbox layout marker {layout_path}: {e}") from e
+    
+    layout = data.get("layout") if isinstance(data, dict) else None
+    if layout not in MAILBOX_LAYOUTS:
+        raise ValueError(f"Unknown mailbox layout: {layout!r}")
+    return layout
+
+
+def set_mailbox_layout(runtime_dir: Path, layout: str) -> None:
+    """
+    Record the mailbox directory layout (atomic write).
+    
+    This only changes where new envelopes are written; use
+    migrate_mailbox_layout() to move existing files.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        layout: LAYOUT_FLAT or LAYOUT_SHARDED
+    """
+    if layout not in MAILBOX_LAYOUTS:
+        raise ValueError(f"Unknown mailbox layout: {layout!r}")
+    layout_path = get_mailbox_dir(runtime_dir) / LAYOUT_FILENAME
+    _atomic_write(layout_path, json.dumps({"layout": layout}, indent=2).encode('utf-8'))
+
+
+def layout_path(box_dir: Path, filename: str, layout: str) -> Path:
+    """
+    Location of a content-addressed envelope file under a box directory.
+    
+    Args:
+        box_dir: Inbox or outbox directory
+        filename: Content-addressed filename (<hash>.json or <hash>.cbor)
+        layout: LAYOUT_FLAT or LAYOUT_SHARDED
+    
+    Returns:
+        box_dir/<filename>, or box_dir/<h[0:2]>/<h[2:4]>/<filename> when sharded
+    """
+    if layout == LAYOUT_SHARDED:
+        return box_dir / filename[0:2] / filename[2:4] / filename
+    return box_dir / filename
+
+
+def iter_envelope_paths(box_dir: Path) -> Iterator[Path]:
+    """
+    Envelope files in a box directory, in either layout (or a mix of both).
+    
+    Only content-addressed regular files are yielded; symlinks (files or
+    shard directories), temporary files, and foreign names are skipped.
+    Uses os.scandir so file type checks come from the directory entries
+    instead of one stat per file.
+    
+    Args:
+        box_dir: Inbox or outbox directory
+    
+    Yields:
+        Paths of envelope files
+    """
+    try:
+        top = os.scandir(box_dir)
+    except FileNotFoundError:
+        return
+    with top:
+        for entry in top:
+            if entry.is_symlink():
+                continue
+            if _FILENAME_RE.fullmatch(entry.name):
+                if entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path)
+            elif _SHARD_RE.fullmatch(entry.name) and entry.is_dir(follow_symlinks=False):
+                yield from _iter_shard(entry.path, entry.name)
+
+
+def _iter_shard(shard_dir: str, prefix: str) -> Iterator[Path]:
+    """Envelope files under a first-level shard directory (<ab>/<cd>/<hash>.*)."""
+    with os.scandir(shard_dir) as level1:
+        for sub in level1:
+            if sub.is_symlink() or not _SHARD_RE.fullmatch(sub.name):
+                continue
+            if not sub.is_dir(follow_symlinks=False):
+                continue
+            expected = prefix + sub.name
+            with os.scandir(sub.path) as level2:
+                for entry in level2:
+                    if (
+                        entry.name.startswith(expected)
+                        and _FILENAME_RE.fullmatch(entry.name)
+                        and not entry.is_symlink()
+                        and entry.is_file(follow_symlinks=False)
+                    ):
+                        yield Path(entry.path)
+
+
+def find_envelope(box_dir: Path, content_hash: str) -> Path | None:
+    """
+    Locate an envelope by content hash in either layout and either suffix.
+    
+    Args:
+        box_dir: Inbox or outbox directory
+        content_hash: 64-char hex content hash
+    
+    Returns:
+        Path of the envelope file, or None if not present
+    """
+    if not is_content_hash(content_hash):
+        return None
+    for suffix in (".json", ".cbor"):
+        filename = content_hash + suffix
+        for layout in MAILBOX_LAYOUTS:
+            path = layout_path(box_dir, filename, layout)
+            if path.is_file() and not path.is_symlink():
+                return path
+    return None
+
+
+def migrate_mailbox_layout(runtime_dir: Path, layout: str = LAYOUT_SHARDED) -> int:
+    """
+    Move existing inbox/outbox envelopes into the given layout (one-shot).
+    
+    The layout marker is written first, so concurrent writers already use
+    the new layout while files are being moved; readers accept both layouts,
+    so an interrupted migration can simply be re-run. Files whose target
+    already exists are duplicates (same content hash) and are removed.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        layout: Target layout (default LAYOUT_SHARDED)
+    
+    Returns:
+        Number of files moved
+    """
+    set_mailbox_layout(runtime_dir, layout)
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    
+    moved = 0
+    for box in MAILBOX_BOXES:
+        box_dir = mailbox_dir / box
+        if not box_dir.exists():
+            continue
+        _check_symlink(box_dir)
+        
+        for path in list(iter_envelope_paths(box_dir)):
+            target = layout_path(box_dir, path.name, layout)
+            if target == path:
+                continue
+            if target.exists():
+                path.unlink()
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(path, target)
+            moved += 1
+        
+        if layout == LAYOUT_FLAT:
+            _remove_empty_shards(box_dir)
+    
+    return moved
+
+
+def _remove_empty_shards(box_dir: Path) -> None:
+    """Remove shard directories left empty after migrating to the flat layout."""
+    for shard in box_dir.iterdir():
+        if not _SHARD_RE.fullmatch(shard.name) or shard.is_symlink() or not shard.is_dir():
+            continue
+        for sub in shard.iterdir():
+            if _SHARD_RE.fullmatch(sub.name) and not sub.is_symlink() and sub.is_dir():
+                try:
+                    sub.rmdir()
+                except OSError:
+                    pass  # Not empty
+        try:
+            shard.rmdir()
+        except OSError:
+            pass
+
+
+def _envelope_filename(hashed: HashedEnvelope) -> str:
+    """
+    Content-addressed filename for envelope: <sha256>.json, or <sha256>.cbor for v0.2.
+    """
+    suffix = ".cbor" if hashed.version == BINARY_PROTOCOL_VERSION else ".json"
+    return f"{hashed.content_hash}{suffix}"
+
+
+def _serialize_envelope(hashed: HashedEnvelope) -> bytes:
+    """
+    On-disk bytes for envelope: its canonical bytes (the bytes the filename hashes).
+    
+    JSON envelopes are stored compact; use `calyx_mail.py show` to read one.
+    Files written pretty-printed by earlier versions stay readable and valid.
+    """
+    return hashed.canonical_bytes
+
+
+def load_envelope(path: Path) -> dict[str, Any]:
+    """
+    Load envelope file of any supported version (.json or binary .cbor).
+    
+    Args:
+        path: Envelope file path
+    
+    Returns:
+        Envelope dict
+    
+    Raises:
+        SecurityError: If path is a symlink
+        EncodingError: If file content cannot be decoded
+        VersionError: If protocol_version is unknown
+    """
+    _check_symlink(path)
+    return decode_envelope(path.read_bytes())
 
 
 class SecurityError(Exception):
@@ -279,14 +590,19 @@ class SecurityError(Exception):
     pass
 
 
-def write_outbox(envelope_json: dict[str, Any], runtime_dir: Path) -> Path:
+def write_outbox(
+    envelope_json: dict[str, Any] | HashedEnvelope,
+    runtime_dir: Path,
+    durability: str = DEFAULT_DURABILITY,
+) -> Path:
     """
     Write envelope to outbox (content-addressed filename, v0.1).
     
     Args:
-        envelope_json: Envelope dict
+        envelope_json: Envelope dict, or HashedEnvelope (cached hash is reused)
         runtime_dir: Runtime root directory
-        
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+    
     Returns:
         Path to written envelope file
     """
@@ -296,62 +612,194 @@ def write_outbox(envelope_json: dict[str, Any], runtime_dir: Path) -> Path:
     
     _check_symlink(outbox_dir)
     
-    # Compute content hash (full SHA256)
-    content_hash = compute_envelope_hash(envelope_json)
+    # Compute content hash (full SHA256, once per envelope)
+    hashed = HashedEnvelope.wrap(envelope_json)
     
-    # Content-addressed filename
-    envelope_path = outbox_dir / f"{content_hash}.json"
+    return _store_envelope(outbox_dir, hashed, get_mailbox_layout(runtime_dir), durability)
+
+
+def write_outbox_stream(
+    blocks: Iterable[bytes],
+    runtime_dir: Path,
+    binary: bool = False,
+    durability: str = DEFAULT_DURABILITY,
+) -> Path:
+    """
+    Write an envelope given as canonical bytes, block by block, to the outbox.
     
-    # Validate filename pattern (content-addressed: 64 hex chars)
-    if not _validate_filename(envelope_path.name):
-        raise SecurityError(f"Invalid filename pattern: {envelope_path.name} (expected ^[0-9a-f]{{64}}\\.json$)")
+    For chunked envelopes too large to hold in memory (see
+    envelope.create_envelope_stream()). The blocks go to a temporary file in
+    the outbox while their SHA256 is computed, and the file is then renamed
+    to its content-addressed name. The blocks are not parsed: they must
+    already be the canonical encoding.
     
-    # Check if file already exists (same content)
-    if envelope_path.exists():
-        if _verify_content_hash(envelope_path, content_hash):
-            return envelope_path
-        else:
-            raise SecurityError(f"Hash mismatch: filename hash {content_hash} does not match content")
+    Args:
+        blocks: Canonical envelope bytes, in order
+        runtime_dir: Runtime root directory
+        binary: True for a v0.2 envelope (.cbor), False for v0.1 (.json)
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
     
-    # Atomic write (pretty-printed for readability)
-    content = json.dumps(envelope_json, indent=2).encode('utf-8')
-    _atomic_write(envelope_path, content)
+    Returns:
+        Path to written envelope file
     
-    # Verify hash: filename should match canonical hash
-    if envelope_path.stem != content_hash:
-        raise SecurityError(f"Filename hash mismatch: {envelope_path.stem} != {content_hash}")
+    Raises:
+        SecurityError: If symlink or hash mismatch detected
+        OSError: If the write fails (the temporary file is removed)
+    """
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    outbox_dir = mailbox_dir / "outbox"
+    outbox_dir.mkdir(parents=True, exist_ok=True)
+    
+    _check_symlink(outbox_dir)
+    
+    # Not a content-addressed name, so listings and the daemon skip it
+    tmp_path = outbox_dir / f".stream.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    digest = hashlib.sha256()
+    fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_NOFOLLOW, 0o600)
+    try:
+        try:
+            for block in blocks:
+                digest.update(block)
+                view = memoryview(block)
+                while view:
+                    view = view[os.write(fd, view):]
+            if durability != DURABILITY_NONE:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        content_hash = digest.hexdigest()
+        filename = f"{content_hash}{'.cbor' if binary else '.json'}"
+        envelope_path, stored = _envelope_target(
+            outbox_dir, filename, content_hash, get_mailbox_layout(runtime_dir), durability,
+        )
+        if stored:
+            os.unlink(tmp_path)
+            return envelope_path
+        _check_symlink(envelope_path)
+        os.replace(tmp_path, envelope_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
     
+    if durability == DURABILITY_FULL:
+        _fsync_dirs([envelope_path.parent])
     return envelope_path
 
 
 def deliver_to_inbox(
-    envelope_json: dict[str, Any],
+    envelope_json: dict[str, Any] | HashedEnvelope,
     runtime_dir: Path,
     replay_state: ReplayState | None = None,
     check_allowlist: bool = True,
     check_replay: bool = True,
     check_timestamp: bool = True,
+    key_directory: KeyDirectory | None = None,
+    durability: str = DEFAULT_DURABILITY,
 ) -> Path:
     """
     Deliver envelope to inbox (v0.1 with hardening).
     
+    The envelope is canonicalized and hashed once; the same HashedEnvelope
+    feeds replay protection and the content-addressed filename.
+    
+    If key_directory is given, the sender is resolved from header.sender_fp
+    and the signature is verified before the envelope is recorded for replay
+    protection or written.
+    
+    A replay is rejected before anything is written, but the replay key is
+    recorded last, once the file and its index row are written: a failed
+    write (ENOSPC, a locked index) leaves nothing recorded, so the same
+    delivery can simply be retried. Two concurrent deliveries of one
+    envelope both write the same content-addressed file; the second to
+    record the key gets ReplayError.
+    
     Args:
-        envelope_json: Envelope dict
+        envelope_json: Envelope dict, or HashedEnvelope (cached hash is reused)
         runtime_dir: Runtime root directory
         replay_state: Replay state database (required if check_replay=True)
         check_allowlist: If True, verify sender is in allowlist
         check_replay: If True, verify envelope is not a replay
         check_timestamp: If True, verify timestamp window
-        
+        key_directory: Optional key directory for sender signature verification
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+    
     Returns:
         Path to written envelope file
-        
+    
     Raises:
         AllowlistError: If sender is not in allowlist
         ReplayError: If envelope is a replay or timestamp invalid
+        VerificationError: If sender is unknown or signature is invalid (key_directory set)
         SecurityError: If symlink or hash mismatch detected
+        OSError, sqlite3.Error: If the write fails (nothing recorded; retryable)
     """
-    header = envelope_json.get("header", {})
+    allowlist = get_allowlist(runtime_dir).fingerprints if check_allowlist else None
+    hashed = _check_delivery(envelope_json, allowlist, check_timestamp, key_directory)
+    msg_id = hashed.header["msg_id"]
+    
+    # Check replay protection (secondary, for recent duplicates)
+    if check_replay:
+        if replay_state is None:
+            # Fallback to legacy msg_id cache for backward compatibility
+            seen = msg_id in get_seen_cache(runtime_dir)
+        else:
+            # Use SQLite replay state (v0.1)
+            seen = replay_state.has_replay_key(hashed.content_hash, hashed.header.get("timestamp", ""))
+        if seen:
+            raise _replay_error(hashed, replay_state)
+    
+    # Write to inbox
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    inbox_dir = mailbox_dir / "inbox"
+    inbox_dir.mkdir(parents=True, exist_ok=True)
+    
+    _check_symlink(inbox_dir)
+    
+    envelope_path = _store_envelope(inbox_dir, hashed, get_mailbox_layout(runtime_dir), durability)
+    
+    # Keep the header index in step with the inbox
+    get_inbox_index(runtime_dir).add(hashed, envelope_path.stat().st_size)
+    
+    # Record the replay key once the envelope is stored (atomic check-and-insert)
+    if check_replay:
+        if replay_state is None:
+            if not add_to_seen_cache(runtime_dir, msg_id):
+                raise _replay_error(hashed, replay_state)
+        else:
+            from .replay import check_replay as check_replay_protection
+            check_replay_protection(hashed, replay_state)
+    
+    return envelope_path
+
+
+def _check_delivery(
+    envelope_json: dict[str, Any] | HashedEnvelope,
+    allowlist: frozenset[str] | None,
+    check_timestamp: bool,
+    key_directory: KeyDirectory | None,
+) -> HashedEnvelope:
+    """
+    Pre-replay delivery checks shared by deliver_to_inbox() and deliver_many().
+    
+    Args:
+        envelope_json: Envelope dict, or HashedEnvelope
+        allowlist: Allowed sender fingerprints (None = no allowlist check)
+        check_timestamp: If True, verify timestamp window
+        key_directory: Optional key directory for sender signature verification
+    
+    Returns:
+        HashedEnvelope (canonicalized and hashed once, for replay key and filename)
+    """
+    if isinstance(envelope_json, HashedEnvelope):
+        header = envelope_json.header
+    else:
+        header = envelope_json.get("header", {})
     sender_fp = header.get("sender_fp")
     msg_id = header.get("msg_id")
     timestamp = header.get("timestamp")
@@ -360,8 +808,7 @@ def deliver_to_inbox(
         raise ValueError("Envelope missing required header fields")
     
     # Check allowlist (deny-by-default)
-    if check_allowlist:
-        allowlist = load_allowlist(runtime_dir)
+    if allowlist is not None:
         if sender_fp not in allowlist:
             raise AllowlistError(f"Sender fingerprint not in allowlist: {sender_fp}")
     
@@ -370,20 +817,125 @@ def deliver_to_inbox(
         if not check_timestamp_window(timestamp):
             raise ReplayError(f"Timestamp validation failed: {timestamp}")
     
-    # Check replay protection (secondary, for recent duplicates)
-    if check_replay:
-        if replay_state is None:
-            # Fallback to legacy JSON cache for backward compatibility
-            seen_cache = load_seen_cache(runtime_dir)
-            if msg_id in seen_cache:
-                raise ReplayError(f"Message ID already seen: {msg_id}")
-            add_to_seen_cache(runtime_dir, msg_id)
-        else:
-            # Use SQLite replay state (v0.1)
-            check_replay_protection(envelope_json, replay_state)
+    # Verify sender signature (resolved by fingerprint)
+    if key_directory is not None:
+        sender_signing_pub = key_directory.signing_key(sender_fp)
+        if sender_signing_pub is None:
+            raise VerificationError(f"Unknown sender fingerprint: {sender_fp}")
+        raw_envelope = envelope_json.envelope if isinstance(envelope_json, HashedEnvelope) else envelope_json
+        from .envelope import verify_envelope
+        verify_envelope(raw_envelope, sender_signing_pub)
+    
+    # Canonicalize and hash once for replay key and filename
+    return HashedEnvelope.wrap(envelope_json)
+
+
+class DeliveryResult:
+    """Outcome of one envelope in deliver_many()."""
+    
+    # A plain slotted class: importing dataclasses (inspect, ast, dis) would
+    # dominate the CLI's import time
+    __slots__ = ("index", "msg_id", "path", "error")
+    
+    def __init__(
+        self,
+        index: int,
+        msg_id: str | None,
+        path: Path | None = None,
+        error: Exception | None = None,
+    ):
+        self.index = index
+        self.msg_id = msg_id
+        self.path = path
+        self.error = error
+    
+    def __repr__(self) -> str:
+        return f"DeliveryResult(index={self.index!r}, msg_id={self.msg_id!r}, path={self.path!r}, error={self.error!r})"
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DeliveryResult):
+            return NotImplemented
+        return (self.index, self.msg_id, self.path, self.error) == (other.index, other.msg_id, other.path, other.error)
+    
+    @property
+    def ok(self) -> bool:
+        """True if the envelope was delivered (or was already in the inbox)."""
+        return self.error is None
+
+
+def deliver_many(
+    envelopes: Iterable[dict[str, Any] | HashedEnvelope],
+    runtime_dir: Path,
+    replay_state: ReplayState | None = None,
+    check_allowlist: bool = True,
+    check_replay: bool = True,
+    check_timestamp: bool = True,
+    key_directory: KeyDirectory | None = None,
+    durability: str = DEFAULT_DURABILITY,
+) -> list[DeliveryResult]:
+    """
+    Deliver a burst of envelopes to the inbox (batch counterpart of deliver_to_inbox).
+    
+    Checks are the same as deliver_to_inbox(), but shared state is touched
+    once per batch: the allowlist and layout are loaded once, replay keys
+    of the written envelopes are recorded last, as in deliver_to_inbox(),
+    with ReplayState.admit_many() (one transaction, one WAL commit) or one
+    append to the legacy seen cache, and the header index is updated in
+    one transaction. With DURABILITY_FULL each inbox
+    directory is fsynced once after the batch instead of once per file.
+    A failing envelope does not stop the batch: its result carries the
+    exception.
+    
+    Args:
+        envelopes: Envelope dicts, or HashedEnvelopes
+        runtime_dir: Runtime root directory
+        replay_state: Replay state database (legacy msg_id cache if None)
+        check_allowlist: If True, verify senders are in allowlist
+        check_replay: If True, reject replays
+        check_timestamp: If True, verify timestamp windows
+        key_directory: Optional key directory for sender signature verification
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+    
+    Returns:
+        One DeliveryResult per envelope, in input order
+    """
+    envelopes = list(envelopes)
+    results = []
+    for index, envelope_json in enumerate(envelopes):
+        header = envelope_json.header if isinstance(envelope_json, HashedEnvelope) else envelope_json.get("header")
+        msg_id = header.get("msg_id") if isinstance(header, dict) else None
+        results.append(DeliveryResult(index=index, msg_id=msg_id))
+    
+    allowlist = get_allowlist(runtime_dir).fingerprints if check_allowlist else None
+    
+    # Per-envelope checks before replay admission
+    pending: list[tuple[DeliveryResult, HashedEnvelope]] = []
+    for result, envelope_json in zip(results, envelopes):
+        try:
+            pending.append((result, _check_delivery(envelope_json, allowlist, check_timestamp, key_directory)))
+        except Exception as e:
+            result.error = e
     
-    # Compute content hash (full SHA256)
-    content_hash = compute_envelope_hash(envelope_json)
+    # Reject replays (including repeats within the batch) before writing
+    if check_replay and pending:
+        accepted = []
+        batch_keys = set()
+        for result, hashed in pending:
+            if replay_state is None:
+                key = hashed.header["msg_id"]
+                seen = key in batch_keys or key in get_seen_cache(runtime_dir)
+            else:
+                key = hashed.content_hash
+                seen = key in batch_keys or replay_state.has_replay_key(key, hashed.header.get("timestamp", ""))
+            if seen:
+                result.error = _replay_error(hashed, replay_state)
+                continue
+            batch_keys.add(key)
+            accepted.append((result, hashed))
+        pending = accepted
+    
+    if not pending:
+        return results
     
     # Write to inbox
     mailbox_dir = get_mailbox_dir(runtime_dir)
@@ -392,23 +944,86 @@ def deliver_to_inbox(
     
     _check_symlink(inbox_dir)
     
-    # Content-addressed filename
-    envelope_path = inbox_dir / f"{content_hash}.json"
+    layout = get_mailbox_layout(runtime_dir)
+    stored = []
+    indexed = []
+    sync_dirs: set[Path] = set()
+    for result, hashed in pending:
+        try:
+            result.path = _store_envelope(inbox_dir, hashed, layout, durability, sync_dirs)
+            indexed.append((hashed, result.path.stat().st_size))
+            stored.append((result, hashed))
+        except Exception as e:
+            result.error = e
+    _fsync_dirs(sorted(sync_dirs, reverse=True))
     
-    # Validate filename pattern (content-addressed: 64 hex chars)
-    if not _validate_filename(envelope_path.name):
-        raise SecurityError(f"Invalid filename pattern: {envelope_path.name} (expected ^[0-9a-f]{{64}}\\.json$)")
+    # Keep the header index in step with the inbox (one transaction)
+    get_inbox_index(runtime_dir).add_many(indexed)
     
-    # Check if file already exists (same content)
-    if envelope_path.exists():
-        if _verify_content_hash(envelope_path, content_hash):
-            return envelope_path
+    # Record replay keys of the stored envelopes last (see deliver_to_inbox()):
+    # one append to the legacy cache, or one ReplayState transaction
+    if check_replay and stored:
+        if replay_state is None:
+            recorded = get_seen_cache(runtime_dir).add_many(hashed.header["msg_id"] for _, hashed in stored)
         else:
-            raise SecurityError(f"Hash mismatch: filename hash {content_hash} does not match content")
+            recorded = replay_state.admit_many(hashed for _, hashed in stored)
+        for (result, hashed), is_new in zip(stored, recorded):
+            if not is_new:
+                # Recorded concurrently since the check above
+                result.error = _replay_error(hashed, replay_state)
+    
+    return results
+
+
+def _replay_error(hashed: HashedEnvelope, replay_state: ReplayState | None) -> Exception:
+    """ReplayError for a replayed envelope (replay.ReplayError with SQLite replay state)."""
+    if replay_state is None:
+        return ReplayError(f"Message ID already seen: {hashed.header['msg_id']}")
+    from .replay import ReplayError as ReplayStateError
+    return ReplayStateError(f"Envelope already seen: {hashed.content_hash[:16]}...")
+
+
+def _store_envelope(
+    box_dir: Path,
+    hashed: HashedEnvelope,
+    layout: str,
+    durability: str = DEFAULT_DURABILITY,
+    sync_dirs: set[Path] | None = None,
+) -> Path:
+    """
+    Write envelope to its content-addressed path under box_dir (idempotent).
+    
+    An existing file with the same name in either layout counts as already
+    stored, so a partially migrated mailbox never holds two copies.
+    
+    Args:
+        box_dir: Inbox or outbox directory (already symlink-checked)
+        hashed: Hashed envelope
+        layout: Layout for new files
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+        sync_dirs: Collects directories to fsync after a batch (DURABILITY_FULL)
+    
+    Returns:
+        Path to the envelope file
+    
+    Raises:
+        SecurityError: If symlink or hash mismatch detected
+    """
+    content_hash = hashed.content_hash
+    filename = _envelope_filename(hashed)
+    
+    # Validate filename pattern (content-addressed: 64 hex chars)
+    if not _validate_filename(filename):
+        raise SecurityError(f"Invalid filename pattern: {filename} (expected ^[0-9a-f]{{64}}\\.(json|cbor)$)")
+    
+    # File content: canonical bytes (JSON for v0.1/v0, binary for v0.2)
+    content = _serialize_envelope(hashed)
     
-    # Atomic write (pretty-printed for readability)
-    content = json.dumps(envelope_json, indent=2).encode('utf-8')
-    _atomic_write(envelope_path, content)
+    envelope_path, stored = _envelope_target(box_dir, filename, content_hash, layout, durability, sync_dirs)
+    if stored:
+        return envelope_path
+    
+    _atomic_write(envelope_path, content, durability, sync_dirs)
     
     # Verify hash: filename should match canonical hash
     if envelope_path.stem != content_hash:
@@ -417,15 +1032,122 @@ def deliver_to_inbox(
     return envelope_path
 
 
-def list_inbox(runtime_dir: Path) -> list[dict[str, Any]]:
+def _envelope_target(
+    box_dir: Path,
+    filename: str,
+    content_hash: str,
+    layout: str,
+    durability: str = DEFAULT_DURABILITY,
+    sync_dirs: set[Path] | None = None,
+) -> tuple[Path, bool]:
     """
-    List envelopes in inbox (headers only, no ciphertext).
+    Path to store an envelope at, creating its shard directory if needed.
+    
+    Args:
+        box_dir: Inbox or outbox directory (already symlink-checked)
+        filename: Content-addressed filename (already validated)
+        content_hash: Content hash the filename carries
+        layout: Layout for new files
+        durability: DURABILITY_NONE, DURABILITY_FILE or DURABILITY_FULL
+        sync_dirs: Collects directories to fsync after a batch (DURABILITY_FULL)
+    
+    Returns:
+        (path, stored): stored is True if the envelope already exists there
+    
+    Raises:
+        SecurityError: If symlink or hash mismatch detected
+    """
+    # Check if file already exists (same content)
+    envelope_path = layout_path(box_dir, filename, layout)
+    for existing in (envelope_path, *(
+        layout_path(box_dir, filename, other) for other in MAILBOX_LAYOUTS if other != layout
+    )):
+        if existing.exists():
+            if _verify_content_hash(existing, content_hash):
+                return existing, True
+            raise SecurityError(f"Hash mismatch: filename hash {content_hash} does not match content")
+    
+    if layout == LAYOUT_SHARDED:
+        if durability == DURABILITY_FULL and not envelope_path.parent.is_dir():
+            # New shard directories must reach their parents too
+            new_dirs = [envelope_path.parent.parent, box_dir]
+            if sync_dirs is None:
+                envelope_path.parent.mkdir(parents=True, exist_ok=True)
+                _fsync_dirs(new_dirs)
+            else:
+                sync_dirs.update(new_dirs)
+        envelope_path.parent.mkdir(parents=True, exist_ok=True)
+        _check_symlink(envelope_path.parent.parent)
+        _check_symlink(envelope_path.parent)
+    
+    return envelope_path, False
+
+
+_inbox_indexes: dict[Path, InboxIndex] = {}
+# Held while an index is created and rebuilt, so a concurrent delivery's
+# add() lands after the rebuild instead of being replaced by it
+_inbox_indexes_lock = threading.Lock()
+
+
+def get_inbox_index(runtime_dir: Path) -> InboxIndex:
+    """
+    Inbox header index (runtime/mailbox/inbox_index.db).
+    
+    If the index database is missing (new or pre-index mailbox, or deleted),
+    it is created and rebuilt from a full inbox scan.
     
     Args:
         runtime_dir: Runtime root directory
-        
+    
     Returns:
-        List of envelope headers (with ciphertext field removed)
+        InboxIndex (one instance per index path)
+    """
+    from .inbox_index import INDEX_FILENAME, InboxIndex
+    
+    db_path = get_mailbox_dir(runtime_dir) / INDEX_FILENAME
+    _check_symlink(db_path)
+    key = db_path.resolve()
+    index = _inbox_indexes.get(key)
+    if index is not None and db_path.exists():
+        return index
+    with _inbox_indexes_lock:
+        missing = not db_path.exists()
+        index = _inbox_indexes.get(key)
+        if index is None or missing:
+            index = InboxIndex(db_path)
+            _inbox_indexes[key] = index
+        if missing:
+            _rebuild_index(runtime_dir, index)
+    return index
+
+
+def rebuild_inbox_index(runtime_dir: Path) -> int:
+    """
+    Rebuild the header index from a full inbox scan (integrity re-verification).
+    
+    Every envelope file is parsed and re-hashed; files whose content hash
+    does not match their filename are left out of the index. Read state of
+    surviving entries is kept.
+    
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        Number of indexed envelopes
+    """
+    return _rebuild_index(runtime_dir, get_inbox_index(runtime_dir))
+
+
+def _rebuild_index(runtime_dir: Path, index: InboxIndex) -> int:
+    return index.replace_all(_scan_inbox(runtime_dir))
+
+
+def _scan_inbox(runtime_dir: Path) -> list[tuple[str, dict[str, Any], int]]:
+    """
+    Parse and verify every inbox envelope.
+    
+    Returns:
+        (content_hash, header, size) for each file whose content hash matches its filename
     """
     mailbox_dir = get_mailbox_dir(runtime_dir)
     inbox_dir = mailbox_dir / "inbox"
@@ -434,47 +1156,137 @@ def list_inbox(runtime_dir: Path) -> list[dict[str, Any]]:
         return []
     
     _check_symlink(inbox_dir)
+    from .stream import EnvelopeFile
     
-    envelopes = []
-    for envelope_path in inbox_dir.glob("*.json"):
-        # Validate filename pattern (content-addressed: 64 hex chars)
-        if not _validate_filename(envelope_path.name):
-            continue  # Skip malformed filenames
-        
-        try:
-            _check_symlink(envelope_path)
-        except SecurityError:
-            continue  # Skip symlinks
-        
+    entries = []
+    # Flat and sharded files; malformed filenames and symlinks are skipped
+    for envelope_path in iter_envelope_paths(inbox_dir):
         try:
-            with envelope_path.open('r', encoding='utf-8') as f:
-                envelope = json.load(f)
-                
-                # Verify content hash matches filename (v0.1 hardening)
-                expected_hash = envelope_path.stem  # Filename without .json
-                actual_hash = compute_envelope_hash(envelope)
+            # Header is parsed without materializing the ciphertext
+            with EnvelopeFile(envelope_path) as envelope_file:
+                header = envelope_file.header
+                size = envelope_file.size
                 
+                # Verify content hash matches filename (v0.1 hardening);
+                # canonical files hash as-is, older pretty-printed ones are canonicalized
+                expected_hash = envelope_path.stem  # Filename without .json/.cbor
+                actual_hash = _file_sha256(envelope_path)
                 if actual_hash != expected_hash:
-                    # Hash mismatch - skip this file
-                    continue
-                
-                # Return header only (remove ciphertext and signature for listing)
-                header_only = {
-                    "header": envelope.get("header", {}),
-                    "msg_id": envelope.get("header", {}).get("msg_id"),
-                    "content_hash": actual_hash,
-                }
-                envelopes.append(header_only)
-        except (json.JSONDecodeError, IOError):
+                    actual_hash = envelope_file.content_hash()
+        except (EncodingError, VersionError, ValueError, TypeError, IOError):
+            continue
+        
+        if actual_hash != expected_hash:
+            # Hash mismatch - skip this file
             continue
+        
+        entries.append((actual_hash, header, size))
+    
+    return entries
+
+
+def list_inbox(
+    runtime_dir: Path,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    sender_fp: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    unread_only: bool = False,
+    verify: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    List envelopes in inbox (headers only, no ciphertext), newest first.
     
-    # Sort by timestamp (newest first)
-    envelopes.sort(
-        key=lambda e: e.get("header", {}).get("timestamp", ""),
-        reverse=True
+    Served from the header index maintained by deliver_to_inbox, so a page
+    costs O(limit) regardless of inbox size. With verify=True every file is
+    re-parsed and re-hashed first and the index is rebuilt from the files
+    that pass (explicit integrity scan).
+    
+    Args:
+        runtime_dir: Runtime root directory
+        limit: Maximum number of entries (None = all)
+        after: Content hash of the last entry of the previous page
+        sender_fp: Only envelopes from this sender fingerprint
+        since: Only timestamps >= since (ISO 8601)
+        until: Only timestamps < until (ISO 8601)
+        unread_only: Only envelopes not marked read
+        verify: If True, re-verify all files and rebuild the index first
+    
+    Returns:
+        List of {"header", "msg_id", "content_hash", "size", "read"} dicts
+    
+    Raises:
+        ValueError: If after is not an indexed content hash
+    """
+    index = get_inbox_index(runtime_dir)
+    if verify:
+        _rebuild_index(runtime_dir, index)
+    return index.query(
+        limit=limit,
+        after=after,
+        sender_fp=sender_fp,
+        since=since,
+        until=until,
+        unread_only=unread_only,
     )
+
+
+def mark_read(runtime_dir: Path, key: str, read: bool = True) -> bool:
+    """
+    Set read state of an inbox envelope in the header index.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        key: Content hash or message ID
+        read: New read state
+    
+    Returns:
+        True if an indexed envelope matched
+    """
+    return get_inbox_index(runtime_dir).set_read(key, read) > 0
+
+
+_receipt_writers: dict[Path, ReceiptWriter] = {}
+
+
+def get_receipt_writer(runtime_dir: Path) -> ReceiptWriter:
+    """
+    Write-through receipt writer for runtime/mailbox/receipts/.
+    
+    The writer keeps the current day's file and the receipt index open
+    between calls. For bursts, create a batching ReceiptWriter instead
+    (see MailDaemon).
+    
+    Args:
+        runtime_dir: Runtime root directory
     
-    return envelopes
+    Returns:
+        ReceiptWriter (one instance per receipts directory)
+    """
+    receipts_dir = get_receipts_dir(runtime_dir)
+    key = receipts_dir.resolve()
+    writer = _receipt_writers.get(key)
+    if writer is None:
+        writer = ReceiptWriter(receipts_dir, max_buffered=1, flush_interval=None)
+        _receipt_writers[key] = writer
+    return writer
+
+
+def get_receipts_dir(runtime_dir: Path) -> Path:
+    """
+    Get receipts directory under runtime_dir.
+    
+    Args:
+        runtime_dir: Runtime root directory
+    
+    Returns:
+        Path to runtime/mailbox/receipts/ directory (created if missing)
+    """
+    receipts_dir = get_mailbox_dir(runtime_dir) / "receipts"
+    receipts_dir.mkdir(parents=True, exist_ok=True)
+    _check_symlink(receipts_dir)
+    return receipts_dir
 
 
 def mark_delivered_receipt(
@@ -484,35 +1296,30 @@ def mark_delivered_receipt(
     error: str | None = None,
 ) -> Path:
     """
-    Create and append receipt to receipts file.
+    Create and append receipt to receipts file (written before returning).
     
     Args:
         msg_id: Message ID from envelope
         status: One of "delivered", "read", "failed"
         runtime_dir: Runtime root directory
         error: Optional error message if status is "failed"
-        
+    
     Returns:
         Path to receipt file
     """
-    mailbox_dir = get_mailbox_dir(runtime_dir)
-    receipts_dir = mailbox_dir / "receipts"
-    receipts_dir.mkdir(parents=True, exist_ok=True)
-    
     # Daily rotation: receipts_YYYY-MM-DD.jsonl
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    receipts_path = receipts_dir / f"receipts_{today}.jsonl"
-    
-    receipt = {
-        "msg_id": msg_id,
-        "status": status,
-        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-    }
-    if error is not None:
-        receipt["error"] = error
-    
-    # Append to JSONL file
-    with receipts_path.open('a', encoding='utf-8') as f:
-        f.write(json.dumps(receipt, sort_keys=True) + "\n")
-    
-    return receipts_path
+    return get_receipt_writer(runtime_dir).write(msg_id, status, error)
+
+
+def lookup_receipt_status(runtime_dir: Path, msg_id: str) -> Optional[dict[str, Any]]:
+    """
+    Latest receipt for a message, from the receipt index.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        msg_id: Message ID
+    
+    Returns:
+        {"msg_id", "status", "timestamp", "error", "file"}, or None if there is no receipt
+    """
+    return _lookup_receipt_status(get_receipts_dir(runtime_dir), msg_id)
@@ -0,0 +1,408 @@
+"""Resumable v0 -> v0.1 mailbox migration for Calyx Mail (journaled, process pool, hardlink backups)."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .codec import HashedEnvelope, decode_envelope
+from .mailbox import (
+    DURABILITY_FILE,
+    MAILBOX_BOXES,
+    _atomic_write,
+    _check_symlink,
+    _envelope_filename,
+    _fsync_dirs,
+    _serialize_envelope,
+    find_envelope,
+    get_inbox_index,
+    get_mailbox_dir,
+    get_mailbox_layout,
+    is_content_hash,
+    layout_path,
+)
+
+
+JOURNAL_FILENAME = "migration_journal.log"
+BACKUP_SUFFIX = "_backup_v0"   # runtime/mailbox/inbox_backup_v0/
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Results are committed (target dirs and journal fsynced, sources removed) in groups
+COMMIT_BATCH = 256
+
+# Files re-encoded in-process by estimate_migration()
+ESTIMATE_SAMPLE = 200
+
+# Per-file outcomes (also the journal "status" field)
+STATUS_MIGRATED = "migrated"     # written as <hash>.json / <hash>.cbor, source removed
+STATUS_DUPLICATE = "duplicate"   # target already existed (same content), source removed
+STATUS_ERROR = "error"           # unreadable or not an envelope, source left in place
+
+
+@dataclass(slots=True)
+class MigrationResult:
+    """Outcome of one legacy mailbox file."""
+    box: str
+    source: str
+    status: str
+    target: Optional[str] = None    # path relative to the box directory
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class MigrationReport:
+    """Totals of one migrate_mailbox() run."""
+    migrated: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    resumed: int = 0      # sources already journaled by an interrupted run
+    skipped: int = 0      # sources journaled as errors (not retried)
+    seconds: float = 0.0
+    results: list[MigrationResult] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class MigrationEstimate:
+    """Dry-run size and throughput estimate (nothing is written)."""
+    files: int
+    bytes: int
+    sampled: int
+    files_per_second: float
+    estimated_seconds: float
+
+
+class MigrationJournal:
+    """
+    Append-only journal of processed legacy files (runtime/mailbox/migration_journal.log).
+    
+    One JSON line per file: {"box", "source", "status", "target", "error"}.
+    A later line for the same (box, source) supersedes an earlier one, so a
+    retried error is simply journaled again. Lines are appended in groups
+    and fsynced before the sources they describe are removed.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Journal file path
+        """
+        self.path = path
+        self._entries: dict[tuple[str, str], MigrationResult] = {}
+        self._load()
+    
+    def get(self, box: str, source: str) -> Optional[MigrationResult]:
+        """Latest journaled result for a source file, or None."""
+        return self._entries.get((box, source))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def append(self, results: list[MigrationResult]) -> None:
+        """
+        Durably append results (one write and one fsync for the group).
+        
+        Args:
+            results: Results to record
+        """
+        if not results:
+            return
+        data = b"".join(
+            json.dumps({
+                "box": r.box,
+                "source": r.source,
+                "status": r.status,
+                "target": r.target,
+                "error": r.error,
+            }, sort_keys=True).encode('utf-8') + b"\n"
+            for r in results
+        )
+        _check_symlink(self.path)
+        fd = os.open(
+            str(self.path),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0),
+            0o600,
+        )
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        for r in results:
+            self._entries[(r.box, r.source)] = r
+    
+    def _load(self) -> None:
+        try:
+            _check_symlink(self.path)
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return
+        # A torn last line (crash mid-append) is ignored; that file is redone
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+                result = MigrationResult(
+                    box=record["box"],
+                    source=record["source"],
+                    status=record["status"],
+                    target=record.get("target"),
+                    error=record.get("error"),
+                )
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._entries[(result.box, result.source)] = result
+
+
+def iter_legacy_files(box_dir: Path) -> Iterator[Path]:
+    """
+    Legacy v0 envelope files in a box directory (<msg_id>.json, always flat).
+    
+    Files already named by content hash are v0.1 and are not yielded.
+    """
+    try:
+        entries = os.scandir(box_dir)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name.startswith("."):
+                continue
+            if is_content_hash(entry.name[:-len(".json")]):
+                continue
+            if entry.is_file(follow_symlinks=False):
+                yield Path(entry.path)
+
+
+def backup_file(path: Path, backup_dir: Path) -> None:
+    """
+    Keep the original of a file in backup_dir (hardlink, copy if links are unsupported).
+    
+    Sources are removed rather than modified after migrating, so a hardlink
+    preserves the original bytes without using extra disk. An existing
+    backup (from an interrupted run) is kept.
+    """
+    backup_path = backup_dir / path.name
+    try:
+        os.link(path, backup_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        # Cross-device or no hardlink support
+        if not backup_path.exists():
+            shutil.copy2(path, backup_path)
+
+
+def _convert(task: tuple[str, str, str, str, Optional[str]]) -> MigrationResult:
+    """
+    Re-encode one legacy file into the box (runs in a worker process).
+    
+    The target is written (fsynced) but the source is not removed; the
+    parent does that once the result is journaled.
+    """
+    box, source, box_dir, layout, backup_dir = task
+    source_path = Path(box_dir) / source
+    try:
+        hashed = HashedEnvelope(decode_envelope(source_path.read_bytes()))
+        if backup_dir is not None:
+            backup_file(source_path, Path(backup_dir))
+        existing = find_envelope(Path(box_dir), hashed.content_hash)
+        if existing is not None:
+            return MigrationResult(box, source, STATUS_DUPLICATE, target=existing.relative_to(box_dir).as_posix())
+        target_path = layout_path(Path(box_dir), _envelope_filename(hashed), layout)
+        _atomic_write(target_path, _serialize_envelope(hashed), durability=DURABILITY_FILE)
+        return MigrationResult(box, source, STATUS_MIGRATED, target=target_path.relative_to(box_dir).as_posix())
+    except Exception as e:
+        return MigrationResult(box, source, STATUS_ERROR, error=str(e))
+
+
+def migrate_mailbox(
+    runtime_dir: Path,
+    backup: bool = True,
+    workers: int = DEFAULT_WORKERS,
+    retry_errors: bool = False,
+    boxes: tuple[str, ...] = MAILBOX_BOXES,
+    progress: Optional[Callable[[MigrationResult], None]] = None,
+) -> MigrationReport:
+    """
+    Migrate legacy inbox/outbox files to content-addressed v0.1 files.
+    
+    Each <msg_id>.json is decoded, hashed and written as its canonical
+    bytes under <hash>.json (or .cbor) in the mailbox's current layout by a
+    pool of worker processes. Results are committed in groups: the target
+    directories and the journal are fsynced, then the sources are removed.
+    An interrupted run can be re-run: journaled sources are not re-encoded
+    (a leftover source of a journaled file is just removed), and a file
+    whose target was written but not journaled is found as a duplicate.
+    Inbox targets are added to the header index before they are journaled.
+    
+    With backup, each source is first hardlinked into <box>_backup_v0/.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        backup: Keep originals in <box>_backup_v0/ (hardlinks)
+        workers: Worker processes (1 = migrate in this process)
+        retry_errors: Retry files journaled as errors by an earlier run
+        boxes: Box directories to migrate
+        progress: Called with each result as it is committed
+    
+    Returns:
+        MigrationReport with totals and per-file results
+    """
+    start = time.perf_counter()
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    layout = get_mailbox_layout(runtime_dir)
+    journal = MigrationJournal(mailbox_dir / JOURNAL_FILENAME)
+    report = MigrationReport()
+    
+    tasks = []
+    for box in boxes:
+        box_dir = mailbox_dir / box
+        if not box_dir.exists():
+            continue
+        _check_symlink(box_dir)
+        backup_dir = None
+        if backup:
+            backup_dir = mailbox_dir / f"{box}{BACKUP_SUFFIX}"
+            _check_symlink(backup_dir)
+            backup_dir.mkdir(exist_ok=True)
+        
+        for path in iter_legacy_files(box_dir):
+            done = journal.get(box, path.name)
+            if done is not None and done.status in (STATUS_MIGRATED, STATUS_DUPLICATE):
+                # Journaled but not yet removed when the last run stopped
+                if done.target and (box_dir / done.target).is_file():
+                    path.unlink()
+                    report.resumed += 1
+                    continue
+            elif done is not None and not retry_errors:
+                report.skipped += 1
+                continue
+            tasks.append((box, path.name, str(box_dir), layout, str(backup_dir) if backup_dir else None))
+    
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+            _commit_results(
+                executor.map(_convert, tasks, chunksize=chunksize), runtime_dir, journal, report, progress,
+            )
+    else:
+        _commit_results(map(_convert, tasks), runtime_dir, journal, report, progress)
+    
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def _commit_results(
+    results: Iterator[MigrationResult],
+    runtime_dir: Path,
+    journal: MigrationJournal,
+    report: MigrationReport,
+    progress: Optional[Callable[[MigrationResult], None]],
+) -> None:
+    batch: list[MigrationResult] = []
+    for result in results:
+        batch.append(result)
+        if len(batch) >= COMMIT_BATCH:
+            _commit(batch, runtime_dir, journal, report, progress)
+            batch = []
+    _commit(batch, runtime_dir, journal, report, progress)
+
+
+def _commit(
+    batch: list[MigrationResult],
+    runtime_dir: Path,
+    journal: MigrationJournal,
+    report: MigrationReport,
+    progress: Optional[Callable[[MigrationResult], None]],
+) -> None:
+    """Make a group of results durable, index and journal them, then remove their sources."""
+    if not batch:
+        return
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    done = [r for r in batch if r.status != STATUS_ERROR]
+    sync_dirs = {(mailbox_dir / r.box / r.target).parent for r in done}
+    sync_dirs.update(mailbox_dir / f"{r.box}{BACKUP_SUFFIX}" for r in done)
+    _fsync_dirs(d for d in sync_dirs if d.is_dir())
+    
+    # Index before journaling: an unjournaled target is found (and indexed) again on re-run
+    inbox_targets = [mailbox_dir / r.box / r.target for r in done if r.box == "inbox"]
+    if inbox_targets:
+        get_inbox_index(runtime_dir).add_entries(_index_entries(inbox_targets))
+    journal.append(batch)
+    
+    for result in batch:
+        if result.status == STATUS_MIGRATED:
+            report.migrated += 1
+        elif result.status == STATUS_DUPLICATE:
+            report.duplicates += 1
+        else:
+            report.errors += 1
+        if result.status != STATUS_ERROR:
+            (mailbox_dir / result.box / result.source).unlink(missing_ok=True)
+        report.results.append(result)
+        if progress is not None:
+            progress(result)
+    _fsync_dirs({mailbox_dir / r.box for r in done})
+
+
+def _index_entries(paths: list[Path]) -> Iterator[tuple[str, dict, int]]:
+    """(content_hash, header, size) of migrated files (hash from the name they were written under)."""
+    from .stream import EnvelopeFile
+    
+    for path in paths:
+        with EnvelopeFile(path) as envelope_file:
+            yield path.stem, envelope_file.header, envelope_file.size
+
+
+def estimate_migration(
+    runtime_dir: Path,
+    workers: int = DEFAULT_WORKERS,
+    sample: int = ESTIMATE_SAMPLE,
+    boxes: tuple[str, ...] = MAILBOX_BOXES,
+) -> MigrationEstimate:
+    """
+    Dry run: count legacy files and time decoding + hashing + re-encoding a sample.
+    
+    Nothing is written. The estimate scales the sampled bytes per second
+    by the worker count and ignores disk write time, so treat it as a
+    lower bound.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        workers: Worker processes the real run would use
+        sample: Files to re-encode in this process
+        boxes: Box directories to count
+    
+    Returns:
+        MigrationEstimate
+    """
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    paths = [path for box in boxes for path in iter_legacy_files(mailbox_dir / box)]
+    total_bytes = sum(path.stat().st_size for path in paths)
+    
+    sampled = sampled_bytes = 0
+    start = time.perf_counter()
+    for path in paths[:sample]:
+        data = path.read_bytes()
+        try:
+            _serialize_envelope(HashedEnvelope(decode_envelope(data)))
+        except Exception:
+            pass
+        sampled += 1
+        sampled_bytes += len(data)
+    elapsed = time.perf_counter() - start
+    
+    if sampled == 0 or elapsed <= 0:
+        return MigrationEstimate(len(paths), total_bytes, sampled, 0.0, 0.0)
+    parallel = max(1, min(workers, len(paths)))
+    files_per_second = sampled / elapsed * parallel
+    estimated_seconds = total_bytes / (sampled_bytes / elapsed * parallel) if sampled_bytes else 0.0
+    return MigrationEstimate(len(paths), total_bytes, sampled, files_per_second, estimated_seconds)
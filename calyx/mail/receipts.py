@@ -0,0 +1,359 @@
+"""Delivery receipts for Calyx Mail (runtime/mailbox/receipts/receipts_YYYY-MM-DD.jsonl)."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+
+RECEIPT_INDEX_FILENAME = "receipt_index.db"
+
+# Default group commit: flush after this many receipts or seconds
+DEFAULT_MAX_BUFFERED = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class ReceiptWriter:
+    """
+    Buffered receipt writer with daily (UTC) file rotation.
+    
+    Keeps the current day's JSONL file open and batches receipts; a batch
+    is written with one append (optionally fsynced) when it reaches
+    max_buffered receipts, flush_interval seconds after its first receipt,
+    on flush() or on close(). A receipt stamped on a new UTC day flushes
+    the batch and switches files.
+    
+    Each flush also records the latest status per msg_id in a SQLite
+    sidecar (receipt_index.db) in the same directory, so
+    lookup_receipt_status() is one indexed query instead of a scan of
+    every JSONL file.
+    
+    Thread-safe; receipts are written in call order.
+    """
+    
+    def __init__(
+        self,
+        receipts_dir: Path,
+        max_buffered: int = DEFAULT_MAX_BUFFERED,
+        flush_interval: float | None = DEFAULT_FLUSH_INTERVAL,
+        fsync: bool = False,
+    ):
+        """
+        Args:
+            receipts_dir: Directory holding the receipt files and index
+            max_buffered: Receipts per batch (1 = write through)
+            flush_interval: Seconds a receipt may stay buffered (None = no timer)
+            fsync: fsync the receipt file on every flush
+        """
+        if max_buffered < 1:
+            raise ValueError("max_buffered must be positive")
+        self.receipts_dir = receipts_dir
+        self.max_buffered = max_buffered
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.receipts_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._buffer: list[bytes] = []
+        self._index_rows: list[tuple] = []
+        self._day: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+        self._index: Optional[sqlite3.Connection] = None
+        # Cached timestamp text for the current second
+        self._stamp_second = -1
+        self._stamp = ("", "")
+    
+    def write(self, msg_id: str, status: str, error: str | None = None) -> Path:
+        """
+        Buffer a receipt.
+        
+        Args:
+            msg_id: Message ID from envelope
+            status: One of "delivered", "read", "failed"
+            error: Optional error message if status is "failed"
+        
+        Returns:
+            Path of the receipt file the receipt goes to
+        """
+        with self._lock:
+            day, timestamp = self._now()
+            if day != self._day:
+                self._rotate(day)
+            
+            receipt = {"msg_id": msg_id, "status": status, "timestamp": timestamp}
+            if error is not None:
+                receipt["error"] = error
+            self._buffer.append(json.dumps(receipt, sort_keys=True).encode('utf-8') + b"\n")
+            self._index_rows.append((msg_id, status, timestamp, error, self._path(day).name))
+            
+            if len(self._buffer) >= self.max_buffered:
+                self.flush()
+            elif len(self._buffer) == 1 and self.flush_interval is not None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return self._path(day)
+    
+    def flush(self) -> None:
+        """Write buffered receipts (one append) and update the index."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            data = b"".join(self._buffer)
+            rows = self._index_rows
+            self._buffer = []
+            self._index_rows = []
+            
+            path = self._path(self._day)
+            if self._fd is not None and not _same_file(self._fd, path):
+                # Moved or deleted since it was opened (e.g. by retention): reopen
+                os.close(self._fd)
+                self._fd = None
+            if self._fd is None:
+                self._fd = _open_append(path)
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(self._fd)
+            
+            if self._index is None:
+                self._index = _open_index(self.receipts_dir)
+            _index_receipts(self._index, rows)
+    
+    def close(self) -> None:
+        """Flush and release the receipt file and index."""
+        with self._lock:
+            self.flush()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            self._day = None
+    
+    def __enter__(self) -> ReceiptWriter:
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _now(self) -> tuple[str, str]:
+        """(YYYY-MM-DD, YYYY-MM-DDTHH:MM:SSZ) for now in UTC, formatted once per second."""
+        second = int(time.time())
+        if second != self._stamp_second:
+            utc = time.gmtime(second)
+            self._stamp = (time.strftime("%Y-%m-%d", utc), time.strftime("%Y-%m-%dT%H:%M:%SZ", utc))
+            self._stamp_second = second
+        return self._stamp
+    
+    def _rotate(self, day: str) -> None:
+        """Flush the previous day's batch and switch files (opened on first flush)."""
+        if self._day is not None:
+            self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._day = day
+    
+    def _path(self, day: str) -> Path:
+        return self.receipts_dir / f"receipts_{day}.jsonl"
+
+
+def lookup_receipt_status(receipts_dir: Path, msg_id: str) -> Optional[dict[str, Any]]:
+    """
+    Latest receipt for a message.
+    
+    Args:
+        receipts_dir: Directory holding the receipt files and index
+        msg_id: Message ID
+    
+    Returns:
+        {"msg_id", "status", "timestamp", "error", "file"} for the most
+        recent receipt (error is None unless failed), or None if there is
+        no receipt
+    """
+    if not receipts_dir.is_dir():
+        return None
+    conn = _open_index(receipts_dir)
+    try:
+        row = conn.execute(
+            "SELECT msg_id, status, timestamp, error, file FROM receipt_status WHERE msg_id = ?",
+            (msg_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return dict(zip(("msg_id", "status", "timestamp", "error", "file"), row))
+
+
+def rebuild_receipt_index(receipts_dir: Path) -> int:
+    """
+    Rebuild the receipt index from every receipt file.
+    
+    Args:
+        receipts_dir: Directory holding the receipt files and index
+    
+    Returns:
+        Number of messages with a receipt
+    """
+    conn = _open_index(receipts_dir)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM receipt_status")
+            _index_files(conn, receipts_dir)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.execute("SELECT COUNT(*) FROM receipt_status").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def prune_receipts(receipts_dir: Path, before_day: str) -> int:
+    """
+    Delete daily receipt files older than a day, and their index rows.
+    
+    Index rows pointing at the pruned files are deleted in one transaction
+    before the files are removed, so lookups never name a missing file.
+    A ReceiptWriter holding a pruned file open reopens it on its next flush.
+    
+    Args:
+        receipts_dir: Directory holding the receipt files and index
+        before_day: UTC day (YYYY-MM-DD); receipts_<day>.jsonl for earlier days are pruned
+    
+    Returns:
+        Number of receipt files removed
+    """
+    if not receipts_dir.is_dir():
+        return 0
+    expired = sorted(
+        path for path in receipts_dir.glob("receipts_*.jsonl")
+        if path.name[len("receipts_"):-len(".jsonl")] < before_day
+    )
+    if not expired:
+        return 0
+    
+    conn = _open_index(receipts_dir)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM receipt_status WHERE file = ?", [(path.name,) for path in expired])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    
+    for path in expired:
+        path.unlink(missing_ok=True)
+    return len(expired)
+
+
+def _open_append(path: Path) -> int:
+    return os.open(
+        str(path),
+        os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0),
+        0o600,
+    )
+
+
+def _same_file(fd: int, path: Path) -> bool:
+    try:
+        st = os.stat(path, follow_symlinks=False)
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+
+def _open_index(receipts_dir: Path) -> sqlite3.Connection:
+    """Open the receipt index, creating it from the existing receipt files if missing."""
+    db_path = receipts_dir / RECEIPT_INDEX_FILENAME
+    missing = not db_path.exists()
+    conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS receipt_status (
+                msg_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                error TEXT,
+                file TEXT NOT NULL
+            )
+        """)
+        if missing:
+            # Receipts written before the index existed
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _index_files(conn, receipts_dir)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _index_files(conn: sqlite3.Connection, receipts_dir: Path) -> None:
+    """Index every receipt in receipts_*.jsonl (oldest file first, later lines win)."""
+    for path in sorted(receipts_dir.glob("receipts_*.jsonl")):
+        rows = []
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    receipt = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(receipt, dict) or "msg_id" not in receipt:
+                    continue
+                rows.append((
+                    receipt["msg_id"],
+                    receipt.get("status", ""),
+                    receipt.get("timestamp", ""),
+                    receipt.get("error"),
+                    path.name,
+                ))
+        conn.executemany(_UPSERT_SQL, rows)
+
+
+def _index_receipts(conn: sqlite3.Connection, rows: list[tuple]) -> None:
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(_UPSERT_SQL, rows)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Latest receipt wins (ties: the later write)
+_UPSERT_SQL = """
+    INSERT INTO receipt_status (msg_id, status, timestamp, error, file)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(msg_id) DO UPDATE SET
+        status = excluded.status,
+        timestamp = excluded.timestamp,
+        error = excluded.error,
+        file = excluded.file
+    WHERE excluded.timestamp >= receipt_status.timestamp
+"""
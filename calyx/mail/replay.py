@@ -2,12 +2,42 @@
 
 from __future__ import annotations
 
+import mmap
+import re
 import sqlite3
+import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterable, Optional
 
-from .codec import compute_envelope_hash
+from .bloom import BloomFilter
+from .codec import HashedEnvelope
+
+
+# How long a connection waits for another writer's lock before failing
+BUSY_TIMEOUT_MS = 5000
+
+# Bound parameters per IN (...) lookup (below SQLite's historical 999 limit)
+_LOOKUP_BATCH = 500
+
+# Negative-cache filter sizing: default capacity covers the 24 hour retention
+# window at ~1 envelope/s; the filter is rebuilt at twice the size if the
+# table outgrows it
+FILTER_CAPACITY = 100_000
+FILTER_FP_RATE = 0.01
+
+# First copy of the WAL-index header at the start of the -shm file
+_WAL_INDEX_HEADER_SIZE = 48
+
+# Replay keys are stored in hourly partition tables named after the UTC hour
+# of the envelope timestamp (replay_YYYYMMDDHH); envelopes whose timestamp
+# does not parse share one table pruned by seen_at
+PARTITION_PREFIX = "replay_"
+UNDATED_PARTITION = "replay_undated"
+_PARTITION_RE = re.compile(r"replay_(?:[0-9]{10}|undated)")
+
+# Pre-partitioning table (TEXT keys), migrated on open
+_LEGACY_TABLE = "replay_state"
 
 
 class ReplayError(Exception):
@@ -19,79 +49,186 @@ class ReplayState:
     """
     Replay state database (SQLite) for tracking seen envelopes.
     
-    Uses content-addressed replay keys (SHA256 of canonical envelope).
+    Uses content-addressed replay keys (SHA256 of canonical envelope),
+    stored as 32-byte BLOBs.
+    
+    Keys are partitioned into one table per UTC hour of the envelope
+    timestamp. The timestamp is part of the hashed envelope, so a replay
+    always lands in the same partition as the original: admission and
+    lookups touch a single table, and pruning drops whole tables (no row
+    deletes, no index rewrites) once their hour has left the retention
+    window.
+    
+    Each thread keeps one long-lived connection (WAL, synchronous=NORMAL),
+    so repeated checks reuse the connection's prepared statement cache
+    instead of reopening the database per call.
+    
+    An in-memory Bloom filter over all stored replay keys answers most
+    lookups (misses) without touching SQLite; only possible hits are
+    confirmed against the table. The filter is built on open, updated on
+    insert, and rebuilt on prune. Rows committed by other connections or
+    processes are picked up before each lookup: the WAL-index change counter
+    tells whether anything changed, and new rows are read by rowid. Inserts always
+    go through the table's primary key, so the filter never decides whether
+    an envelope is admitted.
     """
     
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        filter_capacity: int | None = None,
+        filter_fp_rate: float = FILTER_FP_RATE,
+    ):
         """
         Initialize replay state database.
         
         Args:
             db_path: Path to SQLite database file
+            filter_capacity: Expected replay keys within the retention window
+                             (default: FILTER_CAPACITY, or twice the stored rows)
+            filter_fp_rate: Target Bloom filter false-positive rate
         """
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._filter_lock = threading.RLock()
+        self._filter_capacity = filter_capacity or FILTER_CAPACITY
+        self._filter_fp_rate = filter_fp_rate
+        self._filter = BloomFilter(self._filter_capacity, filter_fp_rate)
+        self._filter_rowids: dict[str, int] = {}
+        self._filter_stats = {"lookups": 0, "memory_negatives": 0, "false_positives": 0}
+        self._wal_index: mmap.mmap | None = None
         self._init_db()
+        # Mapped while this object holds a connection (see close())
+        self._wal_index = _map_wal_index(self.db_path)
+        self._rebuild_filter(self._connection())
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for the calling thread (opened and tuned on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: each statement is its own transaction unless
+            # a method opens one explicitly
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            self._local.change_token = None
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        # Unmap first: once no connection is open SQLite may remove the -shm file
+        if self._wal_index is not None:
+            self._wal_index.close()
+            self._wal_index = None
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    def __enter__(self) -> ReplayState:
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
     def _init_db(self) -> None:
-        """Initialize database schema and hardening."""
-        conn = sqlite3.connect(str(self.db_path))
+        """Initialize database hardening and migrate the pre-partitioning table."""
+        conn = self._connection()
+        
+        # Enable WAL mode (persistent, set once per database)
+        conn.execute("PRAGMA journal_mode = WAL")
+        
+        # Partition tables are created on first insert
+        if _table_exists(conn, _LEGACY_TABLE):
+            self._migrate_legacy_table(conn)
+    
+    def _migrate_legacy_table(self, conn: sqlite3.Connection) -> None:
+        """
+        Move rows of the single replay_state table (TEXT keys) into partitions.
+        
+        Runs in one transaction; a concurrent opener that loses the race
+        finds the table already gone. Rows whose key is not 64-char hex
+        cannot be replay keys and are dropped.
+        """
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            cursor = conn.cursor()
-            
-            # Enable foreign keys
-            cursor.execute("PRAGMA foreign_keys = ON")
-            
-            # Enable WAL mode
-            cursor.execute("PRAGMA journal_mode = WAL")
-            
-            # Create table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS replay_state (
-                    replay_key TEXT PRIMARY KEY,
-                    msg_id TEXT NOT NULL,
-                    sender_fp TEXT NOT NULL,
-                    recipient_fp TEXT NOT NULL,
-                    seen_at TIMESTAMP NOT NULL,
-                    envelope_timestamp TEXT NOT NULL,
-                    UNIQUE(replay_key)
-                )
-            """)
-            
-            # Create indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_seen_at 
-                ON replay_state(seen_at)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_msg_id 
-                ON replay_state(msg_id)
-            """)
-            
-            conn.commit()
-        finally:
-            conn.close()
+            if _table_exists(conn, _LEGACY_TABLE):
+                partitions: dict[str, list[tuple]] = {}
+                for replay_key, *columns, envelope_timestamp in conn.execute(
+                    "SELECT replay_key, msg_id, sender_fp, recipient_fp, seen_at, envelope_timestamp "
+                    f"FROM {_LEGACY_TABLE}"
+                ):
+                    try:
+                        blob = _key_blob(replay_key)
+                    except ValueError:
+                        continue
+                    partition = partition_name(envelope_timestamp)
+                    partitions.setdefault(partition, []).append((blob, *columns, envelope_timestamp))
+                for partition, rows in partitions.items():
+                    _create_partition(conn, partition)
+                    conn.executemany(_insert_sql(partition), rows)
+                conn.execute(f"DROP TABLE {_LEGACY_TABLE}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def partitions(self) -> list[str]:
+        """Names of the partition tables, oldest first (replay_undated last)."""
+        return _list_partitions(self._connection())
     
-    def has_replay_key(self, replay_key: str) -> bool:
+    def has_replay_key(self, replay_key: str, envelope_timestamp: Optional[str] = None) -> bool:
         """
         Check if replay key exists in database.
         
         Args:
             replay_key: Full SHA256 hash (64 hex chars)
-            
+            envelope_timestamp: Envelope timestamp (ISO 8601); when given,
+                                only its partition is consulted, otherwise
+                                every partition is
+        
         Returns:
             True if replay key exists, False otherwise
+        
+        Raises:
+            ValueError: If replay_key is not 64 hex chars
         """
-        conn = sqlite3.connect(str(self.db_path))
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT 1 FROM replay_state WHERE replay_key = ?",
-                (replay_key,)
+        blob = _key_blob(replay_key)
+        conn = self._connection()
+        self._sync_filter(conn)
+        with self._filter_lock:
+            self._filter_stats["lookups"] += 1
+            if replay_key not in self._filter:
+                self._filter_stats["memory_negatives"] += 1
+                return False
+            partitions = (
+                [partition_name(envelope_timestamp)] if envelope_timestamp is not None
+                else list(self._filter_rowids)
             )
-            return cursor.fetchone() is not None
-        finally:
-            conn.close()
+        
+        found = False
+        for partition in partitions:
+            try:
+                row = conn.execute(f"SELECT 1 FROM {partition} WHERE replay_key = ?", (blob,)).fetchone()
+            except sqlite3.OperationalError as e:
+                if not _is_missing_table(e):
+                    raise
+                continue
+            if row is not None:
+                found = True
+                break
+        if not found:
+            with self._filter_lock:
+                self._filter_stats["false_positives"] += 1
+        return found
     
     def add_replay_key(
         self,
@@ -102,7 +239,10 @@ class ReplayState:
         envelope_timestamp: str,
     ) -> None:
         """
-        Add replay key to database (atomic transaction).
+        Add replay key to database (atomic check-and-insert, one statement).
+        
+        The key goes into the partition of envelope_timestamp, which is
+        created on first use.
         
         Args:
             replay_key: Full SHA256 hash (64 hex chars)
@@ -110,59 +250,140 @@ class ReplayState:
             sender_fp: Sender fingerprint
             recipient_fp: Recipient fingerprint
             envelope_timestamp: Original envelope timestamp (ISO 8601)
-            
+        
         Raises:
             ReplayError: If replay key already exists
+            ValueError: If replay_key is not 64 hex chars
         """
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connection()
+        partition = partition_name(envelope_timestamp)
+        row = (_key_blob(replay_key), msg_id, sender_fp, recipient_fp, _seen_at_now(), envelope_timestamp)
         try:
-            cursor = conn.cursor()
-            
-            # Check if already exists
-            if self.has_replay_key(replay_key):
-                raise ReplayError(f"Replay key already exists: {replay_key}")
+            cursor = conn.execute(_insert_sql(partition), row)
+        except sqlite3.OperationalError as e:
+            if not _is_missing_table(e):
+                raise
+            # First key of this hour (or the partition was just pruned)
+            _create_partition(conn, partition)
+            cursor = conn.execute(_insert_sql(partition), row)
+        
+        if cursor.rowcount == 0:
+            raise ReplayError(f"Replay key already exists: {replay_key}")
+        self._filter_add([replay_key])
+    
+    def admit_many(self, envelopes: Iterable[dict | HashedEnvelope]) -> list[bool]:
+        """
+        Check and record replay keys for a batch of envelopes in one transaction.
+        
+        Envelopes are grouped by partition; per partition, existing keys are
+        looked up with batched IN queries and the new ones inserted with a
+        single executemany, so the whole batch costs one WAL commit. The write lock is held throughout (BEGIN IMMEDIATE), so no
+        other writer can admit the same keys concurrently. An envelope that
+        appears twice in the batch is admitted once; later copies are replays.
+        
+        Args:
+            envelopes: Envelope dicts, or HashedEnvelopes (cached hashes are reused)
+        
+        Returns:
+            One flag per envelope, in input order: True if admitted (first
+            sighting), False if it is a replay
+        """
+        hashed_envelopes = [HashedEnvelope.wrap(envelope) for envelope in envelopes]
+        if not hashed_envelopes:
+            return []
+        blobs = [bytes.fromhex(hashed.content_hash) for hashed in hashed_envelopes]
+        batch_partitions = [partition_name(hashed.header.get("timestamp", "")) for hashed in hashed_envelopes]
+        by_partition: dict[str, list[bytes]] = {}
+        for partition, blob in zip(batch_partitions, blobs):
+            by_partition.setdefault(partition, []).append(blob)
+        
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A key always maps to one partition, so the key alone identifies a replay
+            seen: set[bytes] = set()
+            for partition, partition_blobs in by_partition.items():
+                _create_partition(conn, partition)
+                for start in range(0, len(partition_blobs), _LOOKUP_BATCH):
+                    batch = partition_blobs[start:start + _LOOKUP_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    seen.update(row[0] for row in conn.execute(
+                        f"SELECT replay_key FROM {partition} WHERE replay_key IN ({placeholders})",
+                        batch,
+                    ))
             
-            # Insert (atomic transaction)
-            seen_at = datetime.now(timezone.utc)
-            cursor.execute("""
-                INSERT INTO replay_state 
-                (replay_key, msg_id, sender_fp, recipient_fp, seen_at, envelope_timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (replay_key, msg_id, sender_fp, recipient_fp, seen_at, envelope_timestamp))
+            seen_at = _seen_at_now()
+            admitted = []
+            rows: dict[str, list[tuple]] = {}
+            new_keys = []
+            for hashed, blob, partition in zip(hashed_envelopes, blobs, batch_partitions):
+                if blob in seen:
+                    admitted.append(False)
+                    continue
+                seen.add(blob)
+                admitted.append(True)
+                new_keys.append(hashed.content_hash)
+                header = hashed.header
+                rows.setdefault(partition, []).append((
+                    blob,
+                    header.get("msg_id", ""),
+                    header.get("sender_fp", ""),
+                    header.get("recipient_fp", ""),
+                    seen_at,
+                    header.get("timestamp", ""),
+                ))
             
-            conn.commit()
-        except sqlite3.IntegrityError as e:
-            raise ReplayError(f"Replay key already exists: {replay_key}") from e
-        finally:
-            conn.close()
+            for partition, partition_rows in rows.items():
+                conn.executemany(_insert_sql(partition), partition_rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        
+        self._filter_add(new_keys)
+        return admitted
     
     def prune_old_entries(self, retention_hours: int = 24) -> int:
         """
         Prune replay state entries older than retention_hours.
         
+        Drops every hourly partition that ends at or before the cutoff
+        (envelope timestamp older than retention_hours), so the cost does
+        not grow with the number of pruned rows beyond counting them.
+        Entries of the undated partition are deleted by seen_at.
+        
         Args:
             retention_hours: Retention window in hours (default: 24)
-            
+        
         Returns:
             Number of entries pruned
         """
-        conn = sqlite3.connect(str(self.db_path))
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
+        # Partition for hour H holds timestamps in [H, H + 1h): expired once H + 1h <= cutoff
+        last_expired = _hour_partition(cutoff_time - timedelta(hours=1))
+        
+        conn = self._connection()
+        pruned_count = 0
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            cursor = conn.cursor()
-            
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
-            
-            cursor.execute(
-                "DELETE FROM replay_state WHERE seen_at < ?",
-                (cutoff_time,)
-            )
-            
-            pruned_count = cursor.rowcount
-            conn.commit()
-            
-            return pruned_count
-        finally:
-            conn.close()
+            for partition in _list_partitions(conn):
+                if partition == UNDATED_PARTITION:
+                    cursor = conn.execute(
+                        f"DELETE FROM {partition} WHERE seen_at < ?",
+                        (_format_seen_at(cutoff_time),)
+                    )
+                    pruned_count += cursor.rowcount
+                elif partition <= last_expired:
+                    pruned_count += conn.execute(f"SELECT count(*) FROM {partition}").fetchone()[0]
+                    conn.execute(f"DROP TABLE {partition}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        
+        if pruned_count:
+            self._rebuild_filter(conn)
+        return pruned_count
     
     def get_replay_key_by_msg_id(self, msg_id: str) -> Optional[str]:
         """
@@ -170,47 +391,263 @@ class ReplayState:
         
         Args:
             msg_id: Message ID (UUID v4)
-            
+        
         Returns:
-            Replay key if found, None otherwise
+            Replay key if found (newest partition first), None otherwise
         """
-        conn = sqlite3.connect(str(self.db_path))
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT replay_key FROM replay_state WHERE msg_id = ?",
-                (msg_id,)
-            )
-            row = cursor.fetchone()
-            return row[0] if row else None
-        finally:
-            conn.close()
+        conn = self._connection()
+        for partition in reversed(_list_partitions(conn)):
+            try:
+                row = conn.execute(f"SELECT replay_key FROM {partition} WHERE msg_id = ?", (msg_id,)).fetchone()
+            except sqlite3.OperationalError as e:
+                if not _is_missing_table(e):
+                    raise
+                continue
+            if row is not None:
+                return row[0].hex()
+        return None
+    
+    def filter_info(self) -> dict[str, Any]:
+        """
+        Bloom filter metrics.
+        
+        Returns:
+            Dict with capacity, entries, bits, hashes, memory_bytes,
+            estimated_fp_rate (from the fill level), lookups,
+            memory_negatives (lookups answered in memory), false_positives
+            (filter hits the table did not confirm), and observed_fp_rate
+            (false_positives over lookups of absent keys)
+        """
+        with self._filter_lock:
+            bloom = self._filter
+            stats = dict(self._filter_stats)
+            absent_lookups = stats["memory_negatives"] + stats["false_positives"]
+            return {
+                "capacity": bloom.capacity,
+                "entries": bloom.count,
+                "bits": bloom.num_bits,
+                "hashes": bloom.num_hashes,
+                "memory_bytes": bloom.memory_bytes,
+                "estimated_fp_rate": bloom.estimated_fp_rate(),
+                **stats,
+                "observed_fp_rate": stats["false_positives"] / absent_lookups if absent_lookups else 0.0,
+            }
+    
+    def _change_token(self, conn: sqlite3.Connection) -> Any:
+        """
+        Value that changes whenever any connection commits to the database.
+        
+        Reads the WAL-index header from the mapped -shm file (its change
+        counter is bumped on every commit, see sqlite.org/walformat.html),
+        which costs a memory read. Without a mapping, falls back to this
+        thread's PRAGMA data_version, a full statement round trip.
+        """
+        wal_index = self._wal_index
+        if wal_index is not None:
+            return wal_index[:_WAL_INDEX_HEADER_SIZE]
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _rebuild_filter(self, conn: sqlite3.Connection) -> None:
+        """Rebuild the filter from every stored replay key."""
+        with self._filter_lock:
+            token = self._change_token(conn)
+            conn.execute("BEGIN")
+            try:
+                # One read snapshot across all partitions
+                rows = {
+                    partition: conn.execute(f"SELECT rowid, replay_key FROM {partition}").fetchall()
+                    for partition in _list_partitions(conn)
+                }
+            finally:
+                conn.execute("COMMIT")
+            total = sum(len(partition_rows) for partition_rows in rows.values())
+            bloom = BloomFilter(max(self._filter_capacity, 2 * total), self._filter_fp_rate)
+            for partition_rows in rows.values():
+                for _, replay_key in partition_rows:
+                    bloom.add(replay_key.hex())
+            self._filter = bloom
+            self._filter_rowids = {
+                partition: max((rowid for rowid, _ in partition_rows), default=0)
+                for partition, partition_rows in rows.items()
+            }
+            self._local.change_token = token
+    
+    def _sync_filter(self, conn: sqlite3.Connection) -> None:
+        """Add rows committed by other connections since this thread last looked."""
+        token = self._change_token(conn)
+        if token == getattr(self._local, "change_token", None):
+            return
+        with self._filter_lock:
+            partitions = _list_partitions(conn)
+            if not self._filter_rowids.keys() <= set(partitions):
+                # Partitions were dropped by a prune elsewhere: start over
+                self._rebuild_filter(conn)
+                return
+            new_rows = []
+            for partition in partitions:
+                last_rowid = self._filter_rowids.get(partition, 0)
+                max_rowid = conn.execute(f"SELECT max(rowid) FROM {partition}").fetchone()[0] or 0
+                if max_rowid < last_rowid:
+                    # Rows were deleted and rowids reused: start over
+                    self._rebuild_filter(conn)
+                    return
+                if max_rowid > last_rowid:
+                    new_rows.append((partition, conn.execute(
+                        f"SELECT rowid, replay_key FROM {partition} WHERE rowid > ?",
+                        (last_rowid,)
+                    ).fetchall()))
+                else:
+                    self._filter_rowids.setdefault(partition, 0)
+            if self._filter.count + sum(len(rows) for _, rows in new_rows) > self._filter.capacity:
+                self._rebuild_filter(conn)
+                return
+            for partition, rows in new_rows:
+                for rowid, replay_key in rows:
+                    self._filter.add(replay_key.hex())
+                    self._filter_rowids[partition] = max(self._filter_rowids.get(partition, 0), rowid)
+            self._local.change_token = token
+    
+    def _filter_add(self, replay_keys: list[str]) -> None:
+        """Add keys inserted through this object, growing the filter when over capacity."""
+        with self._filter_lock:
+            if self._filter.count + len(replay_keys) > self._filter.capacity:
+                self._rebuild_filter(self._connection())
+                return
+            for replay_key in replay_keys:
+                self._filter.add(replay_key)
+
 
+def _map_wal_index(db_path: Path) -> mmap.mmap | None:
+    """Read-only mapping of the WAL-index header (db_path-shm), or None if unavailable."""
+    try:
+        with open(f"{db_path}-shm", "rb") as f:
+            return mmap.mmap(f.fileno(), _WAL_INDEX_HEADER_SIZE, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
 
-def check_replay(envelope: dict, replay_state: ReplayState) -> None:
+
+def partition_name(envelope_timestamp: str) -> str:
+    """
+    Partition table for an envelope timestamp.
+    
+    Args:
+        envelope_timestamp: Envelope timestamp (ISO 8601)
+    
+    Returns:
+        replay_YYYYMMDDHH for the timestamp's UTC hour, or UNDATED_PARTITION
+        if it does not parse
+    """
+    try:
+        dt = datetime.fromisoformat(envelope_timestamp.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return UNDATED_PARTITION
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    try:
+        return _hour_partition(dt.astimezone(timezone.utc))
+    except OverflowError:
+        return UNDATED_PARTITION
+
+
+def _hour_partition(value: datetime) -> str:
+    """Partition table for a UTC datetime."""
+    return f"{PARTITION_PREFIX}{value.year:04d}{value.month:02d}{value.day:02d}{value.hour:02d}"
+
+
+def _key_blob(replay_key: str) -> bytes:
+    """32-byte column value for a 64-char hex replay key."""
+    try:
+        blob = bytes.fromhex(replay_key)
+    except (TypeError, ValueError):
+        blob = b""
+    if len(blob) != 32:
+        raise ValueError(f"Invalid replay key (expected 64 hex chars): {replay_key!r}")
+    return blob
+
+
+def _insert_sql(partition: str) -> str:
+    return f"""
+        INSERT INTO {partition} 
+        (replay_key, msg_id, sender_fp, recipient_fp, seen_at, envelope_timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(replay_key) DO NOTHING
+    """
+
+
+def _create_partition(conn: sqlite3.Connection, partition: str) -> None:
+    """Create a partition table and its msg_id index if missing."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {partition} (
+            replay_key BLOB PRIMARY KEY,
+            msg_id TEXT NOT NULL,
+            sender_fp TEXT NOT NULL,
+            recipient_fp TEXT NOT NULL,
+            seen_at TIMESTAMP NOT NULL,
+            envelope_timestamp TEXT NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{partition}_msg_id 
+        ON {partition}(msg_id)
+    """)
+
+
+def _list_partitions(conn: sqlite3.Connection) -> list[str]:
+    """Partition tables, oldest first (replay_undated sorts last)."""
+    names = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'replay_*'"
+    ).fetchall()
+    return sorted(name for name, in names if _PARTITION_RE.fullmatch(name))
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def _is_missing_table(error: sqlite3.OperationalError) -> bool:
+    """True if error is SQLite's "no such table" (partition not created yet, or pruned)."""
+    return str(error).startswith("no such table")
+
+
+def _format_seen_at(value: datetime) -> str:
+    """
+    seen_at column text (same form as sqlite3's legacy datetime adapter).
+    
+    Formatting explicitly keeps existing databases comparable without
+    relying on the adapter deprecated in Python 3.12.
+    """
+    return value.isoformat(" ")
+
+
+def _seen_at_now() -> str:
+    return _format_seen_at(datetime.now(timezone.utc))
+
+
+def check_replay(envelope: dict | HashedEnvelope, replay_state: ReplayState) -> None:
     """
     Check if envelope is a replay.
     
     Args:
-        envelope: Envelope dict
+        envelope: Envelope dict, or HashedEnvelope (cached hash is reused)
         replay_state: Replay state database
-        
+    
     Raises:
         ReplayError: If replay is detected
     """
-    # Compute replay key (full SHA256)
-    replay_key = compute_envelope_hash(envelope)
-    
-    # Check replay state
-    if replay_state.has_replay_key(replay_key):
-        raise ReplayError(f"Envelope already seen: {replay_key[:16]}...")
-    
-    # Add to replay state
-    header = envelope.get("header", {})
-    replay_state.add_replay_key(
-        replay_key=replay_key,
-        msg_id=header.get("msg_id", ""),
-        sender_fp=header.get("sender_fp", ""),
-        recipient_fp=header.get("recipient_fp", ""),
-        envelope_timestamp=header.get("timestamp", ""),
-    )
+    # Compute replay key (full SHA256, computed once per HashedEnvelope)
+    hashed = HashedEnvelope.wrap(envelope)
+    replay_key = hashed.content_hash
+    
+    # Check and record in one round trip (insert is a no-op for a seen key)
+    header = hashed.header
+    try:
+        replay_state.add_replay_key(
+            replay_key=replay_key,
+            msg_id=header.get("msg_id", ""),
+            sender_fp=header.get("sender_fp", ""),
+            recipient_fp=header.get("recipient_fp", ""),
+            envelope_timestamp=header.get("timestamp", ""),
+        )
+    except ReplayError:
+        raise ReplayError(f"Envelope already seen: {replay_key[:16]}...") from None
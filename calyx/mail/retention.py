@@ -0,0 +1,223 @@
+"""Mailbox retention for Calyx Mail: archive old envelopes into packs, prune receipts and replay state."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from .archive import ArchiveStore, get_archive
+from .codec import EncodingError, HashedEnvelope, VersionError, decode_envelope
+from .header import parse_timestamp
+from .mailbox import (
+    _check_symlink,
+    find_envelope,
+    get_inbox_index,
+    get_mailbox_dir,
+    iter_envelope_paths,
+)
+from .receipts import prune_receipts
+from .stream import EnvelopeFile
+
+
+# Boxes archived by default: inbox, outbox, and the daemon's sent/ and rejected/
+RETENTION_BOXES = ("inbox", "outbox", "sent", "rejected")
+
+DEFAULT_ENVELOPE_DAYS = 30
+DEFAULT_RECEIPT_DAYS = 30
+DEFAULT_REPLAY_HOURS = 24
+
+# Envelopes appended to a pack per write
+ARCHIVE_BATCH = 500
+
+
+@dataclass(slots=True)
+class RetentionPolicy:
+    """How long mailbox state stays live."""
+    envelope_days: int = DEFAULT_ENVELOPE_DAYS    # envelope timestamp age before archiving
+    receipt_days: int = DEFAULT_RECEIPT_DAYS      # daily receipt files kept
+    replay_hours: int = DEFAULT_REPLAY_HOURS      # replay partitions kept
+    boxes: tuple[str, ...] = RETENTION_BOXES
+    
+    def validate(self) -> None:
+        """Raise ValueError for non-positive windows."""
+        for name in ("envelope_days", "receipt_days", "replay_hours"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be positive")
+
+
+@dataclass(slots=True)
+class RetentionReport:
+    """Outcome of one apply_retention() run (counts of what was, or would be, removed)."""
+    archived: dict[str, int] = field(default_factory=dict)    # per box
+    errors: int = 0              # files left in place (unreadable or failing their hash)
+    receipt_files: int = 0
+    replay_entries: int = 0      # not counted in a dry run
+    dry_run: bool = False
+
+
+def apply_retention(
+    runtime_dir: Path,
+    policy: RetentionPolicy | None = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> RetentionReport:
+    """
+    Move expired envelopes into archive packs and prune receipts and replay state.
+    
+    Envelopes whose header timestamp is older than envelope_days are
+    appended to the box's archive pack, then removed from the box (and the
+    inbox header index). They stay retrievable by content hash and msg_id
+    through ArchiveStore. Each batch is committed to the archive before its
+    files are removed, so an interrupted run loses nothing and can simply
+    be re-run. Expired inbox envelopes are found through the header index;
+    other boxes are scanned.
+    
+    Receipt files older than receipt_days are deleted with their index
+    rows, and replay partitions older than replay_hours are dropped. An
+    archived envelope that is delivered again is still rejected: as a
+    replay while its replay key is kept, by the timestamp window after.
+    
+    Args:
+        runtime_dir: Runtime root directory
+        policy: Retention windows (default RetentionPolicy())
+        dry_run: Only count what would be archived or pruned
+        now: Reference time (default: current UTC time)
+    
+    Returns:
+        RetentionReport
+    """
+    policy = policy or RetentionPolicy()
+    policy.validate()
+    now = now or datetime.now(timezone.utc)
+    mailbox_dir = get_mailbox_dir(runtime_dir)
+    report = RetentionReport(dry_run=dry_run)
+    
+    envelope_cutoff = now - timedelta(days=policy.envelope_days)
+    archive = None if dry_run else get_archive(mailbox_dir)
+    for box in policy.boxes:
+        box_dir = mailbox_dir / box
+        if not box_dir.exists():
+            continue
+        _check_symlink(box_dir)
+        if box == "inbox":
+            report.archived[box] = _archive_inbox(runtime_dir, box_dir, envelope_cutoff, archive, report)
+        else:
+            report.archived[box] = _archive_scanned(box, box_dir, envelope_cutoff, archive, report)
+    
+    receipts_dir = mailbox_dir / "receipts"
+    receipt_cutoff = (now - timedelta(days=policy.receipt_days)).strftime("%Y-%m-%d")
+    if dry_run:
+        report.receipt_files = sum(
+            1 for path in receipts_dir.glob("receipts_*.jsonl")
+            if path.name[len("receipts_"):-len(".jsonl")] < receipt_cutoff
+        ) if receipts_dir.is_dir() else 0
+    else:
+        report.receipt_files = prune_receipts(receipts_dir, receipt_cutoff)
+    
+    replay_db = mailbox_dir / "replay_state.db"
+    if not dry_run and replay_db.exists():
+        from .replay import ReplayState
+        
+        replay_state = ReplayState(replay_db)
+        try:
+            report.replay_entries = replay_state.prune_old_entries(policy.replay_hours)
+        finally:
+            replay_state.close()
+    
+    return report
+
+
+def _archive_inbox(
+    runtime_dir: Path,
+    inbox_dir: Path,
+    cutoff: datetime,
+    archive: ArchiveStore | None,
+    report: RetentionReport,
+) -> int:
+    """Archive expired inbox envelopes, found oldest first through the header index."""
+    index = get_inbox_index(runtime_dir)
+    until = cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+    archived = 0
+    after = None
+    while True:
+        page = index.expired(until, ARCHIVE_BATCH, after)
+        if not page:
+            return archived
+        after = page[-1]
+        if archive is None:
+            archived += len(page)
+            continue
+        
+        paths = []
+        gone = []
+        for _, content_hash in page:
+            path = find_envelope(inbox_dir, content_hash)
+            if path is not None:
+                paths.append(path)
+            elif content_hash in archive:
+                gone.append(content_hash)  # archived and removed; the index update was interrupted
+        removed = _archive_files(archive, "inbox", paths, report)
+        index.remove_many(removed + gone)
+        archived += len(removed)
+
+
+def _archive_scanned(
+    box: str,
+    box_dir: Path,
+    cutoff: datetime,
+    archive: ArchiveStore | None,
+    report: RetentionReport,
+) -> int:
+    """Archive expired envelopes of a box without a header index (header-only parse of each file)."""
+    archived = 0
+    batch: list[Path] = []
+    for path in iter_envelope_paths(box_dir):
+        try:
+            with EnvelopeFile(path) as envelope_file:
+                timestamp = envelope_file.header.get("timestamp", "")
+            expired = parse_timestamp(timestamp) < cutoff
+        except (EncodingError, VersionError, ValueError, TypeError, AttributeError, IOError):
+            report.errors += 1
+            continue
+        if not expired:
+            continue
+        if archive is None:
+            archived += 1
+            continue
+        batch.append(path)
+        if len(batch) >= ARCHIVE_BATCH:
+            archived += len(_archive_files(archive, box, batch, report))
+            batch = []
+    if archive is not None:
+        archived += len(_archive_files(archive, box, batch, report))
+    return archived
+
+
+def _archive_files(archive: ArchiveStore, box: str, paths: list[Path], report: RetentionReport) -> list[str]:
+    """
+    Append envelope files to the archive, then remove them.
+    
+    add_many() returns only once the pack and its directory entry are
+    fsynced and indexed, so no file is removed before its record is durable.
+    
+    Returns:
+        Content hashes of the removed files
+    """
+    entries = []
+    for path in paths:
+        try:
+            hashed = HashedEnvelope(decode_envelope(path.read_bytes()))
+        except (EncodingError, VersionError, ValueError, TypeError, IOError):
+            report.errors += 1
+            continue
+        if hashed.content_hash != path.stem:
+            report.errors += 1
+            continue
+        entries.append((path, hashed))
+    
+    archive.add_many(box, [hashed for _, hashed in entries])
+    for path, _ in entries:
+        path.unlink(missing_ok=True)
+    return [hashed.content_hash for _, hashed in entries]
@@ -0,0 +1,218 @@
+"""Legacy msg_id seen cache for Calyx Mail (runtime/mailbox/seen_cache.log)."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+
+SEEN_CACHE_FILENAME = "seen_cache.log"
+LEGACY_SEEN_CACHE_FILENAME = "seen_cache.json"
+
+# FIFO cap on remembered message IDs (same as the v0 JSON cache)
+SEEN_CACHE_CAPACITY = 10000
+
+
+class SeenCache:
+    """
+    Fixed-capacity FIFO set of seen message IDs, backed by an append-only log.
+    
+    Membership is answered from an in-memory ordered set; adding an ID
+    appends one line (a JSON string) to the log instead of rewriting a JSON
+    list. Once the log holds twice the capacity it is compacted to the
+    newest `capacity` IDs (fsynced atomic rename), so writes stay O(1)
+    amortized.
+    
+    Lines appended by other processes are picked up before each operation
+    by reading the log past the last offset; a compaction elsewhere is
+    detected by the log's inode changing. Appends are not locked against
+    concurrent writers: a duplicate admitted by a race is remembered once.
+    For concurrent delivery use the SQLite ReplayState instead.
+    
+    A v0 seen_cache.json next to the log is imported when no log exists yet.
+    """
+    
+    def __init__(self, log_path: Path, capacity: int = SEEN_CACHE_CAPACITY):
+        """
+        Args:
+            log_path: Path to the log file
+            capacity: Number of message IDs remembered (oldest evicted first)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.log_path = log_path
+        self.legacy_path = log_path.with_name(LEGACY_SEEN_CACHE_FILENAME)
+        self.capacity = capacity
+        self._entries: OrderedDict[Any, None] = OrderedDict()
+        self._file_id: Optional[tuple[int, int]] = None
+        self._offset = 0
+        self._log_lines = 0
+        self._lock = threading.Lock()
+    
+    def __contains__(self, msg_id: Any) -> bool:
+        with self._lock:
+            self._refresh()
+            return msg_id in self._entries
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+    
+    def __iter__(self) -> Iterator[Any]:
+        """Message IDs, oldest first."""
+        with self._lock:
+            self._refresh()
+            return iter(list(self._entries))
+    
+    def add(self, msg_id: Any) -> bool:
+        """
+        Record a message ID.
+        
+        Args:
+            msg_id: Message ID
+        
+        Returns:
+            True if it was new, False if already seen
+        """
+        return self.add_many([msg_id])[0]
+    
+    def add_many(self, msg_ids: Iterable[Any]) -> list[bool]:
+        """
+        Record message IDs with one append.
+        
+        Args:
+            msg_ids: Message IDs (an ID repeated within the batch counts once)
+        
+        Returns:
+            One flag per ID, in input order: True if new, False if already seen
+        """
+        with self._lock:
+            self._refresh()
+            flags = []
+            lines = []
+            for msg_id in msg_ids:
+                if msg_id in self._entries:
+                    flags.append(False)
+                    continue
+                self._remember(msg_id)
+                lines.append(_encode_line(msg_id))
+                flags.append(True)
+            if lines:
+                self._append(lines)
+            return flags
+    
+    def replace(self, msg_ids: Iterable[Any]) -> None:
+        """
+        Replace the cache contents (newest `capacity` IDs are kept).
+        
+        Args:
+            msg_ids: Message IDs, oldest first
+        """
+        with self._lock:
+            self._entries.clear()
+            for msg_id in msg_ids:
+                self._entries.pop(msg_id, None)
+                self._remember(msg_id)
+            self._rewrite()
+    
+    def _remember(self, msg_id: Any) -> None:
+        self._entries[msg_id] = None
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+    
+    def _refresh(self) -> None:
+        """Read lines appended since the last call (reload after compaction)."""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            if self._file_id is None and self._import_legacy():
+                self._refresh()
+                return
+            self._reset(None)
+            return
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self._offset:
+            self._reset(file_id)
+        if st.st_size == self._offset:
+            return
+        
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written by another process is read next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        for line in data[:end].splitlines():
+            self._log_lines += 1
+            try:
+                msg_id = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(msg_id, (dict, list)):
+                continue
+            if msg_id not in self._entries:
+                self._remember(msg_id)
+    
+    def _reset(self, file_id: Optional[tuple[int, int]]) -> None:
+        self._entries.clear()
+        self._file_id = file_id
+        self._offset = 0
+        self._log_lines = 0
+    
+    def _append(self, lines: list[bytes]) -> None:
+        """Append lines to the log, compacting it once it holds twice the capacity."""
+        fd = os.open(
+            str(self.log_path),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0),
+            0o600,
+        )
+        data = b"".join(lines)
+        try:
+            os.write(fd, data)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        if (st.st_dev, st.st_ino) == self._file_id and st.st_size == self._offset + len(data):
+            # Nothing else was appended since the last refresh: skip re-reading our lines
+            self._offset = st.st_size
+            self._log_lines += len(lines)
+        if self._log_lines > 2 * self.capacity:
+            self._rewrite()
+    
+    def _rewrite(self) -> None:
+        """Atomically and durably replace the log with the in-memory entries."""
+        # Imported here: mailbox imports this module
+        from .mailbox import DURABILITY_FILE, _atomic_write
+        
+        content = b"".join(_encode_line(msg_id) for msg_id in self._entries)
+        # fsynced before the rename: a crash never leaves a truncated log
+        _atomic_write(self.log_path, content, durability=DURABILITY_FILE)
+        st = os.stat(self.log_path)
+        self._file_id = (st.st_dev, st.st_ino)
+        self._offset = len(content)
+        self._log_lines = len(self._entries)
+    
+    def _import_legacy(self) -> bool:
+        """Create the log from a v0 seen_cache.json list; True if one was imported."""
+        try:
+            with self.legacy_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            return False
+        if not isinstance(data, list):
+            return False
+        for msg_id in data:
+            if not isinstance(msg_id, (dict, list)):
+                self._entries.pop(msg_id, None)
+                self._remember(msg_id)
+        self._rewrite()
+        return True
+
+
+def _encode_line(msg_id: Any) -> bytes:
+    return json.dumps(msg_id).encode('utf-8') + b"\n"
@@ -0,0 +1,447 @@
+"""Streaming envelope reader: header access without materializing the ciphertext."""
+
+from __future__ import annotations
+
+import binascii
+import hashlib
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+from . import cbor
+from .codec import (
+    BINARY_PROTOCOL_VERSION,
+    EncodingError,
+    build_signed_payload,
+    canonical_encode,
+    decode_envelope,
+    decode_envelope_v0_2,
+    detect_version,
+    encode_signed_payload,
+)
+
+
+# Top-level keys of a standard JSON envelope (v0.1 / legacy v0), plus the
+# optional "chunks" field of chunked-mode envelopes
+_JSON_ENVELOPE_KEYS = {"protocol_version", "header", "ciphertext", "signature"}
+_OPTIONAL_KEYS = {"protocol_version", "chunks"}
+
+# Span values that may be kept unparsed (base64 text)
+_SPAN_KEYS = ("ciphertext", "signature", "chunks")
+_REQUIRED_SPAN_KEYS = {"ciphertext", "signature"}
+
+_JSON_WHITESPACE = b" \t\n\r"
+
+# Anything outside the base64 alphabet forces the materializing fallback
+_NON_BASE64 = re.compile(rb"[^A-Za-z0-9+/=]")
+
+# Hash update granularity for large spans
+_HASH_CHUNK = 1 << 20
+
+# Base64 characters decoded per step when streaming chunk frames (48 KiB out)
+_BASE64_BLOCK = 4 * 16384
+
+
+class EnvelopeFile:
+    """
+    Read-only, memory-mapped view of an envelope file.
+    
+    The header is parsed on open; the ciphertext is never materialized as a
+    Python string. For binary v0.2 files the ciphertext is a zero-copy
+    memoryview into the mapping. For JSON files (v0.1 / legacy v0) the
+    base64 ciphertext is located as a byte span and decoded only on demand.
+    Files that do not fit the standard layout (extra top-level keys,
+    escaped base64) fall back to a full decode.
+    
+    Views handed out by this object must not outlive it; use it as a
+    context manager.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Open and map envelope file, parsing its header.
+        
+        Args:
+            path: Envelope file path (.json or .cbor)
+        
+        Raises:
+            EncodingError: If the file is empty or cannot be decoded
+            VersionError: If protocol_version is unknown
+            OSError: If the file cannot be opened
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map: mmap.mmap | None = None
+        self._view: memoryview | None = None
+        self._views: list[memoryview] = []
+        self._spans: dict[str, tuple[int, int]] = {}
+        self.fields: dict[str, Any] = {}
+        self.binary = False
+        self.size = 0
+        
+        try:
+            self.size = size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                raise EncodingError(f"Empty envelope file: {path}")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+            self._parse()
+        except BaseException:
+            self.close()
+            raise
+    
+    def _parse(self) -> None:
+        """Parse the top-level structure (binary or JSON)."""
+        if cbor.is_map_start(self._map[0]):
+            self.binary = True
+            self.fields = decode_envelope_v0_2(self._view, zero_copy=True)
+            self._views.extend(v for v in self.fields.values() if isinstance(v, memoryview))
+        elif not self._scan_json():
+            # Non-standard layout: decode everything (materializing fallback)
+            self.fields = decode_envelope(bytes(self._view))
+        
+        self.protocol_version = detect_version(self.fields)
+        if not self.binary and self.protocol_version == BINARY_PROTOCOL_VERSION:
+            # v0.2 carries raw bytes, which JSON cannot (as verify_and_open_envelope() rejects it)
+            raise EncodingError(f"JSON envelope cannot be protocol_version {BINARY_PROTOCOL_VERSION}: {self.path}")
+        header = self.fields.get("header", {})
+        if not isinstance(header, dict):
+            raise EncodingError(f"Envelope header is not an object: {self.path}")
+        self.header: dict[str, Any] = header
+    
+    def _skip_ws(self, pos: int) -> int:
+        buf = self._map
+        n = len(buf)
+        while pos < n and buf[pos] in _JSON_WHITESPACE:
+            pos += 1
+        return pos
+    
+    def _string_end(self, pos: int) -> int:
+        """Return index after the closing quote of the string starting at pos."""
+        buf = self._map
+        i = pos + 1
+        while True:
+            i = buf.find(b'"', i)
+            if i < 0:
+                raise EncodingError(f"Unterminated string in {self.path}")
+            # Count preceding backslashes (odd = escaped quote)
+            j = i - 1
+            while buf[j] == 0x5C:  # '\\'
+                j -= 1
+            if (i - 1 - j) % 2 == 0:
+                return i + 1
+            i += 1
+    
+    def _value_end(self, pos: int) -> int:
+        """Return index just past the JSON value starting at pos."""
+        buf = self._map
+        n = len(buf)
+        first = buf[pos]
+        if first == 0x22:  # '"'
+            return self._string_end(pos)
+        if first in b"{[":
+            depth = 0
+            i = pos
+            while i < n:
+                c = buf[i]
+                if c == 0x22:
+                    i = self._string_end(i)
+                    continue
+                if c in b"{[":
+                    depth += 1
+                elif c in b"}]":
+                    depth -= 1
+                    if depth == 0:
+                        return i + 1
+                i += 1
+            raise EncodingError(f"Unterminated JSON value in {self.path}")
+        i = pos
+        while i < n and buf[i] not in b",}] \t\n\r":
+            i += 1
+        return i
+    
+    def _scan_json(self) -> bool:
+        """
+        Scan a JSON envelope, keeping base64 fields as byte spans.
+        
+        Returns:
+            True if the fast layout applies, False if a full decode is needed
+        """
+        buf = self._map
+        n = len(buf)
+        pos = self._skip_ws(0)
+        if pos >= n or buf[pos] != 0x7B:  # '{'
+            return False
+        pos = self._skip_ws(pos + 1)
+        
+        fields: dict[str, Any] = {}
+        spans: dict[str, tuple[int, int]] = {}
+        # Members are separated by exactly one ',' (no trailing comma): a
+        # malformed object falls back to the full decode, which rejects it
+        while True:
+            if pos >= n or buf[pos] != 0x22:
+                return False
+            key_end = self._string_end(pos)
+            key = json.loads(bytes(self._view[pos:key_end]))
+            pos = self._skip_ws(key_end)
+            if pos >= n or buf[pos] != 0x3A:  # ':'
+                return False
+            pos = self._skip_ws(pos + 1)
+            if pos >= n:
+                return False
+            value_end = self._value_end(pos)
+            
+            if key in _SPAN_KEYS and buf[pos] == 0x22:
+                start, end = pos + 1, value_end - 1
+                if _NON_BASE64.search(buf, start, end) is not None:
+                    return False
+                spans[key] = (start, end)
+                fields.pop(key, None)
+            else:
+                try:
+                    fields[key] = json.loads(bytes(self._view[pos:value_end]))
+                except ValueError:
+                    return False
+                spans.pop(key, None)
+            
+            pos = self._skip_ws(value_end)
+            if pos >= n:
+                return False
+            if buf[pos] == 0x7D:  # '}'
+                pos += 1
+                break
+            if buf[pos] != 0x2C:  # ','
+                return False
+            pos = self._skip_ws(pos + 1)
+        
+        if self._skip_ws(pos) != n:
+            return False
+        # Exactly the standard keys (protocol_version optional for legacy v0)
+        keys = set(fields) | set(spans)
+        if not _JSON_ENVELOPE_KEYS - _OPTIONAL_KEYS <= keys <= _JSON_ENVELOPE_KEYS | _OPTIONAL_KEYS:
+            return False
+        if "header" not in fields or not _REQUIRED_SPAN_KEYS <= set(spans) or "chunks" in fields:
+            return False
+        
+        self.fields = fields
+        self._spans = spans
+        return True
+    
+    def _span_view(self, key: str) -> memoryview:
+        start, end = self._spans[key]
+        view = self._view[start:end]
+        self._views.append(view)
+        return view
+    
+    def _field_text(self, key: str) -> memoryview | bytes:
+        """Base64 text of a JSON field (span view, or re-encoded fallback value)."""
+        if key in self._spans:
+            return self._span_view(key)
+        value = self.fields.get(key)
+        if not isinstance(value, str):
+            raise EncodingError(f"Envelope field {key} is not a string")
+        return value.encode('ascii', errors='replace')
+    
+    def signature(self) -> bytes:
+        """
+        Raw signature bytes.
+        
+        Raises:
+            EncodingError: If the signature field is malformed
+        """
+        if self.binary:
+            value = self.fields.get("signature")
+            if not isinstance(value, memoryview):
+                raise EncodingError("v0.2 signature must be raw bytes")
+            return bytes(value)
+        try:
+            return binascii.a2b_base64(self._field_text("signature"))
+        except (binascii.Error, ValueError) as e:
+            raise EncodingError(f"Invalid signature encoding: {e}") from e
+    
+    def ciphertext(self) -> memoryview | bytes:
+        """
+        Raw ciphertext.
+        
+        Returns:
+            Zero-copy memoryview for v0.2 files; decoded bytes for JSON files
+        
+        Raises:
+            EncodingError: If the ciphertext field is malformed
+        """
+        if self.binary:
+            value = self.fields.get("ciphertext")
+            if not isinstance(value, memoryview):
+                raise EncodingError("v0.2 ciphertext must be raw bytes")
+            return value
+        try:
+            return binascii.a2b_base64(self._field_text("ciphertext"))
+        except (binascii.Error, ValueError) as e:
+            raise EncodingError(f"Invalid ciphertext encoding: {e}") from e
+    
+    @property
+    def chunked(self) -> bool:
+        """True if the envelope carries chunked-mode (secretstream) frames."""
+        return "chunks" in self._spans or "chunks" in self.fields
+    
+    def chunk_frames(self, chunk_size: int) -> Iterator[bytes | memoryview]:
+        """
+        Iterate encrypted chunk frames of a chunked-mode envelope.
+        
+        v0.2 frames are zero-copy slices of the mapping. JSON frames are
+        base64-decoded incrementally from the mapped span, so at most one
+        decode block plus one frame is held in memory.
+        
+        Args:
+            chunk_size: Plaintext bytes per chunk (from the header)
+        
+        Returns:
+            Iterator of encrypted frames (chunk_size + 17 bytes, last shorter)
+        
+        Raises:
+            EncodingError: If the chunks field is missing or malformed
+        """
+        from .crypto import STREAM_ABYTES, iter_stream_frames
+        
+        if self.binary:
+            value = self.fields.get("chunks")
+            if not isinstance(value, memoryview):
+                raise EncodingError("v0.2 chunks must be raw bytes")
+            return iter_stream_frames(value, chunk_size)
+        if "chunks" not in self._spans:
+            value = self.fields.get("chunks")
+            if not isinstance(value, str):
+                raise EncodingError("Envelope field chunks is not a string")
+            try:
+                return iter_stream_frames(binascii.a2b_base64(value), chunk_size)
+            except (binascii.Error, ValueError) as e:
+                raise EncodingError(f"Invalid chunks encoding: {e}") from e
+        return self._iter_base64_frames(self._span_view("chunks"), chunk_size + STREAM_ABYTES)
+    
+    def _iter_base64_frames(self, text: memoryview, frame_size: int) -> Iterator[bytes]:
+        """Decode a base64 span block by block, yielding fixed-size frames."""
+        pending = bytearray()
+        for offset in range(0, len(text), _BASE64_BLOCK):
+            try:
+                pending += binascii.a2b_base64(text[offset:offset + _BASE64_BLOCK])
+            except (binascii.Error, ValueError) as e:
+                raise EncodingError(f"Invalid chunks encoding: {e}") from e
+            while len(pending) >= frame_size:
+                yield bytes(pending[:frame_size])
+                del pending[:frame_size]
+        if pending:
+            yield bytes(pending)
+    
+    def signed_message(self) -> bytearray:
+        """
+        Build the NaCl combined signed message (signature || signed payload).
+        
+        The signed payload bytes are identical to
+        encode_signed_payload(build_signed_payload(...)) but are assembled
+        directly from the mapped file into one preallocated buffer, so the
+        ciphertext is copied exactly once.
+        
+        Returns:
+            bytearray suitable for crypto.verify_signed_message()
+        """
+        signature = self.signature()
+        if len(signature) != 64:
+            # Still build a buffer; verification will fail cleanly
+            signature = signature[:64].ljust(64, b"\x00")
+        
+        if self.binary:
+            ciphertext = self.fields["ciphertext"]
+            # Keys in canonical order: "header" < "ciphertext" < "protocol_version"
+            pieces: list[bytes | memoryview] = [
+                bytes((0xA3,)),
+                cbor.encode("header"), cbor.encode(self.header),
+                cbor.encode("ciphertext"), cbor.encode_head(cbor.MAJOR_BYTES, len(ciphertext)), ciphertext,
+                cbor.encode("protocol_version"), cbor.encode(BINARY_PROTOCOL_VERSION),
+            ]
+        elif self._spans:
+            ciphertext_text = self._span_view("ciphertext")
+            header_bytes = canonical_encode(self.header)
+            pieces = [b'{"ciphertext":"', ciphertext_text, b'","header":', header_bytes]
+            if self.protocol_version == "0.1":
+                pieces.append(b',"protocol_version":"0.1"')
+            pieces.append(b'}')
+        else:
+            pieces = [self._fallback_signed_payload()]
+        
+        total = 64 + sum(len(piece) for piece in pieces)
+        message = bytearray(total)
+        message[:64] = signature
+        pos = 64
+        for piece in pieces:
+            message[pos:pos + len(piece)] = piece
+            pos += len(piece)
+        return message
+    
+    def _fallback_signed_payload(self) -> bytes:
+        """Signed payload for fully decoded (non-standard layout) JSON envelopes."""
+        if self.protocol_version == "0.1":
+            payload = build_signed_payload("0.1", self.header, self.fields.get("ciphertext"))
+            return encode_signed_payload(payload)
+        return canonical_encode({"header": self.header, "ciphertext": self.fields.get("ciphertext")})
+    
+    def content_hash(self) -> str:
+        """
+        Full SHA256 of the canonical envelope, streamed from the mapping.
+        
+        Binary files are canonical by construction (strict decoder), so the
+        hash is taken over the file itself. JSON files are hashed piecewise
+        in canonical key order without building the canonical document.
+        """
+        digest = hashlib.sha256()
+        if self.binary:
+            for offset in range(0, len(self._view), _HASH_CHUNK):
+                digest.update(self._view[offset:offset + _HASH_CHUNK])
+            return digest.hexdigest()
+        
+        if not self._spans:
+            return hashlib.sha256(canonical_encode(self.fields)).hexdigest()
+        
+        # Canonical key order: [chunks,] ciphertext, header, protocol_version, signature
+        if "chunks" in self._spans:
+            digest.update(b'{"chunks":"')
+            chunks_text = self._span_view("chunks")
+            for offset in range(0, len(chunks_text), _HASH_CHUNK):
+                digest.update(chunks_text[offset:offset + _HASH_CHUNK])
+            digest.update(b'","ciphertext":"')
+        else:
+            digest.update(b'{"ciphertext":"')
+        ciphertext_text = self._span_view("ciphertext")
+        for offset in range(0, len(ciphertext_text), _HASH_CHUNK):
+            digest.update(ciphertext_text[offset:offset + _HASH_CHUNK])
+        digest.update(b'","header":')
+        digest.update(canonical_encode(self.header))
+        if "protocol_version" in self.fields:
+            digest.update(b',"protocol_version":')
+            digest.update(canonical_encode(self.fields["protocol_version"]))
+        digest.update(b',"signature":"')
+        digest.update(self._span_view("signature"))
+        digest.update(b'"}')
+        return digest.hexdigest()
+    
+    def close(self) -> None:
+        """Release views, unmap, and close the file."""
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self.fields = {}
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self) -> EnvelopeFile:
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark: calyx_mail CLI cold start (wall time and -X importtime totals) per subcommand."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+SUBCOMMANDS = {
+    "help": ["--help"],
+    "inbox": ["inbox"],
+    "receipt": ["receipt", "--msg-id", "bench", "--delivered"],
+    "keygen": ["keygen", "--identity", "bench"],
+}
+
+
+def _importtime(stderr: str) -> tuple[int, int]:
+    """Total cumulative import time (us) of top-level imports, and module count."""
+    total = modules = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules += 1
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, modules
+
+
+def run(runs: int) -> dict[str, dict[str, float]]:
+    """Start the CLI `runs` times per subcommand in a fresh runtime directory."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    results = {}
+    for name, argv in SUBCOMMANDS.items():
+        walls, imports, modules = [], [], 0
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                cmd = [sys.executable, "-X", "importtime", "-m", "tools.calyx_mail", "--runtime-dir", tmpdir]
+                start = time.perf_counter()
+                result = subprocess.run(cmd + argv, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise RuntimeError(f"{name} failed: {result.stderr.splitlines()[-1]}")
+                walls.append(time.perf_counter() - start)
+                import_us, modules = _importtime(result.stderr)
+                imports.append(import_us)
+        results[name] = {
+            "wall_ms": statistics.median(walls) * 1000,
+            "import_ms": statistics.median(imports) / 1000,
+            "modules": modules,
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark calyx_mail CLI startup per subcommand")
+    parser.add_argument("--runs", type=int, default=10, help="Starts per subcommand (default: 10)")
+    args = parser.parse_args()
+    
+    results = run(args.runs)
+    print(f"{'subcommand':>10} {'wall ms':>8} {'import ms':>10} {'modules':>8}")
+    for name, row in results.items():
+        print(f"{name:>10} {row['wall_ms']:8.1f} {row['import_ms']:10.1f} {row['modules']:8d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
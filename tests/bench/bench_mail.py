@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Benchmark suite: throughput, latency and peak RSS of the mail hot paths, with JSON baselines."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from calyx.mail import mailbox, replay
+from calyx.mail.codec import HashedEnvelope, compute_envelope_hash
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Committed baselines for --compare, one file per machine (see baselines/README.md)
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+DEFAULT_BODY_SIZES = (256, 4096, 65536)
+
+# A regression is flagged when ops/s drops or p99 rises by more than this fraction
+DEFAULT_TOLERANCE = 0.2
+
+# Envelopes per deliver_many() call when populating a mailbox
+_POPULATE_BATCH = 1000
+
+
+@dataclass(slots=True)
+class Config:
+    """Benchmark parameters (passed to the child process of each benchmark)."""
+    count: int
+    mailbox_size: int
+    body_sizes: tuple[int, ...]
+    page_size: int
+
+
+def _config_json(config: Config) -> dict:
+    return dict(asdict(config), body_sizes=list(config.body_sizes))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _synthetic(i: int, body_size: int, timestamp: str = "2026-02-12T10:30:00Z") -> HashedEnvelope:
+    """Unsigned v0.1 envelope with a ciphertext of about body_size bytes (no crypto)."""
+    return HashedEnvelope.wrap({
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "a" * 16,
+            "recipient_fp": "b" * 16,
+            "msg_id": f"msg-{i}",
+            "timestamp": timestamp,
+        },
+        "ciphertext": "x" * body_size,
+        "signature": "",
+    })
+
+
+def _populate(runtime_dir: Path, config: Config) -> None:
+    """Fill the inbox with config.mailbox_size synthetic envelopes (no checks, no fsync)."""
+    sizes = config.body_sizes
+    for offset in range(0, config.mailbox_size, _POPULATE_BATCH):
+        end = min(offset + _POPULATE_BATCH, config.mailbox_size)
+        mailbox.deliver_many(
+            [_synthetic(-1 - i, sizes[i % len(sizes)]) for i in range(offset, end)],
+            runtime_dir, check_allowlist=False, check_replay=False, check_timestamp=False,
+            durability=mailbox.DURABILITY_NONE,
+        )
+
+
+def _timed(ops: list[Callable[[], object]]) -> list[float]:
+    latencies = []
+    for op in ops:
+        start = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _sealed_envelopes(config: Config) -> tuple[list[dict], dict, dict]:
+    """Real envelopes between two synthetic identities (one per op, body sizes cycled)."""
+    from calyx.mail import crypto, envelope
+    
+    sender = crypto.generate_identity()
+    recipient = crypto.generate_identity()
+    sizes = config.body_sizes
+    envelopes = [
+        envelope.create_envelope(
+            plaintext=os.urandom(sizes[i % len(sizes)]),
+            sender_signing_priv=sender["signing_keypair"]["private"],
+            sender_signing_pub=sender["signing_keypair"]["public"],
+            recipient_encryption_pub=recipient["encryption_keypair"]["public"],
+        )
+        for i in range(config.count)
+    ]
+    return envelopes, sender, recipient
+
+
+def bench_create_envelope(config: Config) -> list[float]:
+    """Sign and encrypt one message."""
+    from calyx.mail import crypto, envelope
+    
+    sender = crypto.generate_identity()
+    recipient = crypto.generate_identity()
+    sizes = config.body_sizes
+    bodies = [os.urandom(size) for size in sizes]
+    return _timed([
+        lambda body=bodies[i % len(sizes)]: envelope.create_envelope(
+            plaintext=body,
+            sender_signing_priv=sender["signing_keypair"]["private"],
+            sender_signing_pub=sender["signing_keypair"]["public"],
+            recipient_encryption_pub=recipient["encryption_keypair"]["public"],
+        )
+        for i in range(config.count)
+    ])
+
+
+def bench_verify_and_open_envelope(config: Config) -> list[float]:
+    """Verify and decrypt one message."""
+    from calyx.mail import envelope
+    
+    envelopes, sender, recipient = _sealed_envelopes(config)
+    return _timed([
+        lambda env=env: envelope.verify_and_open_envelope(
+            env,
+            sender["signing_keypair"]["public"],
+            recipient["encryption_keypair"]["private"],
+        )
+        for env in envelopes
+    ])
+
+
+def bench_compute_envelope_hash(config: Config) -> list[float]:
+    """Canonicalize and hash one envelope dict."""
+    sizes = config.body_sizes
+    envelopes = [_synthetic(i, sizes[i % len(sizes)]).envelope for i in range(config.count)]
+    return _timed([lambda env=env: compute_envelope_hash(env) for env in envelopes])
+
+
+def bench_write_outbox(config: Config) -> list[float]:
+    """Write one envelope to the outbox (default durability)."""
+    sizes = config.body_sizes
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        envelopes = [_synthetic(i, sizes[i % len(sizes)]) for i in range(config.count)]
+        return _timed([lambda hashed=hashed: mailbox.write_outbox(hashed, runtime_dir) for hashed in envelopes])
+
+
+def bench_deliver_to_inbox(config: Config) -> list[float]:
+    """Deliver one envelope (timestamp and replay checks) into a populated inbox."""
+    sizes = config.body_sizes
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        _populate(runtime_dir, config)
+        replay_state = replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db")
+        timestamp = _now()
+        envelopes = [_synthetic(i, sizes[i % len(sizes)], timestamp) for i in range(config.count)]
+        try:
+            return _timed([
+                lambda hashed=hashed: mailbox.deliver_to_inbox(
+                    hashed, runtime_dir, replay_state=replay_state, check_allowlist=False,
+                )
+                for hashed in envelopes
+            ])
+        finally:
+            replay_state.close()
+
+
+def bench_list_inbox(config: Config) -> list[float]:
+    """Fetch one page of the inbox listing (pages walked in order, wrapping around)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        _populate(runtime_dir, config)
+        after = None
+        latencies = []
+        for _ in range(config.count):
+            start = time.perf_counter()
+            page = mailbox.list_inbox(runtime_dir, limit=config.page_size, after=after)
+            latencies.append(time.perf_counter() - start)
+            after = page[-1]["content_hash"] if len(page) == config.page_size else None
+        return latencies
+
+
+def bench_replay_state(config: Config) -> list[float]:
+    """Check and record one replay key (new key, as on delivery)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        replay_state = replay.ReplayState(Path(tmpdir) / "replay_state.db")
+        envelopes = [_synthetic(i, 0) for i in range(config.count)]
+        try:
+            return _timed([lambda hashed=hashed: replay.check_replay(hashed, replay_state) for hashed in envelopes])
+        finally:
+            replay_state.close()
+
+
+BENCHMARKS: dict[str, Callable[[Config], list[float]]] = {
+    "create_envelope": bench_create_envelope,
+    "verify_and_open_envelope": bench_verify_and_open_envelope,
+    "compute_envelope_hash": bench_compute_envelope_hash,
+    "write_outbox": bench_write_outbox,
+    "deliver_to_inbox": bench_deliver_to_inbox,
+    "list_inbox": bench_list_inbox,
+    "replay_state": bench_replay_state,
+}
+
+
+def _peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+
+def _run_one(name: str, config: Config) -> dict[str, float | None]:
+    """Run one benchmark and summarize it (in its own process, so peak RSS is its own)."""
+    latencies = BENCHMARKS[name](config)
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "ops_per_s": len(latencies) / total if total else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "peak_rss_mib": _peak_rss_mib(),
+    }
+
+
+def run(names: list[str], config: Config) -> dict[str, dict[str, float | None]]:
+    """Run benchmarks, each in a fresh worker process where fork is available."""
+    results = {}
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    for name in names:
+        if context is None:
+            results[name] = _run_one(name, config)
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(_run_one, name, config).result()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of benchmarks whose ops/s or p99 regressed beyond tolerance vs the baseline."""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if row["ops_per_s"] < base["ops_per_s"] * (1 - tolerance) or row["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Calyx Mail hot paths")
+    parser.add_argument("--count", type=int, default=1000, help="Operations per benchmark (default: 1000)")
+    parser.add_argument(
+        "--mailbox-size",
+        type=int,
+        default=1000,
+        help="Envelopes in the inbox for deliver_to_inbox and list_inbox (default: 1000, up to 1M)",
+    )
+    parser.add_argument(
+        "--body-sizes",
+        default=",".join(str(size) for size in DEFAULT_BODY_SIZES),
+        help="Comma-separated body sizes in bytes, cycled per envelope (default: 256,4096,65536)",
+    )
+    parser.add_argument("--page-size", type=int, default=50, help="list_inbox page size (default: 50)")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only this benchmark (repeatable)")
+    parser.add_argument("--save", type=Path, help=f"Write results as a JSON baseline (e.g. {BASELINE_DIR}/<host>.json)")
+    parser.add_argument("--compare", type=Path, help="Compare against a JSON baseline; exit 1 on regression")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed ops/s drop or p99 rise vs the baseline (default: {DEFAULT_TOLERANCE})",
+    )
+    args = parser.parse_args()
+    
+    config = Config(
+        count=args.count,
+        mailbox_size=args.mailbox_size,
+        body_sizes=tuple(int(size) for size in args.body_sizes.split(",")),
+        page_size=args.page_size,
+    )
+    results = run(args.only or list(BENCHMARKS), config)
+    
+    baseline = None
+    if args.compare:
+        with args.compare.open('r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    print(f"{'benchmark':>24} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'peak MiB':>9} {'vs base':>8}")
+    for name, row in results.items():
+        rss = "-" if row["peak_rss_mib"] is None else f"{row['peak_rss_mib']:.1f}"
+        delta = ""
+        base = (baseline or {}).get("results", {}).get(name)
+        if base and base["ops_per_s"]:
+            delta = f"{(row['ops_per_s'] / base['ops_per_s'] - 1) * 100:+.0f}%"
+        print(f"{name:>24} {row['ops_per_s']:10.0f} {row['p50_ms']:8.3f} {row['p99_ms']:8.3f} {rss:>9} {delta:>8}")
+    
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        with args.save.open('w', encoding='utf-8') as f:
+            json.dump({
+                "created": _now(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": _config_json(config),
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    
+    if baseline is not None:
+        if baseline.get("config") != _config_json(config):
+            print("Warning: baseline was recorded with a different configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark: ReplayState replay checks per second (admit new keys, reject replays, batches)."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from calyx.mail import replay
+
+
+def _key(i: int) -> str:
+    return hashlib.sha256(i.to_bytes(8, 'big')).hexdigest()
+
+
+def _admit(replay_state: replay.ReplayState, key: str) -> bool:
+    """One replay check as done on delivery (check_replay semantics)."""
+    try:
+        replay_state.add_replay_key(
+            replay_key=key,
+            msg_id="550e8400-e29b-41d4-a716-446655440000",
+            sender_fp="a" * 16,
+            recipient_fp="b" * 16,
+            envelope_timestamp="2026-02-12T10:30:00Z",
+        )
+        return True
+    except replay.ReplayError:
+        return False
+
+
+def _envelope(i: int) -> dict:
+    return {
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "a" * 16,
+            "recipient_fp": "b" * 16,
+            "msg_id": f"msg-{i}",
+            "timestamp": "2026-02-12T10:30:00Z",
+        },
+        "ciphertext": "",
+        "signature": "",
+    }
+
+
+def run(count: int, batch_size: int = 200) -> dict[str, float]:
+    """Time `count` new-key admissions, replay rejections and lookups, then batched admission."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        replay_state = replay.ReplayState(Path(tmpdir) / "replay_state.db")
+        keys = [_key(i) for i in range(count)]
+        
+        start = time.perf_counter()
+        for key in keys:
+            assert _admit(replay_state, key)
+        admit_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for key in keys:
+            assert not _admit(replay_state, key)
+        reject_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for key in keys:
+            assert replay_state.has_replay_key(key)
+        lookup_s = time.perf_counter() - start
+        
+        # Typical delivery lookup: key not seen before
+        absent = [_key(count + i) for i in range(count)]
+        start = time.perf_counter()
+        for key in absent:
+            assert not replay_state.has_replay_key(key)
+        miss_s = time.perf_counter() - start
+        
+        results = {
+            "admit_per_s": count / admit_s,
+            "reject_per_s": count / reject_s,
+            "lookup_per_s": count / lookup_s,
+            "miss_lookup_per_s": count / miss_s,
+        }
+        
+        if hasattr(replay_state, "admit_many"):
+            hashed = [replay.HashedEnvelope.wrap(_envelope(i)) for i in range(count)]
+            start = time.perf_counter()
+            for offset in range(0, count, batch_size):
+                assert all(replay_state.admit_many(hashed[offset:offset + batch_size]))
+            results["admit_many_per_s"] = count / (time.perf_counter() - start)
+        
+        close = getattr(replay_state, "close", None)
+        if close is not None:
+            close()
+    
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ReplayState replay checks")
+    parser.add_argument("--count", type=int, default=2000, help="Replay keys per phase (default: 2000)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Envelopes per admit_many call (default: 200)")
+    args = parser.parse_args()
+    
+    results = run(args.count, args.batch_size)
+    for name, value in results.items():
+        print(f"{name:>17}: {value:10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
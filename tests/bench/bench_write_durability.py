@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark: per-message inbox write latency under each durability level."""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from calyx.mail import mailbox
+from calyx.mail.codec import HashedEnvelope
+
+
+def _envelope(i: int) -> HashedEnvelope:
+    return HashedEnvelope.wrap({
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "a" * 16,
+            "recipient_fp": "b" * 16,
+            "msg_id": f"msg-{i}",
+            "timestamp": "2026-02-12T10:30:00Z",
+        },
+        "ciphertext": "x" * 512,
+        "signature": "",
+    })
+
+
+def run(count: int, batch_size: int = 50, directory: Path | None = None) -> dict[str, dict[str, float]]:
+    """Time single deliveries and deliver_many() batches for every durability level."""
+    results = {}
+    for durability in mailbox.DURABILITY_LEVELS:
+        with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+            runtime_dir = Path(tmpdir)
+            envelopes = [_envelope(i) for i in range(2 * count)]
+            
+            latencies = []
+            for hashed in envelopes[:count]:
+                start = time.perf_counter()
+                mailbox.deliver_to_inbox(
+                    hashed, runtime_dir, check_allowlist=False, check_replay=False,
+                    check_timestamp=False, durability=durability,
+                )
+                latencies.append(time.perf_counter() - start)
+            
+            batched = envelopes[count:]
+            start = time.perf_counter()
+            for offset in range(0, count, batch_size):
+                mailbox.deliver_many(
+                    batched[offset:offset + batch_size], runtime_dir, check_allowlist=False,
+                    check_replay=False, check_timestamp=False, durability=durability,
+                )
+            batch_s = time.perf_counter() - start
+            
+            latencies.sort()
+            results[durability] = {
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+                "batched_ms": batch_s / count * 1000,
+            }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark inbox write latency per durability level")
+    parser.add_argument("--count", type=int, default=500, help="Messages per phase (default: 500)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Envelopes per deliver_many call (default: 50)")
+    parser.add_argument("--dir", type=Path, default=None, help="Directory to write in (default: system temp)")
+    args = parser.parse_args()
+    
+    results = run(args.count, args.batch_size, args.dir)
+    print(f"{'durability':>10} {'p50 ms':>8} {'p99 ms':>8} {'batched ms/msg':>15}")
+    for durability, row in results.items():
+        print(f"{durability:>10} {row['p50_ms']:8.3f} {row['p99_ms']:8.3f} {row['batched_ms']:15.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+import json
 import tempfile
 from pathlib import Path
 
 import pytest
 
-from calyx.mail import crypto, envelope, mailbox
+from calyx.mail import allowlist as allowlist_module, crypto, envelope, mailbox
 
 
 def test_mail_allowlist_deny_by_default():
@@ -167,3 +168,37 @@ def test_mail_allowlist_multiple_senders():
                 check_allowlist=True,
                 check_replay=False,
             )
+
+
+def test_mail_allowlist_cached_and_reloaded_on_change(monkeypatch):
+    """Test that the shared allowlist is parsed once, reloaded when the file changes, and rejects symlinks."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        mailbox.save_allowlist(runtime_dir, ["fp-a", "fp-b"])
+        allowlist = mailbox.get_allowlist(runtime_dir)
+        assert allowlist is mailbox.get_allowlist(runtime_dir)
+        assert "fp-a" in allowlist and "fp-c" not in allowlist
+        
+        loads = []
+        real_loads = json.loads
+        monkeypatch.setattr(allowlist_module.json, "loads", lambda data: loads.append(1) or real_loads(data))
+        for _ in range(100):
+            assert "fp-b" in allowlist
+        assert loads == []
+        
+        mailbox.save_allowlist(runtime_dir, ["fp-c"])
+        assert "fp-a" not in allowlist and "fp-c" in allowlist
+        assert len(loads) == 1
+        assert mailbox.load_allowlist(runtime_dir) == ["fp-c"]
+        
+        allowlist_path = runtime_dir / "mailbox" / "allowlist.json"
+        allowlist_path.unlink()
+        assert len(allowlist) == 0
+        
+        target = runtime_dir / "elsewhere.json"
+        target.write_text(json.dumps(["fp-a"]))
+        allowlist_path.symlink_to(target)
+        with pytest.raises(mailbox.SecurityError):
+            "fp-a" in allowlist
+        with pytest.raises(mailbox.SecurityError):
+            mailbox.load_allowlist(runtime_dir)
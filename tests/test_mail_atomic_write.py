@@ -0,0 +1,90 @@
+"""Tests for atomic mailbox writes: unique temporary files, O_NOFOLLOW and durability levels."""
+
+from __future__ import annotations
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import crypto, envelope, mailbox
+
+
+def _envelopes(count: int) -> list[dict]:
+    sender = crypto.generate_identity()
+    recipient = crypto.generate_identity()
+    return [
+        envelope.create_envelope(
+            plaintext=f"message {i}".encode(),
+            sender_signing_priv=sender["signing_keypair"]["private"],
+            sender_signing_pub=sender["signing_keypair"]["public"],
+            recipient_encryption_pub=recipient["encryption_keypair"]["public"],
+        )
+        for i in range(count)
+    ]
+
+
+def test_concurrent_writers_of_same_envelope():
+    """Test that threads storing the same envelope never collide on a temporary file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        env = _envelopes(1)[0]
+        barrier = threading.Barrier(8)
+        paths, errors = [], []
+        
+        def writer():
+            barrier.wait()
+            try:
+                for _ in range(20):
+                    paths.append(mailbox.write_outbox(env, runtime_dir))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert len(set(paths)) == 1
+        outbox_dir = runtime_dir / "mailbox" / "outbox"
+        assert [p.name for p in outbox_dir.iterdir()] == [paths[0].name]
+        assert mailbox.load_envelope(paths[0]) == env
+
+
+def test_durability_levels_and_group_fsync(monkeypatch):
+    """Test fsync counts per level, one directory fsync per batch, and symlink refusal."""
+    synced = []
+    real_fsync = mailbox.os.fsync
+    monkeypatch.setattr(mailbox.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        envs = _envelopes(6)
+        kwargs = dict(check_allowlist=False, check_replay=False)
+        
+        expected = {mailbox.DURABILITY_NONE: 0, mailbox.DURABILITY_FILE: 1, mailbox.DURABILITY_FULL: 2}
+        for env, (durability, fsyncs) in zip(envs, expected.items()):
+            synced.clear()
+            mailbox.deliver_to_inbox(env, runtime_dir, durability=durability, **kwargs)
+            assert len(synced) == fsyncs, durability
+        
+        # Three files, one inbox directory sync
+        synced.clear()
+        results = mailbox.deliver_many(envs[3:], runtime_dir, durability=mailbox.DURABILITY_FULL, **kwargs)
+        assert all(result.error is None for result in results)
+        assert len(synced) == 4
+        
+        with pytest.raises(ValueError):
+            mailbox.write_outbox(envs[0], runtime_dir, durability="sometimes")
+        
+        target = Path(tmpdir) / "target"
+        target.write_bytes(b"keep")
+        link = Path(tmpdir) / "link"
+        link.symlink_to(target)
+        with pytest.raises(mailbox.SecurityError):
+            mailbox._atomic_write(link, b"overwrite")
+        assert target.read_bytes() == b"keep"
+        assert not list(Path(tmpdir).glob(".*.tmp"))
@@ -0,0 +1,103 @@
+"""Tests for batched replay admission and bulk inbox delivery."""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+from calyx.mail import codec, crypto, envelope, mailbox, replay
+
+
+def _envelopes(count: int, sender_identity=None):
+    sender_identity = sender_identity or crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    envs = [
+        envelope.create_envelope(
+            plaintext=f"message {i}".encode(),
+            sender_signing_priv=sender_identity["signing_keypair"]["private"],
+            sender_signing_pub=sender_identity["signing_keypair"]["public"],
+            recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        )
+        for i in range(count)
+    ]
+    return envs, sender_identity
+
+
+def test_admit_many_reports_replays():
+    """Test that admit_many admits new keys once and flags replays in input order."""
+    envs, _ = _envelopes(3)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with replay.ReplayState(Path(tmpdir) / "replay_state.db") as replay_state:
+            replay.check_replay(envs[0], replay_state)
+            
+            hashed = [codec.HashedEnvelope.wrap(env) for env in envs]
+            assert replay_state.admit_many(hashed + [envs[1]]) == [False, True, True, False]
+            assert all(replay_state.has_replay_key(h.content_hash) for h in hashed)
+            assert replay_state.get_replay_key_by_msg_id(envs[2]["header"]["msg_id"]) == hashed[2].content_hash
+            
+            assert replay_state.admit_many(envs) == [False, False, False]
+            assert replay_state.admit_many([]) == []
+
+
+def test_deliver_many_mixed_batch():
+    """Test that failures stay per-envelope and good envelopes are delivered and indexed."""
+    envs, sender_identity = _envelopes(4)
+    outsider_envs, _ = _envelopes(1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        mailbox.save_allowlist(runtime_dir, [crypto.compute_fingerprint(sender_identity["signing_keypair"]["public"])])
+        with replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db") as replay_state:
+            mailbox.deliver_to_inbox(envs[0], runtime_dir, replay_state=replay_state)
+            
+            batch = envs + outsider_envs + [envs[3]]
+            results = mailbox.deliver_many(batch, runtime_dir, replay_state=replay_state)
+            
+            assert [r.index for r in results] == list(range(6))
+            assert [r.ok for r in results] == [False, True, True, True, False, False]
+            assert isinstance(results[0].error, replay.ReplayError)
+            assert isinstance(results[4].error, envelope.AllowlistError)
+            assert isinstance(results[5].error, replay.ReplayError)
+            assert all(r.path.exists() for r in results if r.ok)
+            assert results[1].msg_id == envs[1]["header"]["msg_id"]
+            
+            listed = {item["msg_id"] for item in mailbox.list_inbox(runtime_dir)}
+            assert listed == {env["header"]["msg_id"] for env in envs}
+
+
+def test_deliver_many_legacy_seen_cache():
+    """Test the batch path without a ReplayState (legacy msg_id cache)."""
+    envs, _ = _envelopes(3)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        results = mailbox.deliver_many(envs + [envs[0]], runtime_dir, check_allowlist=False)
+        assert [r.ok for r in results] == [True, True, True, False]
+        assert isinstance(results[3].error, envelope.ReplayError)
+        assert mailbox.load_seen_cache(runtime_dir) == [env["header"]["msg_id"] for env in envs]
+        
+        again = mailbox.deliver_many(envs[:1], runtime_dir, check_allowlist=False)
+        assert not again[0].ok
+
+
+def test_deliver_many_records_replay_keys_only_for_stored_envelopes(monkeypatch):
+    """Test that an envelope whose inbox write fails is not recorded, so delivering it again succeeds."""
+    envs, _ = _envelopes(3)
+    failed_hash = codec.compute_envelope_hash(envs[1])
+    real_store = mailbox._store_envelope
+    
+    def failing_store(box_dir, hashed, *args, **kwargs):
+        if hashed.content_hash == failed_hash:
+            raise OSError("No space left on device")
+        return real_store(box_dir, hashed, *args, **kwargs)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        with replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db") as replay_state:
+            with monkeypatch.context() as patch:
+                patch.setattr(mailbox, "_store_envelope", failing_store)
+                results = mailbox.deliver_many(envs, runtime_dir, replay_state=replay_state, check_allowlist=False)
+            assert [r.ok for r in results] == [True, False, True]
+            assert not replay_state.has_replay_key(failed_hash)
+            
+            again = mailbox.deliver_many(envs, runtime_dir, replay_state=replay_state, check_allowlist=False)
+            assert [r.ok for r in again] == [False, True, False]
+            assert len(mailbox.list_inbox(runtime_dir)) == 3
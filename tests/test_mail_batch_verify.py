@@ -0,0 +1,117 @@
+"""Tests for batch envelope verification and decryption."""
+
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from calyx.mail import crypto, envelope
+
+
+def _make_batch(senders, recipient_identity, per_sender: int = 5, protocol_version: str = "0.1"):
+    envelopes = []
+    for i in range(per_sender):
+        for sender_identity in senders:
+            envelopes.append(envelope.create_envelope(
+                plaintext=f"message {i} from {sender_identity['fingerprints']['signing']}".encode('utf-8'),
+                sender_signing_priv=sender_identity["signing_keypair"]["private"],
+                sender_signing_pub=sender_identity["signing_keypair"]["public"],
+                recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+                protocol_version=protocol_version,
+            ))
+    return envelopes
+
+
+def _resolver(senders, calls: list[str]):
+    keys = {s["fingerprints"]["signing"]: s["signing_keypair"]["public"] for s in senders}
+    
+    def resolve(sender_fp: str) -> bytes | None:
+        calls.append(sender_fp)
+        return keys.get(sender_fp)
+    return resolve
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_batch_matches_single_envelope_api(max_workers):
+    """Test that batch results equal per-envelope verify_and_open_envelope()."""
+    senders = [crypto.generate_identity() for _ in range(3)]
+    recipient_identity = crypto.generate_identity()
+    envelopes = _make_batch(senders, recipient_identity)
+    calls: list[str] = []
+    
+    results = envelope.verify_and_open_batch(
+        envelopes,
+        _resolver(senders, calls),
+        recipient_identity["encryption_keypair"]["private"],
+        max_workers=max_workers,
+    )
+    
+    signing_keys = {s["fingerprints"]["signing"]: s["signing_keypair"]["public"] for s in senders}
+    assert [r.index for r in results] == list(range(len(envelopes)))
+    for env, result in zip(envelopes, results):
+        assert result.ok, result.error
+        assert result.msg_id == env["header"]["msg_id"]
+        expected = envelope.verify_and_open_envelope(
+            env,
+            signing_keys[env["header"]["sender_fp"]],
+            recipient_identity["encryption_keypair"]["private"],
+        )
+        assert result.plaintext == expected
+    
+    # Each sender key resolved exactly once
+    assert sorted(calls) == sorted(s["fingerprints"]["signing"] for s in senders)
+
+
+def test_batch_reports_per_envelope_errors():
+    """Test that failures are reported per envelope without aborting the batch."""
+    known, unknown = crypto.generate_identity(), crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    good = _make_batch([known], recipient_identity, per_sender=2, protocol_version="0.2")
+    from_unknown = _make_batch([unknown], recipient_identity, per_sender=1)
+    
+    tampered = dict(_make_batch([known], recipient_identity, per_sender=1)[0])
+    raw = bytearray(base64.b64decode(tampered["ciphertext"]))
+    raw[-1] ^= 0x01
+    tampered["ciphertext"] = base64.b64encode(bytes(raw)).decode('ascii')
+    
+    other_recipient = _make_batch([known], crypto.generate_identity(), per_sender=1)
+    batch = [good[0], tampered, from_unknown[0], {"header": {}}, other_recipient[0], good[1]]
+    
+    results = envelope.verify_and_open_batch(
+        batch,
+        _resolver([known], []),
+        recipient_identity["encryption_keypair"]["private"],
+        max_workers=3,
+    )
+    
+    assert [r.ok for r in results] == [True, False, False, False, False, True]
+    assert isinstance(results[1].error, envelope.VerificationError)
+    assert "Unknown sender" in str(results[2].error)
+    assert isinstance(results[3].error, envelope.VerificationError)
+    assert isinstance(results[4].error, crypto.DecryptionError)
+    assert results[5].plaintext is not None
+
+
+def test_batch_rejects_resolver_key_mismatch_and_applies_checks():
+    """Test fingerprint binding of resolved keys and header checks in batch mode."""
+    sender_identity, impostor = crypto.generate_identity(), crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    envelopes = _make_batch([sender_identity], recipient_identity, per_sender=3)
+    
+    # Resolver returns a key that does not hash to the requested fingerprint
+    results = envelope.verify_and_open_batch(
+        envelopes,
+        lambda fp: impostor["signing_keypair"]["public"],
+        recipient_identity["encryption_keypair"]["private"],
+    )
+    assert all("does not match" in str(r.error) for r in results)
+    
+    # Allowlist check runs per envelope
+    results = envelope.verify_and_open_batch(
+        envelopes,
+        _resolver([sender_identity], []),
+        recipient_identity["encryption_keypair"]["private"],
+        allowlist_check=lambda fp: False,
+    )
+    assert all(isinstance(r.error, envelope.AllowlistError) for r in results)
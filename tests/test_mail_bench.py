@@ -0,0 +1,44 @@
+"""Smoke test for the benchmark harness (tests/bench/bench_mail.py) and its committed baselines."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+
+BENCH_DIR = Path(__file__).resolve().parent / "bench"
+BENCH_MAIL = BENCH_DIR / "bench_mail.py"
+
+
+def _bench(*argv: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(BENCH_MAIL), *argv], capture_output=True, text=True)
+
+
+def test_bench_mail_runs_saves_and_compares():
+    """Test that every benchmark runs on a tiny configuration and round-trips through --save / --compare."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        baseline_path = Path(tmpdir) / "baseline.json"
+        tiny = ["--count", "5", "--mailbox-size", "10", "--body-sizes", "64,1024"]
+        
+        result = _bench(*tiny, "--save", str(baseline_path))
+        assert result.returncode == 0, result.stderr
+        baseline = json.loads(baseline_path.read_text())
+        assert baseline["config"] == {"count": 5, "mailbox_size": 10, "body_sizes": [64, 1024], "page_size": 50}
+        names = set(baseline["results"])
+        assert all(row["ops"] == 5 for row in baseline["results"].values())
+        
+        # Timings of 5 ops are noise; only check that comparison runs
+        result = _bench(*tiny, "--only", "compute_envelope_hash", "--compare", str(baseline_path), "--tolerance", "1000")
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "Warning" not in result.stdout
+    
+    # Committed baselines cover every benchmark the harness runs
+    committed = sorted((BENCH_DIR / "baselines").glob("*.json"))
+    assert committed
+    for path in committed:
+        assert set(json.loads(path.read_text())["results"]) == names, path.name
@@ -0,0 +1,143 @@
+"""Tests for the v0.2 binary canonical wire format (deterministic CBOR subset)."""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import cbor, codec, crypto, envelope, mailbox
+
+
+def _make_envelope(protocol_version: str = "0.2", subject: str | None = "Binary"):
+    sender_identity = crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    env = envelope.create_envelope(
+        plaintext=b"binary wire format body",
+        sender_signing_priv=sender_identity["signing_keypair"]["private"],
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        subject=subject,
+        protocol_version=protocol_version,
+    )
+    return env, sender_identity, recipient_identity
+
+
+def test_cbor_determinism_and_key_order():
+    """Test that encoding is deterministic and independent of insertion order."""
+    obj1 = {"zebra": 1, "a": 2, "nested": {"y": [1, -1, None, True, False], "x": b"\x00\x01"}}
+    obj2 = {"nested": {"x": b"\x00\x01", "y": [1, -1, None, True, False]}, "a": 2, "zebra": 1}
+    assert cbor.encode(obj1) == cbor.encode(obj2)
+    assert cbor.encode({"zebra": 1, "a": 2}) == bytes.fromhex("a2616102657a6562726101")
+    assert cbor.decode(cbor.encode(obj1)) == obj1
+
+
+def test_cbor_shortest_form_heads():
+    """Test shortest-form integer and length heads."""
+    assert cbor.encode(0) == b"\x00"
+    assert cbor.encode(23) == b"\x17"
+    assert cbor.encode(24) == b"\x18\x18"
+    assert cbor.encode(256) == b"\x19\x01\x00"
+    assert cbor.encode(-1) == b"\x20"
+    assert cbor.encode(2 ** 64 - 1) == b"\x1b" + b"\xff" * 8
+    with pytest.raises(ValueError, match="64-bit"):
+        cbor.encode(2 ** 64)
+
+
+def test_cbor_rejects_disallowed_types():
+    """Test that floats, sets and tuples are rejected."""
+    with pytest.raises(ValueError, match="Floats disallowed"):
+        cbor.encode({"value": 1.0})
+    with pytest.raises(ValueError, match="Sets disallowed"):
+        cbor.encode({"value": {1}})
+    with pytest.raises(ValueError, match="Tuples disallowed"):
+        cbor.encode({"value": (1,)})
+    with pytest.raises(ValueError, match="Dict keys must be strings"):
+        cbor.encode({1: "x"})
+
+
+def test_cbor_strict_decoding():
+    """Test that non-canonical encodings are rejected by the decoder."""
+    non_canonical = [
+        b"\x18\x05",                      # 5 encoded with a 1-byte argument
+        b"\x5f\x41\x00\xff",              # indefinite-length byte string
+        bytes.fromhex("a2657a6562726101616102"),  # keys out of order
+        b"\xf9\x3c\x00",                  # half-precision float
+        b"\xc1\x00",                      # tag
+        b"\x00\x00",                      # trailing bytes
+        b"\x62\x65\xcc",                  # truncated / invalid UTF-8
+        b"\x63e\xcc\x81",                 # text not NFC normalized
+    ]
+    for data in non_canonical:
+        with pytest.raises(cbor.CBORError):
+            cbor.decode(data)
+
+
+def test_v0_2_envelope_roundtrip():
+    """Test create -> canonical bytes -> decode -> verify/decrypt for v0.2."""
+    env, sender_identity, recipient_identity = _make_envelope()
+    
+    assert env["protocol_version"] == "0.2"
+    assert isinstance(env["ciphertext"], bytes)
+    assert isinstance(env["signature"], bytes) and len(env["signature"]) == 64
+    
+    data = codec.encode_envelope_v0_2(env)
+    decoded = codec.decode_envelope(data, zero_copy=True)
+    assert isinstance(decoded["ciphertext"], memoryview)
+    assert codec.encode_envelope(decoded) == data
+    assert codec.compute_envelope_hash(decoded) == codec.compute_envelope_hash(env)
+    
+    plaintext = envelope.verify_and_open_envelope(
+        decoded,
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_priv=recipient_identity["encryption_keypair"]["private"],
+    )
+    assert plaintext == b"binary wire format body"
+
+
+def test_v0_2_envelope_smaller_than_v0_1():
+    """Test that the binary encoding avoids base64 inflation."""
+    env_v0_2, _, _ = _make_envelope("0.2")
+    env_v0_1, _, _ = _make_envelope("0.1")
+    assert len(codec.encode_envelope(env_v0_2)) < len(codec.encode_envelope(env_v0_1))
+
+
+def test_v0_2_tamper_detection():
+    """Test that tampering with a v0.2 header fails signature verification."""
+    env, sender_identity, recipient_identity = _make_envelope()
+    env["header"]["subject"] = "TAMPERED"
+    
+    with pytest.raises(envelope.VerificationError):
+        envelope.verify_and_open_envelope(
+            env,
+            sender_signing_pub=sender_identity["signing_keypair"]["public"],
+            recipient_encryption_priv=recipient_identity["encryption_keypair"]["private"],
+        )
+
+
+def test_mixed_version_mailbox():
+    """Test that v0.1 (.json) and v0.2 (.cbor) envelopes coexist in one inbox."""
+    env_v0_2, _, _ = _make_envelope("0.2", subject="binary")
+    env_v0_1, _, _ = _make_envelope("0.1", subject="json")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        
+        path_v0_2 = mailbox.deliver_to_inbox(env_v0_2, runtime_dir, check_allowlist=False, check_replay=False)
+        path_v0_1 = mailbox.deliver_to_inbox(env_v0_1, runtime_dir, check_allowlist=False, check_replay=False)
+        
+        assert path_v0_2.suffix == ".cbor"
+        assert path_v0_1.suffix == ".json"
+        assert mailbox._validate_filename(path_v0_2.name)
+        
+        # Stored binary file is the canonical encoding itself
+        import hashlib
+        assert hashlib.sha256(path_v0_2.read_bytes()).hexdigest() == path_v0_2.stem
+        assert mailbox.load_envelope(path_v0_2) == env_v0_2
+        
+        subjects = sorted(item["header"]["subject"] for item in mailbox.list_inbox(runtime_dir))
+        assert subjects == ["binary", "json"]
+        
+        # Re-delivery of identical content is idempotent
+        assert mailbox.deliver_to_inbox(env_v0_2, runtime_dir, check_allowlist=False, check_replay=False) == path_v0_2
@@ -0,0 +1,237 @@
+"""Tests for chunked (secretstream) envelope encryption."""
+
+from __future__ import annotations
+
+import base64
+import io
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import codec, crypto, envelope, mailbox
+
+
+def _identities():
+    return crypto.generate_identity(), crypto.generate_identity()
+
+
+def _make_chunked(body: bytes, protocol_version: str = "0.1", chunk_size: int = 1000):
+    sender_identity, recipient_identity = _identities()
+    env = envelope.create_envelope(
+        plaintext=io.BytesIO(body),
+        sender_signing_priv=sender_identity["signing_keypair"]["private"],
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        protocol_version=protocol_version,
+        chunk_size=chunk_size,
+    )
+    return env, sender_identity["signing_keypair"]["public"], recipient_identity["encryption_keypair"]["private"]
+
+
+@pytest.mark.parametrize("size", [0, 1, 999, 1000, 1001, 5000])
+def test_stream_roundtrip_chunk_boundaries(size):
+    """Test secretstream sealing across chunk boundaries (including empty body)."""
+    _, recipient_identity = _identities()
+    body = bytes(i % 251 for i in range(size))
+    for source in (body, io.BytesIO(body)):
+        key_block, frames = crypto.seal_stream_to_recipient(
+            source, recipient_identity["encryption_keypair"]["public"], chunk_size=1000,
+        )
+        frames = list(frames)
+        assert len(key_block) == crypto.STREAM_KEY_BLOCK_SIZE
+        assert len(frames) == max(1, -(-size // 1000))
+        
+        chunks = list(crypto.open_stream_from_sender(
+            key_block, frames, recipient_identity["encryption_keypair"]["private"],
+        ))
+        assert b"".join(chunks) == body
+        assert all(len(chunk) <= 1000 for chunk in chunks)
+
+
+def test_stream_rejects_truncation_reorder_and_tamper():
+    """Test that dropped, reordered, or modified frames are rejected."""
+    _, recipient_identity = _identities()
+    recipient_priv = recipient_identity["encryption_keypair"]["private"]
+    key_block, frames = crypto.seal_stream_to_recipient(
+        b"x" * 3000, recipient_identity["encryption_keypair"]["public"], chunk_size=1000,
+    )
+    frames = list(frames)
+    
+    with pytest.raises(crypto.DecryptionError, match="truncated"):
+        list(crypto.open_stream_from_sender(key_block, frames[:-1], recipient_priv))
+    
+    with pytest.raises(crypto.DecryptionError):
+        list(crypto.open_stream_from_sender(key_block, [frames[1], frames[0], frames[2]], recipient_priv))
+    
+    with pytest.raises(crypto.DecryptionError, match="after final"):
+        list(crypto.open_stream_from_sender(key_block, frames + [frames[0]], recipient_priv))
+    
+    tampered = bytearray(frames[1])
+    tampered[5] ^= 0x01
+    with pytest.raises(crypto.DecryptionError):
+        list(crypto.open_stream_from_sender(key_block, [frames[0], bytes(tampered), frames[2]], recipient_priv))
+    
+    # Wrong recipient cannot unseal the per-message key
+    other_identity = crypto.generate_identity()
+    with pytest.raises(crypto.DecryptionError):
+        crypto.open_stream_from_sender(key_block, frames, other_identity["encryption_keypair"]["private"])
+
+
+@pytest.mark.parametrize("protocol_version", ["0.1", "0.2"])
+def test_chunked_envelope_roundtrip(protocol_version):
+    """Test chunked envelopes through create/verify and the progressive API."""
+    body = bytes(range(256)) * 40
+    env, sender_pub, recipient_priv = _make_chunked(body, protocol_version)
+    
+    assert env["header"]["enc"] == envelope.CHUNKED_ENCRYPTION
+    assert env["header"]["chunk_size"] == 1000
+    assert "chunks" in env
+    
+    assert envelope.verify_and_open_envelope(env, sender_pub, recipient_priv) == body
+    
+    chunks = list(envelope.verify_and_open_envelope_stream(env, sender_pub, recipient_priv))
+    assert len(chunks) == 11
+    assert b"".join(chunks) == body
+    
+    # Canonical encoding and hashing cover the chunks field
+    data = codec.encode_envelope(env)
+    assert codec.decode_envelope(data) == env
+
+
+@pytest.mark.parametrize("protocol_version,pretty", [("0.1", True), ("0.1", False), ("0.2", False)])
+def test_chunked_envelope_file_stream(protocol_version, pretty):
+    """Test progressive decryption from a mapped envelope file."""
+    body = bytes(range(256)) * 400
+    env, sender_pub, recipient_priv = _make_chunked(body, protocol_version, chunk_size=4096)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "env"
+        if pretty:
+            path.write_text(json.dumps(env, indent=2), encoding='utf-8')
+        else:
+            path.write_bytes(codec.encode_envelope(env))
+        
+        with envelope.verify_and_open_envelope_file_stream(path, sender_pub, recipient_priv) as chunks:
+            received = [bytes(chunk) for chunk in chunks]
+        assert [len(chunk) for chunk in received[:-1]] == [4096] * (len(received) - 1)
+        assert b"".join(received) == body
+        
+        assert envelope.verify_and_open_envelope_file(path, sender_pub, recipient_priv) == body
+        
+        # Early close releases the mapping
+        stream = envelope.verify_and_open_envelope_file_stream(path, sender_pub, recipient_priv)
+        next(stream)
+        stream.close()
+        assert list(stream) == []
+
+
+def test_chunked_envelope_tampered_chunk_in_mailbox():
+    """Test that a tampered chunk fails decryption and the content hash check."""
+    body = b"evidence export " * 500
+    env, sender_pub, recipient_priv = _make_chunked(body, "0.1")
+    raw = bytearray(base64.b64decode(env["chunks"]))
+    raw[100] ^= 0x01
+    tampered = dict(env)
+    tampered["chunks"] = base64.b64encode(bytes(raw)).decode('ascii')
+    
+    # Signature covers the key block, so verification passes but decryption fails
+    with pytest.raises(crypto.DecryptionError):
+        envelope.verify_and_open_envelope(tampered, sender_pub, recipient_priv)
+    assert codec.compute_envelope_hash(tampered) != codec.compute_envelope_hash(env)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        mailbox.deliver_to_inbox(env, runtime_dir, check_allowlist=False, check_replay=False)
+        listed = mailbox.list_inbox(runtime_dir)
+        assert [item["msg_id"] for item in listed] == [env["header"]["msg_id"]]
+
+
+def test_chunked_header_mismatch_rejected():
+    """Test that chunk mode markers and chunks field must agree."""
+    env, sender_pub, recipient_priv = _make_chunked(b"body", "0.1")
+    
+    without_chunks = {k: v for k, v in env.items() if k != "chunks"}
+    with pytest.raises(envelope.VerificationError, match="chunks field"):
+        envelope.verify_and_open_envelope(without_chunks, sender_pub, recipient_priv)
+    
+    bad_mode = json.loads(json.dumps(env))
+    bad_mode["header"]["enc"] = "other"
+    with pytest.raises(envelope.VerificationError, match="Unsupported encryption mode"):
+        envelope.verify_and_open_envelope(bad_mode, sender_pub, recipient_priv)
+    
+    bad_size = json.loads(json.dumps(env))
+    bad_size["header"]["chunk_size"] = 0
+    with pytest.raises(envelope.VerificationError, match="Invalid chunk_size"):
+        envelope.verify_and_open_envelope(bad_size, sender_pub, recipient_priv)
+
+
+@pytest.mark.parametrize("protocol_version", ["0.1", "0.2"])
+@pytest.mark.parametrize("size", [0, 1, 2999, 5000])
+def test_chunked_envelope_streamed_to_outbox(protocol_version, size):
+    """Test that the streamed outbox file holds the canonical envelope under its content hash."""
+    sender_identity, recipient_identity = _identities()
+    body = bytes(i % 251 for i in range(size))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        env, blocks = envelope.create_envelope_stream(
+            plaintext=io.BytesIO(body),
+            sender_signing_priv=sender_identity["signing_keypair"]["private"],
+            sender_signing_pub=sender_identity["signing_keypair"]["public"],
+            recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+            chunk_size=1000,
+            protocol_version=protocol_version,
+            spool_dir=runtime_dir,
+        )
+        assert "chunks" not in env
+        path = mailbox.write_outbox_stream(blocks, runtime_dir, binary=protocol_version == "0.2")
+        
+        data = path.read_bytes()
+        stored = codec.decode_envelope(data)
+        hashed = codec.HashedEnvelope(stored)
+        assert hashed.canonical_bytes == data
+        assert path.stem == hashed.content_hash
+        assert path.suffix == (".cbor" if protocol_version == "0.2" else ".json")
+        assert {key: value for key, value in stored.items() if key != "chunks"} == env
+        assert envelope.verify_and_open_envelope(
+            stored,
+            sender_identity["signing_keypair"]["public"],
+            recipient_identity["encryption_keypair"]["private"],
+        ) == body
+        
+        # Same bytes again: the existing file is kept, no temporary file is left behind
+        assert mailbox.write_outbox_stream([data], runtime_dir, binary=protocol_version == "0.2") == path
+        assert [p.name for p in path.parent.iterdir()] == [path.name]
+        assert list(runtime_dir.glob("tmp*")) == []
+
+
+@pytest.mark.parametrize("protocol_version", ["0.1", "0.2"])
+def test_chunked_envelope_stream_memory_is_bounded(protocol_version):
+    """Test that streaming a large body to the outbox does not hold the frames in memory."""
+    import tracemalloc
+    
+    sender_identity, recipient_identity = _identities()
+    body_size = 8 * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        body_path = runtime_dir / "body"
+        body_path.write_bytes(b"\x5a" * body_size)
+        
+        tracemalloc.start()
+        try:
+            with body_path.open('rb') as body:
+                _, blocks = envelope.create_envelope_stream(
+                    plaintext=body,
+                    sender_signing_priv=sender_identity["signing_keypair"]["private"],
+                    sender_signing_pub=sender_identity["signing_keypair"]["public"],
+                    recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+                    protocol_version=protocol_version,
+                    spool_dir=runtime_dir,
+                )
+                path = mailbox.write_outbox_stream(blocks, runtime_dir, binary=protocol_version == "0.2")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        assert peak < body_size // 4
+        assert path.stat().st_size > body_size
@@ -0,0 +1,77 @@
+"""CLI batch test: send-batch → open-all (twice: opened, then replays)."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+def _cli(runtime_dir: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["python", "-m", "tools.calyx_mail", "--runtime-dir", str(runtime_dir), *args],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent.parent,
+    )
+
+
+def test_cli_send_batch_and_open_all():
+    """Test batch sending by bundle path and fingerprint, then opening the outbox in one process."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        for identity in ("sender", "recipient"):
+            result = _cli(runtime_dir, "keygen", "--identity", identity)
+            assert result.returncode == 0, f"keygen failed: {result.stderr}"
+        
+        bundle_path = runtime_dir / "keys" / "recipient_public_bundle.json"
+        recipient_fp = json.loads(bundle_path.read_text())["encryption_fp"]
+        records = [{"to": str(bundle_path), "subject": f"s{i}", "body": f"message {i}"} for i in range(4)]
+        records.append({"to": recipient_fp, "body": "by fingerprint"})
+        records.append({"to": "nobody", "body": "lost"})
+        batch_path = runtime_dir / "batch.jsonl"
+        batch_path.write_text("\n".join(json.dumps(record) for record in records) + "\n{not json\n")
+        
+        result = _cli(runtime_dir, "send-batch", "--identity", "sender", "--in", str(batch_path))
+        assert result.returncode == 1
+        assert result.stdout.splitlines()[-1] == "sent: 5, failed: 2"
+        assert "line 6: failed" in result.stderr and "line 7: failed" in result.stderr
+        
+        outbox_dir = runtime_dir / "mailbox" / "outbox"
+        out_dir = runtime_dir / "plaintexts"
+        result = _cli(
+            runtime_dir, "open-all", "--identity", "recipient", "--dir", str(outbox_dir), "--out", str(out_dir),
+        )
+        assert result.returncode == 0, f"open-all failed: {result.stderr}"
+        assert result.stdout.splitlines()[-1] == "opened: 5, replays: 0, failed: 0"
+        assert sorted(path.read_text() for path in out_dir.iterdir()) == [
+            "by fingerprint", "message 0", "message 1", "message 2", "message 3",
+        ]
+        assert len(list((runtime_dir / "mailbox" / "inbox").glob("*.json"))) == 5
+        
+        result = _cli(runtime_dir, "open-all", "--identity", "recipient", "--dir", str(outbox_dir))
+        assert result.returncode == 0
+        assert result.stdout.splitlines()[-1] == "opened: 0, replays: 5, failed: 0"
+
+
+def test_cli_open_all_keeps_going_after_unexpected_errors():
+    """Test that an error outside the verification path fails one envelope, not the whole batch."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        for identity in ("sender", "recipient"):
+            result = _cli(runtime_dir, "keygen", "--identity", identity)
+            assert result.returncode == 0, f"keygen failed: {result.stderr}"
+        
+        bundle_path = runtime_dir / "keys" / "recipient_public_bundle.json"
+        batch_path = runtime_dir / "batch.jsonl"
+        batch_path.write_text("\n".join(json.dumps({"to": str(bundle_path), "body": f"m{i}"}) for i in range(3)))
+        result = _cli(runtime_dir, "send-batch", "--identity", "sender", "--in", str(batch_path))
+        assert result.returncode == 0, result.stderr
+        
+        # The inbox cannot be created: every delivery raises OSError
+        (runtime_dir / "mailbox" / "inbox").write_text("not a directory")
+        result = _cli(runtime_dir, "open-all", "--identity", "recipient", "--dir", str(runtime_dir / "mailbox" / "outbox"))
+        assert result.returncode == 1
+        assert "Traceback" not in result.stderr
+        assert result.stdout.splitlines()[-1] == "opened: 0, replays: 0, failed: 3"
@@ -136,3 +136,75 @@ def test_cli_e2e():
             cwd=Path(__file__).parent.parent,
         )
         assert result.returncode == 0, f"receipt failed: {result.stderr}"
+        
+        # Step 10: Stored envelope is compact canonical JSON; show pretty-prints it
+        assert b"\n" not in envelope_path.read_bytes()
+        result = subprocess.run(
+            [
+                "python", "-m", "tools.calyx_mail",
+                "--runtime-dir", str(runtime_dir),
+                "show",
+                "--hash", envelope_path.stem,
+                "--header"
+            ],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent.parent,
+        )
+        assert result.returncode == 0, f"show failed: {result.stderr}"
+        assert json.loads(result.stdout) == envelope["header"]
+        assert '\n  "msg_id"' in result.stdout
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_cli_send_chunked_body_file(binary):
+    """Test that `send --body-file --chunk-size` streams a chunked envelope that opens."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        
+        def cli(*argv):
+            return subprocess.run(
+                ["python", "-m", "tools.calyx_mail", "--runtime-dir", str(runtime_dir), *argv],
+                capture_output=True,
+                text=True,
+                cwd=Path(__file__).parent.parent,
+            )
+        
+        for identity in ("sender", "recipient"):
+            result = cli("keygen", "--identity", identity)
+            assert result.returncode == 0, f"keygen failed: {result.stderr}"
+        sender_bundle_path = runtime_dir / "keys" / "sender_public_bundle.json"
+        with sender_bundle_path.open('r') as f:
+            sender_fp = json.load(f)["signing_fp"]
+        allowlist_path = runtime_dir / "mailbox" / "allowlist.json"
+        allowlist_path.parent.mkdir(parents=True, exist_ok=True)
+        with allowlist_path.open('w') as f:
+            json.dump([sender_fp], f)
+        
+        body = "".join(f"line {i}\n" for i in range(500))
+        body_path = runtime_dir / "body.txt"
+        body_path.write_text(body)
+        
+        result = cli(
+            "send",
+            "--identity", "sender",
+            "--to", str(runtime_dir / "keys" / "recipient_public_bundle.json"),
+            "--body-file", str(body_path),
+            "--chunk-size", "1000",
+            *(["--binary"] if binary else []),
+        )
+        assert result.returncode == 0, f"send failed: {result.stderr}"
+        
+        outbox_dir = runtime_dir / "mailbox" / "outbox"
+        envelope_files = list(outbox_dir.iterdir())
+        assert [p.suffix for p in envelope_files] == [".cbor" if binary else ".json"]
+        assert f"Envelope written to: {envelope_files[0]}" in result.stdout
+        
+        result = cli(
+            "open",
+            "--in", str(envelope_files[0]),
+            "--sender-bundle", str(sender_bundle_path),
+            "--identity", "recipient",
+        )
+        assert result.returncode == 0, f"open failed: {result.stderr}"
+        assert body in result.stdout
@@ -0,0 +1,44 @@
+"""CLI start-up test: light subcommands must not import PyNaCl, crypto, replay or dataclasses."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded only by the subcommands that sign, encrypt, open or check replays
+# (dataclasses pulls in inspect, ast and dis)
+HEAVY_MODULES = {"nacl", "calyx.mail.crypto", "calyx.mail.envelope", "calyx.mail.replay", "dataclasses"}
+
+
+def _imported_modules(*argv: str) -> set[str]:
+    """Names of the modules imported by one CLI run (from -X importtime)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "tools.calyx_mail", "--runtime-dir", tmpdir, *argv],
+            capture_output=True,
+            text=True,
+            cwd=REPO_ROOT,
+            env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        )
+    assert result.returncode == 0, result.stderr
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+@pytest.mark.parametrize("argv", [["inbox"], ["receipt", "--msg-id", "startup", "--delivered"]])
+def test_light_subcommands_skip_heavy_imports(argv):
+    """Test that inbox listing and receipts start without loading PyNaCl, crypto or replay."""
+    modules = _imported_modules(*argv)
+    assert "calyx.mail.mailbox" in modules
+    assert not {name for name in modules if name.split(".")[0] == "nacl" or name in HEAVY_MODULES}
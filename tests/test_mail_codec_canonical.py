@@ -114,9 +114,10 @@ def test_version_detection():
     
     assert codec.detect_version(envelope_v0_1) == "0.1"
     assert codec.detect_version(envelope_v0) == "0.0"
+    assert codec.detect_version({"protocol_version": "0.2", "header": {}, "ciphertext": b"", "signature": b""}) == "0.2"
     
     with pytest.raises(codec.VersionError):
-        codec.detect_version({"protocol_version": "0.2", "header": {}, "ciphertext": "", "signature": ""})
+        codec.detect_version({"protocol_version": "0.3", "header": {}, "ciphertext": "", "signature": ""})
 
 
 def test_canonical_unicode_normalization():
@@ -169,3 +170,47 @@ def test_canonical_nested_structures():
     # Should be deterministic
     encoded2 = codec.canonical_encode(obj)
     assert encoded == encoded2
+
+
+def _reference_encode(obj):
+    """Reference canonical encoding (validate + json.dumps + whole-document NFC)."""
+    import json
+    import unicodedata
+    codec.validate_canonical_types(obj)
+    encoded = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+    return unicodedata.normalize('NFC', encoded).encode('utf-8')
+
+
+def test_canonical_single_pass_matches_reference():
+    """Test that the single-pass encoder is byte-identical to the reference encoding."""
+    fixtures = [
+        {"key": "value", "number": 123},
+        {"zebra": 1, "alpha": 2, "Beta": 3},
+        {"z": {"c": 1, "a": 2}, "a": {"b": 3}},
+        {"level1": {"level2": {"level3": [1, 2, {"nested": "value"}]}}},
+        {"text": "\u00e9", "other": "\u0065\u0301"},
+        {"flags": [True, False, None], "big": 2 ** 80, "neg": -456, "empty": {}, "none": []},
+        {"escapes": "quote\" backslash\\ tab\t newline\n nul\x00 bell\x07"},
+        # Escape characters followed by combining marks compose after escaping
+        {"combining": "\n\u0303 \t\u0308 \r\u0301 \x1b\u0307"},
+        {"e\u0301": "key normalization", "e": "plain"},
+        {"unicode": "\u2028\u2029 \U0001f600 \u1100\u1161\u11a8"},
+        {
+            "protocol_version": "0.1",
+            "header": {"msg_id": "uuid", "sender_fp": "abc", "recipient_fp": "def", "timestamp": "2026-01-01T00:00:00Z", "subject": "Caf\u00e9"},
+            "ciphertext": "QUJD" * 1000,
+            "signature": "c2ln",
+        },
+    ]
+    for obj in fixtures:
+        assert codec.canonical_encode(obj) == _reference_encode(obj)
+
+
+def test_canonical_single_pass_rejects_nested_types():
+    """Test that type rejection still happens for values nested inside containers."""
+    with pytest.raises(ValueError, match="Tuples disallowed"):
+        codec.canonical_encode({"a": [1, {"b": (1, 2)}]})
+    with pytest.raises(ValueError, match="Bytes disallowed"):
+        codec.canonical_encode({"a": [b"raw"]})
+    with pytest.raises(ValueError, match="Dict keys must be strings"):
+        codec.canonical_encode({"a": {1: "x"}})
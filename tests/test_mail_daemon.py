@@ -0,0 +1,214 @@
+"""Tests for the asynchronous outbox delivery daemon."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import codec, crypto, daemon, envelope, keydir, mailbox
+
+
+def _setup(runtime_dir: Path):
+    """Local recipient identity in runtime/keys and a sender in the key directory."""
+    sender = crypto.generate_identity()
+    recipient = crypto.generate_identity()
+    keys_dir = mailbox.get_keys_dir(runtime_dir)
+    (keys_dir / "default_encryption.key.pub").write_bytes(recipient["encryption_keypair"]["public"])
+    keydir.get_key_directory(runtime_dir).add(
+        "alice", sender["signing_keypair"]["public"], sender["encryption_keypair"]["public"],
+    )
+    return sender, recipient
+
+
+def _envelope(sender, recipient, body: bytes = b"hello"):
+    return envelope.create_envelope(
+        plaintext=body,
+        sender_signing_priv=sender["signing_keypair"]["private"],
+        sender_signing_pub=sender["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient["encryption_keypair"]["public"],
+    )
+
+
+def _receipts(runtime_dir: Path) -> dict[str, str]:
+    receipts = {}
+    for path in (runtime_dir / "mailbox" / "receipts").glob("*.jsonl"):
+        for line in path.read_text().splitlines():
+            receipt = json.loads(line)
+            receipts[receipt["msg_id"]] = receipt["status"]
+    return receipts
+
+
+def test_daemon_once_routes_rejects_and_skips():
+    """Test one pass over the outbox: delivered, rejected (unknown sender, replay) and skipped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, recipient = _setup(runtime_dir)
+        stranger = crypto.generate_identity()
+        
+        good = [_envelope(sender, recipient, f"message {i}".encode()) for i in range(5)]
+        unknown_sender = _envelope(stranger, recipient)
+        other_recipient = _envelope(sender, stranger)
+        for env in good + [unknown_sender, other_recipient]:
+            mailbox.write_outbox(env, runtime_dir)
+        
+        results = []
+        mail_daemon = daemon.MailDaemon(runtime_dir, workers=2, queue_size=2, on_result=results.append)
+        stats = asyncio.run(mail_daemon.run(once=True))
+        
+        assert stats == {"delivered": 5, "rejected": 1, "skipped": 1, "error": 0}
+        assert len(results) == 7
+        inbox_ids = {item["msg_id"] for item in mailbox.list_inbox(runtime_dir)}
+        assert inbox_ids == {env["header"]["msg_id"] for env in good}
+        
+        mailbox_dir = runtime_dir / "mailbox"
+        assert len(list((mailbox_dir / daemon.SENT_DIRNAME).iterdir())) == 5
+        assert len(list((mailbox_dir / daemon.REJECTED_DIRNAME).iterdir())) == 1
+        assert [path.stem for path in mailbox.iter_envelope_paths(mailbox_dir / "outbox")] == [
+            codec.compute_envelope_hash(other_recipient)
+        ]
+        
+        receipts = _receipts(runtime_dir)
+        assert all(receipts[env["header"]["msg_id"]] == "delivered" for env in good)
+        assert receipts[unknown_sender["header"]["msg_id"]] == "failed"
+        
+        # Sending the same envelope again is a replay; it is already in the inbox,
+        # so it is moved to sent/ without a second copy
+        mailbox.write_outbox(good[0], runtime_dir)
+        stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats["delivered"] == 1 and stats["rejected"] == 0
+        assert len(mailbox.list_inbox(runtime_dir)) == 5
+        
+        # A replay of an envelope that is not in the inbox is rejected
+        mailbox.find_envelope(mailbox_dir / "inbox", codec.compute_envelope_hash(good[1])).unlink()
+        mailbox.write_outbox(good[1], runtime_dir)
+        stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats["rejected"] == 1 and stats["delivered"] == 0
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_daemon_delivers_new_outbox_files(use_inotify):
+    """Test that files written while the daemon runs are delivered (inotify and polling)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, recipient = _setup(runtime_dir)
+        envs = [_envelope(sender, recipient, f"message {i}".encode()) for i in range(3)]
+        
+        async def scenario():
+            stop = asyncio.Event()
+            mail_daemon = daemon.MailDaemon(runtime_dir, poll_interval=0.05, use_inotify=use_inotify)
+            task = asyncio.create_task(mail_daemon.run(stop))
+            await asyncio.sleep(0.05)
+            for env in envs:
+                mailbox.write_outbox(env, runtime_dir)
+            for _ in range(200):
+                if mail_daemon.stats["delivered"] == len(envs):
+                    break
+                await asyncio.sleep(0.01)
+            stop.set()
+            return await asyncio.wait_for(task, timeout=5)
+        
+        stats = asyncio.run(scenario())
+        assert stats["delivered"] == 3
+        assert len(mailbox.list_inbox(runtime_dir)) == 3
+
+
+def test_daemon_finishes_interrupted_move_with_delivered_receipt(monkeypatch):
+    """Test that an envelope delivered but left in the outbox is moved to sent/ on restart, not rejected."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, recipient = _setup(runtime_dir)
+        env = _envelope(sender, recipient)
+        mailbox.write_outbox(env, runtime_dir)
+        
+        def failing_move(self, path, dirname):
+            raise OSError("disk full")
+        
+        with monkeypatch.context() as patch:
+            patch.setattr(daemon.MailDaemon, "_move", failing_move)
+            stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats["error"] == 1
+        assert len(mailbox.list_inbox(runtime_dir)) == 1
+        
+        stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats == {"delivered": 1, "rejected": 0, "skipped": 0, "error": 0}
+        assert _receipts(runtime_dir)[env["header"]["msg_id"]] == "delivered"
+        assert not (runtime_dir / "mailbox" / daemon.REJECTED_DIRNAME).exists()
+
+
+def test_daemon_retries_errors_and_survives_callback_failures(monkeypatch):
+    """Test that I/O errors are retried on later scans and a raising on_result does not stall the daemon."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, recipient = _setup(runtime_dir)
+        envs = [_envelope(sender, recipient, f"message {i}".encode()) for i in range(3)]
+        for env in envs:
+            mailbox.write_outbox(env, runtime_dir)
+        monkeypatch.setattr(daemon, "RETRY_DELAY", 0.01)
+        
+        real_deliver = daemon.deliver_to_inbox
+        failures = []
+        
+        def flaky_deliver(*args, **kwargs):
+            if len(failures) < 2:
+                failures.append(1)
+                raise OSError("EIO")
+            return real_deliver(*args, **kwargs)
+        
+        def broken_callback(result):
+            raise RuntimeError("callback bug")
+        
+        monkeypatch.setattr(daemon, "deliver_to_inbox", flaky_deliver)
+        
+        async def scenario():
+            stop = asyncio.Event()
+            mail_daemon = daemon.MailDaemon(
+                runtime_dir, workers=1, queue_size=1, poll_interval=0.02, use_inotify=False,
+                on_result=broken_callback,
+            )
+            task = asyncio.create_task(mail_daemon.run(stop))
+            for _ in range(300):
+                if mail_daemon.stats["delivered"] == len(envs):
+                    break
+                await asyncio.sleep(0.01)
+            stop.set()
+            return await asyncio.wait_for(task, timeout=5)
+        
+        stats = asyncio.run(scenario())
+        assert stats["delivered"] == 3
+        assert len(failures) == 2 and stats["error"] >= 2
+        assert len(mailbox.list_inbox(runtime_dir)) == 3
+
+
+@pytest.mark.parametrize("failure", ["store", "index"])
+def test_daemon_retries_failed_inbox_write_without_losing_the_message(monkeypatch, failure):
+    """Test that a failed inbox file or index write is retried and delivered, not rejected as a replay."""
+    import errno
+    import sqlite3
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, recipient = _setup(runtime_dir)
+        env = _envelope(sender, recipient)
+        mailbox.write_outbox(env, runtime_dir)
+        
+        with monkeypatch.context() as patch:
+            if failure == "store":
+                def failing_store(*args, **kwargs):
+                    raise OSError(errno.ENOSPC, "No space left on device")
+                patch.setattr(mailbox, "_store_envelope", failing_store)
+            else:
+                def failing_add(self, hashed, size):
+                    raise sqlite3.OperationalError("database is locked")
+                patch.setattr(mailbox.get_inbox_index(runtime_dir).__class__, "add", failing_add)
+            stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats == {"delivered": 0, "rejected": 0, "skipped": 0, "error": 1}
+        
+        stats = asyncio.run(daemon.MailDaemon(runtime_dir).run(once=True))
+        assert stats == {"delivered": 1, "rejected": 0, "skipped": 0, "error": 0}
+        assert [item["msg_id"] for item in mailbox.list_inbox(runtime_dir)] == [env["header"]["msg_id"]]
+        assert _receipts(runtime_dir)[env["header"]["msg_id"]] == "delivered"
+        assert not (runtime_dir / "mailbox" / daemon.REJECTED_DIRNAME).exists()
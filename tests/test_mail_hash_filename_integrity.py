@@ -7,7 +7,7 @@ from pathlib import Path
 
 import pytest
 
-from calyx.mail import codec, mailbox
+from calyx.mail import codec, mailbox, stream
 
 
 def test_hash_filename_match():
@@ -113,3 +113,110 @@ def test_content_hash_full_sha256():
     
     assert len(content_hash) == 64  # Full SHA256 hex (no truncation)
     assert all(c in "0123456789abcdef" for c in content_hash)
+
+
+def test_hashed_envelope_is_immutable_snapshot():
+    """Test that HashedEnvelope caches canonical bytes and hash at construction."""
+    envelope = {
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "abc123",
+            "recipient_fp": "def456",
+            "msg_id": "550e8400-e29b-41d4-a716-446655440000",
+            "timestamp": "2026-02-12T10:30:00Z"
+        },
+        "ciphertext": "base64-ciphertext",
+        "signature": "base64-signature"
+    }
+    
+    hashed = codec.HashedEnvelope(envelope)
+    assert hashed.content_hash == codec.compute_envelope_hash(envelope)
+    assert hashed.canonical_bytes == codec.encode_envelope_v0_1(envelope)
+    assert codec.HashedEnvelope.wrap(hashed) is hashed
+    assert codec.compute_envelope_hash(hashed) == hashed.content_hash
+    
+    with pytest.raises(AttributeError):
+        hashed.content_hash = "0" * 64
+    
+    # The header the replay key and index rows are taken from matches the hashed bytes
+    envelope["header"]["msg_id"] = "mutated"
+    assert hashed.header["msg_id"] == "550e8400-e29b-41d4-a716-446655440000"
+    assert codec.decode_envelope(hashed.canonical_bytes)["header"] == hashed.header
+
+
+def test_deliver_canonicalizes_once(monkeypatch):
+    """Test that delivery canonicalizes and hashes each envelope exactly once."""
+    from datetime import datetime, timezone
+    from calyx.mail import replay
+    
+    envelope = {
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "abc123",
+            "recipient_fp": "def456",
+            "msg_id": "550e8400-e29b-41d4-a716-446655440000",
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        },
+        "ciphertext": "base64-ciphertext",
+        "signature": "base64-signature"
+    }
+    
+    calls = []
+    original = codec.encode_envelope_v0_1
+    
+    def counting_encode(env):
+        calls.append(env)
+        return original(env)
+    
+    monkeypatch.setattr(codec, "encode_envelope_v0_1", counting_encode)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        replay_state = replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db")
+        
+        inbox_path = mailbox.deliver_to_inbox(
+            envelope,
+            runtime_dir,
+            replay_state=replay_state,
+            check_allowlist=False,
+        )
+        
+        assert len(calls) == 1
+        assert inbox_path.stem == codec.compute_envelope_hash(envelope)
+
+
+def test_stored_as_canonical_bytes_with_legacy_fallback(monkeypatch):
+    """Test that files hold canonical bytes (hash check without parsing) and pretty-printed files still verify."""
+    import json
+    
+    envelope = {
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "abc123",
+            "recipient_fp": "def456",
+            "msg_id": "550e8400-e29b-41d4-a716-446655440000",
+            "timestamp": "2026-02-12T10:30:00Z"
+        },
+        "ciphertext": "base64-ciphertext",
+        "signature": "base64-signature"
+    }
+    hashed = codec.HashedEnvelope.wrap(envelope)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        outbox_path = mailbox.write_outbox(envelope, runtime_dir)
+        assert outbox_path.read_bytes() == hashed.canonical_bytes
+        
+        parsed = []
+        monkeypatch.setattr(stream, "EnvelopeFile", lambda path: parsed.append(path))
+        assert mailbox._verify_content_hash(outbox_path, hashed.content_hash)
+        assert parsed == []
+        monkeypatch.undo()
+        
+        # Written by an earlier version: pretty-printed, same name
+        outbox_path.write_text(json.dumps(envelope, indent=2))
+        assert mailbox._verify_content_hash(outbox_path, hashed.content_hash)
+        assert mailbox.write_outbox(envelope, runtime_dir) == outbox_path
+        
+        outbox_path.write_text(json.dumps({**envelope, "signature": "forged"}, indent=2))
+        assert not mailbox._verify_content_hash(outbox_path, hashed.content_hash)
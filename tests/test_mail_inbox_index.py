@@ -0,0 +1,156 @@
+"""Tests for the inbox header index (paging, filters, rebuild)."""
+
+from __future__ import annotations
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import codec, crypto, envelope, mailbox
+
+
+def _identity_pair():
+    return crypto.generate_identity(), crypto.generate_identity()
+
+
+def _envelope(sender_identity, recipient_identity, timestamp: str, subject: str):
+    env = envelope.create_envelope(
+        plaintext=subject.encode(),
+        sender_signing_priv=sender_identity["signing_keypair"]["private"],
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        subject=subject,
+    )
+    env["header"]["timestamp"] = timestamp
+    return env
+
+
+def _deliver(env, runtime_dir: Path) -> Path:
+    return mailbox.deliver_to_inbox(
+        env, runtime_dir, check_allowlist=False, check_replay=False, check_timestamp=False,
+    )
+
+
+def _populate(runtime_dir: Path):
+    alice, recipient = _identity_pair()
+    bob = crypto.generate_identity()
+    envs = []
+    for day in range(1, 7):
+        sender = alice if day % 2 else bob
+        env = _envelope(sender, recipient, f"2026-02-0{day}T10:00:00Z", f"day {day}")
+        _deliver(env, runtime_dir)
+        envs.append(env)
+    return envs, alice, bob
+
+
+def test_index_paging_and_filters():
+    """Test newest-first keyset paging and sender/time/unread filters."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        envs, alice, _ = _populate(runtime_dir)
+        assert (runtime_dir / "mailbox" / "inbox_index.db").exists()
+        
+        full = mailbox.list_inbox(runtime_dir)
+        assert [item["header"]["subject"] for item in full] == [f"day {d}" for d in range(6, 0, -1)]
+        assert all(item["size"] > 0 and not item["read"] for item in full)
+        
+        pages = []
+        after = None
+        while True:
+            page = mailbox.list_inbox(runtime_dir, limit=4, after=after)
+            if not page:
+                break
+            pages.append(page)
+            after = page[-1]["content_hash"]
+        assert [len(page) for page in pages] == [4, 2]
+        assert [item for page in pages for item in page] == full
+        
+        alice_fp = crypto.compute_fingerprint(alice["signing_keypair"]["public"])
+        from_alice = mailbox.list_inbox(runtime_dir, sender_fp=alice_fp)
+        assert [item["header"]["subject"] for item in from_alice] == ["day 5", "day 3", "day 1"]
+        
+        window = mailbox.list_inbox(runtime_dir, since="2026-02-02T00:00:00Z", until="2026-02-04T00:00:00Z")
+        assert [item["header"]["subject"] for item in window] == ["day 3", "day 2"]
+        
+        assert mailbox.mark_read(runtime_dir, envs[5]["header"]["msg_id"])
+        assert mailbox.mark_read(runtime_dir, full[1]["content_hash"])
+        assert not mailbox.mark_read(runtime_dir, "unknown")
+        unread = mailbox.list_inbox(runtime_dir, unread_only=True)
+        assert [item["header"]["subject"] for item in unread] == ["day 4", "day 3", "day 2", "day 1"]
+
+
+def test_index_rebuilt_when_missing_and_verify_scan():
+    """Test automatic rebuild of a missing index and the explicit integrity scan."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        envs, _, _ = _populate(runtime_dir)
+        mailbox.mark_read(runtime_dir, envs[0]["header"]["msg_id"])
+        
+        # Index rows survive redelivery without losing read state
+        _deliver(envs[0], runtime_dir)
+        assert mailbox.list_inbox(runtime_dir)[-1]["read"]
+        
+        # Pre-index mailbox: envelope files but no index database
+        for suffix in ("", "-wal", "-shm"):
+            path = runtime_dir / "mailbox" / f"inbox_index.db{suffix}"
+            if path.exists():
+                path.unlink()
+        assert len(mailbox.list_inbox(runtime_dir)) == 6
+        
+        # Tampered file stays listed until an integrity scan drops it
+        hashed = codec.HashedEnvelope.wrap(envs[2])
+        path = mailbox.find_envelope(runtime_dir / "mailbox" / "inbox", hashed.content_hash)
+        path.write_text(path.read_text().replace("day 3", "day 9"))
+        assert len(mailbox.list_inbox(runtime_dir)) == 6
+        verified = mailbox.list_inbox(runtime_dir, verify=True)
+        assert hashed.content_hash not in {item["content_hash"] for item in verified}
+        assert len(verified) == 5
+        assert mailbox.rebuild_inbox_index(runtime_dir) == 5
+
+
+def test_unknown_paging_cursor_raises():
+    """Test that paging after a content hash that is no longer indexed fails instead of returning nothing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        _populate(runtime_dir)
+        first = mailbox.list_inbox(runtime_dir, limit=2)
+        
+        mailbox.get_inbox_index(runtime_dir).remove(first[-1]["content_hash"])
+        with pytest.raises(ValueError):
+            mailbox.list_inbox(runtime_dir, limit=2, after=first[-1]["content_hash"])
+        with pytest.raises(ValueError):
+            mailbox.list_inbox(runtime_dir, after="0" * 64)
+
+
+def test_index_keeps_one_connection_per_thread():
+    """Test that index calls reuse the calling thread's connection, and concurrent first use loses no rows."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        index = mailbox.get_inbox_index(runtime_dir)
+        conn = index._connection()
+        index.count()
+        index.query(limit=1)
+        assert index._connection() is conn
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(index._connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+        assert len(index._connections) == 2
+        index.close()
+        assert index.count() == 0  # reopened on next use
+        
+    # Deliveries racing the creation (and rebuild) of a missing index
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        alice, recipient = _identity_pair()
+        envs = [_envelope(alice, recipient, f"2026-02-01T10:00:0{i}Z", f"m{i}") for i in range(8)]
+        threads = [threading.Thread(target=_deliver, args=(env, runtime_dir)) for env in envs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(mailbox.list_inbox(runtime_dir)) == 8
@@ -0,0 +1,105 @@
+"""Tests for the NaCl key object cache in calyx.mail.crypto."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from calyx.mail import crypto
+
+
+@pytest.fixture(autouse=True)
+def _clear_key_cache():
+    crypto.invalidate_key_cache()
+    yield
+    crypto.invalidate_key_cache()
+
+
+def test_key_objects_reused_across_calls():
+    """Test that repeated operations with the same key hit the cache."""
+    identity = crypto.generate_identity()
+    signing_pub = identity["signing_keypair"]["public"]
+    
+    assert crypto.load_verify_key(signing_pub) is crypto.load_verify_key(signing_pub)
+    
+    before = crypto.key_cache_info()
+    for _ in range(5):
+        ciphertext = crypto.seal_to_recipient(b"hello", identity["encryption_keypair"]["public"])
+        assert crypto.open_from_sender(ciphertext, identity["encryption_keypair"]["private"]) == b"hello"
+        signature = crypto.sign(b"payload", identity["signing_keypair"]["private"])
+        assert crypto.verify(b"payload", signature, signing_pub)
+    after = crypto.key_cache_info()
+    
+    # One miss per new key kind (seal, open, sign); everything else hits
+    assert after["misses"] - before["misses"] == 3
+    assert after["hits"] - before["hits"] == 5 * 4 - 3
+
+
+def test_fingerprint_collision_compares_raw_bytes(monkeypatch):
+    """Test that a hit requires identical raw key bytes, not just a fingerprint."""
+    monkeypatch.setattr(crypto, "compute_fingerprint", lambda public_key: "collision")
+    first, second = crypto.generate_identity(), crypto.generate_identity()
+    
+    key_first = crypto.load_verify_key(first["signing_keypair"]["public"])
+    key_second = crypto.load_verify_key(second["signing_keypair"]["public"])
+    assert bytes(key_first) == first["signing_keypair"]["public"]
+    assert bytes(key_second) == second["signing_keypair"]["public"]
+    
+    signature = crypto.sign(b"payload", first["signing_keypair"]["private"])
+    assert crypto.verify(b"payload", signature, first["signing_keypair"]["public"])
+    assert not crypto.verify(b"payload", signature, second["signing_keypair"]["public"])
+
+
+def test_cache_is_bounded_lru(monkeypatch):
+    """Test that the least recently used entry is evicted at capacity."""
+    monkeypatch.setattr(crypto._key_cache, "maxsize", 3)
+    keys = [crypto.generate_identity()["signing_keypair"]["public"] for _ in range(4)]
+    
+    objects = [crypto.load_verify_key(k) for k in keys[:3]]
+    crypto.load_verify_key(keys[0])  # Refresh keys[0]; keys[1] is now oldest
+    crypto.load_verify_key(keys[3])
+    
+    assert crypto.key_cache_info()["size"] == 3
+    assert crypto.load_verify_key(keys[0]) is objects[0]
+    assert crypto.load_verify_key(keys[1]) is not objects[1]
+
+
+def test_invalidate_by_fingerprint_drops_public_and_private_entries():
+    """Test explicit invalidation when an identity's keys rotate."""
+    identity = crypto.generate_identity()
+    other = crypto.generate_identity()
+    
+    crypto.sign(b"x", identity["signing_keypair"]["private"])
+    crypto.load_verify_key(identity["signing_keypair"]["public"])
+    crypto.load_recipient_box(identity["encryption_keypair"]["private"])
+    crypto.seal_to_recipient(b"x", identity["encryption_keypair"]["public"])
+    crypto.load_verify_key(other["signing_keypair"]["public"])
+    assert crypto.key_cache_info()["size"] == 5
+    
+    assert crypto.invalidate_key_cache(identity["fingerprints"]["signing"]) == 2
+    assert crypto.invalidate_key_cache(identity["fingerprints"]["encryption"]) == 2
+    assert crypto.key_cache_info()["size"] == 1
+    assert crypto.invalidate_key_cache() == 1
+
+
+def test_cache_thread_safety():
+    """Test concurrent use from many threads."""
+    identities = [crypto.generate_identity() for _ in range(4)]
+    errors: list[Exception] = []
+    
+    def worker(identity):
+        try:
+            for _ in range(50):
+                signature = crypto.sign(b"payload", identity["signing_keypair"]["private"])
+                assert crypto.verify(b"payload", signature, identity["signing_keypair"]["public"])
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(identities[i % 4],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert crypto.key_cache_info()["size"] == 8
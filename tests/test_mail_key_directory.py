@@ -0,0 +1,177 @@
+"""Tests for the fingerprint-indexed public key directory."""
+
+from __future__ import annotations
+
+import base64
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import crypto, envelope, keydir, mailbox
+
+
+def _bundle(name: str, identity) -> dict:
+    return {
+        "identity": name,
+        "signing_fp": identity["fingerprints"]["signing"],
+        "signing_pub": base64.b64encode(identity["signing_keypair"]["public"]).decode('ascii'),
+        "encryption_fp": identity["fingerprints"]["encryption"],
+        "encryption_pub": base64.b64encode(identity["encryption_keypair"]["public"]).decode('ascii'),
+    }
+
+
+def test_lookup_by_signing_and_encryption_fingerprint():
+    """Test that entries are indexed by both fingerprints and persisted."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        alice = crypto.generate_identity()
+        directory = keydir.KeyDirectory(runtime_dir)
+        directory.add("alice", alice["signing_keypair"]["public"], alice["encryption_keypair"]["public"])
+        
+        entry = directory.lookup_signing(alice["fingerprints"]["signing"])
+        assert entry["identity"] == "alice"
+        assert entry["encryption_pub"] == alice["encryption_keypair"]["public"]
+        assert directory.lookup_encryption(alice["fingerprints"]["encryption"]) == entry
+        assert directory.lookup_signing("unknown") is None
+        
+        # Fresh instance loads the on-disk index
+        reloaded = keydir.KeyDirectory(runtime_dir)
+        assert reloaded.signing_key(alice["fingerprints"]["signing"]) == alice["signing_keypair"]["public"]
+        
+        data = json.loads((runtime_dir / "keys" / "directory.json").read_text(encoding='utf-8'))
+        assert list(data["identities"]) == [alice["fingerprints"]["signing"]]
+
+
+def test_lookup_miss_picks_up_external_changes():
+    """Test that a cached directory re-reads the index after another writer adds keys."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        reader = keydir.KeyDirectory(runtime_dir)
+        assert reader.entries() == []
+        
+        bob = crypto.generate_identity()
+        keydir.KeyDirectory(runtime_dir).import_bundle(_bundle("bob", bob))
+        assert reader.lookup_signing(bob["fingerprints"]["signing"])["identity"] == "bob"
+
+
+def test_lookup_hit_sees_key_removed_by_another_writer():
+    """Test that a key cached by one instance stops resolving once another writer removes it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        alice = crypto.generate_identity()
+        bob = crypto.generate_identity()
+        writer = keydir.KeyDirectory(runtime_dir)
+        writer.add("alice", alice["signing_keypair"]["public"], alice["encryption_keypair"]["public"])
+        writer.add("bob", bob["signing_keypair"]["public"], bob["encryption_keypair"]["public"])
+        
+        reader = keydir.KeyDirectory(runtime_dir)
+        assert reader.signing_key(alice["fingerprints"]["signing"]) == alice["signing_keypair"]["public"]
+        assert reader.lookup_encryption(alice["fingerprints"]["encryption"])["identity"] == "alice"
+        
+        writer.remove(alice["fingerprints"]["signing"])
+        assert reader.lookup_signing(alice["fingerprints"]["signing"]) is None
+        assert reader.lookup_encryption(alice["fingerprints"]["encryption"]) is None
+        assert reader.signing_key(alice["fingerprints"]["signing"]) is None
+        assert reader.lookup_signing(bob["fingerprints"]["signing"])["identity"] == "bob"
+
+
+def test_import_bundle_validation_and_rotation():
+    """Test bundle fingerprint checks and identity key rotation."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        directory = keydir.KeyDirectory(Path(tmpdir))
+        old, new = crypto.generate_identity(), crypto.generate_identity()
+        
+        forged = _bundle("carol", old)
+        forged["signing_fp"] = new["fingerprints"]["signing"]
+        with pytest.raises(keydir.KeyDirectoryError, match="does not match"):
+            directory.import_bundle(forged)
+        with pytest.raises(keydir.KeyDirectoryError):
+            directory.import_bundle({"identity": "carol", "signing_pub": "!!", "encryption_pub": ""})
+        
+        directory.import_bundle(_bundle("carol", old))
+        crypto.load_verify_key(old["signing_keypair"]["public"])
+        before = crypto.key_cache_info()["size"]
+        
+        # Same identity name with new keys replaces the old entry
+        directory.import_bundle(_bundle("carol", new))
+        assert directory.lookup_signing(old["fingerprints"]["signing"]) is None
+        assert [e["signing_fp"] for e in directory.entries()] == [new["fingerprints"]["signing"]]
+        assert crypto.key_cache_info()["size"] == before - 1
+        
+        assert directory.remove(new["fingerprints"]["encryption"])
+        assert directory.entries() == []
+
+
+def test_directory_as_batch_resolver_and_delivery_check():
+    """Test sender resolution for batch opening and signature-checked delivery."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        sender, stranger, recipient = (crypto.generate_identity() for _ in range(3))
+        directory = keydir.get_key_directory(runtime_dir)
+        assert keydir.get_key_directory(runtime_dir) is directory
+        directory.add("sender", sender["signing_keypair"]["public"], sender["encryption_keypair"]["public"])
+        
+        def make(identity):
+            return envelope.create_envelope(
+                plaintext=b"resolved",
+                sender_signing_priv=identity["signing_keypair"]["private"],
+                sender_signing_pub=identity["signing_keypair"]["public"],
+                recipient_encryption_pub=recipient["encryption_keypair"]["public"],
+            )
+        
+        known, unknown = make(sender), make(stranger)
+        results = envelope.verify_and_open_batch(
+            [known, unknown], directory.signing_key, recipient["encryption_keypair"]["private"],
+        )
+        assert results[0].plaintext == b"resolved"
+        assert "Unknown sender" in str(results[1].error)
+        
+        path = mailbox.deliver_to_inbox(
+            known, runtime_dir, check_allowlist=False, check_replay=False, key_directory=directory,
+        )
+        assert path.exists()
+        with pytest.raises(envelope.VerificationError, match="Unknown sender"):
+            mailbox.deliver_to_inbox(
+                unknown, runtime_dir, check_allowlist=False, check_replay=False, key_directory=directory,
+            )
+        
+        # Forged signature: known sender_fp, body re-signed by a stranger
+        forged = make(stranger)
+        forged["header"]["sender_fp"] = sender["fingerprints"]["signing"]
+        with pytest.raises(envelope.VerificationError, match="Signature verification failed"):
+            mailbox.deliver_to_inbox(
+                forged, runtime_dir, check_allowlist=False, check_replay=False, key_directory=directory,
+            )
+
+
+def test_cli_open_resolves_sender_from_directory():
+    """Test keygen registration and open without --sender-bundle."""
+    repo_root = Path(__file__).parent.parent
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        
+        def run(*argv):
+            return subprocess.run(
+                ["python", "-m", "tools.calyx_mail", "--runtime-dir", str(runtime_dir), *argv],
+                capture_output=True, text=True, cwd=repo_root,
+            )
+        
+        assert run("keygen", "--identity", "sender").returncode == 0
+        assert run("keygen", "--identity", "recipient").returncode == 0
+        result = run("keys")
+        assert "sender" in result.stdout and "recipient" in result.stdout
+        
+        result = run(
+            "send", "--identity", "sender",
+            "--to", str(runtime_dir / "keys" / "recipient_public_bundle.json"),
+            "--body", "directory lookup",
+        )
+        assert result.returncode == 0, result.stderr
+        envelope_path = next((runtime_dir / "mailbox" / "outbox").glob("*.json"))
+        
+        result = run("open", "--in", str(envelope_path), "--identity", "recipient")
+        assert result.returncode == 0, result.stderr
+        assert "directory lookup" in result.stdout
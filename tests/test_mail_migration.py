@@ -0,0 +1,182 @@
+"""Tests for the resumable v0 -> v0.1 mailbox migration engine."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import codec, mailbox, migration
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _legacy_envelope(i: int) -> dict:
+    return {
+        "header": {
+            "sender_fp": "abc123",
+            "recipient_fp": "def456",
+            "msg_id": f"550e8400-e29b-41d4-a716-{i:012d}",
+            "timestamp": "2026-02-12T10:30:00Z",
+        },
+        "ciphertext": f"base64-ciphertext-{i}",
+        "signature": "base64-signature",
+    }
+
+
+def _write_legacy(runtime_dir: Path, box: str, count: int) -> dict[str, str]:
+    """Write v0 <msg_id>.json files (pretty-printed); returns name -> content hash."""
+    box_dir = mailbox.get_mailbox_dir(runtime_dir) / box
+    box_dir.mkdir(exist_ok=True)
+    expected = {}
+    for i in range(count):
+        env = _legacy_envelope(i)
+        name = f"{env['header']['msg_id']}.json"
+        (box_dir / name).write_text(json.dumps(env, indent=2))
+        expected[name] = codec.compute_envelope_hash(env)
+    return expected
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_migrate_writes_canonical_content_addressed_files(workers):
+    """Test that legacy files are re-encoded under their content hash and backed up by hardlink."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        expected = _write_legacy(runtime_dir, "inbox", 5)
+        _write_legacy(runtime_dir, "outbox", 2)
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        
+        report = migration.migrate_mailbox(runtime_dir, workers=workers)
+        assert (report.migrated, report.duplicates, report.errors) == (7, 0, 0)
+        
+        assert not list(migration.iter_legacy_files(inbox_dir))
+        for name, content_hash in expected.items():
+            backup = runtime_dir / "mailbox" / "inbox_backup_v0" / name
+            assert backup.stat().st_nlink == 1  # source removed; the backup keeps the original inode
+            original = json.loads(backup.read_text())
+            assert original["header"]["msg_id"] == name[:-5]
+            assert (inbox_dir / f"{content_hash}.json").read_bytes() == codec.canonical_encode(original)
+        
+        # Nothing left to do
+        again = migration.migrate_mailbox(runtime_dir, workers=workers)
+        assert (again.migrated, again.duplicates, again.resumed) == (0, 0, 0)
+
+
+def test_migrate_resumes_from_journal():
+    """Test that journaled but unremoved sources are removed without re-encoding."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        expected = _write_legacy(runtime_dir, "inbox", 3)
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        backups = {name: (inbox_dir / name).read_bytes() for name in expected}
+        
+        migration.migrate_mailbox(runtime_dir, workers=1, backup=False)
+        
+        # Simulate a crash after the journal was written but before sources were removed
+        for name, data in backups.items():
+            (inbox_dir / name).write_bytes(data)
+        report = migration.migrate_mailbox(runtime_dir, workers=1, backup=False)
+        assert (report.migrated, report.duplicates, report.resumed) == (0, 0, 3)
+        assert sorted(p.name for p in inbox_dir.iterdir()) == sorted(f"{h}.json" for h in expected.values())
+        
+        # A target written but never journaled (crash before commit) is found as a duplicate
+        (runtime_dir / "mailbox" / migration.JOURNAL_FILENAME).unlink()
+        name = next(iter(backups))
+        (inbox_dir / name).write_bytes(backups[name])
+        report = migration.migrate_mailbox(runtime_dir, workers=1, backup=False)
+        assert (report.migrated, report.duplicates) == (0, 1)
+        assert not (inbox_dir / name).exists()
+
+
+def test_migrate_journals_errors_and_retries_on_request():
+    """Test that unreadable files stay in place and are skipped unless retried."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        _write_legacy(runtime_dir, "inbox", 2)
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        (inbox_dir / "broken.json").write_text("{not json")
+        
+        report = migration.migrate_mailbox(runtime_dir, workers=1)
+        assert (report.migrated, report.errors) == (2, 1)
+        assert (inbox_dir / "broken.json").exists()
+        
+        report = migration.migrate_mailbox(runtime_dir, workers=1)
+        assert (report.errors, report.skipped) == (0, 1)
+        
+        (inbox_dir / "broken.json").write_text(json.dumps(_legacy_envelope(99)))
+        report = migration.migrate_mailbox(runtime_dir, workers=1, retry_errors=True)
+        assert (report.migrated, report.errors) == (1, 0)
+        assert not (inbox_dir / "broken.json").exists()
+        
+        journal = migration.MigrationJournal(runtime_dir / "mailbox" / migration.JOURNAL_FILENAME)
+        assert journal.get("inbox", "broken.json").status == migration.STATUS_MIGRATED
+        
+        # A torn last line is ignored
+        with open(journal.path, 'ab') as f:
+            f.write(b'{"box": "inbox", "sou')
+        assert len(migration.MigrationJournal(journal.path)) == len(journal)
+
+
+def test_migrate_into_sharded_layout():
+    """Test that files are written straight into shard directories when the mailbox is sharded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        expected = _write_legacy(runtime_dir, "inbox", 3)
+        mailbox.set_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+        
+        report = migration.migrate_mailbox(runtime_dir, workers=1)
+        assert report.migrated == 3
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        for content_hash in expected.values():
+            assert mailbox.find_envelope(inbox_dir, content_hash) == (
+                inbox_dir / content_hash[0:2] / content_hash[2:4] / f"{content_hash}.json"
+            )
+
+
+def test_dry_run_estimate_changes_nothing():
+    """Test that the dry-run estimate counts legacy files without touching them."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        expected = _write_legacy(runtime_dir, "inbox", 4)
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        before = sorted(os.listdir(inbox_dir))
+        
+        estimate = migration.estimate_migration(runtime_dir, sample=2)
+        assert estimate.files == 4
+        assert estimate.sampled == 2
+        assert estimate.bytes == sum((inbox_dir / name).stat().st_size for name in expected)
+        assert estimate.estimated_seconds >= 0
+        assert sorted(os.listdir(inbox_dir)) == before
+        
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "tools" / "migrate_mailbox_v0_to_v0_1.py"),
+             "--runtime-dir", str(runtime_dir), "--dry-run"],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "Legacy files: 4" in result.stdout
+        assert sorted(os.listdir(inbox_dir)) == before
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_migrate_adds_inbox_files_to_existing_index(workers):
+    """Test that migrated inbox files are listed at once when the header index already exists."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        expected = _write_legacy(runtime_dir, "inbox", 3)
+        _write_legacy(runtime_dir, "outbox", 1)
+        assert mailbox.list_inbox(runtime_dir) == []  # creates inbox_index.db
+        
+        report = migration.migrate_mailbox(runtime_dir, workers=workers)
+        assert report.migrated == 4
+        
+        listed = mailbox.list_inbox(runtime_dir)
+        assert {item["content_hash"] for item in listed} == set(expected.values())
+        assert {item["msg_id"] for item in listed} == {name[:-5] for name in expected}
+        assert mailbox.rebuild_inbox_index(runtime_dir) == 3
@@ -0,0 +1,84 @@
+"""Tests for the buffered receipt writer and the receipt index."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from calyx.mail import mailbox, receipts
+
+
+def _lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_writer_batches_flushes_and_indexes():
+    """Test size-triggered and explicit flushes, and status lookup through the index."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        receipts_dir = Path(tmpdir) / "receipts"
+        with receipts.ReceiptWriter(receipts_dir, max_buffered=3, flush_interval=None) as writer:
+            path = writer.write("m1", "delivered")
+            writer.write("m2", "failed", "bad signature")
+            assert _lines(path) == []
+            writer.write("m1", "read")
+            assert [r["msg_id"] for r in _lines(path)] == ["m1", "m2", "m1"]
+            writer.write("m3", "delivered")
+            writer.flush()
+            assert len(_lines(path)) == 4
+        
+        assert receipts.lookup_receipt_status(receipts_dir, "m1")["status"] == "read"
+        failed = receipts.lookup_receipt_status(receipts_dir, "m2")
+        assert failed["status"] == "failed" and failed["error"] == "bad signature"
+        assert failed["file"] == path.name
+        assert receipts.lookup_receipt_status(receipts_dir, "unknown") is None
+
+
+def test_writer_timer_flush_and_midnight_rotation(monkeypatch):
+    """Test the time-based flush and switching files at UTC midnight."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        receipts_dir = Path(tmpdir) / "receipts"
+        writer = receipts.ReceiptWriter(receipts_dir, flush_interval=0.05)
+        path = writer.write("m1", "delivered")
+        for _ in range(100):
+            if _lines(path):
+                break
+            time.sleep(0.01)
+        assert [r["msg_id"] for r in _lines(path)] == ["m1"]
+        
+        before_midnight = 1_786_319_999  # 2026-08-09T23:59:59Z
+        monkeypatch.setattr(receipts.time, "time", lambda: before_midnight)
+        first = writer.write("m2", "delivered")
+        monkeypatch.setattr(receipts.time, "time", lambda: before_midnight + 1)
+        second = writer.write("m3", "delivered")
+        writer.close()
+        
+        assert first.name == "receipts_2026-08-09.jsonl"
+        assert second.name == "receipts_2026-08-10.jsonl"
+        assert _lines(first)[0]["timestamp"] == "2026-08-09T23:59:59Z"
+        assert _lines(second)[0]["timestamp"] == "2026-08-10T00:00:00Z"
+
+
+def test_mark_delivered_receipt_and_legacy_files():
+    """Test write-through receipts, index creation from pre-index files and reopen after delete."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        receipts_dir = runtime_dir / "mailbox" / "receipts"
+        receipts_dir.mkdir(parents=True)
+        (receipts_dir / "receipts_2026-02-12.jsonl").write_text(
+            json.dumps({"msg_id": "old", "status": "delivered", "timestamp": "2026-02-12T10:30:00Z"}) + "\n"
+        )
+        
+        path = mailbox.mark_delivered_receipt("new", "failed", runtime_dir, "boom")
+        last = _lines(path)[-1]
+        assert (last["msg_id"], last["status"], last["error"]) == ("new", "failed", "boom")
+        assert mailbox.lookup_receipt_status(runtime_dir, "old")["status"] == "delivered"
+        assert mailbox.lookup_receipt_status(runtime_dir, "new")["error"] == "boom"
+        
+        path.unlink()
+        mailbox.mark_delivered_receipt("again", "delivered", runtime_dir)
+        assert [r["msg_id"] for r in _lines(path)] == ["again"]
+        
+        assert receipts.rebuild_receipt_index(receipts_dir) == 2
+        assert mailbox.lookup_receipt_status(runtime_dir, "new") is None
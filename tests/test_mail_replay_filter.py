@@ -0,0 +1,75 @@
+"""Tests for the Bloom filter negative cache in front of the replay database."""
+
+from __future__ import annotations
+
+import hashlib
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import replay
+from calyx.mail.bloom import BloomFilter
+
+
+def _key(i: int) -> str:
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def _add(replay_state: replay.ReplayState, key: str) -> None:
+    replay_state.add_replay_key(key, f"msg-{key[:8]}", "abc123", "def456", "2026-02-12T10:30:00Z")
+
+
+def test_bloom_filter_no_false_negatives():
+    """Test that added keys are always found and the FP rate stays near target."""
+    bloom = BloomFilter(2000, fp_rate=0.01)
+    keys = [_key(i) for i in range(2000)] + ["not-hex-" + str(i) for i in range(100)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    
+    false_positives = sum(_key(-i) in bloom for i in range(1, 10001))
+    assert false_positives / 10000 < 0.03
+    assert 0.005 < bloom.estimated_fp_rate() < 0.03
+    assert bloom.memory_bytes == (bloom.num_bits + 7) // 8
+
+
+@pytest.mark.parametrize("wal_index", [True, False])
+def test_replay_filter_sync_prune_and_metrics(wal_index, monkeypatch):
+    """Test in-memory misses, cross-connection sync, growth and prune rebuild."""
+    if not wal_index:
+        # PRAGMA data_version fallback
+        monkeypatch.setattr(replay, "_map_wal_index", lambda db_path: None)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "replay_state.db"
+        with replay.ReplayState(db_path, filter_capacity=8) as replay_state:
+            for i in range(20):
+                _add(replay_state, _key(i))
+            assert all(replay_state.has_replay_key(_key(i)) for i in range(20))
+            
+            assert not any(replay_state.has_replay_key(_key(-i)) for i in range(1, 201))
+            info = replay_state.filter_info()
+            assert info["lookups"] == 220
+            assert info["memory_negatives"] + info["false_positives"] == 200
+            assert info["capacity"] >= 20
+            assert info["memory_bytes"] > 0
+            assert 0 <= info["observed_fp_rate"] < 0.2
+            
+            # Rows committed through another connection (another process) are seen
+            with replay.ReplayState(db_path) as other:
+                _add(other, _key(1000))
+                assert other.has_replay_key(_key(0))
+            assert replay_state.has_replay_key(_key(1000))
+            
+            # Prune rebuilds the filter from the remaining rows
+            assert replay_state.prune_old_entries(retention_hours=-1) == 21
+            assert replay_state.filter_info()["entries"] == 0
+            assert not replay_state.has_replay_key(_key(0))
+        
+        # Reopening rebuilds from the table
+        with replay.ReplayState(db_path) as reopened:
+            _add(reopened, _key(5))
+        with replay.ReplayState(db_path) as reopened:
+            assert reopened.filter_info()["entries"] == 1
+            assert reopened.has_replay_key(_key(5))
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import tempfile
+from datetime import datetime, timezone
 from pathlib import Path
 
 import pytest
@@ -116,3 +117,34 @@ def test_replay_key_full_length():
     
     assert len(replay_key) == 64  # Full SHA256 hex (no truncation)
     assert all(c in "0123456789abcdef" for c in replay_key)
+
+
+def test_replay_state_concurrent_admission():
+    """Test that per-thread connections admit a replay key exactly once."""
+    import threading
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "mailbox" / "replay_state.db"
+        # Current timestamp: pruning drops whole hours of envelope timestamps
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with replay.ReplayState(db_path) as replay_state:
+            results = []
+            
+            def admit():
+                try:
+                    replay_state.add_replay_key("b" * 64, "msg", "abc123", "def456", timestamp)
+                    results.append(True)
+                except replay.ReplayError:
+                    results.append(False)
+            
+            threads = [threading.Thread(target=admit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            assert sorted(results) == [False] * 7 + [True]
+            assert replay_state.get_replay_key_by_msg_id("msg") == "b" * 64
+            assert replay_state.prune_old_entries(retention_hours=24) == 0
+            assert replay_state.prune_old_entries(retention_hours=-1) == 1
+            assert not replay_state.has_replay_key("b" * 64)
@@ -0,0 +1,106 @@
+"""Tests for the hourly partitioned replay store."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import replay
+
+
+def _key(i: int) -> str:
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def _timestamp(hours_ago: float) -> str:
+    value = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def test_partition_name():
+    """Test partition selection from the envelope timestamp's UTC hour."""
+    assert replay.partition_name("2026-02-12T10:30:00Z") == "replay_2026021210"
+    assert replay.partition_name("2026-02-12T01:30:00+02:00") == "replay_2026021123"
+    assert replay.partition_name("2026-02-12T10:30:00") == "replay_2026021210"
+    assert replay.partition_name("yesterday") == replay.UNDATED_PARTITION
+    assert replay.partition_name("") == replay.UNDATED_PARTITION
+
+
+def test_partitioned_admission_lookup_and_prune():
+    """Test per-hour tables, BLOB keys, single-partition lookups and whole-table pruning."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "replay_state.db"
+        with replay.ReplayState(db_path) as replay_state:
+            old, recent = _timestamp(30), _timestamp(0)
+            replay_state.add_replay_key(_key(0), "msg-0", "abc123", "def456", old)
+            replay_state.add_replay_key(_key(1), "msg-1", "abc123", "def456", recent)
+            replay_state.add_replay_key(_key(2), "msg-2", "abc123", "def456", "not a timestamp")
+            with pytest.raises(replay.ReplayError):
+                replay_state.add_replay_key(_key(1), "msg-1", "abc123", "def456", recent)
+            with pytest.raises(ValueError):
+                replay_state.add_replay_key("xyz", "msg-x", "abc123", "def456", recent)
+            
+            assert replay_state.partitions() == sorted([
+                replay.partition_name(old), replay.partition_name(recent), replay.UNDATED_PARTITION,
+            ])
+            assert replay_state.has_replay_key(_key(1), recent)
+            assert replay_state.has_replay_key(_key(1))
+            assert not replay_state.has_replay_key(_key(1), old)
+            assert replay_state.get_replay_key_by_msg_id("msg-0") == _key(0)
+            
+            conn = sqlite3.connect(str(db_path))
+            try:
+                (stored,) = conn.execute(f"SELECT replay_key FROM {replay.partition_name(recent)}").fetchone()
+            finally:
+                conn.close()
+            assert stored == bytes.fromhex(_key(1))
+            
+            # The 30 hour old partition is dropped; the undated row is younger than the cutoff
+            assert replay_state.prune_old_entries(retention_hours=24) == 1
+            assert replay.partition_name(old) not in replay_state.partitions()
+            assert not replay_state.has_replay_key(_key(0))
+            assert replay_state.has_replay_key(_key(2))
+            assert replay_state.prune_old_entries(retention_hours=24) == 0
+
+
+def test_legacy_table_migrated_on_open():
+    """Test that rows of the single TEXT-keyed replay_state table move into partitions."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "replay_state.db"
+        conn = sqlite3.connect(str(db_path))
+        try:
+            conn.execute("""
+                CREATE TABLE replay_state (
+                    replay_key TEXT PRIMARY KEY,
+                    msg_id TEXT NOT NULL,
+                    sender_fp TEXT NOT NULL,
+                    recipient_fp TEXT NOT NULL,
+                    seen_at TIMESTAMP NOT NULL,
+                    envelope_timestamp TEXT NOT NULL,
+                    UNIQUE(replay_key)
+                )
+            """)
+            conn.executemany(
+                "INSERT INTO replay_state VALUES (?, ?, 'abc123', 'def456', '2026-02-12 10:30:05+00:00', ?)",
+                [
+                    (_key(0), "msg-0", "2026-02-12T10:30:00Z"),
+                    (_key(1), "msg-1", "2026-02-12T11:00:00Z"),
+                    ("short", "msg-2", "2026-02-12T11:00:00Z"),
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        
+        with replay.ReplayState(db_path) as replay_state:
+            assert replay_state.partitions() == ["replay_2026021210", "replay_2026021211"]
+            assert replay_state.has_replay_key(_key(0), "2026-02-12T10:30:00Z")
+            assert replay_state.get_replay_key_by_msg_id("msg-1") == _key(1)
+            assert replay_state.filter_info()["entries"] == 2
+            with pytest.raises(replay.ReplayError):
+                replay_state.add_replay_key(_key(1), "msg-1", "abc123", "def456", "2026-02-12T11:00:00Z")
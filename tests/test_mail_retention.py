@@ -0,0 +1,208 @@
+"""Tests for mailbox retention and archive packs."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import archive, mailbox, replay, retention
+from calyx.mail.codec import HashedEnvelope
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+NOW = datetime(2026, 3, 31, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _envelope(i: int, age_days: float, now: datetime = NOW) -> HashedEnvelope:
+    timestamp = (now - timedelta(days=age_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return HashedEnvelope.wrap({
+        "protocol_version": "0.1",
+        "header": {
+            "sender_fp": "a" * 16,
+            "recipient_fp": "b" * 16,
+            "msg_id": f"msg-{i}",
+            "timestamp": timestamp,
+        },
+        "ciphertext": f"ciphertext-{i}",
+        "signature": "",
+    })
+
+
+def _deliver(runtime_dir: Path, envelopes: list[HashedEnvelope]) -> None:
+    mailbox.deliver_many(envelopes, runtime_dir, check_allowlist=False, check_replay=False, check_timestamp=False)
+
+
+def test_archive_pack_roundtrip_and_rebuild():
+    """Test that packs keep envelopes retrievable by hash and msg_id, and the index can be rebuilt."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = archive.ArchiveStore(Path(tmpdir) / "archive", pack_max_bytes=400)
+        envelopes = [_envelope(i, 40) for i in range(6)]
+        
+        assert store.add_many("inbox", envelopes[:3]) == [h.content_hash for h in envelopes[:3]]
+        store.add_many("inbox", envelopes[2:])  # envelopes[2] is already archived
+        assert store.count() == 6
+        
+        # Small packs roll over
+        packs = sorted((Path(tmpdir) / "archive" / "inbox").glob("pack_*.pack"))
+        assert len(packs) > 1
+        
+        for hashed in envelopes:
+            assert store.get(hashed.content_hash) == hashed.canonical_bytes
+            assert store.load(hashed.content_hash)["header"] == hashed.header
+            assert store.find_msg_id(hashed.header["msg_id"]) == [hashed.content_hash]
+        assert store.get("0" * 64) is None
+        
+        (Path(tmpdir) / "archive" / archive.ARCHIVE_INDEX_FILENAME).unlink()
+        rebuilt = archive.ArchiveStore(Path(tmpdir) / "archive")
+        assert rebuilt.count() == 0
+        assert rebuilt.rebuild_index() == 6
+        assert rebuilt.get(envelopes[4].content_hash) == envelopes[4].canonical_bytes
+
+
+def test_archive_detects_corruption_and_skips_torn_tail():
+    """Test that a damaged record is reported and a torn tail starts a new pack."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = archive.ArchiveStore(Path(tmpdir))
+        first, second = _envelope(1, 40), _envelope(2, 40)
+        store.add_many("inbox", [first])
+        pack = Path(tmpdir) / "inbox" / "pack_000001.pack"
+        
+        # Crash mid-append: a partial record after the last indexed one
+        with open(pack, 'ab') as f:
+            f.write(bytes.fromhex(second.content_hash) + (10_000).to_bytes(8, 'big') + b"partial")
+        store.add_many("inbox", [second])
+        assert (Path(tmpdir) / "inbox" / "pack_000002.pack").exists()
+        assert store.get(second.content_hash) == second.canonical_bytes
+        assert store.rebuild_index() == 2
+        
+        data = bytearray(pack.read_bytes())
+        data[len(archive.PACK_MAGIC) + 40] ^= 0xFF
+        pack.write_bytes(bytes(data))
+        with pytest.raises(archive.ArchiveError):
+            store.get(first.content_hash)
+
+
+def test_archive_syncs_new_pack_directories_before_indexing(monkeypatch):
+    """Test that a new pack's directory entry (and a new box directory) is fsynced before the index commit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive_dir = Path(tmpdir) / "archive"
+        store = archive.ArchiveStore(archive_dir, pack_max_bytes=400)
+        synced = []
+        
+        def fsync_dirs(dirs):
+            synced.extend((Path(d), store.count()) for d in dirs)
+        
+        monkeypatch.setattr(archive, "_fsync_dirs", fsync_dirs)
+        store.add_many("inbox", [_envelope(1, 40)])
+        assert synced == [(archive_dir, 0), (archive_dir / "inbox", 0)]
+        
+        # Appending to the current pack needs no directory sync; rolling over does
+        synced.clear()
+        store.add_many("inbox", [_envelope(2, 40)])
+        store.add_many("inbox", [_envelope(3, 40)])
+        assert synced == [(archive_dir / "inbox", 2)]
+
+
+def test_retention_archives_expired_envelopes():
+    """Test that expired inbox/outbox envelopes move to packs and leave the listing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        old = [_envelope(i, 45) for i in range(3)]
+        recent = [_envelope(10 + i, 2) for i in range(2)]
+        _deliver(runtime_dir, old + recent)
+        mailbox.write_outbox(_envelope(20, 60), runtime_dir)
+        mailbox.write_outbox(_envelope(21, 1), runtime_dir)
+        
+        dry = retention.apply_retention(runtime_dir, dry_run=True, now=NOW)
+        assert dry.archived == {"inbox": 3, "outbox": 1}
+        assert len(mailbox.list_inbox(runtime_dir)) == 5
+        
+        report = retention.apply_retention(runtime_dir, now=NOW)
+        assert report.archived == {"inbox": 3, "outbox": 1}
+        assert report.errors == 0
+        
+        listed = {item["content_hash"] for item in mailbox.list_inbox(runtime_dir)}
+        assert listed == {hashed.content_hash for hashed in recent}
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        store = archive.get_archive(runtime_dir / "mailbox")
+        for hashed in old:
+            assert mailbox.find_envelope(inbox_dir, hashed.content_hash) is None
+            assert store.load(hashed.content_hash)["header"] == hashed.header
+        assert store.find_msg_id("msg-20")
+        
+        # Nothing left to do
+        again = retention.apply_retention(runtime_dir, now=NOW)
+        assert again.archived == {"inbox": 0, "outbox": 0}
+
+
+def test_retention_resumes_after_interrupted_index_update():
+    """Test that index rows of archived-and-removed envelopes are cleaned up on the next run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        hashed = _envelope(1, 45)
+        _deliver(runtime_dir, [hashed])
+        path = mailbox.find_envelope(runtime_dir / "mailbox" / "inbox", hashed.content_hash)
+        
+        # Archived and removed, but the index row survived
+        archive.get_archive(runtime_dir / "mailbox").add_many("inbox", [hashed])
+        path.unlink()
+        assert len(mailbox.list_inbox(runtime_dir)) == 1
+        
+        retention.apply_retention(runtime_dir, now=NOW)
+        assert mailbox.list_inbox(runtime_dir) == []
+
+
+def test_retention_prunes_receipts_and_replay_state():
+    """Test that old receipt files, their index rows, and old replay partitions are pruned."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        receipts_dir = mailbox.get_receipts_dir(runtime_dir)
+        old_day = (NOW - timedelta(days=40)).strftime("%Y-%m-%d")
+        new_day = (NOW - timedelta(days=1)).strftime("%Y-%m-%d")
+        for day, msg_id in ((old_day, "old-msg"), (new_day, "new-msg")):
+            receipt = {"msg_id": msg_id, "status": "delivered", "timestamp": f"{day}T00:00:00Z"}
+            (receipts_dir / f"receipts_{day}.jsonl").write_text(json.dumps(receipt) + "\n")
+        assert mailbox.lookup_receipt_status(runtime_dir, "old-msg") is not None
+        
+        replay_state = replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db")
+        # Replay partitions expire relative to the current time
+        replay.check_replay(_envelope(1, 2, now=datetime.now(timezone.utc)), replay_state)
+        replay_state.close()
+        
+        report = retention.apply_retention(runtime_dir, now=NOW)
+        assert report.receipt_files == 1
+        assert report.replay_entries == 1
+        assert not (receipts_dir / f"receipts_{old_day}.jsonl").exists()
+        assert mailbox.lookup_receipt_status(runtime_dir, "old-msg") is None
+        assert mailbox.lookup_receipt_status(runtime_dir, "new-msg")["status"] == "delivered"
+
+
+def test_retention_policy_rejects_non_positive_windows():
+    """Test that retention windows must be positive."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError):
+            retention.apply_retention(Path(tmpdir), retention.RetentionPolicy(envelope_days=0))
+
+
+def test_cli_show_falls_back_to_archive():
+    """Test that `show --hash` finds archived envelopes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        hashed = _envelope(1, 400)
+        _deliver(runtime_dir, [hashed])
+        
+        cli = [sys.executable, str(REPO_ROOT / "tools" / "calyx_mail.py"), "--runtime-dir", str(runtime_dir)]
+        result = subprocess.run(cli + ["retention"], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert "Archived 1 envelopes from inbox" in result.stdout
+        
+        result = subprocess.run(cli + ["show", "--hash", hashed.content_hash, "--header"], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout) == hashed.header
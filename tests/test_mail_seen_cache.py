@@ -0,0 +1,87 @@
+"""Tests for the append-only legacy msg_id seen cache."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import mailbox
+from calyx.mail.seen_cache import SeenCache
+
+
+def test_seen_cache_fifo_cap_and_compaction():
+    """Test FIFO eviction at capacity and compaction of the log at twice capacity."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = Path(tmpdir) / "seen_cache.log"
+        cache = SeenCache(log_path, capacity=4)
+        assert cache.add("m0")
+        assert not cache.add("m0")
+        assert cache.add_many(["m1", "m2", "m1", "m3", "m4"]) == [True, True, False, True, True]
+        assert list(cache) == ["m1", "m2", "m3", "m4"]
+        assert "m0" not in cache
+        
+        for i in range(5, 9):
+            cache.add(f"m{i}")
+        # 9 appended lines > 2 * capacity: rewritten to the newest 4
+        assert log_path.read_text().splitlines() == ['"m5"', '"m6"', '"m7"', '"m8"']
+        assert list(SeenCache(log_path, capacity=4)) == ["m5", "m6", "m7", "m8"]
+
+
+def test_seen_cache_compaction_is_fsynced_and_refuses_symlinks(monkeypatch):
+    """Test that compaction goes through the fsyncing atomic writer, which refuses a symlinked log."""
+    synced = []
+    real_fsync = mailbox.os.fsync
+    monkeypatch.setattr(mailbox.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = Path(tmpdir) / "seen_cache.log"
+        cache = SeenCache(log_path, capacity=2)
+        cache.add_many(["m0", "m1", "m2", "m3"])
+        assert not synced
+        cache.add("m4")
+        assert len(synced) == 1
+        assert log_path.read_text().splitlines() == ['"m3"', '"m4"']
+        assert not list(Path(tmpdir).glob(".*.tmp"))
+        
+        target = Path(tmpdir) / "target"
+        target.write_bytes(b"keep")
+        log_path.unlink()
+        log_path.symlink_to(target)
+        with pytest.raises(mailbox.SecurityError):
+            SeenCache(log_path, capacity=2).replace(["x"])
+        assert target.read_bytes() == b"keep"
+
+
+def test_seen_cache_shared_between_instances():
+    """Test that appends and compactions by another instance (process) are picked up."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = Path(tmpdir) / "seen_cache.log"
+        first, second = SeenCache(log_path, capacity=3), SeenCache(log_path, capacity=3)
+        first.add("a")
+        assert not second.add("a")
+        assert second.add("b")
+        assert "b" in first
+        
+        second.replace(["x", "y"])
+        assert list(first) == ["x", "y"]
+        assert first.add("a")
+
+
+def test_legacy_json_imported():
+    """Test that a v0 seen_cache.json is read transparently and honoured on delivery paths."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        legacy_ids = [f"msg-{i}" for i in range(12000)]
+        mailbox_dir = mailbox.get_mailbox_dir(runtime_dir)
+        (mailbox_dir / "seen_cache.json").write_text(json.dumps(legacy_ids, indent=2))
+        
+        assert mailbox.load_seen_cache(runtime_dir) == legacy_ids[-10000:]
+        assert (mailbox_dir / "seen_cache.log").exists()
+        assert not mailbox.add_to_seen_cache(runtime_dir, "msg-11999")
+        assert mailbox.add_to_seen_cache(runtime_dir, "msg-0")
+        
+        mailbox.save_seen_cache(runtime_dir, ["a", "b"])
+        assert mailbox.load_seen_cache(runtime_dir) == ["a", "b"]
@@ -0,0 +1,139 @@
+"""Tests for the sharded (hashed fan-out) mailbox layout."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import crypto, envelope, mailbox
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _make_envelope(body: bytes = b"hello", protocol_version: str = "0.1"):
+    sender_identity = crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    return envelope.create_envelope(
+        plaintext=body,
+        sender_signing_priv=sender_identity["signing_keypair"]["private"],
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        protocol_version=protocol_version,
+    )
+
+
+def test_layout_marker_defaults_to_flat():
+    """Test that mailboxes without a marker are flat and the marker round-trips."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        assert mailbox.get_mailbox_layout(runtime_dir) == mailbox.LAYOUT_FLAT
+        
+        mailbox.set_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+        assert mailbox.get_mailbox_layout(runtime_dir) == mailbox.LAYOUT_SHARDED
+        
+        with pytest.raises(ValueError):
+            mailbox.set_mailbox_layout(runtime_dir, "nested")
+        (runtime_dir / "mailbox" / mailbox.LAYOUT_FILENAME).write_text(json.dumps({"layout": "nested"}))
+        with pytest.raises(ValueError):
+            mailbox.get_mailbox_layout(runtime_dir)
+
+
+@pytest.mark.parametrize("protocol_version", ["0.1", "0.2"])
+def test_sharded_write_deliver_and_list(protocol_version):
+    """Test that sharded mailboxes write to ab/cd/<hash> and list/find them."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        mailbox.set_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+        env = _make_envelope(protocol_version=protocol_version)
+        
+        outbox_path = mailbox.write_outbox(env, runtime_dir)
+        inbox_path = mailbox.deliver_to_inbox(env, runtime_dir, check_allowlist=False, check_replay=False)
+        
+        content_hash = inbox_path.stem
+        for path, box in ((outbox_path, "outbox"), (inbox_path, "inbox")):
+            assert path.parent == runtime_dir / "mailbox" / box / content_hash[0:2] / content_hash[2:4]
+        
+        # Idempotent delivery returns the existing file
+        assert mailbox.deliver_to_inbox(env, runtime_dir, check_allowlist=False, check_replay=False) == inbox_path
+        
+        listed = mailbox.list_inbox(runtime_dir)
+        assert [item["content_hash"] for item in listed] == [content_hash]
+        
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        assert mailbox.find_envelope(inbox_dir, content_hash) == inbox_path
+        assert mailbox.find_envelope(inbox_dir, "0" * 64) is None
+        assert mailbox.load_envelope(inbox_path)["header"] == env["header"]
+
+
+def test_iter_envelope_paths_skips_foreign_entries():
+    """Test that shard traversal ignores misplaced files, symlinks and foreign names."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        mailbox.set_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+        path = mailbox.deliver_to_inbox(_make_envelope(), runtime_dir, check_allowlist=False, check_replay=False)
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        
+        # Misplaced file (wrong shard), temp file, foreign dir, symlinked shard
+        wrong_shard = inbox_dir / "00" / "00"
+        wrong_shard.mkdir(parents=True)
+        (wrong_shard / ("f" * 64 + ".json")).write_text("{}")
+        (path.parent / (path.stem + ".tmp")).write_text("{}")
+        (inbox_dir / "notes").mkdir()
+        (inbox_dir / "ff").symlink_to(path.parent.parent)
+        
+        assert list(mailbox.iter_envelope_paths(inbox_dir)) == [path]
+
+
+def test_migrate_flat_to_sharded_and_back():
+    """Test one-shot migration between layouts (idempotent, duplicates removed)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        envs = [_make_envelope(f"message {i}".encode()) for i in range(5)]
+        flat_paths = [
+            mailbox.deliver_to_inbox(env, runtime_dir, check_allowlist=False, check_replay=False)
+            for env in envs
+        ]
+        mailbox.write_outbox(envs[0], runtime_dir)
+        assert all(path.parent.name == "inbox" for path in flat_paths)
+        
+        assert mailbox.migrate_mailbox_layout(runtime_dir) == 6
+        assert mailbox.get_mailbox_layout(runtime_dir) == mailbox.LAYOUT_SHARDED
+        assert mailbox.migrate_mailbox_layout(runtime_dir) == 0
+        
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        assert not list(inbox_dir.glob("*.json"))
+        listed = {item["content_hash"] for item in mailbox.list_inbox(runtime_dir)}
+        assert listed == {path.stem for path in flat_paths}
+        
+        # A stale flat copy left by an interrupted run is treated as a duplicate
+        sharded = mailbox.find_envelope(inbox_dir, flat_paths[0].stem)
+        (inbox_dir / sharded.name).write_bytes(sharded.read_bytes())
+        assert mailbox.deliver_to_inbox(envs[0], runtime_dir, check_allowlist=False, check_replay=False) == sharded
+        assert mailbox.migrate_mailbox_layout(runtime_dir) == 0
+        assert not (inbox_dir / sharded.name).exists()
+        
+        assert mailbox.migrate_mailbox_layout(runtime_dir, mailbox.LAYOUT_FLAT) == 6
+        assert sorted(p.name for p in inbox_dir.iterdir()) == sorted(p.name for p in flat_paths)
+
+
+def test_migration_tool_sharded_flag():
+    """Test that the migration tool moves a flat mailbox with --sharded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        path = mailbox.deliver_to_inbox(_make_envelope(), runtime_dir, check_allowlist=False, check_replay=False)
+        
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "tools" / "migrate_mailbox_v0_to_v0_1.py"),
+             "--runtime-dir", str(runtime_dir), "--no-backup", "--sharded"],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        
+        inbox_dir = runtime_dir / "mailbox" / "inbox"
+        assert mailbox.find_envelope(inbox_dir, path.stem) == inbox_dir / path.name[0:2] / path.name[2:4] / path.name
@@ -0,0 +1,201 @@
+"""Tests for memory-mapped envelope reading and bounded-memory verification."""
+
+from __future__ import annotations
+
+import base64
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from calyx.mail import codec, crypto, envelope, mailbox
+from calyx.mail.stream import EnvelopeFile
+
+
+def _make_envelope(protocol_version: str = "0.1", size: int = 4096):
+    sender_identity = crypto.generate_identity()
+    recipient_identity = crypto.generate_identity()
+    plaintext = bytes(range(256)) * (size // 256)
+    env = envelope.create_envelope(
+        plaintext=plaintext,
+        sender_signing_priv=sender_identity["signing_keypair"]["private"],
+        sender_signing_pub=sender_identity["signing_keypair"]["public"],
+        recipient_encryption_pub=recipient_identity["encryption_keypair"]["public"],
+        subject="Streaming",
+        protocol_version=protocol_version,
+    )
+    return env, plaintext, sender_identity, recipient_identity
+
+
+def _write(path: Path, env: dict, layout: str) -> Path:
+    if layout == "pretty":
+        path.write_text(json.dumps(env, indent=2), encoding='utf-8')
+    elif layout == "canonical":
+        path.write_bytes(codec.canonical_encode(env))
+    else:
+        path.write_bytes(codec.encode_envelope(env))
+    return path
+
+
+@pytest.mark.parametrize("protocol_version,layout", [
+    ("0.1", "pretty"),
+    ("0.1", "canonical"),
+    ("0.2", "binary"),
+])
+def test_envelope_file_matches_full_decode(protocol_version, layout):
+    """Test that header, signed payload and hash match the in-memory path."""
+    env, _, _, _ = _make_envelope(protocol_version)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = _write(Path(tmpdir) / "env", env, layout)
+        
+        with EnvelopeFile(path) as envelope_file:
+            assert envelope_file.header == env["header"]
+            assert envelope_file.protocol_version == protocol_version
+            assert envelope_file.binary == (layout == "binary")
+            
+            # Signed message = signature || exact bytes covered by the signature
+            payload = codec.build_signed_payload(protocol_version, env["header"], env["ciphertext"])
+            signed_message = envelope_file.signed_message()
+            assert bytes(signed_message[64:]) == codec.encode_signed_payload(payload)
+            
+            # Streaming content hash equals the canonical hash
+            assert envelope_file.content_hash() == codec.compute_envelope_hash(env)
+
+
+@pytest.mark.parametrize("protocol_version,layout", [
+    ("0.1", "pretty"),
+    ("0.2", "binary"),
+])
+def test_verify_and_open_envelope_file(protocol_version, layout):
+    """Test file-based verification and decryption round-trip."""
+    env, plaintext, sender_identity, recipient_identity = _make_envelope(protocol_version, size=1 << 16)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = _write(Path(tmpdir) / "env", env, layout)
+        
+        opened = envelope.verify_and_open_envelope_file(
+            path,
+            sender_identity["signing_keypair"]["public"],
+            recipient_identity["encryption_keypair"]["private"],
+        )
+        assert opened == plaintext
+        
+        # Header checks run before any signature work
+        with pytest.raises(envelope.AllowlistError):
+            envelope.verify_and_open_envelope_file(
+                path,
+                sender_identity["signing_keypair"]["public"],
+                recipient_identity["encryption_keypair"]["private"],
+                allowlist_check=lambda fp: False,
+            )
+
+
+def test_verify_envelope_file_detects_tampering():
+    """Test that tampered ciphertext or wrong sender key fail verification."""
+    env, _, sender_identity, recipient_identity = _make_envelope("0.1")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Flip one ciphertext byte
+        tampered = dict(env)
+        raw = bytearray(base64.b64decode(env["ciphertext"]))
+        raw[40] ^= 0x01
+        tampered["ciphertext"] = base64.b64encode(bytes(raw)).decode('ascii')
+        path = _write(Path(tmpdir) / "env", tampered, "pretty")
+        
+        with pytest.raises(envelope.VerificationError, match="Signature verification failed"):
+            envelope.verify_and_open_envelope_file(
+                path,
+                sender_identity["signing_keypair"]["public"],
+                recipient_identity["encryption_keypair"]["private"],
+            )
+        
+        # Untampered file, wrong sender key
+        path = _write(Path(tmpdir) / "env", env, "pretty")
+        other_identity = crypto.generate_identity()
+        with pytest.raises(envelope.VerificationError):
+            envelope.verify_and_open_envelope_file(
+                path,
+                other_identity["signing_keypair"]["public"],
+                recipient_identity["encryption_keypair"]["private"],
+            )
+
+
+def test_envelope_file_fallback_layout():
+    """Test that escaped base64 falls back to a full decode with identical results."""
+    env, plaintext, sender_identity, recipient_identity = _make_envelope("0.1")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "env"
+        # Escape every "/" (valid JSON, but not a plain base64 span)
+        text = json.dumps(env).replace("/", "\\/")
+        path.write_text(text, encoding='utf-8')
+        
+        with EnvelopeFile(path) as envelope_file:
+            assert envelope_file.content_hash() == codec.compute_envelope_hash(env)
+        
+        opened = envelope.verify_and_open_envelope_file(
+            path,
+            sender_identity["signing_keypair"]["public"],
+            recipient_identity["encryption_keypair"]["private"],
+        )
+        assert opened == plaintext
+
+
+def test_list_inbox_uses_streaming_hash():
+    """Test that list_inbox accepts delivered files and skips corrupted ones."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runtime_dir = Path(tmpdir)
+        env_json, _, _, _ = _make_envelope("0.1")
+        env_binary, _, _, _ = _make_envelope("0.2")
+        path_json = mailbox.deliver_to_inbox(env_json, runtime_dir, check_allowlist=False, check_replay=False)
+        mailbox.deliver_to_inbox(env_binary, runtime_dir, check_allowlist=False, check_replay=False)
+        
+        listed = mailbox.list_inbox(runtime_dir)
+        assert {item["msg_id"] for item in listed} == {
+            env_json["header"]["msg_id"], env_binary["header"]["msg_id"],
+        }
+        
+        # Corrupt the JSON file: hash no longer matches filename (found by the integrity scan)
+        data = json.loads(path_json.read_text(encoding='utf-8'))
+        data["header"]["subject"] = "changed"
+        path_json.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        listed = mailbox.list_inbox(runtime_dir, verify=True)
+        assert [item["msg_id"] for item in listed] == [env_binary["header"]["msg_id"]]
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda text: text.replace('","header"', '" "header"', 1),  # missing comma
+    lambda text: text[:-1] + ',}',  # trailing comma
+    lambda text: text.replace(',"header"', ',,"header"', 1),  # doubled comma
+])
+def test_envelope_file_rejects_malformed_json_separators(mangle):
+    """Test that the scanner accepts exactly what json.loads accepts between members."""
+    env, _, sender_identity, recipient_identity = _make_envelope("0.1")
+    text = mangle(codec.canonical_encode(env).decode('utf-8'))
+    with pytest.raises(ValueError):
+        json.loads(text)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "env.json"
+        path.write_text(text, encoding='utf-8')
+        with pytest.raises(envelope.VerificationError):
+            envelope.verify_and_open_envelope_file(
+                path,
+                sender_identity["signing_keypair"]["public"],
+                recipient_identity["encryption_keypair"]["private"],
+            )
+
+
+def test_envelope_file_rejects_json_labelled_binary_version():
+    """Test that a legacy-v0-signed JSON envelope relabelled "0.2" fails in the file path as in memory."""
+    env, _, sender_identity, recipient_identity = _make_envelope("0.1")
+    legacy_payload = codec.canonical_encode({"header": env["header"], "ciphertext": env["ciphertext"]})
+    signature = crypto.sign(legacy_payload, sender_identity["signing_keypair"]["private"])
+    relabelled = {**env, "protocol_version": "0.2", "signature": base64.b64encode(signature).decode('ascii')}
+    sender_pub = sender_identity["signing_keypair"]["public"]
+    recipient_priv = recipient_identity["encryption_keypair"]["private"]
+    
+    with pytest.raises(envelope.VerificationError):
+        envelope.verify_and_open_envelope(relabelled, sender_pub, recipient_priv)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for layout in ("pretty", "canonical"):
+            path = _write(Path(tmpdir) / f"env_{layout}.json", relabelled, layout)
+            with pytest.raises(envelope.VerificationError):
+                envelope.verify_and_open_envelope_file(path, sender_pub, recipient_priv)
@@ -5,18 +5,38 @@ from __future__ import annotations
 
 import argparse
 import base64
+import io
 import json
+import os
 import sys
 from pathlib import Path
 
-# Add calyx to path
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Run as a script (python tools/calyx_mail.py): make the repo root importable
+if not __package__:
+    _repo_root = str(Path(__file__).resolve().parent.parent)
+    if _repo_root not in sys.path:
+        sys.path.insert(0, _repo_root)
 
-from calyx.mail import crypto, envelope, mailbox
+# crypto and envelope (PyNaCl), replay and keydir are imported by the
+# subcommands that use them, so inbox listing, show and receipts start
+# without loading them
+from calyx.mail import mailbox
+
+# Bare --chunk-size: use crypto.STREAM_CHUNK_SIZE (resolved by _chunk_size())
+_DEFAULT_CHUNK_SIZE = "default"
+
+
+def _chunk_size(args: argparse.Namespace) -> int | None:
+    if args.chunk_size == _DEFAULT_CHUNK_SIZE:
+        from calyx.mail import crypto
+        return crypto.STREAM_CHUNK_SIZE
+    return args.chunk_size
 
 
 def cmd_keygen(args: argparse.Namespace) -> int:
     """Generate a new identity (signing + encryption keypairs)."""
+    from calyx.mail import crypto, keydir
+    
     identity = crypto.generate_identity()
     
     keys_dir = mailbox.get_keys_dir(Path(args.runtime_dir))
@@ -55,6 +75,13 @@ def cmd_keygen(args: argparse.Namespace) -> int:
     with bundle_path.open('w', encoding='utf-8') as f:
         json.dump(bundle, f, indent=2)
     
+    # Register in key directory (fingerprint -> public keys)
+    keydir.get_key_directory(Path(args.runtime_dir)).add(
+        identity_name,
+        identity["signing_keypair"]["public"],
+        identity["encryption_keypair"]["public"],
+    )
+    
     print(f"Identity '{identity_name}' generated successfully")
     print(f"Signing fingerprint: {identity['fingerprints']['signing']}")
     print(f"Encryption fingerprint: {identity['fingerprints']['encryption']}")
@@ -65,6 +92,8 @@ def cmd_keygen(args: argparse.Namespace) -> int:
 
 def cmd_send(args: argparse.Namespace) -> int:
     """Send an envelope (create and write to outbox)."""
+    from calyx.mail import envelope
+    
     runtime_dir = Path(args.runtime_dir)
     keys_dir = mailbox.get_keys_dir(runtime_dir)
     
@@ -96,19 +125,42 @@ def cmd_send(args: argparse.Namespace) -> int:
     
     recipient_encryption_pub = base64.b64decode(recipient_encryption_pub_b64)
     
-    # Create envelope (v0.1)
-    plaintext = args.body.encode('utf-8')
-    env = envelope.create_envelope(
-        plaintext=plaintext,
-        sender_signing_priv=sender_signing_priv,
-        sender_signing_pub=sender_signing_pub,
-        recipient_encryption_pub=recipient_encryption_pub,
-        subject=args.subject,
-        protocol_version="0.1",  # v0.1 protocol
-    )
+    # Create envelope (v0.1); --body-file is read chunk by chunk in chunked mode
+    if args.body_file:
+        body_path = Path(args.body_file)
+        if not body_path.exists():
+            print(f"Error: Body file not found: {body_path}", file=sys.stderr)
+            return 1
+        body_source = body_path.open('rb')
+    else:
+        body_source = io.BytesIO(args.body.encode('utf-8'))
+    
+    chunk_size = _chunk_size(args)
+    with body_source:
+        if chunk_size:
+            # Chunked mode streams the frames straight into the outbox file
+            env, blocks = envelope.create_envelope_stream(
+                plaintext=body_source,
+                sender_signing_priv=sender_signing_priv,
+                sender_signing_pub=sender_signing_pub,
+                recipient_encryption_pub=recipient_encryption_pub,
+                chunk_size=chunk_size,
+                subject=args.subject,
+                protocol_version="0.2" if args.binary else "0.1",  # v0.2 = binary wire format
+                spool_dir=mailbox.get_mailbox_dir(runtime_dir),
+            )
+            outbox_path = mailbox.write_outbox_stream(blocks, runtime_dir, binary=args.binary)
+        else:
+            env = envelope.create_envelope(
+                plaintext=body_source.read(),
+                sender_signing_priv=sender_signing_priv,
+                sender_signing_pub=sender_signing_pub,
+                recipient_encryption_pub=recipient_encryption_pub,
+                subject=args.subject,
+                protocol_version="0.2" if args.binary else "0.1",  # v0.2 = binary wire format
+            )
+            outbox_path = mailbox.write_outbox(env, runtime_dir)
     
-    # Write to outbox
-    outbox_path = mailbox.write_outbox(env, runtime_dir)
     print(f"Envelope written to: {outbox_path}")
     print(f"Message ID: {env['header']['msg_id']}")
     
@@ -117,6 +169,8 @@ def cmd_send(args: argparse.Namespace) -> int:
 
 def cmd_open(args: argparse.Namespace) -> int:
     """Open an envelope (verify and decrypt)."""
+    from calyx.mail import crypto, envelope, keydir, replay
+    
     runtime_dir = Path(args.runtime_dir)
     keys_dir = mailbox.get_keys_dir(runtime_dir)
     
@@ -126,8 +180,8 @@ def cmd_open(args: argparse.Namespace) -> int:
         print(f"Error: Envelope file not found: {envelope_path}", file=sys.stderr)
         return 1
     
-    with envelope_path.open('r', encoding='utf-8') as f:
-        env = json.load(f)
+    # JSON (v0.1) or binary (v0.2) envelope
+    env = mailbox.load_envelope(envelope_path)
     
     header = env.get("header", {})
     sender_fp = header.get("sender_fp")
@@ -136,28 +190,28 @@ def cmd_open(args: argparse.Namespace) -> int:
         print("Error: Envelope missing sender_fp", file=sys.stderr)
         return 1
     
-    # Load sender public key (need to find it by fingerprint)
-    # For simplicity, assume we have the sender's public bundle
-    # In a real implementation, we'd have a key directory lookup
+    # Load sender public key: explicit bundle, or key directory lookup by fingerprint
     sender_bundle_path = args.sender_bundle
-    if not sender_bundle_path:
-        print("Error: --sender-bundle required to verify signature", file=sys.stderr)
-        return 1
-    
-    sender_bundle_path = Path(sender_bundle_path)
-    if not sender_bundle_path.exists():
-        print(f"Error: Sender bundle not found: {sender_bundle_path}", file=sys.stderr)
-        return 1
-    
-    with sender_bundle_path.open('r', encoding='utf-8') as f:
-        sender_bundle = json.load(f)
-    
-    sender_signing_pub_b64 = sender_bundle.get("signing_pub")
-    if not sender_signing_pub_b64:
-        print("Error: Sender bundle missing signing_pub", file=sys.stderr)
-        return 1
-    
-    sender_signing_pub = base64.b64decode(sender_signing_pub_b64)
+    if sender_bundle_path:
+        sender_bundle_path = Path(sender_bundle_path)
+        if not sender_bundle_path.exists():
+            print(f"Error: Sender bundle not found: {sender_bundle_path}", file=sys.stderr)
+            return 1
+        
+        with sender_bundle_path.open('r', encoding='utf-8') as f:
+            sender_bundle = json.load(f)
+        
+        sender_signing_pub_b64 = sender_bundle.get("signing_pub")
+        if not sender_signing_pub_b64:
+            print("Error: Sender bundle missing signing_pub", file=sys.stderr)
+            return 1
+        
+        sender_signing_pub = base64.b64decode(sender_signing_pub_b64)
+    else:
+        sender_signing_pub = keydir.get_key_directory(runtime_dir).signing_key(sender_fp)
+        if sender_signing_pub is None:
+            print(f"Error: Unknown sender {sender_fp}; import their bundle or pass --sender-bundle", file=sys.stderr)
+            return 1
     
     # Load recipient keys
     identity_name = args.identity or "default"
@@ -169,12 +223,11 @@ def cmd_open(args: argparse.Namespace) -> int:
     
     recipient_encryption_priv = encryption_key_path.read_bytes()
     
-    # Check allowlist
-    allowlist = mailbox.load_allowlist(runtime_dir)
+    # Check allowlist (shared with deliver_to_inbox, reloaded only if the file changes)
+    allowlist = mailbox.get_allowlist(runtime_dir)
     allowlist_check = lambda fp: fp in allowlist
     
     # Initialize replay state (v0.1)
-    from calyx.mail import replay
     replay_db_path = runtime_dir / "mailbox" / "replay_state.db"
     replay_state = replay.ReplayState(replay_db_path)
     
@@ -207,7 +260,7 @@ def cmd_open(args: argparse.Namespace) -> int:
         print(plaintext.decode('utf-8'))
         
         return 0
-        
+    
     except envelope.AllowlistError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -224,10 +277,253 @@ def cmd_open(args: argparse.Namespace) -> int:
         return 1
 
 
+def cmd_send_batch(args: argparse.Namespace) -> int:
+    """Send every record of a JSONL file (one process, sender keys loaded once)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from calyx.mail import envelope, keydir
+    
+    runtime_dir = Path(args.runtime_dir)
+    keys_dir = mailbox.get_keys_dir(runtime_dir)
+    
+    # Load sender keys (once for the batch)
+    identity_name = args.identity or "default"
+    signing_key_path = keys_dir / f"{identity_name}_signing.key"
+    signing_pub_path = keys_dir / f"{identity_name}_signing.key.pub"
+    
+    if not signing_key_path.exists() or not signing_pub_path.exists():
+        print(f"Error: Identity '{identity_name}' not found. Run 'keygen' first.", file=sys.stderr)
+        return 1
+    
+    sender_signing_priv = signing_key_path.read_bytes()
+    sender_signing_pub = signing_pub_path.read_bytes()
+    
+    batch_path = Path(args.in_file)
+    if not batch_path.exists():
+        print(f"Error: Batch file not found: {batch_path}", file=sys.stderr)
+        return 1
+    
+    # Recipient encryption keys, resolved once per distinct "to"
+    directory = keydir.get_key_directory(runtime_dir)
+    recipients: dict[str, bytes] = {}
+    
+    def recipient_key(to: str) -> bytes:
+        if to not in recipients:
+            entry = directory.lookup_encryption(to)
+            if entry is not None:
+                recipients[to] = entry["encryption_pub"]
+            else:
+                bundle_path = Path(to)
+                if not bundle_path.exists():
+                    raise ValueError(f"Recipient not in key directory and bundle not found: {to}")
+                with bundle_path.open('r', encoding='utf-8') as f:
+                    encryption_pub_b64 = json.load(f).get("encryption_pub")
+                if not encryption_pub_b64:
+                    raise ValueError(f"Recipient bundle missing encryption_pub: {to}")
+                recipients[to] = base64.b64decode(encryption_pub_b64)
+        return recipients[to]
+    
+    chunk_size = _chunk_size(args)
+    
+    def send_one(record: dict) -> tuple[str, Path]:
+        if not isinstance(record, dict) or not isinstance(record.get("to"), str):
+            raise ValueError('Record needs "to" (bundle path or encryption fingerprint)')
+        if isinstance(record.get("body_file"), str):
+            body_source = Path(record["body_file"]).open('rb')
+        elif isinstance(record.get("body"), str):
+            body_source = io.BytesIO(record["body"].encode('utf-8'))
+        else:
+            raise ValueError('Record needs "body" or "body_file"')
+        with body_source:
+            env = envelope.create_envelope(
+                plaintext=body_source if chunk_size else body_source.read(),
+                sender_signing_priv=sender_signing_priv,
+                sender_signing_pub=sender_signing_pub,
+                recipient_encryption_pub=recipient_key(record["to"]),
+                subject=record.get("subject"),
+                protocol_version="0.2" if args.binary else "0.1",
+                chunk_size=chunk_size,
+            )
+        return env["header"]["msg_id"], mailbox.write_outbox(env, runtime_dir)
+    
+    records = []
+    failed = 0
+    with batch_path.open('r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append((line_number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                print(f"line {line_number}: failed: {e}", file=sys.stderr)
+                failed += 1
+    
+    sent = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [(line_number, executor.submit(send_one, record)) for line_number, record in records]
+        for line_number, future in futures:
+            try:
+                msg_id, outbox_path = future.result()
+            except Exception as e:
+                print(f"line {line_number}: failed: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            print(f"sent {msg_id} {outbox_path}")
+            sent += 1
+    
+    print(f"sent: {sent}, failed: {failed}")
+    return 0 if failed == 0 else 1
+
+
+def cmd_open_all(args: argparse.Namespace) -> int:
+    """Open every envelope in a directory (one process, one replay database)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from calyx.mail import envelope, keydir, replay
+    from calyx.mail.receipts import ReceiptWriter
+    
+    runtime_dir = Path(args.runtime_dir)
+    keys_dir = mailbox.get_keys_dir(runtime_dir)
+    
+    envelope_dir = Path(args.dir)
+    if not envelope_dir.is_dir():
+        print(f"Error: Envelope directory not found: {envelope_dir}", file=sys.stderr)
+        return 1
+    
+    # Load recipient keys (once for the batch)
+    identity_name = args.identity or "default"
+    encryption_key_path = keys_dir / f"{identity_name}_encryption.key"
+    
+    if not encryption_key_path.exists():
+        print(f"Error: Identity '{identity_name}' not found. Run 'keygen' first.", file=sys.stderr)
+        return 1
+    
+    recipient_encryption_priv = encryption_key_path.read_bytes()
+    
+    out_dir = Path(args.out) if args.out else None
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    
+    directory = keydir.get_key_directory(runtime_dir)
+    allowlist = mailbox.get_allowlist(runtime_dir)
+    replay_state = replay.ReplayState(runtime_dir / "mailbox" / "replay_state.db")
+    receipts = ReceiptWriter(mailbox.get_receipts_dir(runtime_dir))
+    
+    def open_one(envelope_path: Path) -> tuple[str, str | None]:
+        """("opened" | "replay" | "failed", msg_id or error)."""
+        try:
+            env = mailbox.load_envelope(envelope_path)
+        except Exception as e:
+            return "failed", str(e)
+        header = env.get("header", {}) if isinstance(env, dict) else {}
+        msg_id = header.get("msg_id", "unknown")
+        
+        sender_signing_pub = directory.signing_key(header.get("sender_fp", ""))
+        if sender_signing_pub is None:
+            return "failed", f"Unknown sender {header.get('sender_fp')}; import their bundle"
+        
+        try:
+            plaintext = envelope.verify_and_open_envelope(
+                env,
+                sender_signing_pub,
+                recipient_encryption_priv,
+                allowlist_check=allowlist.__contains__ if allowlist else None,
+                timestamp_check=envelope.check_timestamp_window,
+            )
+            mailbox.deliver_to_inbox(
+                env,
+                runtime_dir,
+                replay_state=replay_state,
+                check_allowlist=bool(allowlist),
+                check_replay=True,
+            )
+        except (envelope.ReplayError, replay.ReplayError) as e:
+            return "replay", str(e)
+        except envelope.AllowlistError as e:
+            return "failed", str(e)
+        except Exception as e:
+            # Verification, decryption, hash mismatch, I/O, ...: one bad file never stops the batch
+            receipts.write(msg_id, "failed", str(e))
+            return "failed", str(e)
+        
+        receipts.write(msg_id, "delivered")
+        if out_dir is not None:
+            # Named by the (validated) content hash, never by header fields
+            try:
+                (out_dir / f"{envelope_path.stem}.txt").write_bytes(plaintext)
+            except OSError as e:
+                return "failed", f"{msg_id} delivered, but the plaintext was not written: {e}"
+        return "opened", msg_id
+    
+    counts = {"opened": 0, "replay": 0, "failed": 0}
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            paths = list(mailbox.iter_envelope_paths(envelope_dir))
+            for envelope_path, (status, detail) in zip(paths, executor.map(open_one, paths)):
+                counts[status] += 1
+                stream = sys.stdout if status == "opened" else sys.stderr
+                print(f"{status:>6} {envelope_path.name}: {detail}", file=stream)
+    finally:
+        receipts.close()
+        replay_state.close()
+    
+    print(f"opened: {counts['opened']}, replays: {counts['replay']}, failed: {counts['failed']}")
+    return 0 if counts["failed"] == 0 else 1
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    """Import a public bundle into the key directory."""
+    from calyx.mail import keydir
+    
+    bundle_path = Path(args.bundle)
+    if not bundle_path.exists():
+        print(f"Error: Bundle not found: {bundle_path}", file=sys.stderr)
+        return 1
+    
+    try:
+        entry = keydir.get_key_directory(Path(args.runtime_dir)).import_bundle(bundle_path)
+    except keydir.KeyDirectoryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Imported identity '{entry['identity']}'")
+    print(f"Signing fingerprint: {entry['signing_fp']}")
+    print(f"Encryption fingerprint: {entry['encryption_fp']}")
+    
+    return 0
+
+
+def cmd_keys(args: argparse.Namespace) -> int:
+    """List identities in the key directory."""
+    from calyx.mail import keydir
+    
+    entries = keydir.get_key_directory(Path(args.runtime_dir)).entries()
+    
+    if not entries:
+        print("Key directory is empty")
+        return 0
+    
+    for entry in entries:
+        print(f"{entry['identity']}  signing={entry['signing_fp']}  encryption={entry['encryption_fp']}")
+    
+    return 0
+
+
 def cmd_inbox(args: argparse.Namespace) -> int:
     """List envelopes in inbox."""
     runtime_dir = Path(args.runtime_dir)
-    envelopes = mailbox.list_inbox(runtime_dir)
+    try:
+        envelopes = mailbox.list_inbox(
+            runtime_dir,
+            limit=args.limit,
+            after=args.after,
+            sender_fp=args.sender,
+            since=args.since,
+            until=args.until,
+            unread_only=args.unread,
+            verify=args.verify,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
     
     if not envelopes:
         print("Inbox is empty")
@@ -239,9 +535,80 @@ def cmd_inbox(args: argparse.Namespace) -> int:
         sender_fp = header.get("sender_fp", "unknown")
         subject = header.get("subject", "(no subject)")
         timestamp = header.get("timestamp", "unknown")
+        flag = " " if env.get("read") else "*"
         
-        print(f"{msg_id[:8]}... | {sender_fp[:16]}... | {timestamp} | {subject}")
+        print(f"{flag} {msg_id[:8]}... | {sender_fp[:16]}... | {timestamp} | {subject}")
+    
+    # Cursor for the next page
+    if args.limit is not None and len(envelopes) == args.limit:
+        print(f"Next page: --after {envelopes[-1]['content_hash']}")
+    
+    return 0
+
+
+def cmd_show(args: argparse.Namespace) -> int:
+    """Pretty-print an envelope (files are stored as compact canonical bytes)."""
+    runtime_dir = Path(args.runtime_dir)
     
+    if args.hash:
+        mailbox_dir = mailbox.get_mailbox_dir(runtime_dir)
+        envelope_path = None
+        for box in mailbox.MAILBOX_BOXES:
+            envelope_path = mailbox.find_envelope(mailbox_dir / box, args.hash)
+            if envelope_path is not None:
+                break
+        if envelope_path is None:
+            from calyx.mail import archive
+            env = archive.get_archive(mailbox_dir).load(args.hash)
+            if env is None:
+                print(f"Error: No envelope with hash {args.hash} in inbox, outbox or archive", file=sys.stderr)
+                return 1
+        else:
+            env = mailbox.load_envelope(envelope_path)
+    else:
+        envelope_path = Path(args.in_file)
+        if not envelope_path.exists():
+            print(f"Error: Envelope file not found: {envelope_path}", file=sys.stderr)
+            return 1
+        env = mailbox.load_envelope(envelope_path)
+    
+    if args.header:
+        env = env.get("header", {})
+    
+    # v0.2 envelopes decode ciphertext and signature to bytes: show them as base64
+    print(json.dumps(
+        env,
+        indent=2,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=lambda value: base64.b64encode(bytes(value)).decode('ascii'),
+    ))
+    return 0
+
+
+def cmd_retention(args: argparse.Namespace) -> int:
+    """Archive expired envelopes into packs and prune receipts and replay state."""
+    from calyx.mail import retention
+    
+    policy = retention.RetentionPolicy(
+        envelope_days=args.days,
+        receipt_days=args.receipt_days,
+        replay_hours=args.replay_hours,
+    )
+    try:
+        report = retention.apply_retention(Path(args.runtime_dir), policy, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    verb = "Would archive" if report.dry_run else "Archived"
+    for box, count in report.archived.items():
+        print(f"{verb} {count} envelopes from {box}")
+    print(f"Receipt files pruned: {report.receipt_files}")
+    if not report.dry_run:
+        print(f"Replay entries pruned: {report.replay_entries}")
+    if report.errors:
+        print(f"Left in place (unreadable or hash mismatch): {report.errors}")
     return 0
 
 
@@ -250,6 +617,17 @@ def cmd_receipt(args: argparse.Namespace) -> int:
     runtime_dir = Path(args.runtime_dir)
     msg_id = args.msg_id
     
+    if args.status:
+        receipt = mailbox.lookup_receipt_status(runtime_dir, msg_id)
+        if receipt is None:
+            print(f"No receipt for {msg_id}")
+            return 1
+        line = f"{receipt['status']} at {receipt['timestamp']} ({receipt['file']})"
+        if receipt["error"]:
+            line += f": {receipt['error']}"
+        print(line)
+        return 0
+    
     status = "delivered"
     if args.delivered:
         status = "delivered"
@@ -263,6 +641,45 @@ def cmd_receipt(args: argparse.Namespace) -> int:
     receipt_path = mailbox.mark_delivered_receipt(msg_id, status, runtime_dir, error)
     print(f"Receipt written: {receipt_path}")
     
+    if status == "read":
+        mailbox.mark_read(runtime_dir, msg_id)
+    
+    return 0
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    """Deliver outbox envelopes to local inboxes as they arrive."""
+    import asyncio
+    import signal
+    from calyx.mail import daemon
+    
+    def report(result: daemon.DaemonResult) -> None:
+        line = f"{result.status:>9} {result.msg_id or '-'} {result.path.name}"
+        if result.error:
+            line += f" ({result.error})"
+        print(line, flush=True)
+    
+    mail_daemon = daemon.MailDaemon(
+        Path(args.runtime_dir),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.poll,
+        on_result=report,
+    )
+    
+    async def serve() -> dict[str, int]:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+        return await mail_daemon.run(stop, once=args.once)
+    
+    stats = asyncio.run(serve())
+    print(", ".join(f"{status}: {count}" for status, count in stats.items()))
     return 0
 
 
@@ -286,21 +703,90 @@ def main() -> int:
     send_parser = subparsers.add_parser("send", help="Send an envelope")
     send_parser.add_argument("--to", required=True, help="Path to recipient public bundle JSON")
     send_parser.add_argument("--subject", help="Subject line")
-    send_parser.add_argument("--body", required=True, help="Message body")
+    body_group = send_parser.add_mutually_exclusive_group(required=True)
+    body_group.add_argument("--body", help="Message body")
+    body_group.add_argument("--body-file", help="Read message body from file")
     send_parser.add_argument("--identity", help="Sender identity name (default: default)")
+    send_parser.add_argument("--binary", action="store_true", help="Use binary wire format (protocol v0.2)")
+    send_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        nargs="?",
+        const=_DEFAULT_CHUNK_SIZE,
+        help="Chunked encryption for large bodies (optional chunk size in bytes, default 64 KiB)",
+    )
     send_parser.set_defaults(func=cmd_send)
     
+    # send-batch
+    send_batch_parser = subparsers.add_parser("send-batch", help="Send every record of a JSONL file")
+    send_batch_parser.add_argument(
+        "--in",
+        dest="in_file",
+        required=True,
+        help='JSONL file of {"to": bundle path or encryption fingerprint, "subject": ..., "body": ... | "body_file": ...}',
+    )
+    send_batch_parser.add_argument("--identity", help="Sender identity name (default: default)")
+    send_batch_parser.add_argument("--workers", type=int, default=4, help="Concurrent envelopes (default: 4)")
+    send_batch_parser.add_argument("--binary", action="store_true", help="Use binary wire format (protocol v0.2)")
+    send_batch_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        nargs="?",
+        const=_DEFAULT_CHUNK_SIZE,
+        help="Chunked encryption for large bodies (optional chunk size in bytes, default 64 KiB)",
+    )
+    send_batch_parser.set_defaults(func=cmd_send_batch)
+    
     # open
     open_parser = subparsers.add_parser("open", help="Open and decrypt an envelope")
-    open_parser.add_argument("--in", dest="in_file", required=True, help="Path to envelope JSON file")
-    open_parser.add_argument("--sender-bundle", required=True, help="Path to sender public bundle JSON")
+    open_parser.add_argument("--in", dest="in_file", required=True, help="Path to envelope file (.json or .cbor)")
+    open_parser.add_argument(
+        "--sender-bundle",
+        help="Path to sender public bundle JSON (default: resolve sender_fp in key directory)",
+    )
     open_parser.add_argument("--identity", help="Recipient identity name (default: default)")
     open_parser.set_defaults(func=cmd_open)
     
+    # open-all
+    open_all_parser = subparsers.add_parser("open-all", help="Open every envelope in a directory")
+    open_all_parser.add_argument("--dir", required=True, help="Directory of envelope files (flat or sharded)")
+    open_all_parser.add_argument("--identity", help="Recipient identity name (default: default)")
+    open_all_parser.add_argument("--workers", type=int, default=4, help="Concurrent envelopes (default: 4)")
+    open_all_parser.add_argument("--out", help="Write each plaintext to OUT/<content hash>.txt")
+    open_all_parser.set_defaults(func=cmd_open_all)
+    
+    # import
+    import_parser = subparsers.add_parser("import", help="Import a public bundle into the key directory")
+    import_parser.add_argument("--bundle", required=True, help="Path to public bundle JSON")
+    import_parser.set_defaults(func=cmd_import)
+    
+    # keys
+    keys_parser = subparsers.add_parser("keys", help="List identities in the key directory")
+    keys_parser.set_defaults(func=cmd_keys)
+    
     # inbox
     inbox_parser = subparsers.add_parser("inbox", help="List envelopes in inbox")
+    inbox_parser.add_argument("--limit", type=int, help="Maximum number of envelopes to list")
+    inbox_parser.add_argument("--after", help="Content hash of the last envelope of the previous page")
+    inbox_parser.add_argument("--sender", help="Only envelopes from this sender fingerprint")
+    inbox_parser.add_argument("--since", help="Only envelopes with timestamp >= SINCE (ISO 8601)")
+    inbox_parser.add_argument("--until", help="Only envelopes with timestamp < UNTIL (ISO 8601)")
+    inbox_parser.add_argument("--unread", action="store_true", help="Only unread envelopes")
+    inbox_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Re-verify every envelope file and rebuild the header index first",
+    )
     inbox_parser.set_defaults(func=cmd_inbox)
     
+    # show
+    show_parser = subparsers.add_parser("show", help="Pretty-print an envelope")
+    show_group = show_parser.add_mutually_exclusive_group(required=True)
+    show_group.add_argument("--in", dest="in_file", help="Path to envelope file (.json or .cbor)")
+    show_group.add_argument("--hash", help="Content hash of an envelope in the inbox, outbox or archive")
+    show_parser.add_argument("--header", action="store_true", help="Only print the header")
+    show_parser.set_defaults(func=cmd_show)
+    
     # receipt
     receipt_parser = subparsers.add_parser("receipt", help="Mark receipt status")
     receipt_parser.add_argument("--msg-id", required=True, help="Message ID")
@@ -308,13 +794,38 @@ def main() -> int:
     receipt_group.add_argument("--delivered", action="store_true", help="Mark as delivered")
     receipt_group.add_argument("--read", action="store_true", help="Mark as read")
     receipt_group.add_argument("--failed", action="store_true", help="Mark as failed")
+    receipt_group.add_argument("--status", action="store_true", help="Show the latest receipt status")
     receipt_parser.add_argument("--error", help="Error message (required if --failed)")
     receipt_parser.set_defaults(func=cmd_receipt)
     
+    # retention
+    retention_parser = subparsers.add_parser(
+        "retention",
+        help="Archive old envelopes into pack files and prune receipts and replay state",
+    )
+    retention_parser.add_argument("--days", type=int, default=30, help="Archive envelopes older than DAYS (default: 30)")
+    retention_parser.add_argument("--receipt-days", type=int, default=30, help="Keep receipt files for DAYS (default: 30)")
+    retention_parser.add_argument("--replay-hours", type=int, default=24, help="Keep replay state for HOURS (default: 24)")
+    retention_parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived or pruned")
+    retention_parser.set_defaults(func=cmd_retention)
+    
+    # daemon
+    daemon_parser = subparsers.add_parser("daemon", help="Deliver outbox envelopes to local inboxes as they arrive")
+    daemon_parser.add_argument("--workers", type=int, default=4, help="Concurrent deliveries (default: 4)")
+    daemon_parser.add_argument("--queue-size", type=int, default=64, help="Envelopes queued ahead of the workers (default: 64)")
+    daemon_parser.add_argument("--poll", action="store_true", help="Poll the outbox instead of using inotify")
+    daemon_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between outbox scans when polling (default: 1.0)",
+    )
+    daemon_parser.add_argument("--once", action="store_true", help="Deliver the current outbox and exit")
+    daemon_parser.set_defaults(func=cmd_daemon)
+    
     args = parser.parse_args()
     return args.func(args)
 
 
 if __name__ == "__main__":
-    import os
     sys.exit(main())
@@ -11,135 +11,17 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from calyx.mail import codec, mailbox, replay
+from calyx.mail import mailbox, migration, replay
 
 
-def migrate_inbox(runtime_dir: Path, backup: bool = True) -> int:
-    """
-    Migrate inbox from v0 (msg_id.json) to v0.1 (content_hash.json).
-    
-    Args:
-        runtime_dir: Runtime root directory
-        backup: If True, backup original files
-        
-    Returns:
-        Number of files migrated
-    """
-    mailbox_dir = mailbox.get_mailbox_dir(runtime_dir)
-    inbox_dir = mailbox_dir / "inbox"
-    
-    if not inbox_dir.exists():
-        print("No inbox directory found")
-        return 0
-    
-    # Backup if requested
-    if backup:
-        backup_dir = mailbox_dir / "inbox_backup_v0"
-        if backup_dir.exists():
-            print(f"Backup directory already exists: {backup_dir}")
-        else:
-            shutil.copytree(inbox_dir, backup_dir)
-            print(f"Backed up inbox to: {backup_dir}")
-    
-    migrated_count = 0
-    
-    # Find all v0 files (msg_id.json format)
-    for old_path in inbox_dir.glob("*.json"):
-        # Skip if already v0.1 format (64-char hex filename)
-        if len(old_path.stem) == 64 and all(c in "0123456789abcdef" for c in old_path.stem):
-            continue  # Already migrated
-        
-        try:
-            # Read envelope
-            with old_path.open('r', encoding='utf-8') as f:
-                envelope = json.load(f)
-            
-            # Compute content hash (v0.1)
-            content_hash = codec.compute_envelope_hash(envelope)
-            
-            # New filename
-            new_path = inbox_dir / f"{content_hash}.json"
-            
-            # Skip if already exists (duplicate content)
-            if new_path.exists():
-                print(f"Skipping duplicate: {old_path.name} -> {new_path.name}")
-                old_path.unlink()  # Remove old file
-                continue
-            
-            # Rename (atomic)
-            old_path.rename(new_path)
-            migrated_count += 1
-            print(f"Migrated: {old_path.name} -> {new_path.name}")
-            
-        except Exception as e:
-            print(f"Error migrating {old_path}: {e}")
-            continue
-    
-    return migrated_count
-
-
-def migrate_outbox(runtime_dir: Path, backup: bool = True) -> int:
-    """
-    Migrate outbox from v0 (msg_id.json) to v0.1 (content_hash.json).
-    
-    Args:
-        runtime_dir: Runtime root directory
-        backup: If True, backup original files
-        
-    Returns:
-        Number of files migrated
-    """
-    mailbox_dir = mailbox.get_mailbox_dir(runtime_dir)
-    outbox_dir = mailbox_dir / "outbox"
-    
-    if not outbox_dir.exists():
-        print("No outbox directory found")
-        return 0
-    
-    # Backup if requested
-    if backup:
-        backup_dir = mailbox_dir / "outbox_backup_v0"
-        if backup_dir.exists():
-            print(f"Backup directory already exists: {backup_dir}")
-        else:
-            shutil.copytree(outbox_dir, backup_dir)
-            print(f"Backed up outbox to: {backup_dir}")
-    
-    migrated_count = 0
-    
-    # Find all v0 files (msg_id.json format)
-    for old_path in outbox_dir.glob("*.json"):
-        # Skip if already v0.1 format (64-char hex filename)
-        if len(old_path.stem) == 64 and all(c in "0123456789abcdef" for c in old_path.stem):
-            continue  # Already migrated
-        
-        try:
-            # Read envelope
-            with old_path.open('r', encoding='utf-8') as f:
-                envelope = json.load(f)
-            
-            # Compute content hash (v0.1)
-            content_hash = codec.compute_envelope_hash(envelope)
-            
-            # New filename
-            new_path = outbox_dir / f"{content_hash}.json"
-            
-            # Skip if already exists (duplicate content)
-            if new_path.exists():
-                print(f"Skipping duplicate: {old_path.name} -> {new_path.name}")
-                old_path.unlink()  # Remove old file
-                continue
-            
-            # Rename (atomic)
-            old_path.rename(new_path)
-            migrated_count += 1
-            print(f"Migrated: {old_path.name} -> {new_path.name}")
-            
-        except Exception as e:
-            print(f"Error migrating {old_path}: {e}")
-            continue
-    
-    return migrated_count
+def print_result(result: migration.MigrationResult) -> None:
+    """Print one migrated file (progress callback)."""
+    if result.status == migration.STATUS_MIGRATED:
+        print(f"Migrated: {result.box}/{result.source} -> {result.target}")
+    elif result.status == migration.STATUS_DUPLICATE:
+        print(f"Skipping duplicate: {result.box}/{result.source} -> {result.target}")
+    else:
+        print(f"Error migrating {result.box}/{result.source}: {result.error}")
 
 
 def migrate_replay_cache(runtime_dir: Path) -> int:
@@ -148,7 +30,7 @@ def migrate_replay_cache(runtime_dir: Path) -> int:
     
     Args:
         runtime_dir: Runtime root directory
-        
+    
     Returns:
         Number of entries migrated
     """
@@ -206,6 +88,27 @@ def main() -> int:
         action="store_true",
         help="Skip backup of original files",
     )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Move inbox/outbox to the sharded layout (inbox/ab/cd/<hash>.json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=migration.DEFAULT_WORKERS,
+        help=f"Worker processes for hashing and re-encoding (default: {migration.DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--retry-errors",
+        action="store_true",
+        help="Retry files that failed in an earlier (journaled) run",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Count legacy files and estimate migration time without changing anything",
+    )
     
     args = parser.parse_args()
     runtime_dir = Path(args.runtime_dir)
@@ -219,19 +122,38 @@ def main() -> int:
     print("=" * 60)
     print()
     
-    backup = not args.no_backup
+    if args.dry_run:
+        estimate = migration.estimate_migration(runtime_dir, workers=args.workers)
+        print(f"Legacy files: {estimate.files} ({estimate.bytes} bytes)")
+        print(f"Sampled: {estimate.sampled} files, {estimate.files_per_second:.0f} files/s with {args.workers} workers")
+        print(f"Estimated time: {estimate.estimated_seconds:.1f} s (excluding disk writes)")
+        return 0
     
-    # Migrate inbox
-    print("Migrating inbox...")
-    inbox_count = migrate_inbox(runtime_dir, backup=backup)
-    print(f"Inbox: {inbox_count} files migrated")
+    # Write migrated files straight into the target layout
+    if args.sharded:
+        mailbox.set_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+    
+    # Migrate inbox and outbox (resumes from runtime/mailbox/migration_journal.log)
+    print("Migrating inbox and outbox...")
+    report = migration.migrate_mailbox(
+        runtime_dir,
+        backup=not args.no_backup,
+        workers=args.workers,
+        retry_errors=args.retry_errors,
+        progress=print_result,
+    )
+    print(f"Mailbox: {report.migrated} files migrated, {report.duplicates} duplicates, {report.errors} errors")
+    if report.resumed or report.skipped:
+        print(f"Resumed: {report.resumed} files finished by an earlier run, {report.skipped} earlier errors skipped")
+    print(f"Took {report.seconds:.1f} s")
     print()
     
-    # Migrate outbox
-    print("Migrating outbox...")
-    outbox_count = migrate_outbox(runtime_dir, backup=backup)
-    print(f"Outbox: {outbox_count} files migrated")
-    print()
+    # Fan out existing v0.1 files into shard directories
+    if args.sharded:
+        print("Migrating to sharded layout...")
+        sharded_count = mailbox.migrate_mailbox_layout(runtime_dir, mailbox.LAYOUT_SHARDED)
+        print(f"Layout: {sharded_count} files moved into shard directories")
+        print()
     
     # Migrate replay cache
     print("Migrating replay cache...")